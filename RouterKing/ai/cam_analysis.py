@@ -1,8 +1,5 @@
 """CAM risk analysis helpers for RouterKing."""
 
-import math
-import re
-
 try:
     from .config import load_config
     from .results import AnalysisIssue, CamAnalysisResult
@@ -11,12 +8,9 @@ except ImportError:  # pragma: no cover - fallback for FreeCAD import path
     from ai.results import AnalysisIssue, CamAnalysisResult
 
 try:
-    from ..gcode.parser import iter_gcode_lines
+    from ..gcode.toolpath import RAPID, interpret_gcode
 except ImportError:  # pragma: no cover - fallback for FreeCAD import path
-    from gcode.parser import iter_gcode_lines
-
-
-_WORD_RE = re.compile(r"([A-Za-z])([-+]?\d*\.?\d+)")
+    from gcode.toolpath import RAPID, interpret_gcode
 
 
 def analyze_gcode(text, config=None):
@@ -32,25 +26,26 @@ def analyze_gcode(text, config=None):
         )
         result.summary = "No G-code loaded."
         return result
+    return analyze_toolpath(interpret_gcode(text), config)
 
+
+def analyze_toolpath(toolpath, config=None):
+    """Check an interpreted ``Toolpath`` (e.g. the preview parser's) for CAM risks."""
     if config is None:
         config = load_config()
-    settings = config.get("cam", {})
-    parser = _CamParser(settings)
-    for line in iter_gcode_lines(text):
-        parser.handle_line(line)
-    return parser.result()
-
-
-class _CamParser:
+    checker = _CamChecker(config.get("cam", {}))
+    checker.stats["lines"] = toolpath.blocks
+    first = toolpath.move(0) if len(toolpath) else None
+    if toolpath.first_block and (first is None or toolpath.first_block < first.line):
+        # A block before the first move leaves the tool where it starts.
+        checker.stats["min_z"] = first.start[2] if first is not None else 0.0
+    for move in toolpath:
+        checker.handle_move(move)
+    return checker.result()
+
+
+class _CamChecker:
     def __init__(self, settings):
-        self.units = 1.0
-        self.absolute = True
-        self.motion = None
-        self.x = 0.0
-        self.y = 0.0
-        self.z = 0.0
-        self.feed = None
         self.safe_z = float(settings.get("safe_z_height", 3.0))
         self.min_arc_radius = float(settings.get("min_arc_radius", 0.5))
         self.tool_radius = float(settings.get("tool_radius", 1.0))
@@ -66,47 +61,11 @@ class _CamParser:
         self.issues = []
         self._issue_counts = {}
 
-    def handle_line(self, line):
-        words = _parse_words(line)
-        if not words:
-            return
-        self.stats["lines"] += 1
-
-        coords = {}
-        for letter, value in words:
-            if letter == "G":
-                code = int(round(value))
-                if code in (0, 1, 2, 3):
-                    self.motion = code
-                elif code == 90:
-                    self.absolute = True
-                elif code == 91:
-                    self.absolute = False
-                elif code == 20:
-                    self.units = 25.4
-                elif code == 21:
-                    self.units = 1.0
-            elif letter == "F":
-                self.feed = value
-            elif letter in ("X", "Y", "Z", "I", "J", "R"):
-                coords[letter] = value
-
-        x0, y0, z0 = self.x, self.y, self.z
-        x1, y1, z1 = x0, y0, z0
-
-        if "X" in coords:
-            value = coords["X"] * self.units
-            x1 = value if self.absolute else x1 + value
-        if "Y" in coords:
-            value = coords["Y"] * self.units
-            y1 = value if self.absolute else y1 + value
-        if "Z" in coords:
-            value = coords["Z"] * self.units
-            z1 = value if self.absolute else z1 + value
-
+    def handle_move(self, move):
+        (x0, y0, z0), (x1, y1, z1) = move.start, move.end
         self._update_min_z(z1)
 
-        if self.motion == 0:
+        if move.kind == RAPID:
             if (x0, y0) != (x1, y1):
                 self.stats["rapid_moves"] += 1
                 if max(z0, z1) <= self.safe_z:
@@ -116,10 +75,10 @@ class _CamParser:
                         f"Rapid move at low Z ({max(z0, z1):.2f}).",
                         "Raise Z before rapid XY moves.",
                     )
-        elif self.motion in (2, 3):
+        elif move.is_arc:
             if (x0, y0) != (x1, y1):
                 self.stats["arcs"] += 1
-                radius = _arc_radius(coords, self.units)
+                radius = move.radius
                 if radius is not None:
                     self._update_min_radius(radius)
                     if radius < self.min_arc_radius:
@@ -145,8 +104,6 @@ class _CamParser:
                 "Reduce Z step depth or add ramping.",
             )
 
-        self.x, self.y, self.z = x1, y1, z1
-
     def result(self):
         result = CamAnalysisResult()
         result.issues = list(self.issues)
@@ -191,18 +148,3 @@ class _CamParser:
             )
         )
 
-
-def _parse_words(line):
-    return [(letter.upper(), float(number)) for letter, number in _WORD_RE.findall(line)]
-
-
-def _arc_radius(coords, units):
-    if "I" in coords or "J" in coords:
-        i_val = coords.get("I", 0.0) * units
-        j_val = coords.get("J", 0.0) * units
-        radius = math.hypot(i_val, j_val)
-        return radius if radius > 0 else None
-    if "R" in coords:
-        radius = abs(coords["R"]) * units
-        return radius if radius > 0 else None
-    return None
@@ -2,6 +2,11 @@
 
 from dataclasses import dataclass
 
+try:
+    from ..gcode.arcfit import fit_arcs
+except ImportError:  # pragma: no cover - fallback for FreeCAD import path
+    from gcode.arcfit import fit_arcs
+
 
 @dataclass
 class SimpleJobSettings:
@@ -18,6 +23,8 @@ class SimpleJobSettings:
     spindle_speed: int = 0
     laser_power: int = 0
     start_spindle: bool = True
+    # Fit G2/G3 arcs to runs of G1 chords within this distance (mm); 0 = off.
+    arc_tolerance: float = 0.0
 
 
 def generate_gcode_from_paths(paths, settings=None):
@@ -87,6 +94,8 @@ def generate_gcode_from_paths(paths, settings=None):
 
     lines.append("M5")
     lines.append("M2")
+    if settings.arc_tolerance and settings.arc_tolerance > 0:
+        lines = fit_arcs(lines, settings.arc_tolerance).lines
     return "\n".join(lines)
 
 
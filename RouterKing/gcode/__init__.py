@@ -1,5 +1,5 @@
 """G-code helpers for RouterKing."""
 
-from .parser import iter_gcode_lines, parse_gcode
+from .parser import iter_gcode_file, iter_gcode_lines, parse_gcode, parse_gcode_file
 
-__all__ = ["iter_gcode_lines", "parse_gcode"]
+__all__ = ["iter_gcode_file", "iter_gcode_lines", "parse_gcode", "parse_gcode_file"]
@@ -0,0 +1,253 @@
+"""Replace runs of short G1 moves that follow a circle with G2/G3 arcs.
+
+Spline and arc exports often come out as hundreds of tiny chords; each is
+a line to stream and a planner block. ``fit_arcs`` walks the program with
+``ModalState``, collects runs of plain ``G1`` moves that stay in the active
+plane (G17/G18/G19, linear axis constant) and greedily fits circles
+through them. A run becomes an arc when every vertex lies within
+``tolerance`` of the circle, every original chord stays within
+``tolerance`` of it (its sagitta), all chords turn the same way and the
+sweep is less than a full turn. Arcs are written in I/J/K form for the
+active plane and distance mode, ending exactly on the original end point,
+so everything after the run is unchanged.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+import math
+
+try:
+    from .lexer import lex_line
+    from .modal import _PLANES, ModalState
+except ImportError:
+    from gcode.lexer import lex_line
+    from gcode.modal import _PLANES, ModalState
+
+DEFAULT_TOLERANCE = 0.01
+# Fewer chords than this are not worth an arc line.
+MIN_SEGMENTS = 4
+# Flatter runs stay lines: huge radii lose precision in I/J.
+MAX_RADIUS = 5000.0
+
+_AXIS_INDEX = {"x": 0, "y": 1, "z": 2}
+_LINE_WORDS = {"G", "X", "Y", "Z", "F", "N"}
+_MOTION_CODES = {0, 1, 2, 3, 38.2, 38.3, 38.4, 38.5, 80}
+
+
+@dataclass
+class ArcFitResult:
+    """Rewritten lines and, per line, the 1-based source line it came from."""
+
+    lines: list = field(default_factory=list)
+    source_lines: array = field(default_factory=lambda: array("I"))
+    arcs: int = 0
+    replaced: int = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def source_line(self, index):
+        return self.source_lines[index]
+
+    def to_gcode(self):
+        return "".join(f"{line}\n" for line in self.lines)
+
+
+def fit_arcs(lines, tolerance=DEFAULT_TOLERANCE, min_segments=MIN_SEGMENTS, max_radius=MAX_RADIUS):
+    """Return an ``ArcFitResult`` with G1 runs along circles replaced by arcs."""
+    fitter = _ArcFitter(tolerance, max(2, int(min_segments)), max_radius)
+    for number, raw in enumerate(lines, 1):
+        fitter.handle_line(number, raw)
+    fitter.flush()
+    return fitter.result
+
+
+def fit_arcs_gcode(text, tolerance=DEFAULT_TOLERANCE, **options):
+    return fit_arcs(text.splitlines(), tolerance, **options)
+
+
+class _ArcFitter:
+    def __init__(self, tolerance, min_segments, max_radius):
+        self.tolerance = tolerance
+        self.min_segments = min_segments
+        self.max_radius = max_radius
+        self.state = ModalState()
+        self.result = ArcFitResult()
+        # Motion mode the controller has after the lines written so far.
+        self.motion = None
+        self.run = []
+        self.run_key = None
+        self.run_feed = None
+        self.run_rate = None
+
+    def handle_line(self, number, raw):
+        words = lex_line(raw)
+        before = self.state.motion
+        move = self.state.update(raw)
+        key = self._run_key(words, move)
+        if key is not None and self.run and key == self.run_key and self.state.feed == self.run_rate:
+            self.run.append((number, raw, move, before))
+            return
+        self.flush()
+        if key is None:
+            self._write_original(number, raw, words, before)
+            return
+        # Feed words that change the rate open a new run; its first line
+        # (or the arc replacing it) carries them.
+        self.run = [(number, raw, move, before)]
+        self.run_key = key
+        self.run_feed = next((value for letter, value in words if letter == "F"), None)
+        self.run_rate = self.state.feed
+
+    def flush(self):
+        run, self.run = self.run, []
+        if not run:
+            return
+        plane, relative, scale = self.run_key
+        first, second, linear, off1, off2 = _PLANES[plane]
+        a, b = _AXIS_INDEX[first], _AXIS_INDEX[second]
+        points = [(run[0][2].start[a], run[0][2].start[b])]
+        points.extend((move.end[a], move.end[b]) for _, _, move, _ in run)
+        start = 0
+        while start < len(run):
+            fit = self._longest_arc(points, start)
+            if fit is None:
+                number, raw, _, before = run[start]
+                self._write_original(number, raw, lex_line(raw), before)
+                start += 1
+                continue
+            stop, (ca, cb, radius, sweep) = fit
+            cw = sweep < 0
+            (a0, b0), (a1, b1) = points[start], points[stop]
+            if relative:
+                end = ((a1 - a0) / scale, (b1 - b0) / scale)
+            else:
+                end = (a1 / scale, b1 / scale)
+            words = [
+                "G2" if cw else "G3",
+                f"{first.upper()}{_format(end[0])}",
+                f"{second.upper()}{_format(end[1])}",
+                f"{off1}{_format((ca - a0) / scale)}",
+                f"{off2}{_format((cb - b0) / scale)}",
+            ]
+            if start == 0 and self.run_feed is not None:
+                words.append(f"F{_format(self.run_feed)}")
+            self.motion = words[0]
+            self.result.lines.append(" ".join(words))
+            self.result.source_lines.append(run[start][0])
+            self.result.arcs += 1
+            self.result.replaced += stop - start
+            start = stop
+
+    def _run_key(self, words, move):
+        """What G1 lines of one run share, or ``None`` if the line cannot join one."""
+        state = self.state
+        if move is None or not move.length or state.motion != "G1" or state.feed_mode != "G94":
+            return None
+        if any(letter not in _LINE_WORDS or (letter == "G" and value != 1.0) for letter, value in words):
+            return None
+        linear = _AXIS_INDEX[_PLANES[state.plane][2]]
+        if move.start[linear] != move.end[linear]:
+            return None
+        return (state.plane, state.distance == "G91", state.scale)
+
+    def _write_original(self, number, raw, words, before):
+        line = raw.strip()
+        has_motion = any(letter == "G" and round(value, 1) in _MOTION_CODES for letter, value in words)
+        has_axes = any(letter in "XYZ" for letter, _ in words)
+        if not has_motion and has_axes and self.motion is not None and self.motion != before:
+            # An arc we wrote changed the modal motion; restate the original one.
+            line = f"{before} {line}"
+            self.motion = before
+        elif has_motion or self.state.motion != before:
+            self.motion = self.state.motion
+        if not words and not line:
+            return
+        self.result.lines.append(line)
+        self.result.source_lines.append(number)
+
+    def _longest_arc(self, points, start):
+        """``(stop, circle)`` of the longest arc from ``points[start]``, or ``None``."""
+        last = len(points) - 1
+        low = start + self.min_segments
+        if low > last:
+            return None
+        best = self._fit(points, start, low)
+        if best is None:
+            return None
+        best = (low, best)
+        # Grow the span geometrically, then bisect between the last fit and
+        # the first miss.
+        span = self.min_segments
+        high = None
+        while True:
+            span *= 2
+            stop = min(start + span, last)
+            circle = self._fit(points, start, stop)
+            if circle is None:
+                high = stop
+                break
+            best = (stop, circle)
+            if stop == last:
+                return best
+        low = best[0]
+        while high - low > 1:
+            middle = (low + high) // 2
+            circle = self._fit(points, start, middle)
+            if circle is None:
+                high = middle
+            else:
+                best = (middle, circle)
+                low = middle
+        return best
+
+    def _fit(self, points, start, stop):
+        circle = _circle(points[start], points[(start + stop) // 2], points[stop])
+        if circle is None:
+            return None
+        ca, cb, radius = circle
+        if radius > self.max_radius:
+            return None
+        tolerance = self.tolerance
+        sweep = 0.0
+        direction = 0
+        previous = None
+        for index in range(start, stop + 1):
+            pa, pb = points[index]
+            da, db = pa - ca, pb - cb
+            if abs(math.hypot(da, db) - radius) > tolerance:
+                return None
+            if previous is not None:
+                qa, qb = previous
+                turn = math.atan2(qa * db - qb * da, qa * da + qb * db)
+                if turn == 0.0 or (direction and (turn > 0) != (direction > 0)):
+                    return None
+                direction = turn
+                sweep += turn
+                chord = math.hypot(da - qa, db - qb)
+                if radius - math.sqrt(max(radius * radius - chord * chord / 4.0, 0.0)) > tolerance:
+                    return None
+            previous = (da, db)
+        if abs(sweep) >= 2.0 * math.pi - 1e-3:
+            return None
+        return ca, cb, radius, sweep
+
+
+def _circle(first, middle, last):
+    """Center and radius of the circle through three points, or ``None``."""
+    ax, ay = first
+    bx, by = middle[0] - ax, middle[1] - ay
+    cx, cy = last[0] - ax, last[1] - ay
+    d = 2.0 * (bx * cy - by * cx)
+    if abs(d) < 1e-12:
+        return None
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ux = (cy * b2 - by * c2) / d
+    uy = (bx * c2 - cx * b2) / d
+    return ax + ux, ay + uy, math.hypot(ux, uy)
+
+
+def _format(value):
+    text = f"{value:.6f}".rstrip("0").rstrip(".")
+    return text if text not in ("", "-0") else "0"
@@ -0,0 +1,412 @@
+"""Precompiled, memory-mappable job bundles (``.rkjob``).
+
+A bundle is written once after CAM and streamed many times. It holds the
+sanitized line bytes (comments stripped, one ``\\n`` per line), a uint64
+offset index, a uint32 map back to source line numbers, a modal-state
+checkpoint every ``checkpoint_interval`` lines and the job's bounds and
+planner-estimated run time (``gcode/estimate.py``). Opening a bundle maps the file instead of reading it,
+so starting, seeking and resuming cost the same for a 10-line file and a
+500 MB program.
+
+Layout (little-endian)::
+
+    header   magic, version, line count, section offsets/sizes
+    data     sanitized lines, ``\\n`` terminated
+    index    uint64[line_count + 1] offsets into data
+    linemap  uint32[line_count] 1-based source line numbers
+    meta     JSON: source, bounds [min x/y/z, max x/y/z], estimated_time,
+             checkpoints (ModalState dicts, one per interval), time_marks
+             (seconds elapsed at each checkpoint), machine limits,
+             compact resolution
+
+With ``compact`` the lines are rewritten by ``gcode/compact.py`` first;
+the line map still points at the original source lines.
+"""
+
+from dataclasses import asdict
+import array
+import bisect
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+try:
+    from .compact import Compactor
+    from .estimate import PlannerEstimator
+    from .lexer import lex_line
+    from .modal import _MOTIONS, ModalState, _fmt
+    from .parser import strip_comments
+except ImportError:
+    from gcode.compact import Compactor
+    from gcode.estimate import PlannerEstimator
+    from gcode.lexer import lex_line
+    from gcode.modal import _MOTIONS, ModalState, _fmt
+    from gcode.parser import strip_comments
+
+
+BUNDLE_SUFFIX = ".rkjob"
+MAGIC = b"RKJOB\x00\r\n"
+VERSION = 1
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+_HEADER = struct.Struct("<8sIIQQQQQQQ")
+_CHUNK = 1 << 16
+
+
+class BundleError(ValueError):
+    """Raised for files that are not readable job bundles."""
+
+
+def bundle_path_for(source_path):
+    return f"{os.path.splitext(source_path)[0]}{BUNDLE_SUFFIX}"
+
+
+def is_bundle(path):
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def compile_bundle(
+    source_path,
+    bundle_path=None,
+    checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+    limits=None,
+    compact=None,
+):
+    """Compile a G-code file into a bundle and return the bundle path.
+
+    The source is read line by line and the index sections are spilled to
+    temporary files, so memory use does not grow with the program size.
+    ``limits`` (a ``MachineLimits`` or ``{110: ..., 120: ...}`` settings)
+    describes the machine the run time is estimated for. ``compact`` is a
+    resolution in mm to compact the lines with (``None`` keeps them).
+    """
+    bundle_path = bundle_path or bundle_path_for(source_path)
+    checkpoint_interval = max(1, int(checkpoint_interval))
+    directory = os.path.dirname(os.path.abspath(bundle_path))
+    temp_path = f"{bundle_path}.tmp"
+    try:
+        _write_bundle(source_path, temp_path, directory, checkpoint_interval, limits, compact)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    os.replace(temp_path, bundle_path)
+    return bundle_path
+
+
+def _write_bundle(source_path, temp_path, directory, checkpoint_interval, limits, compact):
+    estimator = PlannerEstimator(limits)
+    compactor = Compactor(compact) if compact else None
+    state = estimator.state
+    checkpoints = []
+    bounds = None
+    count = 0
+    offset = 0
+    index = array.array("Q", [0])
+    linemap = array.array("I")
+    with open(source_path, "rb") as source, open(temp_path, "wb") as out, tempfile.TemporaryFile(
+        dir=directory
+    ) as index_file, tempfile.TemporaryFile(dir=directory) as linemap_file:
+        out.write(b"\x00" * _HEADER.size)
+        for number, raw in enumerate(source, 1):
+            line = strip_comments(raw.decode("ascii", errors="replace"))
+            if line and compactor is not None:
+                line = compactor.compact_line(line)
+            if not line:
+                continue
+            if count % checkpoint_interval == 0:
+                checkpoints.append(state.to_dict())
+            move = estimator.update(line)
+            if move is not None:
+                bounds = _grow(bounds, move.end)
+            payload = line.encode("ascii", errors="replace") + b"\n"
+            out.write(payload)
+            offset += len(payload)
+            count += 1
+            index.append(offset)
+            linemap.append(number)
+            if len(linemap) >= _CHUNK:
+                _spill(index, index_file)
+                _spill(linemap, linemap_file)
+        _spill(index, index_file)
+        _spill(linemap, linemap_file)
+        estimate = estimator.finish()
+
+        data_offset = _HEADER.size
+        data_size = offset
+        index_offset = _pad(out)
+        _copy(index_file, out)
+        linemap_offset = _pad(out)
+        _copy(linemap_file, out)
+        meta = {
+            "source": os.path.abspath(source_path),
+            "source_size": os.path.getsize(source_path),
+            "source_mtime": os.path.getmtime(source_path),
+            "created": time.time(),
+            "checkpoint_interval": checkpoint_interval,
+            "checkpoints": checkpoints,
+            "bounds": list(bounds[0] + bounds[1]) if bounds else None,
+            "estimated_time": round(estimate.total, 3),
+            "time_marks": [elapsed for _, elapsed in estimate.marks(checkpoint_interval)],
+            "limits": asdict(estimator.limits),
+            "compact": compact,
+        }
+        meta_offset = _pad(out)
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+        out.write(meta_bytes)
+        out.seek(0)
+        out.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                0,
+                count,
+                data_offset,
+                data_size,
+                index_offset,
+                linemap_offset,
+                meta_offset,
+                len(meta_bytes),
+            )
+        )
+
+
+class JobBundle:
+    """Read-only view of a compiled bundle backed by ``mmap``.
+
+    Lines are decoded on demand; ``iter_lines(start)`` is what the sender
+    streams from, ``resume_lines(index)`` re-creates the modal state and
+    tool position in front of a resume point.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise BundleError(f"{path}: empty file")
+        try:
+            self._load()
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self):
+        if len(self._map) < _HEADER.size:
+            raise BundleError(f"{self.path}: not a job bundle")
+        (
+            magic,
+            version,
+            _flags,
+            count,
+            self._data_offset,
+            data_size,
+            index_offset,
+            linemap_offset,
+            meta_offset,
+            meta_size,
+        ) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise BundleError(f"{self.path}: not a job bundle")
+        if version != VERSION:
+            raise BundleError(f"{self.path}: unsupported bundle version {version}")
+        if meta_offset + meta_size > len(self._map):
+            raise BundleError(f"{self.path}: truncated bundle")
+        self._count = count
+        self._view = memoryview(self._map)
+        self._index = _typed(self._view[index_offset : index_offset + 8 * (count + 1)], "Q")
+        self._linemap = _typed(self._view[linemap_offset : linemap_offset + 4 * count], "I")
+        if self._index[count] != data_size:
+            raise BundleError(f"{self.path}: corrupt index")
+        self.metadata = json.loads(bytes(self._view[meta_offset : meta_offset + meta_size]))
+
+    def close(self):
+        for name in ("_index", "_linemap", "_view"):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def bounds(self):
+        bounds = self.metadata.get("bounds")
+        return tuple(bounds) if bounds else None
+
+    @property
+    def estimated_time(self):
+        return self.metadata.get("estimated_time", 0.0)
+
+    def elapsed_time(self, index):
+        """Estimated seconds from the start until line ``index`` runs.
+
+        Interpolates between the per-checkpoint time marks; bundles written
+        before marks were stored scale the total by line count.
+        """
+        total = self.estimated_time
+        if not self._count:
+            return 0.0
+        index = min(max(0, index), self._count)
+        marks = self.metadata.get("time_marks")
+        if not marks:
+            return total * index / self._count
+        interval = self.metadata["checkpoint_interval"]
+        slot = min(index // interval, len(marks) - 1)
+        start = slot * interval
+        end = min(start + interval, self._count)
+        following = total if slot + 1 == len(marks) else marks[slot + 1]
+        if end <= start:
+            return marks[slot]
+        return marks[slot] + (following - marks[slot]) * (index - start) / (end - start)
+
+    def remaining_time(self, index):
+        """Estimated seconds left when line ``index`` is the next to run."""
+        return max(self.estimated_time - self.elapsed_time(index), 0.0)
+
+    def line_bytes(self, index):
+        start = self._data_offset + self._index[index]
+        end = self._data_offset + self._index[index + 1] - 1
+        return self._map[start:end]
+
+    def line(self, index):
+        return self.line_bytes(index).decode("ascii")
+
+    def source_line(self, index):
+        """1-based line number of ``index`` in the original file."""
+        return self._linemap[index]
+
+    def find_line(self, source_line):
+        """Index of the first bundle line at or after a source line number."""
+        return bisect.bisect_left(self._linemap, source_line)
+
+    def iter_lines(self, start=0, stop=None):
+        stop = self._count if stop is None else min(stop, self._count)
+        base = self._data_offset
+        index = self._index
+        data = self._map
+        for position in range(max(0, start), stop):
+            yield data[base + index[position] : base + index[position + 1] - 1].decode("ascii")
+
+    def modal_at(self, index):
+        """Modal state in effect just before line ``index`` runs."""
+        index = min(max(0, index), self._count)
+        interval = self.metadata["checkpoint_interval"]
+        checkpoints = self.metadata["checkpoints"]
+        slot = min(index // interval, len(checkpoints) - 1) if checkpoints else -1
+        state = ModalState.from_dict(checkpoints[slot]) if slot >= 0 else ModalState()
+        for line in self.iter_lines(max(slot, 0) * interval, index):
+            state.update(line)
+        return state
+
+    def resume_lines(self, index, clearance=None):
+        """Lines that bring the machine into the state ``index`` expects.
+
+        Restores the modal groups, spindle and coolant, retracts to
+        ``clearance`` (default: the top of the job), travels over the resume
+        point and feeds down to it. Moves are written in G21/G90 before the
+        file's own units and distance mode are restored.
+
+        Raises ``ValueError`` when ``index`` is inside a modal G2/G3 run:
+        the plunge leaves G1 active, so arc lines without their own motion
+        word would run as straight moves.
+        """
+        state = self.modal_at(index)
+        if state.motion in ("G2", "G3") and self._continues_arcs(index):
+            raise ValueError(
+                f"Line {self.source_line(index)} continues a modal {state.motion} arc; "
+                "resume from the line that starts the arc"
+            )
+        if clearance is None:
+            bounds = self.bounds
+            clearance = bounds[5] if bounds else state.z
+        clearance = max(clearance, state.z)
+        plunge = state.feed or 100.0
+        lines = [f"G21 G90 {state.plane} G94 {state.wcs}"]
+        lines.extend(line for line in state.preamble()[1:] if not line.startswith(("F", "G")))
+        lines.append(f"G0 Z{_fmt(clearance)}")
+        lines.append(f"G0 X{_fmt(state.x)} Y{_fmt(state.y)}")
+        lines.append(f"G1 Z{_fmt(state.z)} F{_fmt(plunge)}")
+        lines.append(f"{state.units} {state.distance} {state.feed_mode}")
+        if state.feed:
+            lines.append(f"F{_fmt(state.feed / state.scale)}")
+        if state.motion in ("G0", "G1"):
+            lines.append(state.motion)
+        return lines
+
+    def _continues_arcs(self, index):
+        """Whether the first move from ``index`` on has no motion word of its own."""
+        for line in self.iter_lines(index):
+            words = lex_line(line)
+            if any(letter == "G" and (round(value, 1) in _MOTIONS or value == 80.0) for letter, value in words):
+                return False
+            if any(letter in "XYZ" for letter, _ in words):
+                return True
+        return False
+
+
+def open_bundle(path):
+    return JobBundle(path)
+
+
+def _typed(view, code):
+    if sys.byteorder == "little":
+        return view.cast(code)
+    values = array.array(code)
+    values.frombytes(view.tobytes())
+    values.byteswap()
+    return values
+
+
+def _spill(values, handle):
+    if sys.byteorder != "little":
+        values.byteswap()
+    values.tofile(handle)
+    del values[:]
+
+
+def _copy(source, target):
+    source.seek(0)
+    shutil.copyfileobj(source, target, 1 << 20)
+
+
+def _pad(handle):
+    position = handle.tell()
+    padding = -position % 8
+    if padding:
+        handle.write(b"\x00" * padding)
+    return position + padding
+
+
+def _grow(bounds, point):
+    if bounds is None:
+        return (tuple(point), tuple(point))
+    low, high = bounds
+    return (
+        tuple(min(a, b) for a, b in zip(low, point)),
+        tuple(max(a, b) for a, b in zip(high, point)),
+    )
+
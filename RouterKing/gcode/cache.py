@@ -0,0 +1,322 @@
+"""On-disk cache of parsed preview toolpaths (``parse_cache/*.rkpc``).
+
+Re-opening a large program should not re-parse it. After a parse, the
+``GcodePath`` arrays (coordinates, flags, source lines) are written as-is
+together with the bounds and a few stats; the next load of the same file
+reads them back in a few bulk copies. A ``ParsedProgram`` also stores its
+``Toolpath`` arrays and checkpoints, so a hit can seed an
+``IncrementalParser`` without any parsing.
+
+Entries are keyed by the file size, its modification time and a BLAKE2
+hash of sampled 64 KiB blocks (start, end and evenly spaced in between),
+plus the arc tolerance. That reads a few MiB at most however large the
+file is. Hits refresh the entry's mtime, and the least recently used
+entries are evicted once the cache grows past ``max_bytes``.
+
+Layout (little-endian)::
+
+    header   magic, version, segment count, move count, meta size
+    coords   float64[4 * count]  x0, y0, x1, y1
+    flags    uint8[count]
+    lines    uint32[count]       1-based source lines (4-byte aligned)
+    kinds    uint8[moves]        toolpath move kinds
+    lines    uint32[moves]       toolpath source lines (4-byte aligned)
+    values   float64[11 * moves] toolpath points, feed and arc values
+    meta     JSON: source, arc_tolerance, bounds, stats and, for a
+             ParsedProgram, lines, blocks, first_block and checkpoints
+"""
+
+from array import array
+from dataclasses import dataclass, field
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+
+try:  # FreeCAD may not be available during tests or linting.
+    import FreeCAD as App
+except Exception:  # pragma: no cover - FreeCAD not available in CI
+    App = None
+
+try:  # Optional fast path.
+    import numpy as np
+except Exception:  # pragma: no cover - numpy not installed
+    np = None
+
+try:
+    from .parser import ARC_TOLERANCE, FLAG_RAPID, GcodePath, ParsedProgram, _Checkpoint, parse_gcode_file
+    from .toolpath import Toolpath
+except ImportError:
+    from gcode.parser import ARC_TOLERANCE, FLAG_RAPID, GcodePath, ParsedProgram, _Checkpoint, parse_gcode_file
+    from gcode.toolpath import Toolpath
+
+CACHE_SUFFIX = ".rkpc"
+MAGIC = b"RKPC\x00\r\n\x1a"
+VERSION = 4
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_HEADER = struct.Struct("<8sIQQQ")
+_SAMPLE = 64 * 1024
+_SAMPLES = 16
+
+
+@dataclass
+class CacheEntry:
+    """A cached parse: the path plus what was stored alongside it.
+
+    ``program`` is set when a ``ParsedProgram`` was stored.
+    """
+
+    path: GcodePath
+    bounds: tuple = None
+    stats: dict = field(default_factory=dict)
+    program: ParsedProgram = None
+
+
+class ParseCache:
+    """Directory of cached parses with LRU eviction by total size."""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or get_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, source, arc_tolerance=ARC_TOLERANCE):
+        """Cache key for a source file (size, mtime and sampled content)."""
+        info = os.stat(source)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(struct.pack("<QQd", info.st_size, info.st_mtime_ns, arc_tolerance))
+        with open(source, "rb") as handle:
+            for offset in _sample_offsets(info.st_size):
+                handle.seek(offset)
+                digest.update(handle.read(_SAMPLE))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, f"{key}{CACHE_SUFFIX}")
+
+    def load(self, source, arc_tolerance=ARC_TOLERANCE):
+        """Return the cached ``CacheEntry`` for ``source`` or ``None``.
+
+        A cache with no ``max_bytes`` is disabled and never hits, even on entries written before it was.
+        """
+        if not self.max_bytes:
+            return None
+        try:
+            entry_path = self.entry_path(self.key(source, arc_tolerance))
+            with open(entry_path, "rb") as handle:
+                entry = _read_entry(handle)
+        except (OSError, EOFError, ValueError, struct.error):
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def store(self, source, parsed, arc_tolerance=ARC_TOLERANCE):
+        """Write ``parsed`` (a ``GcodePath`` or ``ParsedProgram``) as the parse of ``source``.
+
+        Returns the entry file.
+        """
+        if not self.max_bytes:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        entry_path = self.entry_path(self.key(source, arc_tolerance))
+        program = parsed if isinstance(parsed, ParsedProgram) else None
+        path = parsed.path if program is not None else parsed
+        meta = {
+            "source": os.path.abspath(source),
+            "arc_tolerance": arc_tolerance,
+            "bounds": list(path.bounds()) if len(path) else None,
+            "stats": path_stats(path),
+        }
+        if program is not None:
+            meta["lines"] = program.lines
+            meta["blocks"] = program.toolpath.blocks
+            meta["first_block"] = program.toolpath.first_block
+            meta["checkpoints"] = [
+                [item.line, list(item.state), item.segment, item.move, item.feed, item.blocks]
+                for item in program.checkpoints
+            ]
+        temp_path = f"{entry_path}.tmp"
+        try:
+            with open(temp_path, "wb") as handle:
+                _write_entry(handle, path, program.toolpath if program is not None else None, meta)
+            os.replace(temp_path, entry_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return None
+        self.evict(keep=entry_path)
+        return entry_path
+
+    def evict(self, keep=None):
+        """Drop least recently used entries until the cache fits."""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            entry_path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, entry_path, info.st_size))
+            total += info.st_size
+        for _, entry_path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry_path == keep:
+                continue
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            if name.endswith(CACHE_SUFFIX):
+                os.remove(os.path.join(self.directory, name))
+
+
+def parse_cached(source, parse=parse_gcode_file, cache=None, arc_tolerance=ARC_TOLERANCE):
+    """Load ``source`` from the parse cache, or parse it with ``parse`` and store it.
+
+    ``parse(source, arc_tolerance)`` is any file parser (``parse_gcode_file``,
+    ``parse_gcode_parallel``, or ``parse_program_file`` and
+    ``parse_program_parallel`` for a ``ParsedProgram``); ``cache=None`` uses
+    the default cache.
+    """
+    cache = cache or ParseCache()
+    entry = cache.load(source, arc_tolerance)
+    if entry is not None:
+        return entry.path if entry.program is None else entry.program
+    path = parse(source, arc_tolerance=arc_tolerance)
+    cache.store(source, path, arc_tolerance)
+    return path
+
+
+def path_stats(path):
+    """Segment counts and XY lengths of cuts and rapids."""
+    if np is not None and len(path):
+        segments = np.frombuffer(path._coords, dtype=np.float64).reshape(-1, 4)
+        lengths = np.hypot(segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1])
+        rapid = (np.frombuffer(path._flags, dtype=np.uint8) & FLAG_RAPID) != 0
+        return {
+            "segments": len(path),
+            "rapids": int(rapid.sum()),
+            "cut_length": round(float(lengths[~rapid].sum()), 6),
+            "rapid_length": round(float(lengths[rapid].sum()), 6),
+            "lines": int(np.frombuffer(path._lines, dtype=np.uint32).max()),
+        }
+    coords = path._coords
+    flags = path._flags
+    cut_length = rapid_length = 0.0
+    rapids = 0
+    for index in range(len(path)):
+        base = index * 4
+        length = math.hypot(coords[base + 2] - coords[base], coords[base + 3] - coords[base + 1])
+        if flags[index] & FLAG_RAPID:
+            rapids += 1
+            rapid_length += length
+        else:
+            cut_length += length
+    return {
+        "segments": len(path),
+        "rapids": rapids,
+        "cut_length": round(cut_length, 6),
+        "rapid_length": round(rapid_length, 6),
+        "lines": max(path._lines) if len(path) else 0,
+    }
+
+
+def get_cache_dir():
+    if App is not None and hasattr(App, "getUserAppDataDir"):
+        base = App.getUserAppDataDir()
+    else:
+        base = os.path.join(os.path.expanduser("~"), ".routerking")
+    return os.path.join(base, "parse_cache")
+
+
+def _sample_offsets(size):
+    if size <= _SAMPLE * (_SAMPLES + 2):
+        return [0] if size <= _SAMPLE else range(0, size, _SAMPLE)
+    step = (size - _SAMPLE) // (_SAMPLES + 1)
+    return [step * index for index in range(_SAMPLES + 2)]
+
+
+def _write_entry(handle, path, toolpath, meta):
+    count = len(path)
+    moves = len(toolpath) if toolpath is not None else 0
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    handle.write(_HEADER.pack(MAGIC, VERSION, count, moves, len(meta_bytes)))
+    blocks = [path._coords, path._flags, _padding(_HEADER.size + 33 * count), path._lines]
+    if toolpath is not None:
+        offset = _HEADER.size + 37 * count + len(blocks[2])
+        blocks += [toolpath._kinds, _padding(offset + moves), toolpath._lines, toolpath._values]
+    for values in blocks:
+        if isinstance(values, array) and sys.byteorder != "little":
+            values = array(values.typecode, values)
+            values.byteswap()
+        handle.write(values)
+    handle.write(meta_bytes)
+
+
+def _read_entry(handle):
+    magic, version, count, moves, meta_size = _HEADER.unpack(handle.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a parse cache entry")
+    path = GcodePath()
+    path._coords = _read_array(handle, "d", 4 * count)
+    path._flags = bytearray(handle.read(count))
+    padding = len(_padding(_HEADER.size + 33 * count))
+    handle.read(padding)
+    path._lines = _read_array(handle, "I", count)
+    toolpath = None
+    if moves:
+        toolpath = Toolpath()
+        toolpath._kinds = bytearray(handle.read(moves))
+        handle.read(len(_padding(_HEADER.size + 37 * count + padding + moves)))
+        toolpath._lines = _read_array(handle, "I", moves)
+        toolpath._values = _read_array(handle, "d", 11 * moves)
+    meta = json.loads(handle.read(meta_size))
+    if len(path._flags) != count or (toolpath is not None and len(toolpath._kinds) != moves):
+        raise ValueError("truncated parse cache entry")
+    bounds = tuple(meta["bounds"]) if meta.get("bounds") else None
+    if bounds is not None:
+        path._bounds = bounds
+        path._bounded = count
+    program = None
+    if "checkpoints" in meta:
+        if toolpath is None:
+            toolpath = Toolpath()
+        toolpath.blocks = meta["blocks"]
+        toolpath.first_block = meta["first_block"]
+        checkpoints = [
+            _Checkpoint(line, tuple(state), *rest) for line, state, *rest in meta["checkpoints"]
+        ]
+        program = ParsedProgram(path, toolpath, checkpoints, meta["lines"])
+    return CacheEntry(path, bounds, meta.get("stats", {}), program)
+
+
+def _read_array(handle, code, count):
+    values = array(code)
+    values.fromfile(handle, count)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _padding(offset):
+    # Keeps a uint32 line map 4-byte aligned after the flag or kind bytes.
+    return b"\x00" * (-offset % 4)
@@ -0,0 +1,272 @@
+"""Rewrite G-code into fewer bytes without changing what the machine does.
+
+Every byte goes over a 115200-baud link (about 11.5 bytes/ms), so short
+lines stream faster. ``Compactor`` drops comments, blank lines, ``N``
+numbers and spaces, modal words that repeat the active mode (``G0``/``G1``,
+``G90``, ``G21``, ``G17``, ``F``, ``S``, ...) and axis words that repeat
+the current position, and rounds coordinates to ``resolution`` mm.
+
+The modal state is not assumed: everything starts unknown (a previous job
+may have left G20 or G91 active) and only words seen in the program make it
+known. Non-modal commands (``G28``, ``G53``, ``G92``, probing, ...) are kept
+as they are and make the position unknown again. Rounding error is carried
+to the next word on each axis (in G91 too) and into arc offsets, so it
+never accumulates. Arc lines keep their ``G2``/``G3`` and in-plane axis
+words, which GRBL requires and resume preambles do not restore.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+import math
+
+try:
+    from .lexer import lex_line
+except ImportError:
+    from gcode.lexer import lex_line
+
+DEFAULT_RESOLUTION = 0.001
+
+_AXES = ("X", "Y", "Z")
+_OFFSETS = {"I": "X", "J": "Y", "K": "Z"}
+_PLANE_AXES = {17.0: ("X", "Y"), 18.0: ("Z", "X"), 19.0: ("Y", "Z")}
+# G-code modal groups whose repeats can be dropped.
+_GROUPS = {
+    0.0: "motion",
+    1.0: "motion",
+    2.0: "motion",
+    3.0: "motion",
+    38.2: "motion",
+    38.3: "motion",
+    38.4: "motion",
+    38.5: "motion",
+    80.0: "motion",
+    17.0: "plane",
+    18.0: "plane",
+    19.0: "plane",
+    20.0: "units",
+    21.0: "units",
+    90.0: "distance",
+    91.0: "distance",
+    93.0: "feed_mode",
+    94.0: "feed_mode",
+    54.0: "wcs",
+    55.0: "wcs",
+    56.0: "wcs",
+    57.0: "wcs",
+    58.0: "wcs",
+    59.0: "wcs",
+}
+# Codes whose axis words are not a programmed end point (G4 leaves the
+# position alone, the others move or redefine it).
+_NON_MODAL = {4.0, 10.0, 28.0, 28.1, 30.0, 30.1, 53.0, 92.0, 92.1}
+_PROBES = {38.2, 38.3, 38.4, 38.5}
+
+
+@dataclass
+class CompactProgram:
+    """Compacted lines and, per line, the 1-based source line it came from."""
+
+    lines: list = field(default_factory=list)
+    source_lines: array = field(default_factory=lambda: array("I"))
+    source_bytes: int = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    @property
+    def bytes(self):
+        """Bytes on the wire, one newline per line."""
+        return sum(len(line) + 1 for line in self.lines)
+
+    def source_line(self, index):
+        return self.source_lines[index]
+
+    def to_gcode(self):
+        return "".join(f"{line}\n" for line in self.lines)
+
+
+class Compactor:
+    """Stateful line compactor; feed it a program's lines in order."""
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION):
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self.resolution = float(resolution)
+        self.reset()
+
+    def reset(self):
+        """Forget all modal state, as at the start of a program."""
+        self.modes = {}
+        self.feed = None
+        self.speed = None
+        # Last emitted value per axis (program units) or None if unknown,
+        # and the exact minus the emitted value.
+        self.position = dict.fromkeys(_AXES)
+        self.residual = dict.fromkeys(_AXES, 0.0)
+
+    @property
+    def digits(self):
+        """Decimals for coordinates; inch precision while units are unknown."""
+        step = self.resolution if self.modes.get("units") == 21.0 else self.resolution / 25.4
+        return max(0, math.ceil(-math.log10(step) - 1e-9))
+
+    def compact_line(self, line):
+        """Return the compact form of one line ("" if it can be dropped)."""
+        stripped = line.strip()
+        if stripped.startswith("$"):
+            # System commands are not G-code; pass them through.
+            return stripped
+        words = lex_line(line)
+        if not words:
+            return ""
+        codes = [value for letter, value in words if letter == "G"]
+        if any(code in _NON_MODAL for code in codes):
+            return self._pass_through(words, codes)
+
+        before = dict(self.modes)
+        self._set_units([code for code in codes if _GROUPS.get(code) == "units"])
+        for code in codes:
+            group = _GROUPS.get(code)
+            if group is not None and group != "units":
+                self.modes[group] = code
+        motion = self.modes.get("motion")
+        relative = self.modes.get("distance") == 91.0
+        digits = self.digits
+        keep = _PLANE_AXES.get(self.modes.get("plane"), _AXES) if motion in (2.0, 3.0) else ()
+        droppable = motion in (0.0, 1.0, 2.0, 3.0)
+        start_residual = dict(self.residual)
+
+        out = []
+        zero_offsets = []
+        for letter, value in words:
+            if letter == "G":
+                group = _GROUPS.get(value)
+                # Of the motion words only G0/G1 may go; arcs and probes
+                # always state theirs.
+                if group is not None and before.get(group) == value and (group != "motion" or value < 2.0):
+                    continue
+                out.append(f"G{_number(value)}")
+            elif letter == "N":
+                continue
+            elif letter in _AXES:
+                text = self._axis(letter, value, relative, digits, droppable and letter not in keep)
+                if text is not None:
+                    out.append(text)
+            elif letter in _OFFSETS and motion in (2.0, 3.0):
+                offset = round(value + start_residual[_OFFSETS[letter]], digits)
+                if offset == 0.0:
+                    zero_offsets.append(len(out))
+                out.append(f"{letter}{_number(offset, digits)}")
+            elif letter == "R":
+                out.append(f"R{_number(round(value, digits), digits)}")
+            elif letter == "F":
+                # G93 (inverse time) needs F on every move.
+                if self.feed == value and self.modes.get("feed_mode") != 93.0:
+                    continue
+                self.feed = value
+                out.append(f"F{_number(value)}")
+            elif letter == "S":
+                if self.speed == value:
+                    continue
+                self.speed = value
+                out.append(f"S{_number(value)}")
+            elif letter == "M":
+                out.append(f"M{_number(value)}")
+                if value in (2.0, 30.0):
+                    self.reset()
+            else:
+                out.append(f"{letter}{_number(value)}")
+        if motion in _PROBES and any(letter in _AXES for letter, _ in words):
+            # A probe stops wherever it touches.
+            self._forget_position()
+        offsets = sum(1 for letter, _ in words if letter in _OFFSETS)
+        if zero_offsets and len(zero_offsets) < offsets:
+            # Missing offsets are zero; GRBL only needs one of them.
+            for index in reversed(zero_offsets):
+                del out[index]
+        return "".join(out)
+
+    def _axis(self, letter, value, relative, digits, droppable):
+        previous = self.position[letter]
+        if "distance" not in self.modes:
+            # Absolute or relative: rounding could accumulate, so do not.
+            self.position[letter] = None
+            return f"{letter}{_number(value)}"
+        if relative:
+            exact = value + self.residual[letter]
+            step = round(exact, digits)
+            self.residual[letter] = exact - step
+            if previous is not None:
+                self.position[letter] = round(previous + step, digits)
+            if droppable and step == 0.0:
+                return None
+            return f"{letter}{_number(step, digits)}"
+        target = round(value, digits)
+        self.residual[letter] = value - target
+        self.position[letter] = target
+        if droppable and previous == target:
+            return None
+        return f"{letter}{_number(target, digits)}"
+
+    def _set_units(self, codes):
+        if not codes:
+            return
+        units = codes[-1]
+        current = self.modes.get("units")
+        self.modes["units"] = units
+        if current == units:
+            return
+        # Positions are kept in program units; re-learn them after a switch.
+        self.position = dict.fromkeys(_AXES)
+        if current is not None:
+            scale = 25.4 if units == 21.0 else 1.0 / 25.4
+            self.residual = {axis: value * scale for axis, value in self.residual.items()}
+        # GRBL keeps the number, not the rate, across G20/G21.
+        self.feed = None
+
+    def _pass_through(self, words, codes):
+        for code in codes:
+            group = _GROUPS.get(code)
+            if group == "units":
+                self._set_units([code])
+            elif group is not None:
+                self.modes[group] = code
+        if any(code != 4.0 for code in codes if code in _NON_MODAL):
+            self._forget_position()
+        for letter, value in words:
+            if letter == "F":
+                self.feed = value
+            elif letter == "S":
+                self.speed = value
+        return "".join(f"{letter}{_number(value)}" for letter, value in words if letter != "N")
+
+    def _forget_position(self):
+        self.position = dict.fromkeys(_AXES)
+        self.residual = dict.fromkeys(_AXES, 0.0)
+
+
+def compact_lines(lines, resolution=DEFAULT_RESOLUTION):
+    """Compact raw lines into a ``CompactProgram``."""
+    compactor = Compactor(resolution)
+    program = CompactProgram()
+    for number, raw in enumerate(lines, 1):
+        program.source_bytes += len(raw) + 1
+        line = compactor.compact_line(raw)
+        if line:
+            program.lines.append(line)
+            program.source_lines.append(number)
+    return program
+
+
+def compact_gcode(text, resolution=DEFAULT_RESOLUTION):
+    return compact_lines(text.splitlines(), resolution)
+
+
+def _number(value, digits=6):
+    """Shortest G-code spelling of ``value`` at ``digits`` decimals (``-.5``)."""
+    text = f"{value:.{digits}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text.startswith("0.") or text.startswith("-0."):
+        text = text.replace("0.", ".", 1)
+    return "0" if text in ("", "-0", "-") else text
@@ -0,0 +1,378 @@
+"""Job run-time estimates from a model of GRBL's motion planner.
+
+Moves are broken into planner blocks the way GRBL does it (arcs become
+chords within ``$12``), and each block gets the nominal speed and
+acceleration its direction allows under ``$110``-``$112`` and
+``$120``-``$122``. Junction speeds follow GRBL's junction-deviation rule
+(``$11``). Spindle/coolant changes, tool changes and dwells empty the
+planner, so the machine stops there.
+
+The planner only sees ``lookahead`` blocks (15 on a stock GRBL), so every
+block must be able to stop by the end of the blocks buffered behind it. The
+limit that follows from that, together with the usual reverse pass, gives
+the same exit speeds as re-planning a 15-block window at every step, in
+one pass over the blocks. Arcs are planned as one block standing in for
+their chords, which keeps multi-million-line programs cheap.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+import bisect
+import math
+import re
+
+try:
+    from .modal import ModalState
+    from .parser import iter_gcode_lines, strip_comments
+except ImportError:
+    from gcode.modal import ModalState
+    from gcode.parser import iter_gcode_lines, strip_comments
+
+# GRBL's 16-slot planner buffer always keeps one slot free.
+DEFAULT_LOOKAHEAD = 15
+_SETTING_RE = re.compile(r"\$(\d+)\s*=\s*([-+]?\d*\.?\d+)")
+_LARGE = 1.0e38
+
+
+@dataclass
+class MachineLimits:
+    """GRBL motion settings: rates in mm/min, accelerations in mm/s^2."""
+
+    max_rate: tuple = (3000.0, 3000.0, 1000.0)
+    acceleration: tuple = (200.0, 200.0, 100.0)
+    junction_deviation: float = 0.01
+    arc_tolerance: float = 0.002
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build from ``{110: 3000.0, ...}``; missing codes keep the defaults."""
+        values = {int(str(code).lstrip("$")): float(value) for code, value in settings.items()}
+        base = cls()
+        return cls(
+            tuple(values.get(110 + axis, base.max_rate[axis]) for axis in range(3)),
+            tuple(values.get(120 + axis, base.acceleration[axis]) for axis in range(3)),
+            values.get(11, base.junction_deviation),
+            values.get(12, base.arc_tolerance),
+        )
+
+    @classmethod
+    def from_text(cls, text):
+        """Build from a ``$$`` dump (``$110=3000.000`` lines)."""
+        return cls.from_settings({int(code): float(value) for code, value in _SETTING_RE.findall(text)})
+
+
+@dataclass
+class Section:
+    """Lines ``start:end`` run with one tool."""
+
+    name: str
+    start: int
+    end: int = 0
+    time: float = 0.0
+
+
+@dataclass
+class TimeEstimate:
+    """Seconds per program; ``elapsed_at(line)`` maps line indices to time.
+
+    Line indices count sanitized lines (as ``iter_gcode_lines`` yields
+    them), matching job bundles, the splitter and the sender's progress.
+    """
+
+    total: float = 0.0
+    rapid: float = 0.0
+    feed: float = 0.0
+    dwell: float = 0.0
+    lines: int = 0
+    sections: list = field(default_factory=list)
+    _line_ends: array = field(default_factory=lambda: array("I"), repr=False)
+    _elapsed: array = field(default_factory=lambda: array("d"), repr=False)
+
+    def elapsed_at(self, line):
+        """Seconds from the start until line ``line`` begins to execute."""
+        slot = bisect.bisect_left(self._line_ends, line)
+        return self._elapsed[slot - 1] if slot else 0.0
+
+    def remaining(self, line):
+        return max(self.total - self.elapsed_at(line), 0.0)
+
+    def marks(self, every=1000):
+        """``[line, elapsed]`` pairs every ``every`` lines, for storage."""
+        return [[line, round(self.elapsed_at(line), 3)] for line in range(0, self.lines, max(1, every))]
+
+
+class PlannerEstimator:
+    """Feed it lines with ``update()``, then call ``finish()``.
+
+    ``state`` is the ``ModalState`` after the last line, so callers that
+    also need modal checkpoints (job bundles, the splitter) can share it.
+    """
+
+    def __init__(self, limits=None, lookahead=DEFAULT_LOOKAHEAD):
+        if limits is not None and not isinstance(limits, MachineLimits):
+            limits = MachineLimits.from_settings(limits)
+        self.limits = limits or MachineLimits()
+        self.lookahead = max(2, int(lookahead))
+        self.state = ModalState()
+        self.lines = 0
+        self._length = array("d")
+        self._accel = array("d")
+        self._nominal = array("d")
+        self._entry = array("d")
+        self._line = array("I")
+        self._slots = array("I")
+        self._rapid = bytearray()
+        self._dwells = []
+        self._sections = [Section("T0", 0)]
+        self._unit = None
+        self._previous_nominal = 0.0
+
+    def update(self, line):
+        """Apply one sanitized line; return its ``Move`` (or ``None``)."""
+        state = self.state
+        index = self.lines
+        self.lines += 1
+        before = (state.spindle, state.speed, state.mist, state.flood, state.tool)
+        move = state.update(line)
+        if (state.spindle, state.speed, state.mist, state.flood, state.tool) != before:
+            self._unit = None
+            if state.tool != before[4]:
+                self._sections[-1].end = index
+                self._sections.append(Section(f"T{state.tool}", index))
+        if move is None:
+            return None
+        if move.motion == "G4":
+            self._unit = None
+            self._dwells.append((len(self._length), index, move.dwell))
+        elif move.arc is not None:
+            self._add_arc(move, index)
+        else:
+            self._add_block(move.start, move.end, move.motion == "G0", move.feed, index)
+        return move
+
+    def finish(self):
+        """Plan all blocks and return the ``TimeEstimate``."""
+        count = len(self._length)
+        length = self._length
+        accel = self._accel
+        nominal = self._nominal
+        slots = self._slots
+        # Reverse pass: fastest entry that can still stop by the program end
+        # or any forced stop.
+        limit = array("d", bytes(8 * (count + 1)))
+        for index in range(count - 1, -1, -1):
+            reach = limit[index + 1] + 2.0 * accel[index] * length[index]
+            entry = self._entry[index]
+            limit[index] = entry if entry < reach else reach
+        # Prefix sums of stopping "room" (2*a*L) and of planner slots, for the
+        # lookahead window behind each block.
+        room = array("d", bytes(8 * (count + 1)))
+        filled = array("d", bytes(8 * (count + 1)))
+        for index in range(count):
+            room[index + 1] = room[index] + 2.0 * accel[index] * length[index]
+            filled[index + 1] = filled[index] + slots[index]
+        window = self.lookahead - 1
+
+        estimate = TimeEstimate(lines=self.lines)
+        line_ends = estimate._line_ends
+        elapsed_at = estimate._elapsed
+        dwells = self._dwells
+        next_dwell = 0
+        elapsed = rapid = feed = dwell = 0.0
+        entry = 0.0
+        last = 0
+        for index in range(count):
+            while next_dwell < len(dwells) and dwells[next_dwell][0] == index:
+                _, line, seconds = dwells[next_dwell]
+                elapsed += seconds
+                dwell += seconds
+                _mark(line_ends, elapsed_at, line, elapsed)
+                next_dwell += 1
+            span = length[index]
+            rate = accel[index]
+            cap = limit[index + 1]
+            # Blocks (or chords) still buffered while this one runs: the
+            # machine must be able to stop within them.
+            target = filled[index + 1] + window
+            if last < index + 1:
+                last = index + 1
+            while last < count and filled[last + 1] <= target:
+                last += 1
+            buffered = room[last] - room[index + 1]
+            if last < count:
+                buffered += (target - filled[last]) / slots[last] * 2.0 * accel[last] * length[last]
+            if buffered < cap:
+                cap = buffered
+            reach = entry + 2.0 * rate * span
+            leave = cap if cap < reach else reach
+            seconds = _block_time(span, rate, entry, leave, nominal[index])
+            elapsed += seconds
+            if self._rapid[index]:
+                rapid += seconds
+            else:
+                feed += seconds
+            _mark(line_ends, elapsed_at, self._line[index], elapsed)
+            entry = leave
+        for _, line, seconds in dwells[next_dwell:]:
+            elapsed += seconds
+            dwell += seconds
+            _mark(line_ends, elapsed_at, line, elapsed)
+
+        estimate.total = elapsed
+        estimate.rapid = rapid
+        estimate.feed = feed
+        estimate.dwell = dwell
+        self._sections[-1].end = self.lines
+        for section in self._sections:
+            section.time = estimate.elapsed_at(section.end) - estimate.elapsed_at(section.start)
+        estimate.sections = [section for section in self._sections if section.end > section.start]
+        return estimate
+
+    def _add_arc(self, move, line):
+        first, second, linear, center_a, center_b, radius, delta = move.arc
+        tolerance = self.limits.arc_tolerance
+        # GRBL's mc_arc() segment count.
+        segments = 0
+        if 2.0 * radius > tolerance:
+            segments = int(abs(0.5 * delta * radius) / math.sqrt(tolerance * (2.0 * radius - tolerance)))
+        if segments < 2:
+            self._add_block(move.start, move.end, False, move.feed, line)
+            return
+        # The chords are all alike, so the arc is planned as one block that
+        # fills ``segments`` planner slots: entered along the first chord,
+        # left along the last, and never faster than the chord-to-chord
+        # junction speed or than stopping within a buffer full of chords.
+        start = move.start
+        angle = math.atan2(start[second] - center_b, start[first] - center_a)
+        step = delta / segments
+        rise = (move.end[linear] - start[linear]) / segments
+
+        def chord_point(index):
+            point = list(start)
+            point[first] = center_a + radius * math.cos(angle + step * index)
+            point[second] = center_b + radius * math.sin(angle + step * index)
+            point[linear] = start[linear] + rise * index
+            return point
+
+        chord, unit_in = _direction(start, chord_point(1))
+        _, unit_out = _direction(chord_point(segments - 1), move.end)
+        limits = self.limits
+        # Worst case over the directions the arc sweeps through.
+        flat = math.sqrt(max(1.0 - unit_in[linear] ** 2, 0.0))
+        sweep = [0.0, 0.0, 0.0]
+        sweep[first] = sweep[second] = flat
+        sweep[linear] = unit_in[linear]
+        rate = _axis_limit(limits.max_rate, sweep) / 60.0
+        accel = _axis_limit(limits.acceleration, sweep)
+        # GRBL measures the junction angle against the reversed previous chord.
+        sin_half = math.cos(abs(step) / 2.0)
+        turn = accel * limits.junction_deviation * sin_half / (1.0 - sin_half) if sin_half < 1.0 else 0.0
+        buffered = 2.0 * accel * chord * (self.lookahead - 1)
+        cap = min(turn, buffered)
+        self._append(chord * segments, unit_in, unit_out, rate, accel, move.feed, False, line, segments, cap)
+
+    def _add_block(self, start, end, rapid, feed, line):
+        span, unit = _direction(start, end)
+        if span < 1e-9:
+            return
+        limits = self.limits
+        ux, uy, uz = unit
+        rate = _LARGE
+        accel = _LARGE
+        if ux:
+            ux = abs(ux)
+            rate = limits.max_rate[0] / ux
+            accel = limits.acceleration[0] / ux
+        if uy:
+            uy = abs(uy)
+            rate = min(rate, limits.max_rate[1] / uy)
+            accel = min(accel, limits.acceleration[1] / uy)
+        if uz:
+            uz = abs(uz)
+            rate = min(rate, limits.max_rate[2] / uz)
+            accel = min(accel, limits.acceleration[2] / uz)
+        self._append(span, unit, unit, rate / 60.0, accel, feed, rapid, line)
+
+    def _append(self, span, unit_in, unit_out, rate, accel, feed, rapid, line, slots=1, cap=_LARGE):
+        if not rapid and feed > 0.0 and feed / 60.0 < rate:
+            rate = feed / 60.0
+        nominal = min(rate * rate, cap)
+        previous = self._unit
+        if previous is None:
+            entry = 0.0
+        else:
+            px, py, pz = previous
+            ux, uy, uz = unit_in
+            cos_theta = -(px * ux + py * uy + pz * uz)
+            if cos_theta > 0.999999:
+                junction = 0.0
+            elif cos_theta < -0.999999:
+                junction = _LARGE
+            else:
+                turn = (ux - px, uy - py, uz - pz)
+                norm = math.sqrt(turn[0] * turn[0] + turn[1] * turn[1] + turn[2] * turn[2])
+                turn_accel = _axis_limit(self.limits.acceleration, (turn[0] / norm, turn[1] / norm, turn[2] / norm))
+                sin_half = math.sqrt(0.5 * (1.0 - cos_theta))
+                junction = turn_accel * self.limits.junction_deviation * sin_half / (1.0 - sin_half)
+            entry = min(junction, nominal, self._previous_nominal)
+        self._length.append(span)
+        self._accel.append(accel)
+        self._nominal.append(nominal)
+        self._entry.append(entry)
+        self._line.append(line)
+        self._slots.append(slots)
+        self._rapid.append(1 if rapid else 0)
+        self._unit = unit_out
+        self._previous_nominal = nominal
+
+
+def estimate_program(program, limits=None, lookahead=DEFAULT_LOOKAHEAD):
+    """Estimate G-code text or an iterable of lines (e.g. a bundle's)."""
+    estimator = PlannerEstimator(limits, lookahead)
+    if isinstance(program, str):
+        lines = iter_gcode_lines(program)
+    else:
+        lines = (line for line in (strip_comments(raw) for raw in program) if line)
+    for line in lines:
+        estimator.update(line)
+    return estimator.finish()
+
+
+def _axis_limit(values, unit):
+    """GRBL's limit_value_by_axis_maximum()."""
+    best = _LARGE
+    for value, component in zip(values, unit):
+        if component:
+            best = min(best, value / abs(component))
+    return best
+
+
+def _direction(start, end):
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    dz = end[2] - start[2]
+    span = math.sqrt(dx * dx + dy * dy + dz * dz)
+    if not span:
+        return 0.0, (0.0, 0.0, 0.0)
+    return span, (dx / span, dy / span, dz / span)
+
+
+def _block_time(length, accel, entry, leave, nominal):
+    """Seconds for a trapezoid/triangle profile; speeds are squared mm/s."""
+    v0 = math.sqrt(entry)
+    v1 = math.sqrt(leave)
+    speeding = (nominal - entry) / (2.0 * accel)
+    braking = (nominal - leave) / (2.0 * accel)
+    if speeding + braking <= length:
+        cruise = math.sqrt(nominal)
+        return (cruise - v0) / accel + (cruise - v1) / accel + (length - speeding - braking) / cruise
+    peak = math.sqrt(max((2.0 * accel * length + entry + leave) / 2.0, 0.0))
+    return (peak - v0) / accel + (peak - v1) / accel
+
+
+def _mark(line_ends, elapsed, line, seconds):
+    if line_ends and line_ends[-1] == line:
+        elapsed[-1] = seconds
+    else:
+        line_ends.append(line)
+        elapsed.append(seconds)
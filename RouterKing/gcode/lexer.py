@@ -0,0 +1,23 @@
+"""Single-pass G-code lexer shared by the parser, modal tracker and CAM checks.
+
+One compiled scanner walks a raw line once: ``(...)`` and ``;`` comments,
+``*NN`` checksums, ``%`` markers and ``/`` block-delete marks are skipped,
+and every address word (``N``, ``G``, ``M``, ``X``, ``F``, ``S``, ``T``, ...)
+comes back as an upper-case ``(letter, float)`` pair. Spaces between a
+letter and its number are allowed, as in GRBL.
+
+The scanner's groups hand back letter and number directly, so each word is
+matched once. Nothing is cached: CAM coordinates rarely repeat, and a cache
+that misses on nearly every line costs more than it saves.
+"""
+
+import re
+
+# Comments and checksums match with empty groups so the words inside them
+# are never seen. Lines are upper-cased first, so letters need no .upper().
+_TOKEN_RE = re.compile(r"\([^)]*\)|;.*|\*\d*|([A-Z])\s*([-+]?\d*\.?\d+)")
+
+
+def lex_line(line):
+    """Return the ``(letter, value)`` words of one raw G-code line as a tuple."""
+    return tuple([(letter, float(number)) for letter, number in _TOKEN_RE.findall(line.upper()) if letter])
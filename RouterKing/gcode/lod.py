@@ -0,0 +1,150 @@
+"""Level-of-detail pyramid for zoom-dependent toolpath previews.
+
+Level ``k`` is the path simplified for a screen tolerance of ``finest *
+factor ** (k - 1)`` mm: segment end points are snapped to a grid of that
+size, segments that collapse to a point are dropped and duplicates are
+merged. Shared end points snap alike, so polylines stay connected and stay
+within the tolerance of the original; dense zig-zags collapse onto grid
+edges, which bounds the segment count of a level by the number of grid
+cells it covers rather than by the program size. Rapids and cuts are
+snapped separately and never merged into each other.
+
+Levels are built lazily, each from the nearest finer one already built,
+and each gets its own ``SegmentIndex`` for culling. Level 0 is the
+original path.
+"""
+
+from array import array
+import math
+
+try:
+    from .parser import FLAG_RAPID, GcodePath
+    from .spatial import SegmentIndex
+except ImportError:
+    from gcode.parser import FLAG_RAPID, GcodePath
+    from gcode.spatial import SegmentIndex
+
+try:  # Optional fast path.
+    import numpy as np
+except Exception:  # pragma: no cover - numpy not installed
+    np = None
+
+# The finest level snaps to 1/16384 of the path extent (a few pixels of a
+# full view on any screen); each level is ``DEFAULT_FACTOR`` times coarser.
+DEFAULT_DIVISIONS = 16384
+DEFAULT_FACTOR = 4.0
+
+
+class LodLevel:
+    """One level: a simplified ``GcodePath`` and its lazily built index."""
+
+    def __init__(self, tolerance, path):
+        self.tolerance = tolerance
+        self.path = path
+        self._index = None
+
+    def __len__(self):
+        return len(self.path)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = SegmentIndex(self.path)
+        return self._index
+
+    def visible(self, x0, y0, x1, y1):
+        """Indices of this level's segments inside the window."""
+        return self.index.window(x0, y0, x1, y1)
+
+
+class LodPyramid:
+    """Simplified copies of a ``GcodePath`` for increasing view scales.
+
+    ``levels`` maps level numbers to the ``LodLevel``s built so far.
+    """
+
+    def __init__(self, path, finest=None, factor=DEFAULT_FACTOR):
+        self.path = path
+        self.factor = max(1.5, float(factor))
+        bounds = path.bounds()
+        self.extent = max(bounds[2] - bounds[0], bounds[3] - bounds[1]) if bounds else 0.0
+        self.finest = finest or (self.extent / DEFAULT_DIVISIONS if self.extent else 1.0)
+        self.levels = {0: LodLevel(0.0, path)}
+
+    def tolerance(self, level):
+        return self.finest * self.factor ** (level - 1) if level else 0.0
+
+    def level_for(self, tolerance):
+        """Coarsest level whose error stays within ``tolerance`` mm.
+
+        The level is built on first use from the nearest finer one; levels
+        stop once the grid is as coarse as the path itself.
+        """
+        if tolerance < self.finest or self.extent <= 0.0:
+            return self.levels[0]
+        level = int(math.floor(math.log(tolerance / self.finest) / math.log(self.factor) + 1e-9)) + 1
+        level = min(level, int(math.ceil(math.log(DEFAULT_DIVISIONS) / math.log(self.factor))) + 1)
+        if level not in self.levels:
+            source = self.levels[max(known for known in self.levels if known < level)]
+            grid = self.tolerance(level)
+            self.levels[level] = LodLevel(grid, simplify_path(source.path, grid))
+        return self.levels[level]
+
+
+def simplify_path(path, tolerance):
+    """Snap ``path`` to a ``tolerance`` grid and merge what coincides.
+
+    Each kept segment remembers the source line of the first segment that
+    produced it.
+    """
+    result = GcodePath()
+    if not len(path):
+        return result
+    if np is not None:
+        coords = np.frombuffer(path._coords, dtype=np.float64).reshape(-1, 4)
+        flags = np.frombuffer(path._flags, dtype=np.uint8) & FLAG_RAPID
+        lines = np.frombuffer(path._lines, dtype=np.uint32)
+        cells = np.round(coords / tolerance).astype(np.int64)
+        keep = (cells[:, 0] != cells[:, 2]) | (cells[:, 1] != cells[:, 3])
+        cells = cells[keep]
+        # Direction does not matter for drawing; order the end points so
+        # A->B and B->A merge.
+        swap = (cells[:, 0] > cells[:, 2]) | ((cells[:, 0] == cells[:, 2]) & (cells[:, 1] > cells[:, 3]))
+        cells[swap] = cells[swap][:, [2, 3, 0, 1]]
+        keys = np.column_stack((cells, flags[keep]))
+        _, first = np.unique(keys, axis=0, return_index=True)
+        first.sort()
+        result._coords = array("d", (cells[first] * tolerance).astype(np.float64).tobytes())
+        result._flags = bytearray(flags[keep][first].tobytes())
+        result._lines = array("I", lines[keep][first].astype(np.uint32).tobytes())
+        return result
+    coords = path._coords
+    flags = path._flags
+    seen = set()
+    for index in range(len(path)):
+        base = index * 4
+        a = (round(coords[base] / tolerance), round(coords[base + 1] / tolerance))
+        b = (round(coords[base + 2] / tolerance), round(coords[base + 3] / tolerance))
+        if a == b:
+            continue
+        if b < a:
+            a, b = b, a
+        rapid = flags[index] & FLAG_RAPID
+        key = (a, b, rapid)
+        if key in seen:
+            continue
+        seen.add(key)
+        result.add_segment(
+            a[0] * tolerance,
+            a[1] * tolerance,
+            b[0] * tolerance,
+            b[1] * tolerance,
+            rapid=bool(rapid),
+            line=path.source_line(index),
+        )
+    return result
+
+
+def pixel_tolerance(scale, pixels=1.0):
+    """Millimetres covered by ``pixels`` at a view scale of pixels per mm."""
+    return pixels / abs(scale) if scale else math.inf
@@ -0,0 +1,231 @@
+"""Modal G-code state tracking for job bundles, resume and estimates."""
+
+from dataclasses import asdict, dataclass, fields
+import math
+
+try:
+    from .lexer import lex_line
+    from .toolpath import NON_MOTION_CODES, arc_delta
+except ImportError:
+    from gcode.lexer import lex_line
+    from gcode.toolpath import NON_MOTION_CODES, arc_delta
+
+
+# Plane -> (first axis, second axis, linear axis, first offset, second offset).
+_PLANES = {
+    "G17": ("x", "y", "z", "I", "J"),
+    "G18": ("z", "x", "y", "K", "I"),
+    "G19": ("y", "z", "x", "J", "K"),
+}
+# Rapid rate used for estimates when the machine's $110-$112 are unknown.
+DEFAULT_RAPID_RATE = 3000.0
+_MOTIONS = {0: "G0", 1: "G1", 2: "G2", 3: "G3", 38.2: "G38.2", 38.3: "G38.3", 38.4: "G38.4", 38.5: "G38.5"}
+
+
+@dataclass
+class Move:
+    motion: str
+    start: tuple
+    end: tuple
+    length: float
+    feed: float
+    dwell: float = 0.0
+    # Arcs only: (first axis, second axis, linear axis, center first,
+    # center second, radius, signed sweep in radians); axes are 0/1/2.
+    arc: tuple = None
+
+
+@dataclass
+class ModalState:
+    """GRBL modal groups plus the programmed position (work mm).
+
+    ``feed`` is stored in mm/min so estimates do not depend on G20/G21.
+    """
+
+    motion: str = "G0"
+    plane: str = "G17"
+    units: str = "G21"
+    distance: str = "G90"
+    feed_mode: str = "G94"
+    wcs: str = "G54"
+    spindle: str = "M5"
+    mist: bool = False
+    flood: bool = False
+    feed: float = 0.0
+    speed: float = 0.0
+    tool: int = 0
+    x: float = 0.0
+    y: float = 0.0
+    z: float = 0.0
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {item.name for item in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    def copy(self):
+        return ModalState(**asdict(self))
+
+    @property
+    def scale(self):
+        return 25.4 if self.units == "G20" else 1.0
+
+    def position(self):
+        return (self.x, self.y, self.z)
+
+    def update(self, line):
+        """Apply one sanitized line; return the resulting ``Move`` or ``None``."""
+        words = lex_line(line)
+        if not words:
+            return None
+        motion = None
+        dwell = None
+        skip_position = False
+        set_offset = False
+        coords = {}
+        for letter, value in words:
+            if letter == "G":
+                code = round(value, 1)
+                if code in _MOTIONS:
+                    motion = _MOTIONS[code]
+                elif code == 80:
+                    self.motion = "G80"
+                elif code in (17, 18, 19):
+                    self.plane = f"G{int(code)}"
+                elif code in (20, 21):
+                    self.units = f"G{int(code)}"
+                elif code in (90, 91):
+                    self.distance = f"G{int(code)}"
+                elif code in (93, 94):
+                    self.feed_mode = f"G{int(code)}"
+                elif code in (54, 55, 56, 57, 58, 59):
+                    self.wcs = f"G{int(code)}"
+                elif code == 4:
+                    dwell = 0.0
+                elif code in NON_MOTION_CODES:
+                    skip_position = True
+                elif code == 92:
+                    set_offset = True
+            elif letter == "M":
+                code = int(round(value))
+                if code in (3, 4, 5):
+                    self.spindle = f"M{code}"
+                elif code == 7:
+                    self.mist = True
+                elif code == 8:
+                    self.flood = True
+                elif code == 9:
+                    self.mist = self.flood = False
+                elif code in (2, 30):
+                    self._program_end()
+            elif letter == "F":
+                self.feed = value * self.scale
+            elif letter == "S":
+                self.speed = value
+            elif letter == "T":
+                self.tool = int(value)
+            else:
+                coords[letter] = value
+
+        if dwell is not None:
+            return Move("G4", self.position(), self.position(), 0.0, 0.0, coords.get("P", 0.0))
+        axes = {axis: coords[axis.upper()] * self.scale for axis in "xyz" if axis.upper() in coords}
+        if set_offset:
+            for axis, value in axes.items():
+                setattr(self, axis, value)
+            return None
+        if motion is not None:
+            self.motion = motion
+        if skip_position or not axes or self.motion == "G80":
+            return None
+        start = self.position()
+        for axis, value in axes.items():
+            if self.distance == "G91":
+                value += getattr(self, axis)
+            setattr(self, axis, value)
+        end = self.position()
+        length, arc = _length(self, start, end, coords)
+        return Move(self.motion, start, end, length, self.feed, arc=arc)
+
+    def preamble(self):
+        """Lines that restore the modal groups (not the position)."""
+        lines = [f"{self.units} {self.distance} {self.plane} {self.feed_mode} {self.wcs}"]
+        if self.tool:
+            lines.append(f"T{self.tool}")
+        if self.spindle != "M5":
+            lines.append(f"{self.spindle} S{_fmt(self.speed)}")
+        elif self.speed:
+            lines.append(f"S{_fmt(self.speed)}")
+        coolant = " ".join(code for code, on in (("M7", self.mist), ("M8", self.flood)) if on)
+        if coolant:
+            lines.append(coolant)
+        if self.feed:
+            lines.append(f"F{_fmt(self.feed / self.scale)}")
+        if self.motion in ("G0", "G1"):
+            lines.append(self.motion)
+        return lines
+
+    def _program_end(self):
+        self.motion = "G1"
+        self.plane = "G17"
+        self.distance = "G90"
+        self.feed_mode = "G94"
+        self.wcs = "G54"
+        self.spindle = "M5"
+        self.mist = self.flood = False
+
+
+def move_time(move, rapid_rate=DEFAULT_RAPID_RATE):
+    """Seconds for a move at its programmed feed (no acceleration)."""
+    if move.dwell:
+        return move.dwell
+    rate = rapid_rate if move.motion == "G0" or not move.feed else move.feed
+    return 60.0 * move.length / rate if rate > 0 else 0.0
+
+
+def _length(state, start, end, coords):
+    """Return the path length and, for arcs, the ``Move.arc`` geometry."""
+    straight = math.dist(start, end)
+    if state.motion not in ("G2", "G3"):
+        return straight, None
+    first, second, linear, off1, off2 = _PLANES[state.plane]
+    index = {"x": 0, "y": 1, "z": 2}
+    a0, b0 = start[index[first]], start[index[second]]
+    a1, b1 = end[index[first]], end[index[second]]
+    height = end[index[linear]] - start[index[linear]]
+    cw = state.motion == "G2"
+    if off1 in coords or off2 in coords:
+        ca = a0 + coords.get(off1, 0.0) * state.scale
+        cb = b0 + coords.get(off2, 0.0) * state.scale
+        radius = math.hypot(a0 - ca, b0 - cb)
+        delta = arc_delta(a0, b0, a1, b1, ca, cb, cw=cw)
+        if (a0, b0) == (a1, b1):
+            delta = -2 * math.pi if cw else 2 * math.pi
+    elif "R" in coords:
+        radius = abs(coords["R"]) * state.scale
+        chord = math.hypot(a1 - a0, b1 - b0)
+        if not radius or chord > 2 * radius or not chord:
+            return straight, None
+        delta = 2 * math.asin(chord / (2 * radius))
+        if coords["R"] < 0:
+            delta = 2 * math.pi - delta
+        # Center on the left of the chord for CCW minor arcs, mirrored for
+        # CW and for major (negative R) arcs.
+        offset = math.sqrt(max(radius * radius - chord * chord / 4.0, 0.0))
+        side = (1.0 if not cw else -1.0) * (1.0 if coords["R"] >= 0 else -1.0)
+        ca = (a0 + a1) / 2.0 - side * offset * (b1 - b0) / chord
+        cb = (b0 + b1) / 2.0 + side * offset * (a1 - a0) / chord
+        if cw:
+            delta = -delta
+    else:
+        return straight, None
+    arc = (index[first], index[second], index[linear], ca, cb, radius, delta)
+    return math.hypot(radius * abs(delta), height), arc
+
+
+def _fmt(value):
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return text if text not in ("", "-0") else "0"
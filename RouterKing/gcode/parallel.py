@@ -0,0 +1,311 @@
+"""Parse large G-code files on several cores.
+
+The file is cut into byte ranges at line starts. The parser state at each
+cut is recovered cheaply: distance mode, units and plane from a regex
+pass over the mapped bytes, motion and position from the few lines just
+before the cut (CAM output restates them constantly). Only cuts that such a window
+cannot pin down fall back to scanning the previous chunk with a state-only
+parser. The chunks are then parsed in a process pool from those
+states and their segment arrays concatenated in order. The result is
+identical to ``parse_gcode_file``. ``parse_program_parallel`` also records
+the moves and checkpoints (``parse_program_file``); there the feed at each
+cut comes from the last ``F`` word before it.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import bisect
+import math
+import mmap
+import multiprocessing
+import os
+import re
+
+try:
+    from .lexer import lex_line
+    from .parser import (
+        ARC_TOLERANCE,
+        CHECKPOINT_INTERVAL,
+        GcodePath,
+        ParsedProgram,
+        _iter_raw_file,
+        _Parser,
+        parse_gcode_file,
+        parse_program_file,
+    )
+    from .toolpath import Toolpath
+except ImportError:
+    from gcode.lexer import lex_line
+    from gcode.parser import (
+        ARC_TOLERANCE,
+        CHECKPOINT_INTERVAL,
+        GcodePath,
+        ParsedProgram,
+        _iter_raw_file,
+        _Parser,
+        parse_gcode_file,
+        parse_program_file,
+    )
+    from gcode.toolpath import Toolpath
+
+# Below this size process start-up costs more than it saves.
+MIN_PARALLEL_BYTES = 8 * 1024 * 1024
+_CHUNKS_PER_WORKER = 4
+_MODE_RE = re.compile(rb"([Gg])\s*0*(1[789]|2[01]|9[01])(?![\d.])|([Mm])\s*0*(2|30)(?![\d.])")
+# (letter, code) -> the (key, value) pairs it sets in the mode marks.
+_MODE_WORDS = {
+    ("G", 17.0): (("plane", 17),),
+    ("G", 18.0): (("plane", 18),),
+    ("G", 19.0): (("plane", 19),),
+    ("G", 20.0): (("units", 25.4),),
+    ("G", 21.0): (("units", 1.0),),
+    ("G", 90.0): (("absolute", True),),
+    ("G", 91.0): (("absolute", False),),
+    # Program end resets distance mode and plane.
+    ("M", 2.0): (("absolute", True), ("plane", 17)),
+    ("M", 30.0): (("absolute", True), ("plane", 17)),
+}
+
+
+def parse_gcode_parallel(
+    path,
+    workers=None,
+    arc_tolerance=ARC_TOLERANCE,
+    min_bytes=MIN_PARALLEL_BYTES,
+    start_method="spawn",
+    python_executable=None,
+):
+    """Parse ``path`` into a ``GcodePath`` using up to ``workers`` processes.
+
+    Small files, ``workers=1`` and a pool that cannot be started fall back
+    to ``parse_gcode_file``. ``python_executable`` is passed on to
+    ``multiprocessing`` for hosts (like FreeCAD) whose ``sys.executable`` is
+    not a Python interpreter.
+    """
+    return _parse_parallel(path, None, workers, arc_tolerance, min_bytes, start_method, python_executable)
+
+
+def parse_program_parallel(
+    path,
+    workers=None,
+    arc_tolerance=ARC_TOLERANCE,
+    min_bytes=MIN_PARALLEL_BYTES,
+    start_method="spawn",
+    python_executable=None,
+    checkpoint_interval=CHECKPOINT_INTERVAL,
+):
+    """Parse ``path`` into a ``ParsedProgram`` using up to ``workers`` processes.
+
+    Same options and fallbacks as ``parse_gcode_parallel``; the result
+    matches ``parse_program_file`` except that every chunk also starts a
+    new checkpoint.
+    """
+    return _parse_parallel(
+        path, checkpoint_interval, workers, arc_tolerance, min_bytes, start_method, python_executable
+    )
+
+
+def _parse_parallel(path, checkpoint_interval, workers, arc_tolerance, min_bytes, start_method, python_executable):
+    program = checkpoint_interval is not None
+
+    def parse_in_process():
+        if program:
+            return parse_program_file(path, arc_tolerance, checkpoint_interval)
+        return parse_gcode_file(path, arc_tolerance)
+
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    if workers < 2 or size < max(min_bytes, 1):
+        return parse_in_process()
+    cuts = chunk_offsets(path, workers * _CHUNKS_PER_WORKER)
+    states = _scan_states(path, cuts, arc_tolerance)
+    feeds = _scan_feeds(path, cuts) if program else [0.0] * len(states)
+    jobs = [
+        (path, start, stop, state, feed, arc_tolerance, checkpoint_interval)
+        for (start, stop), state, feed in zip(zip(cuts, cuts[1:]), states, feeds)
+    ]
+    context = multiprocessing.get_context(start_method)
+    if python_executable:
+        context.set_executable(python_executable)
+    result = GcodePath()
+    toolpath = Toolpath()
+    checkpoints = []
+    lines = 0
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+            for part, count, moves, marks in pool.map(_parse_chunk, jobs):
+                if program:
+                    # Chunk checkpoints count from the chunk start.
+                    for mark in marks:
+                        mark.line += lines
+                        mark.segment += len(result)
+                        mark.move += len(toolpath)
+                        mark.blocks += toolpath.blocks
+                    checkpoints += marks
+                    toolpath.extend(moves, lines)
+                result.extend(part, lines)
+                lines += count
+    except (OSError, RuntimeError, ImportError):
+        # No usable worker processes on this host; parse in-process.
+        return parse_in_process()
+    if program:
+        return ParsedProgram(result, toolpath, checkpoints, lines)
+    return result
+
+
+def chunk_offsets(path, count):
+    """Return ``count + 1`` (or fewer) ascending line-start byte offsets."""
+    size = os.path.getsize(path)
+    offsets = [0]
+    if size == 0:
+        return offsets
+    with open(path, "rb") as handle:
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for step in range(1, max(1, count)):
+                newline = data.find(b"\n", max(size * step // count, offsets[-1]))
+                if newline < 0 or newline + 1 >= size:
+                    break
+                if newline + 1 > offsets[-1]:
+                    offsets.append(newline + 1)
+        finally:
+            data.close()
+    offsets.append(size)
+    return offsets
+
+
+class _StateScanner(_Parser):
+    """Preview parser that only tracks state."""
+
+    resolve_arcs = False
+
+    def _emit(self, move):
+        pass
+
+
+def _scan_states(path, cuts, arc_tolerance):
+    scanner = _StateScanner(arc_tolerance)
+    states = [scanner.state()]
+    with open(path, "rb") as handle:
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            marks = _mode_marks(data)
+            for floor, cut in zip(cuts, cuts[1:-1]):
+                state = _window_state(path, data, floor, cut, scanner, marks)
+                if state is None:
+                    scanner.restore(states[-1])
+                    for raw in _iter_raw_file(path, floor, cut):
+                        scanner.handle_line(raw)
+                    state = scanner.state()
+                states.append(state)
+        finally:
+            data.close()
+    return states
+
+
+def _mode_marks(data):
+    """Find every G17-G21/G90/G91/M2/M30 line with one pass of the regex engine.
+
+    Returns ``{"absolute": (offsets, values), "units": ..., "plane": ...}``
+    keyed by line-start offset. Hits inside comments are discarded by
+    lexing the line.
+    """
+    marks = {"absolute": ([], []), "units": ([], []), "plane": ([], [])}
+    for match in _MODE_RE.finditer(data):
+        start = data.rfind(b"\n", 0, match.start()) + 1
+        end = data.find(b"\n", match.end())
+        words = lex_line(data[start : end if end >= 0 else len(data)].decode("utf-8", errors="replace"))
+        if match.group(1):
+            word = ("G", float(match.group(2)))
+        else:
+            word = ("M", float(match.group(4)))
+        if word not in words:
+            continue
+        for key, value in _MODE_WORDS[word]:
+            offsets, values = marks[key]
+            if offsets and offsets[-1] == start:
+                # Several words on one line: the parser applies them in order.
+                values[-1] = value
+            else:
+                offsets.append(start)
+                values.append(value)
+    return marks
+
+
+def _mode_at(marks, key, offset, default):
+    offsets, values = marks[key]
+    slot = bisect.bisect_left(offsets, offset)
+    return values[slot - 1] if slot else default
+
+
+def _window_state(path, data, floor, cut, scanner, marks, lines=64):
+    """Resolve the state at ``cut`` from the lines just before it, if possible.
+
+    Distance mode, units and plane at the window start come from
+    ``marks``; the window is replayed from an unknown motion and NaN
+    position. Unknowns
+    stay unknown until a word sets them, so a fully known result is exact.
+    Windows that would reach ``floor`` give up and leave the cut to the
+    sequential scan.
+    """
+    while True:
+        start = cut
+        for _ in range(lines):
+            if start <= floor:
+                return None
+            newline = data.rfind(b"\n", floor, start - 1)
+            start = newline + 1 if newline >= 0 else floor
+        absolute = _mode_at(marks, "absolute", start, True)
+        units = _mode_at(marks, "units", start, 1.0)
+        plane = _mode_at(marks, "plane", start, 17)
+        scanner.restore((absolute, units, plane, None, math.nan, math.nan, math.nan))
+        for raw in _iter_raw_file(path, start, cut):
+            scanner.handle_line(raw)
+        state = scanner.state()
+        if state[3] is not None and not any(map(math.isnan, state[4:])):
+            return state
+        lines *= 4
+
+
+def _scan_feeds(path, cuts):
+    """Feed rate in effect at each chunk start."""
+    feeds = [0.0]
+    with open(path, "rb") as handle:
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            feeds += [_feed_at(data, cut) for cut in cuts[1:-1]]
+        finally:
+            data.close()
+    return feeds
+
+
+def _feed_at(data, cut):
+    """Value of the last ``F`` word before ``cut`` outside comments, else 0."""
+    end = cut
+    while end > 0:
+        hit = max(data.rfind(b"F", 0, end), data.rfind(b"f", 0, end))
+        if hit < 0:
+            break
+        start = data.rfind(b"\n", 0, hit) + 1
+        stop = data.find(b"\n", hit, cut)
+        words = lex_line(data[start : stop if stop >= 0 else cut].decode("utf-8", errors="replace"))
+        feeds = [value for letter, value in words if letter == "F"]
+        if feeds:
+            return feeds[-1]
+        end = start
+    return 0.0
+
+
+def _parse_chunk(job):
+    path, start, stop, state, feed, arc_tolerance, checkpoint_interval = job
+    if checkpoint_interval is None:
+        parser = _Parser(arc_tolerance)
+        parser.restore(state)
+        for raw in _iter_raw_file(path, start, stop):
+            parser.handle_line(raw)
+        # Source lines are chunk-relative; the caller adds the lines before it.
+        return parser.path, parser.line, None, None
+    parser = _Parser(arc_tolerance, Toolpath())
+    parser.restore(state)
+    parser.feed = feed
+    checkpoints = parser.parse_checkpointed(_iter_raw_file(path, start, stop), checkpoint_interval)
+    return parser.finish(), parser.line, parser.toolpath, checkpoints
@@ -1,38 +1,215 @@
 """G-code parsing helpers for preview and streaming."""
 
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+import bisect
 import math
+import mmap
 import re
 
-_WORD_RE = re.compile(r"([A-Za-z])([-+]?\d*\.?\d+)")
+try:
+    from .lexer import lex_line
+    from .toolpath import LINEAR, PLANE_AXES, RAPID, Interpreter, Toolpath, shift_lines
+except ImportError:
+    from gcode.lexer import lex_line
+    from gcode.toolpath import LINEAR, PLANE_AXES, RAPID, Interpreter, Toolpath, shift_lines
+
 _COMMENT_RE = re.compile(r"\(.*?\)")
 
 
+FLAG_RAPID = 0x01
+# Maximum distance (mm) between an arc and the chords drawn for it.
+ARC_TOLERANCE = 0.01
+# Lines between parser state checkpoints of an ``IncrementalParser``.
+CHECKPOINT_INTERVAL = 1000
+
+# NumPy module once looked up (``None`` if missing); see ``_numpy()``.
+_NUMPY = False
+
+
+def _numpy():
+    """NumPy for the optional bulk fast paths, or ``None``.
+
+    Imported on first use, not with this module: the headless sender
+    imports the parser and must start without loading NumPy.
+    """
+    global _NUMPY
+    if _NUMPY is False:
+        try:
+            import numpy
+        except Exception:  # pragma: no cover - numpy not installed
+            numpy = None
+        _NUMPY = numpy
+    return _NUMPY
+
+
 class GcodePath:
+    """XY toolpath segments stored column-wise in typed arrays.
+
+    Each segment costs 32 bytes of coordinates (``array('d')``: x0, y0, x1,
+    y1), one flag byte and the 1-based source line it came from
+    (``array('I')``), instead of a tuple of Python floats. Bounds are
+    computed in bulk on demand and only over segments added since the last
+    call. ``segments`` keeps the old list-of-tuples interface.
+    """
+
     def __init__(self):
-        self.segments = []
-        self._min_x = None
-        self._min_y = None
-        self._max_x = None
-        self._max_y = None
+        self._coords = array("d")
+        self._flags = bytearray()
+        self._lines = array("I")
+        self._bounds = None
+        self._bounded = 0
 
-    def add_segment(self, x0, y0, x1, y1, rapid=False):
+    def add_segment(self, x0, y0, x1, y1, rapid=False, line=0):
         if x0 == x1 and y0 == y1:
             return
-        self.segments.append((x0, y0, x1, y1, rapid))
-        for x, y in ((x0, y0), (x1, y1)):
-            if self._min_x is None:
-                self._min_x = self._max_x = x
-                self._min_y = self._max_y = y
-                continue
-            self._min_x = min(self._min_x, x)
-            self._max_x = max(self._max_x, x)
-            self._min_y = min(self._min_y, y)
-            self._max_y = max(self._max_y, y)
+        self._coords.extend((x0, y0, x1, y1))
+        self._flags.append(FLAG_RAPID if rapid else 0)
+        self._lines.append(line)
+
+    def add_polyline(self, x0, y0, xs, ys, rapid=False, line=0):
+        """Add segments from ``(x0, y0)`` through the points ``xs``/``ys``."""
+        np = _numpy()
+        if np is not None and isinstance(xs, np.ndarray):
+            starts_x = np.concatenate(([x0], xs[:-1]))
+            starts_y = np.concatenate(([y0], ys[:-1]))
+            block = np.column_stack((starts_x, starts_y, xs, ys))
+            block = block[(starts_x != xs) | (starts_y != ys)]
+            self._coords.frombytes(block.astype(np.float64).tobytes())
+            self._flags.extend(bytes([FLAG_RAPID if rapid else 0]) * len(block))
+            self._lines.extend(array("I", [line]) * len(block))
+            return
+        for x1, y1 in zip(xs, ys):
+            self.add_segment(x0, y0, x1, y1, rapid=rapid, line=line)
+            x0, y0 = x1, y1
+
+    def extend(self, other, line_offset=0):
+        """Append all segments of ``other``, shifting its source lines."""
+        self._coords.extend(other._coords)
+        self._flags.extend(other._flags)
+        self._lines.extend(shift_lines(other._lines, line_offset))
+
+    def splice(self, start, stop, other, line_shift=0):
+        """Replace segments ``start:stop`` with all segments of ``other``.
+
+        Source lines of the segments after ``stop`` move by ``line_shift``
+        (lines inserted minus lines removed by the edit).
+        """
+        self._coords[start * 4 : stop * 4] = other._coords
+        self._flags[start:stop] = other._flags
+        tail = start + len(other._lines)
+        self._lines[start:stop] = other._lines
+        if line_shift:
+            self._lines[tail:] = shift_lines(self._lines[tail:], line_shift)
+        # Removed segments may have defined the box; recompute lazily.
+        self._bounds = None
+        self._bounded = 0
+
+    def source_line(self, index):
+        """1-based source line of segment ``index`` (0 if unknown)."""
+        return self._lines[index]
+
+    def __len__(self):
+        return len(self._flags)
+
+    @property
+    def segments(self):
+        return _SegmentView(self)
+
+    def segment(self, index):
+        base = index * 4
+        coords = self._coords
+        return (
+            coords[base],
+            coords[base + 1],
+            coords[base + 2],
+            coords[base + 3],
+            bool(self._flags[index] & FLAG_RAPID),
+        )
+
+    def iter_segments(self, start=0, stop=None):
+        coords = self._coords
+        flags = self._flags
+        stop = len(flags) if stop is None else min(stop, len(flags))
+        for index in range(max(start, 0), stop):
+            base = index * 4
+            yield (
+                coords[base],
+                coords[base + 1],
+                coords[base + 2],
+                coords[base + 3],
+                bool(flags[index] & FLAG_RAPID),
+            )
+
+    def as_arrays(self):
+        """Return ``(coords, flags)`` for bulk processing.
+
+        With NumPy these are an ``(n, 4)`` float64 array and a uint8 array
+        (snapshots: exported views would pin the buffers and block
+        ``add_segment``); otherwise the live flat ``array('d')`` and
+        ``bytearray``.
+        """
+        np = _numpy()
+        if np is not None:
+            coords = np.array(self._coords, dtype=np.float64).reshape(-1, 4)
+            return coords, np.array(self._flags, dtype=np.uint8)
+        return self._coords, self._flags
 
     def bounds(self):
-        if self._min_x is None:
-            return None
-        return (self._min_x, self._min_y, self._max_x, self._max_y)
+        count = len(self._flags)
+        if self._bounded < count:
+            pending = self._coords[self._bounded * 4 : count * 4]
+            np = _numpy()
+            if np is not None:
+                points = np.frombuffer(pending, dtype=np.float64).reshape(-1, 2)
+                low = points.min(axis=0)
+                high = points.max(axis=0)
+                box = (float(low[0]), float(low[1]), float(high[0]), float(high[1]))
+            else:
+                xs = pending[0::2]
+                ys = pending[1::2]
+                box = (min(xs), min(ys), max(xs), max(ys))
+            if self._bounds is not None:
+                box = (
+                    min(box[0], self._bounds[0]),
+                    min(box[1], self._bounds[1]),
+                    max(box[2], self._bounds[2]),
+                    max(box[3], self._bounds[3]),
+                )
+            self._bounds = box
+            self._bounded = count
+        return self._bounds
+
+
+class _SegmentView(Sequence):
+    """Read-only ``(x0, y0, x1, y1, rapid)`` sequence over a ``GcodePath``."""
+
+    def __init__(self, path):
+        self._path = path
+
+    def __len__(self):
+        return len(self._path)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._path.segment(item) for item in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return self._path.segment(index)
+
+    def __iter__(self):
+        return self._path.iter_segments()
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"<{len(self)} segments>"
 
 
 def strip_comments(line):
@@ -49,144 +226,366 @@ def iter_gcode_lines(text):
             yield line
 
 
-def parse_gcode(text):
-    parser = _Parser()
-    for line in iter_gcode_lines(text):
-        parser.handle_line(line)
-    return parser.path
+def iter_gcode_file(path):
+    """Yield sanitized lines of a G-code file without reading it into a ``str``.
 
+    The file is memory-mapped and split into byte lines in place, so only
+    the current line is ever decoded.
+    """
+    for raw in _iter_raw_file(path):
+        line = strip_comments(raw)
+        if line:
+            yield line
 
-class _Parser:
-    def __init__(self):
+
+def _iter_raw_file(path, start=0, stop=None):
+    """Yield decoded raw lines of ``path`` between two line-start offsets."""
+    with open(path, "rb") as handle:
+        try:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return
+        try:
+            size = len(data) if stop is None else min(stop, len(data))
+            while start < size:
+                end = data.find(b"\n", start, size)
+                if end < 0:
+                    end = size
+                raw = data[start:end]
+                start = end + 1
+                if raw.endswith(b"\r"):
+                    raw = raw[:-1]
+                # Also split on bare CR, like str.splitlines().
+                for piece in raw.split(b"\r"):
+                    yield piece.decode("utf-8", errors="replace")
+        finally:
+            data.close()
+
+
+def parse_gcode(text, arc_tolerance=ARC_TOLERANCE, toolpath=None):
+    """Parse ``text`` into a ``GcodePath``; moves also go into ``toolpath`` if given."""
+    parser = _Parser(arc_tolerance, toolpath)
+    for raw in text.splitlines():
+        parser.handle_line(raw)
+    return parser.finish()
+
+
+def parse_gcode_file(path, arc_tolerance=ARC_TOLERANCE, toolpath=None):
+    """Parse a G-code file into a ``GcodePath`` in one streaming pass.
+
+    Same result as ``parse_gcode(open(path).read())``, but memory use is
+    bounded by the path, not the size of the file.
+    """
+    parser = _Parser(arc_tolerance, toolpath)
+    for raw in _iter_raw_file(path):
+        parser.handle_line(raw)
+    return parser.finish()
+
+
+def parse_program_file(path, arc_tolerance=ARC_TOLERANCE, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """Parse a G-code file into a ``ParsedProgram`` in one streaming pass.
+
+    Like ``parse_gcode_file``, but the moves are also recorded and the
+    parser state is checkpointed, so an ``IncrementalParser`` can be seeded
+    with the result instead of parsing the program again.
+    """
+    parser = _Parser(arc_tolerance, Toolpath())
+    checkpoints = parser.parse_checkpointed(_iter_raw_file(path), checkpoint_interval)
+    return ParsedProgram(parser.finish(), parser.toolpath, checkpoints, parser.line)
+
+
+@dataclass
+class _Checkpoint:
+    line: int
+    state: tuple
+    segment: int
+    move: int = 0
+    feed: float = 0.0
+    blocks: int = 0
+
+
+@dataclass
+class ParsedProgram:
+    """A parse that ``IncrementalParser.seed()`` can continue from.
+
+    ``checkpoints`` hold the parser state at line 0 and at intervals after
+    it; ``lines`` is the number of source lines parsed.
+    """
+
+    path: GcodePath
+    toolpath: Toolpath
+    checkpoints: list
+    lines: int
+
+
+class IncrementalParser:
+    """Keep a ``GcodePath`` and its ``Toolpath`` in sync with an edited program.
+
+    Parser state is checkpointed every ``checkpoint_interval`` lines. An
+    edit re-parses from the last checkpoint before it and stops at the
+    first checkpoint after it whose state is unchanged; only that range of
+    segments and moves is replaced in ``path`` and ``toolpath``.
+    ``reparsed`` is the number of lines the last update went through.
+    """
+
+    def __init__(self, arc_tolerance=ARC_TOLERANCE, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.arc_tolerance = arc_tolerance
+        self.checkpoint_interval = max(1, int(checkpoint_interval))
         self.path = GcodePath()
-        self.absolute = True
-        self.units = 1.0
-        self.motion = 0
-        self.x = 0.0
-        self.y = 0.0
-        self.z = 0.0
+        self.toolpath = Toolpath()
+        self.lines = []
+        self.reparsed = 0
+        self._checkpoints = [_Parser(arc_tolerance).checkpoint()]
+
+    def seed(self, text, program):
+        """Take over ``program``, a parse of ``text``, and return its path.
+
+        Nothing is re-parsed, so loading a file costs one parse for the
+        preview and the CAM analysis together. A ``program`` that does not
+        have one line per line of ``text`` is ignored and ``text`` is
+        parsed from scratch.
+        """
+        lines = text.splitlines()
+        if program.lines != len(lines) or not program.checkpoints:
+            self.path = GcodePath()
+            self.toolpath = Toolpath()
+            self.lines = []
+            self._checkpoints = [_Parser(self.arc_tolerance).checkpoint()]
+            return self.update(text)
+        self.path = program.path
+        self.toolpath = program.toolpath
+        self.lines = lines
+        self.reparsed = 0
+        self._checkpoints = list(program.checkpoints)
+        return self.path
+
+    def update(self, text):
+        """Bring the path up to date with ``text`` and return it."""
+        lines = text.splitlines()
+        old = self.lines
+        limit = min(len(old), len(lines))
+        first = 0
+        while first < limit and old[first] == lines[first]:
+            first += 1
+        if first == len(old) == len(lines):
+            self.reparsed = 0
+            return self.path
+        tail = 0
+        while tail < limit - first and old[-1 - tail] == lines[-1 - tail]:
+            tail += 1
+        return self.edit(first, len(old) - tail, lines[first : len(lines) - tail])
+
+    def edit(self, start, stop, new_lines):
+        """Replace lines ``start:stop`` with ``new_lines`` and return the path."""
+        new_lines = list(new_lines)
+        delta = len(new_lines) - (stop - start)
+        self.lines[start:stop] = new_lines
+        checkpoints = self._checkpoints
+        keep = bisect.bisect_right([item.line for item in checkpoints], start)
+        base = checkpoints[keep - 1]
+        later = [item for item in checkpoints[keep:] if item.line >= stop]
+
+        parser = _Parser(self.arc_tolerance, Toolpath())
+        parser.restore(base.state)
+        parser.line = base.line
+        parser.feed = base.feed
+        parser.blocks = base.blocks
+        fresh = []
+        lines = self.lines
+        edit_end = start + len(new_lines)
+        index = base.line
+        last = base.line
+        pending = 0
+        converged = None
+        while index < len(lines):
+            if index >= edit_end:
+                while pending < len(later) and later[pending].line + delta < index:
+                    pending += 1
+                if pending < len(later) and later[pending].line + delta == index:
+                    # The toolpath records feeds, so they must match too.
+                    if later[pending].state == parser.state() and later[pending].feed == parser.feed:
+                        converged = pending
+                        break
+            if index - last >= self.checkpoint_interval:
+                fresh.append(
+                    _Checkpoint(
+                        index,
+                        parser.state(),
+                        base.segment + len(parser.path),
+                        base.move + len(parser.toolpath),
+                        parser.feed,
+                        parser.blocks,
+                    )
+                )
+                last = index
+            parser.handle_line(lines[index])
+            index += 1
+        self.reparsed = index - base.line
+
+        if converged is None:
+            self.path.splice(base.segment, len(self.path), parser.path)
+            self.toolpath.splice(base.move, len(self.toolpath), parser.toolpath)
+            self.toolpath.blocks = parser.blocks
+            self._update_first_block(base, parser, index)
+            self._checkpoints = checkpoints[:keep] + fresh
+            return self.path
+        resume = later[converged]
+        shift = len(parser.path) - (resume.segment - base.segment)
+        move_shift = len(parser.toolpath) - (resume.move - base.move)
+        block_shift = parser.blocks - resume.blocks
+        self.path.splice(base.segment, resume.segment, parser.path, delta)
+        self.toolpath.splice(base.move, resume.move, parser.toolpath, delta)
+        self.toolpath.blocks += block_shift
+        self._update_first_block(base, parser, index)
+        remaining = later[converged:]
+        for item in remaining:
+            item.line += delta
+            item.segment += shift
+            item.move += move_shift
+            item.blocks += block_shift
+        self._checkpoints = checkpoints[:keep] + fresh + remaining
+        return self.path
+
+    def _update_first_block(self, base, parser, index):
+        if base.blocks:
+            # The first block lies before the re-parsed lines.
+            return
+        first = parser.first_block
+        if not first and self.toolpath.blocks:
+            # It lies after them; rare, so look for it directly.
+            first = next((number + 1 for number in range(index, len(self.lines)) if lex_line(self.lines[number])), 0)
+        self.toolpath.first_block = first
+
+
+class _Parser(Interpreter):
+    """Tessellate interpreted moves into a ``GcodePath``.
+
+    With a ``toolpath`` the moves are also recorded there, so the preview
+    and the CAM analysis share one interpretation of the program.
+    """
+
+    def __init__(self, arc_tolerance=ARC_TOLERANCE, toolpath=None):
+        super().__init__()
+        self.path = GcodePath()
+        self.arc_tolerance = arc_tolerance
+        self.toolpath = toolpath
 
     def handle_line(self, line):
-        words = _parse_words(line)
-        if not words:
+        move = self.step(line)
+        if move is None:
             return
-        coords = {}
-        for letter, value in words:
-            if letter == "G":
-                code = int(round(value))
-                if code in (0, 1, 2, 3):
-                    self.motion = code
-                elif code == 90:
-                    self.absolute = True
-                elif code == 91:
-                    self.absolute = False
-                elif code == 20:
-                    self.units = 25.4
-                elif code == 21:
-                    self.units = 1.0
-            elif letter in ("X", "Y", "Z", "I", "J", "R"):
-                coords[letter] = value
-
-        x0, y0, z0 = self.x, self.y, self.z
-        x1, y1, z1 = x0, y0, z0
-
-        if "X" in coords:
-            x_val = coords["X"] * self.units
-            x1 = x_val if self.absolute else x1 + x_val
-        if "Y" in coords:
-            y_val = coords["Y"] * self.units
-            y1 = y_val if self.absolute else y1 + y_val
-        if "Z" in coords:
-            z_val = coords["Z"] * self.units
-            z1 = z_val if self.absolute else z1 + z_val
-
-        if self.motion in (0, 1):
-            if (x0, y0) != (x1, y1):
-                self.path.add_segment(x0, y0, x1, y1, rapid=self.motion == 0)
-        elif self.motion in (2, 3):
-            if (x0, y0) != (x1, y1):
-                self._add_arc(x0, y0, x1, y1, coords, cw=self.motion == 2)
-
-        self.x, self.y, self.z = x1, y1, z1
-
-    def _add_arc(self, x0, y0, x1, y1, coords, cw):
-        center = None
-        if "I" in coords or "J" in coords:
-            center = self._center_from_ij(x0, y0, x1, y1, coords, cw)
-        elif "R" in coords:
-            center = self._center_from_r(x0, y0, x1, y1, coords["R"], cw)
-        if center is None:
-            self.path.add_segment(x0, y0, x1, y1, rapid=False)
+        if self.toolpath is not None:
+            self.toolpath.append(move)
+        self._emit(move)
+
+    def checkpoint(self):
+        """The current state as a ``_Checkpoint`` of this parser's output."""
+        moves = len(self.toolpath) if self.toolpath is not None else 0
+        return _Checkpoint(self.line, self.state(), len(self.path), moves, self.feed, self.blocks)
+
+    def parse_checkpointed(self, lines, interval=CHECKPOINT_INTERVAL):
+        """Parse ``lines``; return checkpoints from now and every ``interval`` lines."""
+        checkpoints = [self.checkpoint()]
+        mark = self.line + interval
+        for line in lines:
+            if self.line == mark:
+                checkpoints.append(self.checkpoint())
+                mark += interval
+            self.handle_line(line)
+        return checkpoints
+
+    def finish(self):
+        """Return the path after copying the block count into the toolpath."""
+        if self.toolpath is not None:
+            self.toolpath.blocks = self.blocks
+            self.toolpath.first_block = self.first_block
+        return self.path
+
+    def _emit(self, move):
+        x0, y0, _ = move.start
+        x1, y1, _ = move.end
+        kind = move.kind
+        if kind == LINEAR or kind == RAPID or move.center is None:
+            if x0 != x1 or y0 != y1:
+                self.path.add_segment(x0, y0, x1, y1, kind == RAPID, move.line)
             return
-        cx, cy, delta = center
-        radius = math.hypot(x0 - cx, y0 - cy)
-        if radius == 0.0:
+        if move.plane != 17:
+            self._emit_projected_arc(move)
             return
-        steps = max(8, int(abs(delta) / (math.pi / 16)))
-        prev_x, prev_y = x0, y0
-        for step in range(1, steps + 1):
-            angle = math.atan2(y0 - cy, x0 - cx) + (delta * step / steps)
-            nx = cx + math.cos(angle) * radius
-            ny = cy + math.sin(angle) * radius
-            self.path.add_segment(prev_x, prev_y, nx, ny, rapid=False)
-            prev_x, prev_y = nx, ny
-
-    def _center_from_ij(self, x0, y0, x1, y1, coords, cw):
-        i_val = coords.get("I", 0.0) * self.units
-        j_val = coords.get("J", 0.0) * self.units
-        cx = x0 + i_val
-        cy = y0 + j_val
-        delta = _arc_delta(x0, y0, x1, y1, cx, cy, cw=cw)
-        return (cx, cy, delta) if delta is not None else None
-
-    def _center_from_r(self, x0, y0, x1, y1, r_value, cw):
-        radius = abs(r_value) * self.units
-        dx = x1 - x0
-        dy = y1 - y0
-        dist = math.hypot(dx, dy)
-        if dist == 0 or dist > 2 * radius:
-            return None
-        mid_x = (x0 + x1) / 2.0
-        mid_y = (y0 + y1) / 2.0
-        h = math.sqrt(max(radius * radius - (dist / 2.0) ** 2, 0.0))
-        ux = -dy / dist
-        uy = dx / dist
-        centers = [
-            (mid_x + ux * h, mid_y + uy * h),
-            (mid_x - ux * h, mid_y - uy * h),
-        ]
-        use_large = r_value < 0
-        best = None
-        for cx, cy in centers:
-            delta = _arc_delta(x0, y0, x1, y1, cx, cy, cw=cw)
-            if delta is None:
-                continue
-            if best is None:
-                best = (cx, cy, delta)
-                continue
-            if use_large:
-                if abs(delta) > abs(best[2]):
-                    best = (cx, cy, delta)
-            else:
-                if abs(delta) < abs(best[2]):
-                    best = (cx, cy, delta)
-        return best
+        cx, cy = move.center
+        if math.hypot(x0 - cx, y0 - cy) == 0.0:
+            return
+        xs, ys = tessellate_arc(x0, y0, x1, y1, cx, cy, move.delta, self.arc_tolerance)
+        self.path.add_polyline(x0, y0, xs, ys, line=move.line)
 
+    def _emit_projected_arc(self, move):
+        """Draw a G18/G19 arc as its projection onto XY."""
+        first, second, linear = PLANE_AXES[move.plane]
+        start, end = move.start, move.end
+        ca, cb = move.center
+        if math.hypot(start[first] - ca, start[second] - cb) == 0.0:
+            return
+        firsts, seconds = tessellate_arc(
+            start[first], start[second], end[first], end[second], ca, cb, move.delta, self.arc_tolerance
+        )
+        steps = len(firsts)
+        rise = (end[linear] - start[linear]) / steps
+        xs = []
+        ys = []
+        point = list(start)
+        for step in range(steps):
+            point[first] = firsts[step]
+            point[second] = seconds[step]
+            point[linear] = start[linear] + rise * (step + 1)
+            xs.append(point[0])
+            ys.append(point[1])
+        xs[-1], ys[-1] = end[0], end[1]
+        self.path.add_polyline(start[0], start[1], xs, ys, line=move.line)
 
-def _parse_words(line):
-    return [(letter.upper(), float(number)) for letter, number in _WORD_RE.findall(line)]
 
+def arc_steps(radius, delta, tolerance=ARC_TOLERANCE):
+    """Number of chords keeping an arc within ``tolerance`` of its true shape.
 
-def _arc_delta(x0, y0, x1, y1, cx, cy, cw=None):
-    start = math.atan2(y0 - cy, x0 - cx)
-    end = math.atan2(y1 - cy, x1 - cx)
-    delta = end - start
-    if cw is None:
-        return delta
-    if cw:
-        if delta >= 0:
-            delta -= 2 * math.pi
+    A chord spanning angle ``a`` deviates ``radius * (1 - cos(a / 2))`` from
+    the arc at its midpoint; the step angle is capped at 90 degrees so full
+    circles keep their shape even when the radius is below the tolerance.
+    """
+    if radius <= tolerance or tolerance <= 0.0:
+        step = math.pi / 2
     else:
-        if delta <= 0:
-            delta += 2 * math.pi
-    return delta
+        step = min(2.0 * math.acos(1.0 - tolerance / radius), math.pi / 2)
+    return max(1, int(math.ceil(abs(delta) / step - 1e-9)))
+
+
+def tessellate_arc(x0, y0, x1, y1, cx, cy, delta, tolerance=ARC_TOLERANCE):
+    """Return the chord end points of an arc from ``(x0, y0)`` to ``(x1, y1)``.
+
+    ``delta`` is the signed sweep around ``(cx, cy)``. The last point is the
+    programmed end point exactly. Uses NumPy arrays when available and a
+    rotation recurrence (one ``cos``/``sin`` per arc) otherwise.
+    """
+    dx = x0 - cx
+    dy = y0 - cy
+    radius = math.hypot(dx, dy)
+    steps = arc_steps(radius, delta, tolerance)
+    np = _numpy()
+    if np is not None:
+        angles = math.atan2(dy, dx) + delta * (np.arange(1, steps + 1) / steps)
+        xs = cx + radius * np.cos(angles)
+        ys = cy + radius * np.sin(angles)
+        xs[-1] = x1
+        ys[-1] = y1
+        return xs, ys
+    cos_step = math.cos(delta / steps)
+    sin_step = math.sin(delta / steps)
+    xs = []
+    ys = []
+    for _ in range(steps - 1):
+        dx, dy = dx * cos_step - dy * sin_step, dx * sin_step + dy * cos_step
+        xs.append(cx + dx)
+        ys.append(cy + dy)
+    xs.append(x1)
+    ys.append(y1)
+    return xs, ys
+
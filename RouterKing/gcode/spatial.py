@@ -0,0 +1,184 @@
+"""Spatial index over ``GcodePath`` segments for hit-testing and culling.
+
+``SegmentIndex`` is a static, packed R-tree bulk-loaded with the
+sort-tile-recursive (STR) method: segment boxes are sorted into vertical
+strips by center x, each strip by center y, and grouped into nodes of
+``node_size``; the node boxes are grouped the same way up to a single root.
+Every level is a flat ``array('d')`` of boxes, and the children of node
+``j`` are entries ``j * node_size`` onward one level down, so the tree
+needs no pointers and is built with a couple of sorts (vectorized with
+NumPy when available).
+
+Window queries answer "what is visible", ``nearest()`` answers "what is
+under the cursor" and ``line_at()`` maps that back to the source line.
+The index is a snapshot: rebuild it when the path changes.
+"""
+
+from array import array
+import heapq
+import math
+
+try:  # Optional fast path.
+    import numpy as np
+except Exception:  # pragma: no cover - numpy not installed
+    np = None
+
+NODE_SIZE = 16
+
+
+class SegmentIndex:
+    """Packed R-tree over the segments of a ``GcodePath``."""
+
+    def __init__(self, path, node_size=NODE_SIZE):
+        self.path = path
+        self.node_size = max(2, int(node_size))
+        self.count = len(path)
+        if np is not None:
+            self._order, boxes = _pack_numpy(path, self.node_size)
+        else:
+            self._order, boxes = _pack(path, self.node_size)
+        # _levels[0] holds segment boxes in leaf order, the last the root(s).
+        self._levels = [boxes]
+        while len(self._levels[-1]) > 4:
+            self._levels.append(_parent_boxes(self._levels[-1], self.node_size))
+
+    def __len__(self):
+        return self.count
+
+    def window(self, x0, y0, x1, y1):
+        """Indices (ascending) of segments whose box meets the rectangle."""
+        if not self.count:
+            return array("I")
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        levels = self._levels
+        size = self.node_size
+        order = self._order
+        found = array("I")
+        top = len(levels) - 1
+        stack = [(top, node) for node in range(len(levels[top]) // 4)]
+        while stack:
+            level, node = stack.pop()
+            boxes = levels[level]
+            base = node * 4
+            if boxes[base] > x1 or boxes[base + 2] < x0 or boxes[base + 1] > y1 or boxes[base + 3] < y0:
+                continue
+            if level == 0:
+                found.append(order[node])
+                continue
+            first = node * size
+            last = min(first + size, len(levels[level - 1]) // 4)
+            stack.extend((level - 1, child) for child in range(first, last))
+        return array("I", sorted(found))
+
+    def nearest(self, x, y, max_distance=math.inf):
+        """``(segment index, distance)`` of the closest segment, or ``None``.
+
+        Best-first search over node boxes; only segments closer than
+        ``max_distance`` are considered.
+        """
+        if not self.count:
+            return None
+        levels = self._levels
+        size = self.node_size
+        coords = self.path._coords
+        limit = max_distance * max_distance
+        top = len(levels) - 1
+        heap = []
+        for node in range(len(levels[top]) // 4):
+            heap.append((_box_distance2(levels[top], node, x, y), top, node))
+        heapq.heapify(heap)
+        best = None
+        while heap:
+            distance2, level, node = heapq.heappop(heap)
+            if distance2 > limit:
+                break
+            if level < 0:
+                best = (node, math.sqrt(distance2))
+                break
+            if level == 0:
+                segment = self._order[node]
+                base = segment * 4
+                exact = _segment_distance2(x, y, coords[base], coords[base + 1], coords[base + 2], coords[base + 3])
+                if exact <= limit:
+                    heapq.heappush(heap, (exact, -1, segment))
+                continue
+            boxes = levels[level - 1]
+            first = node * size
+            for child in range(first, min(first + size, len(boxes) // 4)):
+                heapq.heappush(heap, (_box_distance2(boxes, child, x, y), level - 1, child))
+        return best
+
+    def line_at(self, x, y, max_distance=math.inf):
+        """1-based source line of the segment nearest ``(x, y)``, or ``None``."""
+        hit = self.nearest(x, y, max_distance)
+        if hit is None:
+            return None
+        return self.path.source_line(hit[0]) or None
+
+
+def _pack(path, size):
+    coords = path._coords
+    count = len(path)
+    boxes = []
+    for index in range(count):
+        x0, y0, x1, y1 = coords[index * 4 : index * 4 + 4]
+        boxes.append((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+    by_x = sorted(range(count), key=lambda index: boxes[index][0] + boxes[index][2])
+    order = array("I")
+    strip = _strip_size(count, size)
+    for start in range(0, count, strip):
+        order.extend(sorted(by_x[start : start + strip], key=lambda index: boxes[index][1] + boxes[index][3]))
+    packed = array("d")
+    for index in order:
+        packed.extend(boxes[index])
+    return order, packed
+
+
+def _pack_numpy(path, size):
+    segments = np.frombuffer(path._coords, dtype=np.float64).reshape(-1, 4)
+    boxes = np.column_stack(
+        (
+            np.minimum(segments[:, 0], segments[:, 2]),
+            np.minimum(segments[:, 1], segments[:, 3]),
+            np.maximum(segments[:, 0], segments[:, 2]),
+            np.maximum(segments[:, 1], segments[:, 3]),
+        )
+    )
+    by_x = np.argsort(boxes[:, 0] + boxes[:, 2], kind="stable")
+    strips = np.empty(len(boxes), dtype=np.int64)
+    strips[by_x] = np.arange(len(boxes)) // _strip_size(len(boxes), size)
+    order = np.lexsort((boxes[:, 1] + boxes[:, 3], strips))
+    return array("I", order.astype(np.uint32).tobytes()), array("d", boxes[order].tobytes())
+
+
+def _strip_size(count, size):
+    nodes = max(1, math.ceil(count / size))
+    strips = math.ceil(math.sqrt(nodes))
+    return size * math.ceil(nodes / strips)
+
+
+def _parent_boxes(boxes, size):
+    parents = array("d")
+    count = len(boxes) // 4
+    for first in range(0, count, size):
+        chunk = boxes[first * 4 : min(first + size, count) * 4]
+        parents.extend((min(chunk[0::4]), min(chunk[1::4]), max(chunk[2::4]), max(chunk[3::4])))
+    return parents
+
+
+def _box_distance2(boxes, node, x, y):
+    base = node * 4
+    dx = max(boxes[base] - x, 0.0, x - boxes[base + 2])
+    dy = max(boxes[base + 1] - y, 0.0, y - boxes[base + 3])
+    return dx * dx + dy * dy
+
+
+def _segment_distance2(x, y, x0, y0, x1, y1):
+    dx = x1 - x0
+    dy = y1 - y0
+    length2 = dx * dx + dy * dy
+    t = 0.0 if not length2 else min(1.0, max(0.0, ((x - x0) * dx + (y - y0) * dy) / length2))
+    px = x0 + t * dx - x
+    py = y0 + t * dy - y
+    return px * px + py * py
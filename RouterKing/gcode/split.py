@@ -0,0 +1,145 @@
+"""Split a G-code program into time-balanced sub-jobs for several machines.
+
+Cuts are only made in front of a rapid XY travel that starts above every
+feed move, i.e. while the tool is retracted between parts. Each sub-job
+after the first starts with a preamble that retracts, travels to where the
+original program was and restores the modal state (units, distance mode,
+plane, WCS, tool, spindle, coolant, feed); each sub-job before the last ends
+with the spindle and coolant off.
+"""
+
+from dataclasses import dataclass, field
+import bisect
+
+try:
+    from .estimate import PlannerEstimator
+    from .modal import ModalState, _fmt
+    from .parser import iter_gcode_lines, strip_comments
+except ImportError:
+    from gcode.estimate import PlannerEstimator
+    from gcode.modal import ModalState, _fmt
+    from gcode.parser import iter_gcode_lines, strip_comments
+
+
+@dataclass
+class SubJob:
+    index: int
+    start: int
+    end: int
+    estimated_time: float
+    lines: list = field(default_factory=list)
+
+    def to_gcode(self):
+        return "\n".join(self.lines) + "\n"
+
+    def start_on(self, sender):
+        """Start streaming this sub-job on a connected sender."""
+        sender.start_stream(self.lines)
+
+
+@dataclass
+class _Boundary:
+    index: int
+    elapsed: float
+    state: ModalState
+
+
+def split_program(program, parts, safe_z=None, limits=None):
+    """Split ``program`` into at most ``parts`` sub-jobs of similar run time.
+
+    ``program`` is G-code text (e.g. from ``generate_gcode_from_paths``) or
+    any iterable of lines such as ``JobBundle.iter_lines()``. ``safe_z``
+    (mm, work coordinates) is the lowest Z that counts as retracted; by
+    default it is just above the highest feed move. Run times come from the
+    planner model for ``limits`` (see ``gcode/estimate.py``). Fewer sub-jobs
+    come back when the program has too few safe boundaries.
+    """
+    lines = _sanitize(program)
+    boundaries, total, feed_top = _scan(lines, limits)
+    if safe_z is None:
+        safe = [item for item in boundaries if item.state.z > feed_top]
+    else:
+        safe = [item for item in boundaries if item.state.z >= safe_z]
+    cuts = _choose_cuts(safe, total, max(1, int(parts)))
+
+    jobs = []
+    edges = [None] + cuts + [None]
+    for number, (first, last) in enumerate(zip(edges, edges[1:])):
+        start = first.index if first else 0
+        end = last.index if last else len(lines)
+        body = lines[start:end]
+        job_lines = _preamble(first.state) if first else []
+        job_lines.extend(body)
+        if last:
+            job_lines.extend(_postamble(last.state))
+        begin = first.elapsed if first else 0.0
+        finish = last.elapsed if last else total
+        jobs.append(SubJob(number, start, end, round(finish - begin, 3), job_lines))
+    return jobs
+
+
+def _sanitize(program):
+    if isinstance(program, str):
+        return list(iter_gcode_lines(program))
+    return [line for line in (strip_comments(raw) for raw in program) if line]
+
+
+def _scan(lines, limits):
+    estimator = PlannerEstimator(limits)
+    state = estimator.state
+    boundaries = []
+    feed_top = None
+    for index, line in enumerate(lines):
+        before = state.copy()
+        move = estimator.update(line)
+        if move is not None:
+            if (
+                move.motion == "G0"
+                and move.start[:2] != move.end[:2]
+                and move.start[2] == move.end[2]
+            ):
+                boundaries.append(_Boundary(index, 0.0, before))
+            elif move.motion in ("G1", "G2", "G3"):
+                feed_top = move.end[2] if feed_top is None else max(feed_top, move.end[2])
+    estimate = estimator.finish()
+    for item in boundaries:
+        item.elapsed = estimate.elapsed_at(item.index)
+    return boundaries, estimate.total, feed_top if feed_top is not None else float("-inf")
+
+
+def _choose_cuts(boundaries, total, parts):
+    if parts < 2 or not boundaries or total <= 0.0:
+        return []
+    elapsed = [item.elapsed for item in boundaries]
+    cuts = []
+    for step in range(1, parts):
+        target = total * step / parts
+        slot = bisect.bisect_left(elapsed, target)
+        best = None
+        for candidate in (slot - 1, slot):
+            if not 0 <= candidate < len(boundaries):
+                continue
+            item = boundaries[candidate]
+            if item.elapsed <= 0.0 or (cuts and item.index <= cuts[-1].index):
+                continue
+            if best is None or abs(item.elapsed - target) < abs(best.elapsed - target):
+                best = item
+        if best is not None:
+            cuts.append(best)
+    return cuts
+
+
+def _preamble(state):
+    lines = [f"G21 G90 {state.plane} G94 {state.wcs}"]
+    lines.append(f"G0 Z{_fmt(state.z)}")
+    lines.append(f"G0 X{_fmt(state.x)} Y{_fmt(state.y)}")
+    lines.extend(state.preamble())
+    return lines
+
+
+def _postamble(state):
+    lines = ["M5"]
+    if state.mist or state.flood:
+        lines.append("M9")
+    lines.append("M2")
+    return lines
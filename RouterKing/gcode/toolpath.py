@@ -0,0 +1,380 @@
+"""Shared G-code interpreter and toolpath intermediate representation.
+
+``Interpreter`` applies the modal rules once (motion G0-G3 and G38.x,
+G90/G91, G20/G21, G17-G19 planes, G80, G92 and the other non-modal codes,
+feed, arc centers from offsets or R) and turns each line that moves the
+tool into a ``ToolMove``. The preview parser tessellates those moves into
+a ``GcodePath`` and the CAM risk analysis checks them, so both see the
+same semantics and a program is interpreted once for both. The rules are
+those of ``modal.ModalState`` (bundles, estimates, splitting), so the
+timeline and the preview agree too.
+
+``Toolpath`` stores the moves in typed arrays (kind and plane, source
+line, and one packed run of doubles per move for start/end XYZ, feed and
+arc center/radius/sweep), like ``GcodePath`` does for segments.
+"""
+
+from array import array
+from dataclasses import dataclass
+import math
+
+try:
+    from .lexer import lex_line
+except ImportError:
+    from gcode.lexer import lex_line
+
+RAPID = 0
+LINEAR = 1
+ARC_CW = 2
+ARC_CCW = 3
+# Motion mode after G80: axis words no longer move the tool.
+MOTION_CANCEL = -1
+
+# Motion words; probing (G38.x) moves in a straight line.
+MOTION_CODES = {0: RAPID, 1: LINEAR, 2: ARC_CW, 3: ARC_CCW, 38.2: LINEAR, 38.3: LINEAR, 38.4: LINEAR, 38.5: LINEAR}
+# Non-modal codes whose axis words are not a programmed move (homing, machine
+# coordinates, offset setting); ``ModalState`` follows the same rules.
+NON_MOTION_CODES = frozenset((10, 28, 28.1, 30, 30.1, 53, 92.1))
+# Plane -> (first axis, second axis, linear axis) indices and arc offset words.
+PLANE_AXES = {17: (0, 1, 2), 18: (2, 0, 1), 19: (1, 2, 0)}
+_PLANE_OFFSETS = {17: ("I", "J"), 18: ("K", "I"), 19: ("J", "K")}
+
+_NAN = float("nan")
+_NO_CENTER = (_NAN, _NAN)
+_COORD_LETTERS = frozenset("XYZIJKR")
+
+
+@dataclass
+class ToolMove:
+    """One interpreted move; positions in mm, feed in programmed units/min.
+
+    ``radius`` is the programmed arc radius (from the offsets or R);
+    ``center`` (in the ``plane`` axes: XY, ZX or YZ) and ``delta`` (signed
+    sweep, radians) are only set for arcs whose center could be resolved.
+    """
+
+    kind: int
+    line: int
+    start: tuple
+    end: tuple
+    feed: float = 0.0
+    center: tuple = None
+    radius: float = None
+    delta: float = None
+    plane: int = 17
+
+    @property
+    def is_arc(self):
+        return self.kind in (ARC_CW, ARC_CCW)
+
+
+class Interpreter:
+    """Modal G-code state machine; ``step(line)`` returns a ``ToolMove``.
+
+    The rules match ``ModalState``: G17/G18/G19 planes, G80, dwells, G92
+    and the non-modal codes in ``NON_MOTION_CODES`` (which do not move the
+    programmed position), and M2/M30 resets.
+
+    ``line`` is the 1-based number of the last line stepped, ``blocks``
+    counts lines that had any words and ``first_block`` is the line of the
+    first of them (0 while there is none). ``resolve_arcs = False`` skips
+    arc center math for callers that only need the state.
+    """
+
+    resolve_arcs = True
+
+    def __init__(self):
+        self.absolute = True
+        self.units = 1.0
+        self.plane = 17
+        self.motion = RAPID
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+        self.feed = 0.0
+        self.line = 0
+        self.blocks = 0
+        self.first_block = 0
+
+    def state(self):
+        return (self.absolute, self.units, self.plane, self.motion, self.x, self.y, self.z)
+
+    def restore(self, state):
+        self.absolute, self.units, self.plane, self.motion, self.x, self.y, self.z = state
+
+    def step(self, line):
+        """Apply one raw line; return its ``ToolMove`` or ``None``."""
+        self.line += 1
+        words = lex_line(line)
+        if not words:
+            return None
+        self.blocks += 1
+        if self.blocks == 1:
+            self.first_block = self.line
+        coords = {}
+        motion = None
+        dwell = skip = set_offset = False
+        for letter, value in words:
+            if letter in _COORD_LETTERS:
+                coords[letter] = value
+            elif letter == "G":
+                code = round(value, 1)
+                if code in MOTION_CODES:
+                    motion = MOTION_CODES[code]
+                elif code == 90:
+                    self.absolute = True
+                elif code == 91:
+                    self.absolute = False
+                elif code == 20:
+                    self.units = 25.4
+                elif code == 21:
+                    self.units = 1.0
+                elif code in PLANE_AXES:
+                    self.plane = int(code)
+                elif code == 80:
+                    self.motion = MOTION_CANCEL
+                elif code == 4:
+                    dwell = True
+                elif code in NON_MOTION_CODES:
+                    skip = True
+                elif code == 92:
+                    set_offset = True
+            elif letter == "F":
+                self.feed = value
+            elif letter == "M" and int(round(value)) in (2, 30):
+                self.motion = LINEAR
+                self.plane = 17
+                self.absolute = True
+        if dwell:
+            return None
+        if set_offset:
+            # G92: the axis words name the current position.
+            units = self.units
+            self.x = coords["X"] * units if "X" in coords else self.x
+            self.y = coords["Y"] * units if "Y" in coords else self.y
+            self.z = coords["Z"] * units if "Z" in coords else self.z
+            return None
+        if motion is not None:
+            self.motion = motion
+        if skip or self.motion == MOTION_CANCEL or not ("X" in coords or "Y" in coords or "Z" in coords):
+            return None
+
+        x0, y0, z0 = x1, y1, z1 = self.x, self.y, self.z
+        units = self.units
+        if self.absolute:
+            if "X" in coords:
+                x1 = coords["X"] * units
+            if "Y" in coords:
+                y1 = coords["Y"] * units
+            if "Z" in coords:
+                z1 = coords["Z"] * units
+        else:
+            if "X" in coords:
+                x1 += coords["X"] * units
+            if "Y" in coords:
+                y1 += coords["Y"] * units
+            if "Z" in coords:
+                z1 += coords["Z"] * units
+        motion = self.motion
+        arc = motion == ARC_CW or motion == ARC_CCW
+        if x0 == x1 and y0 == y1 and z0 == z1:
+            # Only a full circle (offsets, end at the start) moves here.
+            if not arc or not any(letter in coords for letter in _PLANE_OFFSETS[self.plane]):
+                return None
+        self.x, self.y, self.z = x1, y1, z1
+
+        start = (x0, y0, z0)
+        end = (x1, y1, z1)
+        move = ToolMove(motion, self.line, start, end, self.feed, plane=self.plane)
+        if arc:
+            first, second, _ = PLANE_AXES[self.plane]
+            off1, off2 = _PLANE_OFFSETS[self.plane]
+            a0, b0, a1, b1 = start[first], start[second], end[first], end[second]
+            offsets = off1 in coords or off2 in coords
+            if offsets or a0 != a1 or b0 != b1:
+                i = coords.get(off1, 0.0) * units
+                j = coords.get(off2, 0.0) * units
+                move.radius = _programmed_radius(coords, units, offsets, i, j)
+                if self.resolve_arcs:
+                    cw = motion == ARC_CW
+                    if offsets:
+                        resolved = _center_from_offsets(a0, b0, a1, b1, i, j, cw)
+                    elif "R" in coords:
+                        resolved = _center_from_r(a0, b0, a1, b1, coords["R"] * units, cw)
+                    else:
+                        resolved = None
+                    if resolved is not None:
+                        move.center = resolved[:2]
+                        move.delta = resolved[2]
+        return move
+
+
+class Toolpath:
+    """Interpreted moves stored in typed arrays.
+
+    ``blocks`` and ``first_block`` are the interpreter's counts (see
+    ``Interpreter``), so checks can tell what happens outside the moves.
+    """
+
+    def __init__(self):
+        # Kind in the low two bits, plane (0 = G17, 1 = G18, 2 = G19) above.
+        self._kinds = bytearray()
+        self._lines = array("I")
+        # 11 doubles per move, written with one extend: x0, y0, z0, x1, y1,
+        # z1, feed, center x, center y, radius, delta (NaN when not set).
+        self._values = array("d")
+        self.blocks = 0
+        self.first_block = 0
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def append(self, move):
+        self._kinds.append(move.kind | (move.plane - 17) << 2)
+        self._lines.append(move.line)
+        center = move.center or _NO_CENTER
+        self._values.extend(
+            (
+                *move.start,
+                *move.end,
+                move.feed,
+                center[0],
+                center[1],
+                _NAN if move.radius is None else move.radius,
+                _NAN if move.delta is None else move.delta,
+            )
+        )
+
+    def move(self, index):
+        x0, y0, z0, x1, y1, z1, feed, cx, cy, radius, delta = self._values[index * 11 : index * 11 + 11]
+        code = self._kinds[index]
+        return ToolMove(
+            code & 3,
+            self._lines[index],
+            (x0, y0, z0),
+            (x1, y1, z1),
+            feed,
+            None if math.isnan(cx) else (cx, cy),
+            None if math.isnan(radius) else radius,
+            None if math.isnan(delta) else delta,
+            17 + (code >> 2),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.move(index)
+
+    def extend(self, other, line_offset=0):
+        self._kinds.extend(other._kinds)
+        self._lines.extend(shift_lines(other._lines, line_offset))
+        self._values.extend(other._values)
+        if not self.blocks and other.first_block:
+            self.first_block = other.first_block + line_offset
+        self.blocks += other.blocks
+
+    def splice(self, start, stop, other, line_shift=0):
+        """Replace moves ``start:stop`` with ``other``'s; later lines move by ``line_shift``."""
+        self._kinds[start:stop] = other._kinds
+        self._values[start * 11 : stop * 11] = other._values
+        tail = start + len(other._lines)
+        self._lines[start:stop] = other._lines
+        if line_shift:
+            self._lines[tail:] = shift_lines(self._lines[tail:], line_shift)
+
+
+def interpret_lines(lines):
+    """Interpret raw lines into a ``Toolpath``."""
+    interpreter = Interpreter()
+    toolpath = Toolpath()
+    for line in lines:
+        move = interpreter.step(line)
+        if move is not None:
+            toolpath.append(move)
+    toolpath.blocks = interpreter.blocks
+    toolpath.first_block = interpreter.first_block
+    return toolpath
+
+
+def interpret_gcode(text):
+    return interpret_lines(text.splitlines())
+
+
+def shift_lines(lines, offset):
+    """Copy of a uint32 line array with ``offset`` added."""
+    if not offset:
+        return lines
+    try:  # Optional fast path; imported here so the CLI never loads NumPy.
+        import numpy as np
+    except Exception:  # pragma: no cover - numpy not installed
+        np = None
+    if np is not None:
+        shifted = np.frombuffer(lines, dtype=np.uint32).astype(np.int64) + offset
+        return array("I", shifted.astype(np.uint32).tobytes())
+    return array("I", [line + offset for line in lines])
+
+
+def _programmed_radius(coords, units, offsets, i, j):
+    if offsets:
+        radius = math.hypot(i, j)
+        return radius if radius > 0 else None
+    if "R" in coords:
+        radius = abs(coords["R"]) * units
+        return radius if radius > 0 else None
+    return None
+
+
+def _center_from_offsets(a0, b0, a1, b1, i, j, cw):
+    ca = a0 + i
+    cb = b0 + j
+    delta = arc_delta(a0, b0, a1, b1, ca, cb, cw=cw)
+    return (ca, cb, delta) if delta is not None else None
+
+
+def _center_from_r(x0, y0, x1, y1, r_value, cw):
+    radius = abs(r_value)
+    dx = x1 - x0
+    dy = y1 - y0
+    dist = math.hypot(dx, dy)
+    if dist == 0 or dist > 2 * radius:
+        return None
+    mid_x = (x0 + x1) / 2.0
+    mid_y = (y0 + y1) / 2.0
+    h = math.sqrt(max(radius * radius - (dist / 2.0) ** 2, 0.0))
+    ux = -dy / dist
+    uy = dx / dist
+    centers = [
+        (mid_x + ux * h, mid_y + uy * h),
+        (mid_x - ux * h, mid_y - uy * h),
+    ]
+    use_large = r_value < 0
+    best = None
+    for cx, cy in centers:
+        delta = arc_delta(x0, y0, x1, y1, cx, cy, cw=cw)
+        if delta is None:
+            continue
+        if best is None:
+            best = (cx, cy, delta)
+            continue
+        if use_large:
+            if abs(delta) > abs(best[2]):
+                best = (cx, cy, delta)
+        else:
+            if abs(delta) < abs(best[2]):
+                best = (cx, cy, delta)
+    return best
+
+
+def arc_delta(x0, y0, x1, y1, cx, cy, cw=None):
+    """Signed sweep from start to end around ``(cx, cy)`` in the arc direction."""
+    start = math.atan2(y0 - cy, x0 - cx)
+    end = math.atan2(y1 - cy, x1 - cx)
+    delta = end - start
+    if cw is None:
+        return delta
+    if cw:
+        if delta >= 0:
+            delta -= 2 * math.pi
+    else:
+        if delta <= 0:
+            delta += 2 * math.pi
+    return delta
@@ -0,0 +1,386 @@
+"""Surface probing and Z autoleveling for RouterKing."""
+
+from bisect import bisect_right
+import json
+import math
+import re
+
+try:  # Optional fast path.
+    import numpy as np
+except Exception:  # pragma: no cover - numpy not installed
+    np = None
+
+try:
+    from .procedures import ProcedureError, SenderProcedure
+except ImportError:
+    from grbl.procedures import ProcedureError, SenderProcedure
+
+
+_PRB_RE = re.compile(r"\[PRB:([-+\d.]+),([-+\d.]+),([-+\d.]+):(\d)\]")
+_WORD_RE = re.compile(r"([A-Za-z])\s*([-+]?\d*\.?\d+)")
+_AXIS_WORD_RE = re.compile(r"[XYZxyz]\s*[-+]?\d*\.?\d+")
+# Lines per HeightMap.offsets call in autolevel_lines.
+_BATCH_LINES = 1024
+
+
+class HeightMap:
+    """Rectilinear grid of surface heights with bilinear interpolation.
+
+    ``heights[row][col]`` is the surface offset at ``(xs[col], ys[row])``.
+    Per-cell bilinear coefficients are computed once, so evaluating a point
+    is a cell lookup plus three multiply-adds. Points outside the grid are
+    clamped to its edge.
+    """
+
+    def __init__(self, xs, ys, heights):
+        if len(xs) < 2 or len(ys) < 2:
+            raise ValueError("Height map needs at least 2x2 points")
+        if any(b <= a for a, b in zip(xs, xs[1:])) or any(b <= a for a, b in zip(ys, ys[1:])):
+            raise ValueError("Grid coordinates must be strictly increasing")
+        if len(heights) != len(ys) or any(len(row) != len(xs) for row in heights):
+            raise ValueError("Heights do not match the grid")
+        self.xs = [float(x) for x in xs]
+        self.ys = [float(y) for y in ys]
+        self.heights = [[float(z) for z in row] for row in heights]
+        self._coefficients = self._build_coefficients()
+        self._np = None
+        if np is not None:
+            self._np = (
+                np.asarray(self.xs),
+                np.asarray(self.ys),
+                np.asarray(self._coefficients, dtype=float),
+            )
+
+    def _build_coefficients(self):
+        # Flattened per cell (row-major): z = a + b*u + c*v + d*u*v with
+        # u, v measured from the cell's lower-left corner.
+        cells = []
+        for row in range(len(self.ys) - 1):
+            dy = self.ys[row + 1] - self.ys[row]
+            for col in range(len(self.xs) - 1):
+                dx = self.xs[col + 1] - self.xs[col]
+                z00 = self.heights[row][col]
+                z10 = self.heights[row][col + 1]
+                z01 = self.heights[row + 1][col]
+                z11 = self.heights[row + 1][col + 1]
+                cells.append(
+                    (
+                        z00,
+                        (z10 - z00) / dx,
+                        (z01 - z00) / dy,
+                        (z11 - z10 - z01 + z00) / (dx * dy),
+                    )
+                )
+        return cells
+
+    def bounds(self):
+        return (self.xs[0], self.ys[0], self.xs[-1], self.ys[-1])
+
+    def z_at(self, x, y):
+        x = min(max(x, self.xs[0]), self.xs[-1])
+        y = min(max(y, self.ys[0]), self.ys[-1])
+        col = min(max(bisect_right(self.xs, x) - 1, 0), len(self.xs) - 2)
+        row = min(max(bisect_right(self.ys, y) - 1, 0), len(self.ys) - 2)
+        a, b, c, d = self._coefficients[row * (len(self.xs) - 1) + col]
+        u = x - self.xs[col]
+        v = y - self.ys[row]
+        return a + b * u + c * v + d * u * v
+
+    def offsets(self, xs, ys):
+        """Evaluate many points at once (NumPy when available).
+
+        NumPy only pays off for large batches; ``autolevel_lines`` calls this
+        once per batch of lines, not per line.
+        """
+        if self._np is None:
+            return [self.z_at(x, y) for x, y in zip(xs, ys)]
+        grid_x, grid_y, coefficients = self._np
+        px = np.clip(np.asarray(xs, dtype=float), grid_x[0], grid_x[-1])
+        py = np.clip(np.asarray(ys, dtype=float), grid_y[0], grid_y[-1])
+        cols = np.clip(np.searchsorted(grid_x, px, side="right") - 1, 0, len(grid_x) - 2)
+        rows = np.clip(np.searchsorted(grid_y, py, side="right") - 1, 0, len(grid_y) - 2)
+        cells = coefficients[rows * (len(grid_x) - 1) + cols]
+        u = px - grid_x[cols]
+        v = py - grid_y[rows]
+        values = cells[:, 0] + cells[:, 1] * u + cells[:, 2] * v + cells[:, 3] * u * v
+        return values.tolist()
+
+    def to_dict(self):
+        return {"xs": self.xs, "ys": self.ys, "heights": self.heights}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["xs"], data["ys"], data["heights"])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as handle:
+            return cls.from_dict(json.load(handle))
+
+
+def _linspace(start, stop, count):
+    if count < 2:
+        raise ValueError("Grid needs at least 2 points per axis")
+    step = (stop - start) / (count - 1)
+    return [start + step * index for index in range(count)]
+
+
+def _fmt(value):
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def refine_axis(coords, samples, threshold):
+    """Return midpoints to insert where the surface bends along one axis.
+
+    ``samples`` is a list of height profiles sampled at ``coords``. A point
+    whose height deviates from the average of its neighbours by more than
+    ``threshold`` marks both adjacent intervals for refinement.
+    """
+    marked = set()
+    for profile in samples:
+        for index in range(1, len(coords) - 1):
+            left = coords[index] - coords[index - 1]
+            right = coords[index + 1] - coords[index]
+            weight = left / (left + right)
+            expected = profile[index - 1] + (profile[index + 1] - profile[index - 1]) * weight
+            if abs(profile[index] - expected) > threshold:
+                marked.add(index - 1)
+                marked.add(index)
+    return [(coords[index] + coords[index + 1]) / 2.0 for index in sorted(marked)]
+
+
+class GridProber(SenderProcedure):
+    """Probe a rectangular grid with G38.2 and build a ``HeightMap``.
+
+    Each pass streams all of its probe moves through the sender, so the
+    controller plans the next move while the current probe reports. After
+    the base grid, columns/rows are inserted where the surface bends by more
+    than ``refine_threshold`` and only the new points are probed.
+    Heights are reported relative to the first probed point.
+    """
+
+    name = "Probe grid"
+
+    def __init__(
+        self,
+        sender,
+        x0,
+        y0,
+        width,
+        height,
+        cols=5,
+        rows=5,
+        clearance=2.0,
+        depth=-5.0,
+        feed=100.0,
+        refine_threshold=None,
+        max_refine_passes=2,
+        on_line=None,
+    ):
+        super().__init__(sender, on_line=on_line)
+        self.xs = _linspace(x0, x0 + width, cols)
+        self.ys = _linspace(y0, y0 + height, rows)
+        self.clearance = clearance
+        self.depth = depth
+        self.feed = feed
+        self.refine_threshold = refine_threshold
+        self.max_refine_passes = max_refine_passes
+        self.probed = {}
+        self.passes = 0
+        self._reports = []
+
+    def handle_line(self, line):
+        match = _PRB_RE.match(line.strip())
+        if match:
+            self._reports.append(
+                (float(match.group(1)), float(match.group(2)), float(match.group(3)), match.group(4) == "1")
+            )
+
+    def execute(self):
+        if self.sender.is_streaming():
+            raise ProcedureError("Probe grid: sender busy.")
+        while True:
+            pending = [
+                (x, y)
+                for row, y in enumerate(self.ys)
+                for x in (self.xs if row % 2 == 0 else reversed(self.xs))
+                if (x, y) not in self.probed
+            ]
+            if pending:
+                self._probe_points(pending)
+            self.passes += 1
+            if self.refine_threshold is None or self.passes > self.max_refine_passes:
+                break
+            new_xs = refine_axis(self.xs, self._rows(), self.refine_threshold)
+            new_ys = refine_axis(self.ys, self._columns(), self.refine_threshold)
+            if not new_xs and not new_ys:
+                break
+            self.xs = sorted(set(self.xs) | set(new_xs))
+            self.ys = sorted(set(self.ys) | set(new_ys))
+        reference = self.probed[(self.xs[0], self.ys[0])]
+        heights = [[self.probed[(x, y)] - reference for x in self.xs] for y in self.ys]
+        return HeightMap(self.xs, self.ys, heights)
+
+    def _rows(self):
+        return [[self.probed[(x, y)] for x in self.xs] for y in self.ys]
+
+    def _columns(self):
+        return [[self.probed[(x, y)] for y in self.ys] for x in self.xs]
+
+    def _probe_points(self, points):
+        lines = ["G21", "G90"]
+        for x, y in points:
+            lines.append(f"G0 Z{_fmt(self.clearance)}")
+            lines.append(f"G0 X{_fmt(x)} Y{_fmt(y)}")
+            lines.append(f"G38.2 Z{_fmt(self.depth)} F{_fmt(self.feed)}")
+        lines.append(f"G0 Z{_fmt(self.clearance)}")
+        self._reports = []
+        self.sender.start_stream(lines)
+        self.wait_stream()
+        if len(self._reports) != len(points):
+            raise ProcedureError(
+                f"Probe grid: expected {len(points)} probe reports, got {len(self._reports)}."
+            )
+        for (x, y), (_, _, z, success) in zip(points, self._reports):
+            if not success:
+                raise ProcedureError(f"Probe grid: no contact at X{_fmt(x)} Y{_fmt(y)}.")
+            self.probed[(x, y)] = z
+
+
+def autolevel_lines(lines, height_map, segment_length=5.0, batch_lines=_BATCH_LINES):
+    """Yield ``lines`` with Z corrected by ``height_map``.
+
+    Feed moves (G1) longer than ``segment_length`` are split so the
+    correction follows the surface. Rapids and arc endpoints get their Z
+    corrected without splitting. G53 moves, probing and coordinate-setting
+    lines pass through unchanged. Lines are read ``batch_lines`` at a time
+    and the surface is evaluated with one ``HeightMap.offsets`` call per
+    batch, so the output streams without holding the whole program.
+    """
+    state = _LevelState()
+    batch = []
+    for line in lines:
+        batch.append(state.plan(line, segment_length))
+        if len(batch) >= batch_lines:
+            yield from state.emit(batch, height_map)
+            batch = []
+    yield from state.emit(batch, height_map)
+
+
+class _LevelState:
+    def __init__(self):
+        self.absolute = True
+        self.units = 1.0
+        self.motion = 0
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+        self.emitted_z = None
+
+    def plan(self, line, segment_length):
+        """Track the modal state of ``line`` and return what ``emit`` needs.
+
+        Lines that pass through become ``(line, None, resync)``; moves become
+        ``(prefix, points, (has_x, has_y, absolute, units, x0, y0, z0))``.
+        """
+        words = [(letter.upper(), float(value)) for letter, value in _WORD_RE.findall(line)]
+        passthrough = False
+        axes = {}
+        for letter, value in words:
+            if letter == "G":
+                if abs(value - round(value)) > 1e-6:
+                    passthrough = True
+                    continue
+                code = int(round(value))
+                if code in (0, 1, 2, 3):
+                    self.motion = code
+                elif code == 90:
+                    self.absolute = True
+                elif code == 91:
+                    self.absolute = False
+                elif code == 20:
+                    self.units = 25.4
+                elif code == 21:
+                    self.units = 1.0
+                elif code in (28, 30, 53, 92):
+                    passthrough = True
+            elif letter in ("X", "Y", "Z"):
+                axes[letter] = value
+        if passthrough or not axes:
+            # Position is unknown to us after these; resync on next Z.
+            return (line, None, passthrough and bool(axes))
+
+        x0, y0, z0 = self.x, self.y, self.z
+        if self.absolute:
+            x1 = axes.get("X", x0)
+            y1 = axes.get("Y", y0)
+            z1 = axes.get("Z", z0)
+        else:
+            x1 = x0 + axes.get("X", 0.0)
+            y1 = y0 + axes.get("Y", 0.0)
+            z1 = z0 + axes.get("Z", 0.0)
+        self.x, self.y, self.z = x1, y1, z1
+
+        points = [(x1, y1, z1)]
+        if self.motion == 1 and segment_length > 0:
+            length = math.hypot(x1 - x0, y1 - y0) * self.units
+            count = int(math.ceil(length / segment_length))
+            if count > 1:
+                points = [
+                    (
+                        x0 + (x1 - x0) * step / count,
+                        y0 + (y1 - y0) * step / count,
+                        z0 + (z1 - z0) * step / count,
+                    )
+                    for step in range(1, count + 1)
+                ]
+        prefix = " ".join(_AXIS_WORD_RE.sub("", line).split())
+        return (prefix, points, ("X" in axes, "Y" in axes, self.absolute, self.units, x0, y0, z0))
+
+    def emit(self, batch, height_map):
+        """Yield the corrected lines of planned ``batch``."""
+        xs = []
+        ys = []
+        for _, points, move in batch:
+            if points is not None:
+                units = move[3]
+                xs.extend(point[0] * units for point in points)
+                ys.extend(point[1] * units for point in points)
+        offsets = iter(height_map.offsets(xs, ys)) if xs else None
+        for text, points, move in batch:
+            if points is None:
+                if move:
+                    self.emitted_z = None
+                yield text
+                continue
+            yield from self._corrected(text, points, move, offsets)
+
+    def _corrected(self, prefix, points, move, offsets):
+        has_x, has_y, absolute, units, x0, y0, z0 = move
+        previous = (x0, y0, self.emitted_z)
+        last = len(points) - 1
+        for index, (x, y, z) in enumerate(points):
+            corrected = z + next(offsets) / units
+            if absolute:
+                words_out = []
+                if has_x or index < last:
+                    words_out.append(f"X{_fmt(x)}")
+                if has_y or index < last:
+                    words_out.append(f"Y{_fmt(y)}")
+                words_out.append(f"Z{_fmt(corrected)}")
+            else:
+                base_z = previous[2] if previous[2] is not None else z0
+                words_out = [
+                    f"X{_fmt(x - previous[0])}",
+                    f"Y{_fmt(y - previous[1])}",
+                    f"Z{_fmt(corrected - base_z)}",
+                ]
+            text = " ".join(words_out)
+            yield f"{prefix} {text}" if index == 0 and prefix else text
+            previous = (x, y, corrected)
+        self.emitted_z = previous[2]
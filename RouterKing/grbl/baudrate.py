@@ -0,0 +1,267 @@
+"""Baud-rate negotiation and link self-test for GRBL controllers."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+import os
+import re
+
+try:  # FreeCAD may not be available during tests or linting.
+    import FreeCAD as App
+except Exception:  # pragma: no cover - FreeCAD not available in CI
+    App = None
+
+try:
+    from ..vendor import import_serial
+    from .clock import SYSTEM_CLOCK
+except ImportError:
+    from vendor import import_serial
+    from grbl.clock import SYSTEM_CLOCK
+
+
+CANDIDATE_BAUDRATES = (250000, 230400, 115200)
+DEFAULT_BAUDRATE = 115200
+# Modal-only line: acknowledged immediately without queuing motion.
+_TEST_LINE = b"G90 G21 G17 G94\n"
+_VERSION_RE = re.compile(r"\[VER:([^:\]]*):?([^\]]*)\]")
+
+
+@dataclass
+class LinkTestResult:
+    baudrate: int = 0
+    controller_id: str = ""
+    lines_per_sec: float = 0.0
+    results: dict = field(default_factory=dict)
+    log: list = field(default_factory=list)
+
+
+def open_serial(port, baudrate, timeout=0.2):
+    serial_module = import_serial()
+    return serial_module.serial_for_url(
+        port,
+        baudrate=baudrate,
+        timeout=timeout,
+        write_timeout=timeout,
+    )
+
+
+def is_grbl_response(text):
+    if "Grbl" in text:
+        return True
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("<") and line.endswith(">"):
+            return True
+    if "<" in text and ">" in text and ("MPos" in text or "WPos" in text):
+        return True
+    return False
+
+
+def probe_link(link, wait=0.8, clock=None):
+    """Wake the controller and wait for a banner or status response."""
+    clock = clock or SYSTEM_CLOCK
+    try:
+        link.reset_input_buffer()
+    except Exception:
+        pass
+    link.write(b"\r\n\r\n")
+    link.flush()
+    clock.sleep(0.1)
+    link.write(b"?")
+    link.flush()
+    deadline = clock.monotonic() + wait
+    data = b""
+    while clock.monotonic() < deadline:
+        chunk = link.read(128)
+        if chunk:
+            data += chunk
+            decoded = data.decode("utf-8", errors="replace")
+            if is_grbl_response(decoded):
+                return True, decoded
+    return False, data.decode("utf-8", errors="replace")
+
+
+def probe_port(port, baudrate=DEFAULT_BAUDRATE, opener=None, wait=0.8, clock=None):
+    """Open ``port`` at ``baudrate`` and report whether GRBL answered."""
+    opener = opener or open_serial
+    try:
+        link = opener(port, baudrate)
+    except Exception as exc:
+        return False, f"Probe failed: {exc}"
+    try:
+        ok, text = probe_link(link, wait=wait, clock=clock)
+        if ok:
+            return True, "GRBL response detected."
+        preview = text.strip()
+        if preview:
+            if len(preview) > 200:
+                preview = f"{preview[:200]}..."
+            return False, f"No GRBL signature (got: {preview})"
+        return False, ""
+    finally:
+        try:
+            link.close()
+        except Exception:
+            pass
+
+
+def read_controller_id(link, port, timeout=1.0, clock=None):
+    """Identify the controller from ``$I`` build info, falling back to the port."""
+    clock = clock or SYSTEM_CLOCK
+    try:
+        link.reset_input_buffer()
+    except Exception:
+        pass
+    link.write(b"$I\n")
+    link.flush()
+    version = ""
+    name = ""
+    deadline = clock.monotonic() + timeout
+    while clock.monotonic() < deadline:
+        raw = link.readline()
+        if not raw:
+            continue
+        line = raw.decode("utf-8", errors="replace").strip()
+        match = _VERSION_RE.match(line)
+        if match:
+            version, name = match.group(1), match.group(2).strip()
+        if line.lower().startswith(("ok", "error")):
+            break
+    if name:
+        return name
+    return f"{version or 'grbl'}@{port}"
+
+
+def measure_round_trips(link, count=50, timeout=1.0, clock=None):
+    """Send ``count`` modal-only lines ping-pong style.
+
+    Returns ``(lines_per_sec, stable)``; a link is stable when every line is
+    acknowledged with ``ok`` and nothing garbled or ``error`` comes back.
+    """
+    clock = clock or SYSTEM_CLOCK
+    started = clock.monotonic()
+    for _ in range(count):
+        link.write(_TEST_LINE)
+        link.flush()
+        deadline = clock.monotonic() + timeout
+        while True:
+            raw = link.readline()
+            line = raw.decode("ascii", errors="replace").strip()
+            if line == "ok":
+                break
+            if line.lower().startswith("error") or "\ufffd" in line:
+                return 0.0, False
+            if clock.monotonic() >= deadline:
+                return 0.0, False
+    elapsed = max(clock.monotonic() - started, 1e-9)
+    return count / elapsed, True
+
+
+def negotiate_baudrate(
+    port,
+    candidates=CANDIDATE_BAUDRATES,
+    opener=None,
+    test_lines=50,
+    clock=None,
+):
+    """Find the fastest stable baud rate for the controller on ``port``."""
+    opener = opener or open_serial
+    result = LinkTestResult()
+    for baudrate in candidates:
+        try:
+            link = opener(port, baudrate)
+        except Exception as exc:
+            result.log.append(f"{baudrate}: open failed ({exc})")
+            continue
+        try:
+            ok, _ = probe_link(link, clock=clock)
+            if not ok:
+                result.log.append(f"{baudrate}: no GRBL response")
+                continue
+            controller_id = read_controller_id(link, port, clock=clock)
+            lines_per_sec, stable = measure_round_trips(link, count=test_lines, clock=clock)
+        except Exception as exc:
+            result.log.append(f"{baudrate}: link test failed ({exc})")
+            continue
+        finally:
+            try:
+                link.close()
+            except Exception:
+                pass
+        if not stable:
+            result.log.append(f"{baudrate}: unstable")
+            continue
+        result.results[baudrate] = lines_per_sec
+        result.log.append(f"{baudrate}: {lines_per_sec:.0f} lines/s")
+        if lines_per_sec > result.lines_per_sec:
+            result.baudrate = baudrate
+            result.lines_per_sec = lines_per_sec
+            result.controller_id = controller_id
+    if result.baudrate:
+        remember_baudrate(result.controller_id, port, result.baudrate, result.lines_per_sec)
+    return result
+
+
+def remembered_baudrate(port):
+    """Return the stored baud rate of the controller last seen on ``port``."""
+    entries = load_link_profiles().get("controllers", {})
+    best = None
+    for entry in entries.values():
+        if entry.get("port") != port:
+            continue
+        if best is None or entry.get("updated_at", "") > best.get("updated_at", ""):
+            best = entry
+    if best is None:
+        return None
+    return int(best.get("baudrate", 0)) or None
+
+
+def remember_baudrate(controller_id, port, baudrate, lines_per_sec):
+    data = load_link_profiles()
+    data["controllers"][controller_id] = {
+        "port": port,
+        "baudrate": int(baudrate),
+        "lines_per_sec": round(float(lines_per_sec), 1),
+        "updated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ"),
+    }
+    save_link_profiles(data)
+
+
+def forget_port(port):
+    data = load_link_profiles()
+    controllers = data["controllers"]
+    for key in [key for key, entry in controllers.items() if entry.get("port") == port]:
+        del controllers[key]
+    save_link_profiles(data)
+
+
+def load_link_profiles():
+    path = get_link_profile_path()
+    if not os.path.exists(path):
+        return {"controllers": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {"controllers": {}}
+    if not isinstance(data, dict):
+        return {"controllers": {}}
+    data.setdefault("controllers", {})
+    return data
+
+
+def save_link_profiles(data):
+    path = get_link_profile_path()
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+
+
+def get_link_profile_path():
+    if App is not None and hasattr(App, "getUserAppDataDir"):
+        base = App.getUserAppDataDir()
+    else:
+        base = os.path.join(os.path.expanduser("~"), ".routerking")
+    return os.path.join(base, "grbl_links.json")
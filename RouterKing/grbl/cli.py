@@ -0,0 +1,702 @@
+"""Headless command-line GRBL sender.
+
+Run with ``python -m RouterKing.grbl``. Only the sender stack is imported,
+so this starts quickly without FreeCAD or Qt::
+
+    python -m RouterKing.grbl stream job.nc --port /dev/ttyUSB0
+    python -m RouterKing.grbl stream job.nc --port sim:// --json
+    python -m RouterKing.grbl stream job.nc --port /dev/ttyUSB0 --metrics-port 9465
+    python -m RouterKing.grbl bundle job.nc --compact
+    python -m RouterKing.grbl compact job.nc -o job.min.nc
+    python -m RouterKing.grbl stream job.rkjob --port /dev/ttyUSB0 --start-line 48210
+    python -m RouterKing.grbl split sheet.nc --port /dev/ttyUSB0 --port /dev/ttyUSB1
+    python -m RouterKing.grbl send --port tcp://192.168.1.50:23 '$$'
+    python -m RouterKing.grbl ports
+
+Progress and telemetry go to stderr; ``--json`` prints a run summary to
+stdout for scripts and throughput benchmarks.
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+
+try:
+    from ..gcode.bundle import DEFAULT_CHECKPOINT_INTERVAL, JobBundle, compile_bundle, is_bundle
+    from ..gcode.arcfit import fit_arcs_gcode
+    from ..gcode.compact import DEFAULT_RESOLUTION, compact_lines
+    from ..gcode.estimate import MachineLimits
+    from ..gcode.parser import iter_gcode_lines
+    from ..gcode.split import split_program
+    from .clock import SYSTEM_CLOCK
+    from .sender import GrblSender
+except ImportError:
+    from gcode.bundle import DEFAULT_CHECKPOINT_INTERVAL, JobBundle, compile_bundle, is_bundle
+    from gcode.arcfit import fit_arcs_gcode
+    from gcode.compact import DEFAULT_RESOLUTION, compact_lines
+    from gcode.estimate import MachineLimits
+    from gcode.parser import iter_gcode_lines
+    from gcode.split import split_program
+    from grbl.clock import SYSTEM_CLOCK
+    from grbl.sender import GrblSender
+
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_CONNECT = 3
+EXIT_ERROR = 4
+EXIT_ALARM = 5
+EXIT_TIMEOUT = 6
+EXIT_INTERRUPTED = 130
+
+_UNSET = object()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m RouterKing.grbl",
+        description="Headless GRBL sender.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stream = commands.add_parser("stream", help="Stream a G-code file.")
+    stream.add_argument("file", help="G-code file or job bundle ('-' reads stdin).")
+    _add_link_arguments(stream)
+    stream.add_argument(
+        "--start-line",
+        type=int,
+        default=0,
+        help="Resume at this source line: restore modal state, retract, travel and plunge first.",
+    )
+    stream.add_argument("--height-map", help="Autolevel with a saved height map (JSON).")
+    stream.add_argument(
+        "--status-interval",
+        type=float,
+        default=0.25,
+        help="Seconds between status requests (default 0.25).",
+    )
+    stream.add_argument("--timeout", type=float, default=0.0, help="Abort after N seconds.")
+    stream.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="Exit once the last line is acknowledged instead of waiting for Idle.",
+    )
+    stream.add_argument("--quiet", action="store_true", help="No progress output.")
+    stream.add_argument("--json", action="store_true", help="Print a JSON summary to stdout.")
+    stream.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus-style metrics on 127.0.0.1:PORT/metrics while streaming.",
+    )
+    stream.add_argument("--machine", default="", help="Machine label for the metrics.")
+
+    send = commands.add_parser("send", help="Send commands and print the responses.")
+    send.add_argument("commands", nargs="+", help="Commands, e.g. '$$' or 'G0 X0'.")
+    _add_link_arguments(send)
+
+    bundle = commands.add_parser("bundle", help="Compile a G-code file into a job bundle.")
+    bundle.add_argument("file", help="G-code file.")
+    bundle.add_argument("-o", "--output", help="Bundle path (default: FILE with .rkjob).")
+    bundle.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help=f"Lines between modal checkpoints (default {DEFAULT_CHECKPOINT_INTERVAL}).",
+    )
+    _add_limits_argument(bundle)
+    bundle.add_argument(
+        "--compact",
+        type=float,
+        nargs="?",
+        const=DEFAULT_RESOLUTION,
+        default=None,
+        metavar="MM",
+        help=f"Compact the lines, rounding to MM (default {DEFAULT_RESOLUTION}).",
+    )
+
+    compact = commands.add_parser(
+        "compact",
+        help="Rewrite a G-code file with fewer bytes (modal repeats, comments and extra digits dropped).",
+    )
+    compact.add_argument("file", help="G-code file ('-' reads stdin).")
+    compact.add_argument("-o", "--output", help="Output file (default: stdout).")
+    compact.add_argument(
+        "--resolution",
+        type=float,
+        default=DEFAULT_RESOLUTION,
+        help=f"Coordinate resolution in mm (default {DEFAULT_RESOLUTION}).",
+    )
+    compact.add_argument(
+        "--arcs",
+        type=float,
+        default=0.0,
+        metavar="MM",
+        help="First replace runs of G1 chords along circles with G2/G3 arcs within MM.",
+    )
+
+    split = commands.add_parser(
+        "split",
+        help="Split a job at safe retracts into time-balanced parts, one per machine.",
+    )
+    split.add_argument("file", help="G-code file or job bundle.")
+    split.add_argument("--parts", type=int, default=0, help="Number of parts (default: one per --port).")
+    split.add_argument("--safe-z", type=float, default=None, help="Lowest retract Z to cut at (work mm).")
+    split.add_argument("--output-dir", help="Write FILE.partN.nc here (default: next to FILE).")
+    _add_limits_argument(split)
+    _add_link_arguments(split, multiple=True)
+    split.add_argument("--quiet", action="store_true", help="No progress output.")
+
+    commands.add_parser("ports", help="List serial ports.")
+    return parser
+
+
+def _add_limits_argument(parser):
+    parser.add_argument(
+        "--machine-settings",
+        help="GRBL '$$' dump to estimate run time with ($11, $12, $110-$112, $120-$122).",
+    )
+
+
+def _load_limits(args):
+    if not args.machine_settings:
+        return None
+    with open(args.machine_settings, "r", encoding="utf-8", errors="replace") as handle:
+        return MachineLimits.from_text(handle.read())
+
+
+def _add_link_arguments(parser, multiple=False):
+    if multiple:
+        parser.add_argument(
+            "--port",
+            action="append",
+            default=[],
+            help="Stream part N to the Nth port; repeat once per machine.",
+        )
+    else:
+        parser.add_argument("--port", required=True, help="Serial port, tcp://host:port or sim://.")
+    parser.add_argument("--baud", type=int, default=115200, help="Baud rate (default 115200).")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=None,
+        help="Unacknowledged bytes while streaming (0 = one line per ok).",
+    )
+    parser.add_argument(
+        "--process",
+        action="store_true",
+        help="Host the sender in a child process.",
+    )
+    parser.add_argument(
+        "--banner-wait",
+        type=float,
+        default=2.5,
+        help="Seconds to wait for the GRBL banner after connecting (default 2.5).",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Echo controller messages.")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "ports":
+        return _list_ports()
+    if args.command == "bundle":
+        return _bundle(args)
+    if args.command == "split":
+        return _split(args)
+    if args.command == "compact":
+        return _compact(args)
+    try:
+        sender = _connect(args)
+    except Exception as exc:
+        _err(f"Connect failed: {exc}")
+        return EXIT_CONNECT
+    try:
+        if args.command == "send":
+            return _send(sender, args)
+        return _stream(sender, args)
+    except KeyboardInterrupt:
+        _abort(sender)
+        _err("Interrupted: stream stopped, feed hold and reset sent.")
+        return EXIT_INTERRUPTED
+    finally:
+        sender.disconnect()
+
+
+def _connect(args):
+    if args.process:
+        try:
+            from .process import ProcessSender
+        except ImportError:
+            from grbl.process import ProcessSender
+        sender = ProcessSender()
+    else:
+        sender = GrblSender()
+    sender.connect(args.port, baudrate=args.baud, window=args.window)
+    clock = _clock(sender)
+    deadline = clock.monotonic() + args.banner_wait
+    while clock.monotonic() < deadline:
+        lines = sender.poll()
+        _echo(lines, args.verbose)
+        if any(line.startswith("Grbl") for line in lines):
+            break
+        clock.sleep(0.01)
+    return sender
+
+
+def _clock(sender):
+    """The sender's clock for waits and timeouts; ``ProcessSender`` has none."""
+    return getattr(sender, "clock", None) or SYSTEM_CLOCK
+
+
+def _read_lines(args):
+    if args.file == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.file, "r", encoding="utf-8", errors="replace") as handle:
+            text = handle.read()
+    lines = iter_gcode_lines(text)
+    if args.height_map:
+        lines = _autolevel(lines, args.height_map)
+    return list(lines)
+
+
+def _autolevel(lines, height_map):
+    try:
+        from .autolevel import HeightMap, autolevel_lines
+    except ImportError:
+        from grbl.autolevel import HeightMap, autolevel_lines
+    return autolevel_lines(lines, HeightMap.load(height_map))
+
+
+class _Job:
+    """Lines to stream: a plain list, or a bundle streamed from its map."""
+
+    def __init__(self, lines=None, bundle=None, start=0, preamble=None, temp_dir=None):
+        self.lines = lines
+        self.bundle = bundle
+        self.start = start
+        self.preamble = preamble or []
+        self._temp_dir = temp_dir
+
+    @property
+    def total(self):
+        if self.bundle is None:
+            return len(self.lines)
+        return len(self.preamble) + len(self.bundle) - self.start
+
+    def begin(self, sender):
+        if self.bundle is None:
+            sender.start_stream(self.lines)
+        else:
+            sender.start_bundle(self.bundle, self.start, self.preamble)
+
+    def remaining(self, acked):
+        """Estimated seconds left after ``acked`` lines, if known."""
+        if self.bundle is None:
+            return None
+        return self.bundle.remaining_time(self.start + max(0, acked - len(self.preamble)))
+
+    def close(self):
+        if self.bundle is not None:
+            self.bundle.close()
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+
+
+def _open_job(args):
+    bundled = args.file != "-" and is_bundle(args.file)
+    if args.start_line and args.height_map:
+        raise ValueError("--start-line cannot be combined with --height-map")
+    if not bundled and not args.start_line:
+        return _Job(lines=_read_lines(args))
+    if bundled and args.height_map:
+        with JobBundle(args.file) as bundle:
+            return _Job(lines=list(_autolevel(bundle.iter_lines(), args.height_map)))
+    temp_dir = None
+    path = args.file
+    if not bundled:
+        if args.file == "-":
+            raise ValueError("--start-line needs a file")
+        temp_dir = tempfile.TemporaryDirectory(prefix="routerking_")
+        path = compile_bundle(args.file, os.path.join(temp_dir.name, "job.rkjob"))
+    bundle = JobBundle(path)
+    start = bundle.find_line(args.start_line) if args.start_line else 0
+    try:
+        preamble = bundle.resume_lines(start) if start else []
+    except ValueError:
+        bundle.close()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+        raise
+    return _Job(bundle=bundle, start=start, preamble=preamble, temp_dir=temp_dir)
+
+
+def _bundle(args):
+    try:
+        path = compile_bundle(
+            args.file,
+            args.output,
+            args.checkpoint_interval,
+            _load_limits(args),
+            compact=args.compact,
+        )
+        with JobBundle(path) as bundle:
+            lines = len(bundle)
+            estimate = bundle.estimated_time
+    except (OSError, ValueError) as exc:
+        _err(f"Cannot compile {args.file}: {exc}")
+        return EXIT_FAILURE
+    _err(f"Wrote {path}: {lines} lines, estimated {estimate / 60.0:.1f} min.")
+    return EXIT_OK
+
+
+def _compact(args):
+    try:
+        if args.file == "-":
+            text = sys.stdin.read()
+        else:
+            with open(args.file, "r", encoding="utf-8", errors="replace") as handle:
+                text = handle.read()
+        lines = text.splitlines()
+        source_bytes = sum(len(line) + 1 for line in lines)
+        if args.arcs > 0:
+            lines = fit_arcs_gcode(text, args.arcs).lines
+        program = compact_lines(lines, args.resolution)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                handle.write(program.to_gcode())
+        else:
+            sys.stdout.write(program.to_gcode())
+    except (OSError, ValueError) as exc:
+        _err(f"Cannot compact {args.file}: {exc}")
+        return EXIT_FAILURE
+    saved = 1.0 - program.bytes / source_bytes if source_bytes else 0.0
+    _err(f"{source_bytes} -> {program.bytes} bytes ({saved:.0%} smaller), {len(program)} lines.")
+    return EXIT_OK
+
+
+def _split(args):
+    parts = args.parts or len(args.port)
+    if parts < 1:
+        _err("Give --parts or one --port per machine.")
+        return EXIT_USAGE
+    if args.port and parts != len(args.port):
+        _err(f"{parts} parts but {len(args.port)} ports.")
+        return EXIT_USAGE
+    try:
+        limits = _load_limits(args)
+        if is_bundle(args.file):
+            with JobBundle(args.file) as bundle:
+                jobs = split_program(bundle.iter_lines(), parts, safe_z=args.safe_z, limits=limits)
+        else:
+            with open(args.file, "r", encoding="utf-8", errors="replace") as handle:
+                jobs = split_program(handle.read(), parts, safe_z=args.safe_z, limits=limits)
+    except (OSError, ValueError) as exc:
+        _err(f"Cannot read {args.file}: {exc}")
+        return EXIT_FAILURE
+    if len(jobs) < parts:
+        _err(f"Only {len(jobs)} safe split point(s) found; using {len(jobs)} part(s).")
+    if args.output_dir or not args.port:
+        directory = args.output_dir or os.path.dirname(os.path.abspath(args.file))
+        stem = os.path.splitext(os.path.basename(args.file))[0]
+        for job in jobs:
+            path = os.path.join(directory, f"{stem}.part{job.index + 1}.nc")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(job.to_gcode())
+            _err(f"Wrote {path}: {len(job.lines)} lines, estimated {job.estimated_time / 60.0:.1f} min.")
+    if not args.port:
+        return EXIT_OK
+    return _stream_parts(args, jobs)
+
+
+def _stream_parts(args, jobs):
+    senders = []
+    try:
+        for job, port in zip(jobs, args.port):
+            link = copy.copy(args)
+            link.port = port
+            try:
+                senders.append(_connect(link))
+            except Exception as exc:
+                _err(f"Connect failed on {port}: {exc}")
+                return EXIT_CONNECT
+        runs = []
+        for job, sender, port in zip(jobs, senders, args.port):
+            job.start_on(sender)
+            runs.append({"port": port, "sender": sender, "stale": _UNSET, "code": None})
+            if not args.quiet:
+                _err(f"{port}: part {job.index + 1}, {len(job.lines)} lines, ~{job.estimated_time / 60.0:.1f} min.")
+        try:
+            _wait_parts(runs, args)
+        except KeyboardInterrupt:
+            for run in runs:
+                _abort(run["sender"])
+            _err("Interrupted: streams stopped, feed hold and reset sent.")
+            return EXIT_INTERRUPTED
+        code = EXIT_OK
+        for run in runs:
+            if run["code"] != EXIT_OK and code == EXIT_OK:
+                code = run["code"]
+            if not args.quiet or run["code"] != EXIT_OK:
+                progress = run["sender"].get_progress()
+                error = progress.get("last_error") or ""
+                _err(f"{run['port']}: {progress.get('acked', 0)}/{progress.get('total', 0)} lines {error}".rstrip())
+        return code
+    finally:
+        for sender in senders:
+            sender.disconnect()
+
+
+def _wait_parts(runs, args, status_interval=0.25):
+    clock = _clock(runs[0]["sender"]) if runs else SYSTEM_CLOCK
+    next_status = 0.0
+    while any(run["code"] is None for run in runs):
+        now = clock.monotonic()
+        request = now >= next_status
+        if request:
+            next_status = now + status_interval
+        for run in runs:
+            if run["code"] is not None:
+                continue
+            sender = run["sender"]
+            _echo(sender.poll(), args.verbose)
+            if request:
+                sender.request_status()
+            progress = sender.get_progress()
+            current = sender.get_status()
+            if progress.get("last_error"):
+                error = progress["last_error"].lower()
+                run["code"] = EXIT_ALARM if error.startswith("alarm") else EXIT_ERROR
+            elif not progress.get("streaming"):
+                if run["stale"] is _UNSET:
+                    run["stale"] = current
+                    next_status = now
+                elif current is not run["stale"]:
+                    state = str((current or {}).get("state", "")).lower()
+                    if state == "idle":
+                        run["code"] = EXIT_OK
+                    elif state == "alarm":
+                        run["code"] = EXIT_ALARM
+        clock.sleep(0.002)
+
+
+def _stream(sender, args):
+    try:
+        job = _open_job(args)
+    except (OSError, ValueError) as exc:
+        _err(f"Cannot read {args.file}: {exc}")
+        return EXIT_FAILURE
+    try:
+        if not job.total:
+            _err("Nothing to send: file has no G-code.")
+            return EXIT_FAILURE
+        if job.start and not args.quiet:
+            _err(f"Resuming at source line {job.bundle.source_line(job.start)}.")
+        metrics = _start_metrics(sender, args)
+        try:
+            return _stream_lines(sender, args, job)
+        finally:
+            if metrics is not None:
+                metrics.stop()
+    finally:
+        job.close()
+
+
+def _start_metrics(sender, args):
+    if args.metrics_port is None:
+        return None
+    try:
+        from .metrics import MetricsServer
+    except ImportError:
+        from grbl.metrics import MetricsServer
+    labels = {"machine": args.machine} if args.machine else None
+    server = MetricsServer(sender, port=args.metrics_port, labels=labels)
+    try:
+        server.start()
+    except OSError as exc:
+        _err(f"Metrics endpoint unavailable: {exc}")
+        return None
+    if not args.quiet:
+        _err(f"Metrics at {server.url}")
+    return server
+
+
+def _stream_lines(sender, args, job):
+    progress_out = _Progress(quiet=args.quiet)
+    clock = _clock(sender)
+    started = clock.monotonic()
+    job.begin(sender)
+    next_status = 0.0
+    stale_status = _UNSET
+    code = EXIT_OK
+    while True:
+        now = clock.monotonic()
+        _echo(sender.poll(), args.verbose)
+        if now >= next_status:
+            sender.request_status()
+            next_status = now + args.status_interval
+        progress = sender.get_progress()
+        current = sender.get_status()
+        progress_out.update(progress, current or {}, now - started, job.remaining(progress.get("acked", 0)))
+        if progress.get("last_error"):
+            error = progress["last_error"]
+            code = EXIT_ALARM if error.lower().startswith("alarm") else EXIT_ERROR
+            break
+        if not progress.get("streaming"):
+            if args.no_wait:
+                break
+            if stale_status is _UNSET:
+                # Only trust a status report requested after the last ok.
+                stale_status = current
+                next_status = now
+            elif current is not stale_status:
+                state = str((current or {}).get("state", "")).lower()
+                if state == "idle":
+                    break
+                if state == "alarm":
+                    code = EXIT_ALARM
+                    break
+        if args.timeout and now - started > args.timeout:
+            _abort(sender)
+            code = EXIT_TIMEOUT
+            break
+        clock.sleep(0.002)
+
+    elapsed = clock.monotonic() - started
+    progress = sender.get_progress()
+    progress_out.finish()
+    summary = {
+        "file": args.file,
+        "port": args.port,
+        "lines": job.total,
+        "acked": progress.get("acked", 0),
+        "elapsed": round(elapsed, 3),
+        "lines_per_sec": round(progress.get("acked", 0) / elapsed, 1) if elapsed else 0.0,
+        "error": progress.get("last_error"),
+        "state": (sender.get_status() or {}).get("state"),
+        "exit_code": code,
+    }
+    if code == EXIT_TIMEOUT:
+        _err(f"Timed out after {args.timeout:.0f} s; stream stopped.")
+    elif summary["error"]:
+        _err(f"Controller reported {summary['error']} after {summary['acked']} lines.")
+    elif code == EXIT_ALARM:
+        _err("Controller entered alarm state.")
+    if not args.quiet:
+        _err(
+            f"Sent {summary['acked']}/{summary['lines']} lines in {elapsed:.2f} s "
+            f"({summary['lines_per_sec']:.0f} lines/s)."
+        )
+    if args.json:
+        print(json.dumps(summary))
+    return code
+
+
+def _send(sender, args):
+    clock = _clock(sender)
+    code = EXIT_OK
+    for command in args.commands:
+        sender.send_line(command)
+        deadline = clock.monotonic() + 10.0
+        done = False
+        while not done:
+            for line in sender.poll():
+                lower = line.lower()
+                if line.startswith("<"):
+                    continue
+                print(line)
+                if lower == "ok":
+                    done = True
+                elif lower.startswith("error"):
+                    done, code = True, EXIT_ERROR
+                elif lower.startswith("alarm"):
+                    done, code = True, EXIT_ALARM
+            if not done and clock.monotonic() > deadline:
+                _err(f"No response to {command}.")
+                return EXIT_TIMEOUT
+            clock.sleep(0.005)
+        if code != EXIT_OK:
+            break
+    return code
+
+
+def _list_ports():
+    try:
+        from ..vendor import import_serial
+    except ImportError:
+        from vendor import import_serial
+    import_serial()
+    from serial.tools import list_ports
+
+    for port in list_ports.comports():
+        print(f"{port.device}\t{port.description}")
+    return EXIT_OK
+
+
+def _abort(sender):
+    try:
+        sender.stop_stream()
+        sender.send_realtime_command("!")
+        sender.send_soft_reset()
+    except Exception:
+        pass
+
+
+def _echo(lines, verbose):
+    for line in lines:
+        lower = line.lower()
+        if lower.startswith(("error", "alarm")) or (
+            verbose and lower != "ok" and not line.startswith("<")
+        ):
+            _err(line)
+
+
+def _err(text):
+    print(text, file=sys.stderr)
+
+
+class _Progress:
+    """Single-line progress on a terminal, one line per second otherwise."""
+
+    def __init__(self, quiet=False, stream=None):
+        self.quiet = quiet
+        self.stream = stream or sys.stderr
+        self.tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self._last = 0.0
+        self._width = 0
+
+    def update(self, progress, status, elapsed, remaining=None):
+        if self.quiet or elapsed - self._last < (0.1 if self.tty else 1.0):
+            return
+        self._last = elapsed
+        total = progress.get("total", 0) or 1
+        acked = progress.get("acked", 0)
+        rate = acked / elapsed if elapsed else 0.0
+        feed = (status.get("FS") or status.get("F") or "").split(",")[0]
+        text = (
+            f"{acked}/{total} {100.0 * acked / total:5.1f}% {rate:6.0f} l/s "
+            f"{status.get('state', '?')} {status.get('MPos') or status.get('WPos') or ''}"
+        )
+        if feed:
+            text += f" F{feed}"
+        if status.get("Bf"):
+            text += f" Bf:{status['Bf']}"
+        if remaining is not None:
+            text += f" ETA {int(remaining) // 60}:{int(remaining) % 60:02d}"
+        if self.tty:
+            padding = " " * max(0, self._width - len(text))
+            self.stream.write(f"\r{text}{padding}")
+            self._width = len(text)
+        else:
+            self.stream.write(f"{text}\n")
+        self.stream.flush()
+
+    def finish(self):
+        if self.tty and self._width and not self.quiet:
+            self.stream.write("\n")
+            self.stream.flush()
@@ -0,0 +1,102 @@
+"""Injectable time sources for the sender stack.
+
+The sender, procedures, baud probing, the simulator, the CLI's waits and
+the metrics endpoint wait and measure time through a clock:
+``SYSTEM_CLOCK`` in production, ``VirtualClock`` in tests. A virtual clock
+only moves when something sleeps or calls ``advance()``, so a one-hour job
+against the timed simulator runs in the time it takes to compute it and
+every run is repeatable. Waits the operating system does for us (socket
+``select`` in ``SocketTransport``, the pipe to the ``ProcessSender`` child)
+stay on wall time; they only occur with real links.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class SystemClock:
+    """Real time: ``time.perf_counter``/``time.time``/``time.sleep``."""
+
+    virtual = False
+
+    def monotonic(self):
+        # perf_counter is monotonic too and keeps sub-ms resolution on Windows.
+        return time.perf_counter()
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event, timeout):
+        """``event.wait(timeout)`` that a virtual clock can fast-forward."""
+        return event.wait(timeout)
+
+    def call_later(self, delay, callback, *args):
+        timer = threading.Timer(max(delay, 0.0), callback, args)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+class VirtualClock(SystemClock):
+    """Deterministic clock for single-threaded tests and harnesses.
+
+    ``sleep()``/``wait()`` advance the clock instead of blocking, and
+    callbacks scheduled with ``call_later()`` fire in time order as the
+    clock passes them (with ``monotonic()`` reading their due time).
+    """
+
+    virtual = True
+
+    def __init__(self, start=0.0, epoch=1_700_000_000.0):
+        self._now = float(start)
+        self._epoch = epoch
+        self._timers = []
+        self._sequence = itertools.count()
+
+    def monotonic(self):
+        return self._now
+
+    def time(self):
+        return self._epoch + self._now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        self.advance(timeout)
+        return event.is_set()
+
+    def call_later(self, delay, callback, *args):
+        entry = [self._now + max(delay, 0.0), next(self._sequence), callback, args]
+        heapq.heappush(self._timers, entry)
+        return _VirtualTimer(entry)
+
+    def advance(self, seconds):
+        """Move time forward, firing due callbacks on the way."""
+        target = self._now + max(seconds, 0.0)
+        while self._timers and self._timers[0][0] <= target:
+            due, _, callback, args = heapq.heappop(self._timers)
+            if callback is None:
+                continue
+            self._now = max(self._now, due)
+            callback(*args)
+        self._now = max(self._now, target)
+
+
+class _VirtualTimer:
+    def __init__(self, entry):
+        self._entry = entry
+
+    def cancel(self):
+        self._entry[2] = None
+
+
+SYSTEM_CLOCK = SystemClock()
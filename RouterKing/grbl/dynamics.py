@@ -0,0 +1,323 @@
+"""Max-feed and acceleration characterization for GRBL machines."""
+
+from dataclasses import dataclass, field
+import math
+import re
+
+try:
+    from .procedures import ProcedureError, SenderProcedure, format_number, parse_position
+except ImportError:
+    from grbl.procedures import ProcedureError, SenderProcedure, format_number, parse_position
+
+
+_AXES = "XYZ"
+_SETTING_RE = re.compile(r"^\$(\d+)=([-+]?\d*\.?\d+)")
+# Multipliers of the current $110-$112 / $120-$122 values tried by default.
+FEED_STEPS = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0)
+ACCEL_STEPS = (0.5, 0.75, 1.0, 1.5, 2.0, 3.0)
+
+
+def move_time(distance, feed, accel):
+    """Return the duration in seconds of a rest-to-rest trapezoidal move.
+
+    ``feed`` is in mm/min and ``accel`` in mm/s^2, matching GRBL settings.
+    """
+    distance = abs(distance)
+    speed = feed / 60.0
+    if distance <= 0.0 or speed <= 0.0 or accel <= 0.0:
+        return 0.0
+    if speed * speed / accel > distance:
+        return 2.0 * math.sqrt(distance / accel)
+    return speed / accel + distance / speed
+
+
+def peak_feed(distance, feed, accel):
+    """Return the highest rate (mm/min) a move of ``distance`` can reach."""
+    return min(feed, math.sqrt(abs(distance) * accel) * 60.0)
+
+
+@dataclass
+class DynamicsLevel:
+    axis: str
+    kind: str
+    feed: float
+    accel: float
+    expected_time: float = 0.0
+    measured_time: float = 0.0
+    peak_feed: float = 0.0
+    drift: float = None
+    fault: str = ""
+    samples: list = field(default_factory=list)
+
+
+class CharacterizeDynamics(SenderProcedure):
+    """Step max feed and acceleration per axis and propose GRBL settings.
+
+    For each axis the feed sweep writes each candidate to ``$110``-``$112``
+    and jogs ``distance`` mm away from the reference switch at that rate.
+    The acceleration sweep then does the same with ``$120``-``$122`` at the
+    best passing feed. Every test move is sampled at ``sample_interval``.
+    The elapsed time and peak ``FS`` rate are compared with the trapezoidal
+    profile the settings promise. The move back runs at the original
+    settings.
+
+    With hard limits enabled (``$21=1``) the axis re-touches its reference
+    switch after every level; a trigger position that moved by more than
+    ``drift_tolerance`` means the test move lost steps. Sweeps stop at the
+    first faulty level, the proposal is the last passing value times
+    ``safety``, and the original settings are always written back.
+    ``directions`` gives the side of the reference switch per axis.
+    """
+
+    name = "Characterize dynamics"
+    sample_interval = 0.01
+
+    def __init__(
+        self,
+        sender,
+        axes=("X", "Y", "Z"),
+        directions=None,
+        distance=50.0,
+        feeds=None,
+        accels=None,
+        tolerance=0.25,
+        latency=0.2,
+        drift_tolerance=0.05,
+        search_feed=600.0,
+        touch_feed=100.0,
+        backoff=3.0,
+        search_distance=2000.0,
+        safety=0.8,
+        on_line=None,
+    ):
+        super().__init__(sender, on_line=on_line)
+        self.axes = [axis.upper() for axis in axes]
+        self.directions = {axis: -1.0 for axis in _AXES}
+        self.directions.update(directions or {})
+        if isinstance(distance, dict):
+            self.distance = {axis: distance.get(axis, 50.0) for axis in _AXES}
+        else:
+            self.distance = {axis: distance for axis in _AXES}
+        self.feeds = feeds or {}
+        self.accels = accels or {}
+        self.tolerance = tolerance
+        self.latency = latency
+        self.drift_tolerance = drift_tolerance
+        self.search_feed = search_feed
+        self.touch_feed = touch_feed
+        self.backoff = backoff
+        self.search_distance = search_distance
+        self.safety = safety
+        self.settings = {}
+        self.levels = []
+        self.proposals = {}
+        self.notes = []
+        self._original = {}
+        self._reference = None
+
+    def handle_line(self, line):
+        match = _SETTING_RE.match(line)
+        if match:
+            self.settings[int(match.group(1))] = float(match.group(2))
+
+    def execute(self):
+        if self.sender.is_streaming():
+            raise ProcedureError(f"{self.name}: sender busy.")
+        self.command("$$")
+        codes = [base + _AXES.index(axis) for axis in self.axes for base in (110, 120)]
+        missing = [code for code in codes if code not in self.settings]
+        if missing:
+            raise ProcedureError(f"{self.name}: controller did not report ${missing[0]}.")
+        self._original = {code: self.settings[code] for code in codes}
+        verify = bool(self.settings.get(21))
+        if not verify:
+            self.notes.append("Hard limits are off ($21=0); lost steps cannot be detected.")
+        try:
+            for axis in self.axes:
+                self._characterize(axis, verify)
+        finally:
+            with self.shielded():
+                self._restore_settings()
+        return dict(self.proposals)
+
+    def _characterize(self, axis, verify):
+        index = _AXES.index(axis)
+        base_feed = self._original[110 + index]
+        base_accel = self._original[120 + index]
+        self._reference = self._find_reference(axis) if verify else None
+
+        best_feed = None
+        feeds = self.feeds.get(axis) or [base_feed * step for step in FEED_STEPS]
+        for feed in sorted(feeds):
+            if peak_feed(self.distance[axis], feed, base_accel) < feed * (1.0 - self.tolerance):
+                self.notes.append(
+                    f"{axis}: {self.distance[axis]:.0f} mm is too short to reach {feed:.0f} mm/min."
+                )
+                break
+            level = self._run_level(axis, "feed", feed, base_accel)
+            if level.fault:
+                break
+            best_feed = feed
+        if best_feed is None:
+            self.notes.append(f"{axis}: no feed level passed.")
+            return
+        self.proposals[110 + index] = round(best_feed * self.safety)
+
+        best_accel = None
+        accels = self.accels.get(axis) or [base_accel * step for step in ACCEL_STEPS]
+        for accel in sorted(accels):
+            level = self._run_level(axis, "accel", best_feed, accel)
+            if level.fault:
+                break
+            best_accel = accel
+        if best_accel is None:
+            self.notes.append(f"{axis}: no acceleration level passed.")
+            return
+        self.proposals[120 + index] = round(best_accel * self.safety)
+
+    def _run_level(self, axis, kind, feed, accel):
+        index = _AXES.index(axis)
+        distance = -self.directions[axis] * self.distance[axis]
+        level = DynamicsLevel(axis, kind, feed, accel)
+        level.expected_time = move_time(distance, feed, accel)
+        self.levels.append(level)
+
+        self.wait_idle()
+        self._write_setting(110 + index, feed)
+        self._write_setting(120 + index, accel)
+        start = self._position()[index]
+        level.samples, level.measured_time = self._sample_jog(
+            axis, distance, feed, level.expected_time
+        )
+        end = level.samples[-1][1] if level.samples else start
+        level.peak_feed = _peak_rate(level.samples)
+
+        self._write_setting(120 + index, self._original[120 + index])
+        if not self._return(axis, -distance, min(feed, self._original[110 + index])):
+            # The switch tripped before the axis got back: steps were lost.
+            self.reset_and_unlock()
+            self.jog(axis, -self.directions[axis] * self.backoff, self.search_feed)
+            self._reference = self._touch(axis)
+            level.fault = "lost steps (reference switch hit on the way back)"
+            return level
+        if self._reference is not None:
+            trigger = self._touch(axis)
+            level.drift = trigger - self._reference
+            self._reference = trigger
+
+        expected_peak = peak_feed(distance, feed, accel)
+        allowed_time = level.expected_time * (1.0 + self.tolerance) + self.latency
+        if abs(end - (start + distance)) > 0.01:
+            level.fault = f"stopped at {end:.3f} instead of {start + distance:.3f}"
+        elif level.measured_time > allowed_time:
+            level.fault = (
+                f"took {level.measured_time:.2f} s, expected {level.expected_time:.2f} s"
+            )
+        elif level.peak_feed < expected_peak * (1.0 - self.tolerance):
+            level.fault = f"peaked at {level.peak_feed:.0f} mm/min of {expected_peak:.0f}"
+        elif level.drift is not None and abs(level.drift) > self.drift_tolerance:
+            level.fault = f"lost steps ({level.drift:+.3f} mm at the reference switch)"
+        return level
+
+    def _sample_jog(self, axis, distance, feed, expected):
+        index = _AXES.index(axis)
+        alarms = self._alarm_count
+        started = self.clock.monotonic()
+        self.jog(axis, distance, feed)
+        timeout = expected * 3.0 + 5.0
+        samples = []
+        while True:
+            status = self.query_status()
+            elapsed = self.clock.monotonic() - started
+            state = str(status.get("state", "")).lower()
+            position = parse_position(status)
+            if position is not None:
+                samples.append((elapsed, position[index], _status_rate(status)))
+            if state == "alarm" or self._alarm_count > alarms:
+                raise ProcedureError(
+                    f"{self.name}: {axis} hit a limit during the test move; reduce the distance."
+                )
+            if state == "idle":
+                return samples, elapsed
+            if elapsed > timeout:
+                raise ProcedureError(f"{self.name}: {axis} test move timed out.")
+            self.sleep(self.sample_interval)
+
+    def _return(self, axis, distance, feed, timeout=60.0):
+        """Jog back to the level's start; return False if a limit tripped."""
+        alarms = self._alarm_count
+        self.jog(axis, distance, feed)
+        deadline = self.clock.monotonic() + timeout
+        while True:
+            state = str(self.query_status().get("state", "")).lower()
+            if state == "alarm" or self._alarm_count > alarms:
+                return False
+            if state == "idle":
+                return True
+            if self.clock.monotonic() >= deadline:
+                raise ProcedureError(f"{self.name}: {axis} return move timed out.")
+            self.sleep(self.sample_interval)
+
+    def _find_reference(self, axis):
+        direction = self.directions[axis]
+        self.jog_to_limit(axis, direction, self.search_distance, self.search_feed)
+        self.reset_and_unlock()
+        self.jog(axis, -direction * self.backoff, self.search_feed)
+        return self._touch(axis)
+
+    def _touch(self, axis):
+        """Creep into the reference switch and return the trigger position."""
+        direction = self.directions[axis]
+        self.wait_idle()
+        self.jog_to_limit(axis, direction, self.backoff * 2.0, self.touch_feed)
+        self.reset_and_unlock()
+        trigger = self._position()[_AXES.index(axis)]
+        self.jog(axis, -direction * self.backoff, self.search_feed)
+        self.wait_idle()
+        return trigger
+
+    def _position(self):
+        position = parse_position(self.wait_idle())
+        if position is None:
+            raise ProcedureError(f"{self.name}: status report has no MPos.")
+        return position
+
+    def _write_setting(self, code, value):
+        if abs(self.settings.get(code, float("nan")) - value) < 1e-6:
+            return
+        self.command(f"${code}={format_number(value)}")
+        self.settings[code] = value
+
+    def _restore_settings(self):
+        self.cancel_jog()
+        try:
+            self.wait_idle(timeout=10.0)
+        except ProcedureError:
+            pass
+        for code, value in self._original.items():
+            try:
+                self._write_setting(code, value)
+            except ProcedureError as exc:
+                self.notes.append(f"Could not restore ${code}: {exc}")
+
+
+def _status_rate(status):
+    value = status.get("FS") or status.get("F")
+    if not value:
+        return None
+    try:
+        return float(value.split(",")[0])
+    except ValueError:
+        return None
+
+
+def _peak_rate(samples):
+    """Return the peak rate from ``FS`` fields, or from position deltas."""
+    rates = [rate for _, _, rate in samples if rate is not None]
+    if rates and max(rates) > 0.0:
+        return max(rates)
+    peak = 0.0
+    for (t0, p0, _), (t1, p1, _) in zip(samples, samples[1:]):
+        if t1 > t0:
+            peak = max(peak, abs(p1 - p0) / (t1 - t0) * 60.0)
+    return peak
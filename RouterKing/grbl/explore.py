@@ -0,0 +1,121 @@
+"""Travel-limit discovery with continuous jogs for RouterKing."""
+
+try:
+    from .procedures import ProcedureError, SenderProcedure, format_number, parse_position
+except ImportError:
+    from grbl.procedures import ProcedureError, SenderProcedure, format_number, parse_position
+
+
+_AXES = "XYZ"
+
+
+class ExploreLimits(SenderProcedure):
+    """Measure axis travel by jogging into the limit switches.
+
+    For each axis one long ``$J=`` jog runs toward the limit while status is
+    sampled at ``status_interval``. When the hard limit trips, the
+    controller is reset and unlocked and the retained machine position is
+    read back. The axis then backs off by ``reapproach`` and creeps into the
+    switch again at ``slow_feed`` for a precise trigger position, and
+    finally returns to where it started. The stored travel is the distance
+    from the start position to the precise trigger, minus ``margin``.
+
+    GRBL treats the machine position as lost after a hard-limit halt, so
+    with homing enabled (``homing=None`` reads ``$22`` from the controller)
+    each measurement re-homes with ``$H`` before the return jog.
+    """
+
+    name = "Explore limits"
+    status_interval = 0.02
+    homing_timeout = 120.0
+
+    def __init__(
+        self,
+        sender,
+        axes=("X", "Y", "Z"),
+        directions=None,
+        feed=1200.0,
+        slow_feed=100.0,
+        margin=2.0,
+        reapproach=5.0,
+        max_travel=None,
+        expected=None,
+        homing=None,
+        on_line=None,
+    ):
+        super().__init__(sender, on_line=on_line)
+        self.axes = [axis.upper() for axis in axes]
+        self.directions = {axis: 1.0 for axis in _AXES}
+        self.directions.update(directions or {})
+        self.feed = feed
+        self.slow_feed = slow_feed
+        self.margin = margin
+        self.reapproach = reapproach
+        self.max_travel = {axis: 2000.0 for axis in _AXES}
+        self.max_travel.update(max_travel or {})
+        self.expected = {axis: value for axis, value in (expected or {}).items() if value}
+        self.homing = homing
+        self.results = {}
+        self.triggers = {}
+
+    def handle_line(self, line):
+        if self.homing is None and line.startswith("$22="):
+            try:
+                self.homing = float(line[4:]) != 0.0
+            except ValueError:
+                pass
+
+    def execute(self):
+        if self.sender.is_streaming():
+            raise ProcedureError(f"{self.name}: sender busy.")
+        if self.homing is None:
+            self.command("$$")
+            self.homing = bool(self.homing)
+        try:
+            for axis in self.axes:
+                self.results[axis] = self._explore_axis(axis)
+        except ProcedureError:
+            self.cancel_jog()
+            raise
+        return dict(self.results)
+
+    def _explore_axis(self, axis):
+        direction = self.directions.get(axis, 1.0)
+        measured = self._measure(axis, direction)
+        if self._too_short(axis, measured):
+            # The axis probably started at the far end; try the other way.
+            measured = max(measured, self._measure(axis, -direction))
+        return measured
+
+    def _too_short(self, axis, measured):
+        expected = self.expected.get(axis)
+        if expected:
+            return measured < expected * 0.8
+        return measured < self.reapproach * 2.0
+
+    def _measure(self, axis, direction):
+        index = _AXES.index(axis)
+        start = self._position()[index]
+        self.jog_to_limit(axis, direction, self.max_travel[axis], self.feed, self.status_interval)
+        self.reset_and_unlock()
+        self.jog(axis, -direction * self.reapproach, self.feed)
+        self.wait_idle()
+        self.jog_to_limit(
+            axis, direction, self.reapproach * 2.0, self.slow_feed, self.status_interval
+        )
+        self.reset_and_unlock()
+        trigger = self._position()[index]
+        self.triggers[axis] = trigger
+        if self.homing:
+            # The hard-limit halt may have lost steps; re-establish the
+            # machine position before moving anywhere by coordinates.
+            self.command("$H", timeout=self.homing_timeout)
+        self.command(f"$J=G53 G21 {axis}{format_number(start)} F{format_number(self.feed)}")
+        self.wait_idle()
+        return max(0.0, abs(trigger - start) - self.margin)
+
+    def _position(self):
+        position = parse_position(self.wait_idle())
+        if position is None:
+            raise ProcedureError(f"{self.name}: status report has no MPos.")
+        return position
@@ -0,0 +1,111 @@
+"""Virtual-time test bench: sender + timed simulator on one ``VirtualClock``.
+
+``VirtualHarness`` wires a ``GrblSender`` to an in-process ``GrblSimulator``
+without a reader thread; the simulator's motion, the transport's read
+timeouts and every procedure wait run on the same virtual clock. Streaming
+an hour of motion or waiting out a 60 s timeout therefore takes
+milliseconds and behaves the same on every run::
+
+    bench = VirtualHarness(settings={21: 1})
+    bench.stream(lines)
+    ExploreLimits(bench.sender, axes="X").run()
+"""
+
+try:
+    from .clock import VirtualClock
+    from .sender import GrblSender
+    from .simulator import GrblSimulator, SimulatorTransport
+except ImportError:
+    from grbl.clock import VirtualClock
+    from grbl.sender import GrblSender
+    from grbl.simulator import GrblSimulator, SimulatorTransport
+
+
+class HarnessTimeout(AssertionError):
+    """Raised when a virtual-time wait runs past its deadline."""
+
+
+class VirtualHarness:
+    def __init__(self, settings=None, timed=True, start=0.0, window=None, **simulator_options):
+        self.clock = VirtualClock(start)
+        self.simulator = GrblSimulator(
+            settings,
+            timed=timed,
+            clock=self.clock.monotonic,
+            **simulator_options,
+        )
+        self.transport = SimulatorTransport(self.simulator, timeout=0.0, clock=self.clock)
+        self.sender = GrblSender(clock=self.clock)
+        self.sender.connect_transport(self.transport, window=window)
+        self.lines = []
+
+    def close(self):
+        self.sender.disconnect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def now(self):
+        return self.clock.monotonic()
+
+    def poll(self):
+        lines = self.sender.poll()
+        self.lines.extend(lines)
+        return lines
+
+    def advance(self, seconds, step=0.01):
+        """Let ``seconds`` of virtual time pass, polling every ``step``."""
+        end = self.now + seconds
+        while self.now < end:
+            self.clock.advance(min(step, end - self.now))
+            self.poll()
+
+    def run_until(self, predicate, timeout, step=0.01, status_interval=None):
+        """Poll (and optionally request status) until ``predicate()`` holds.
+
+        Returns the virtual seconds it took; raises ``HarnessTimeout`` after
+        ``timeout`` virtual seconds.
+        """
+        started = self.now
+        next_status = started
+        while True:
+            if status_interval is not None and self.now >= next_status:
+                self.sender.request_status()
+                next_status = self.now + status_interval
+            self.poll()
+            if predicate():
+                return self.now - started
+            if self.now - started >= timeout:
+                raise HarnessTimeout(f"condition not met within {timeout:.3f} virtual s")
+            self.clock.advance(step)
+
+    def stream(self, lines, timeout=86400.0, step=0.05, wait_idle=True):
+        """Stream ``lines`` and return the virtual run time in seconds.
+
+        With ``wait_idle`` the time includes the motion still queued in the
+        planner after the last ``ok``.
+        """
+        started = self.now
+        self.sender.start_stream(lines)
+        self.run_until(lambda: not self.sender.is_streaming(), timeout, step=step)
+        if wait_idle:
+            self.run_until(
+                lambda: self.sender.get_progress().get("last_error") or self.is_idle(),
+                timeout - (self.now - started),
+                step=step,
+            )
+        return self.now - started
+
+    def is_idle(self):
+        self.sender.request_status()
+        self.poll()
+        status = self.sender.get_status() or {}
+        return status.get("state") == "Idle"
+
+    def run(self, procedure):
+        """Run a ``SenderProcedure`` synchronously in virtual time."""
+        return procedure.run()
@@ -0,0 +1,366 @@
+"""Persistent production job queue for RouterKing."""
+
+import csv
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import uuid
+
+try:  # FreeCAD may not be available during tests or linting.
+    import FreeCAD as App
+except Exception:  # pragma: no cover - FreeCAD not available in CI
+    App = None
+
+try:
+    from ..gcode.bundle import JobBundle, is_bundle
+    from ..gcode.estimate import PlannerEstimator
+    from ..gcode.parser import iter_gcode_lines
+    from .procedures import ProcedureError, SenderProcedure
+except ImportError:
+    from gcode.bundle import JobBundle, is_bundle
+    from gcode.estimate import PlannerEstimator
+    from gcode.parser import iter_gcode_lines
+    from grbl.procedures import ProcedureError, SenderProcedure
+
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STOPPED = "stopped"
+INTERRUPTED = "interrupted"
+
+_LOG_FIELDS = ["name", "path", "status", "started_at", "finished_at", "duration", "lines", "error"]
+
+
+def _timestamp(seconds=None):
+    moment = datetime.now(timezone.utc) if seconds is None else datetime.fromtimestamp(seconds, timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+@dataclass
+class Job:
+    path: str
+    name: str = ""
+    preamble: list = field(default_factory=list)
+    postamble: list = field(default_factory=list)
+    status: str = PENDING
+    started_at: str = ""
+    finished_at: str = ""
+    duration: float = 0.0
+    lines: int = 0
+    error: str = ""
+    estimated_time: float = 0.0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+    def __post_init__(self):
+        if not self.name:
+            self.name = os.path.basename(self.path)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {item.name for item in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    def iter_lines(self, line_filter=None):
+        """Yield preamble, file body and postamble lines for streaming.
+
+        ``line_filter`` (e.g. autoleveling) only rewrites the file body.
+        The path may be a plain G-code file or a compiled job bundle.
+        """
+        if is_bundle(self.path):
+            source = JobBundle(self.path)
+            body = source.iter_lines()
+        else:
+            source = open(self.path, "r", encoding="utf-8", errors="replace")
+            body = iter_gcode_lines(source.read())
+        with source:
+            if line_filter is not None:
+                body = line_filter(body)
+            yield from (line.strip() for line in self.preamble if line.strip())
+            yield from body
+            yield from (line.strip() for line in self.postamble if line.strip())
+
+
+class JobQueue:
+    """Ordered list of file-backed jobs persisted to ``grbl_queue.json``.
+
+    Every change is saved immediately so the queue survives a restart. A job
+    that was running when the application went away is loaded back as
+    ``interrupted``; ``reset()`` puts it back in line.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_queue_path()
+        self.jobs = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path=None):
+        queue = cls(path)
+        if not os.path.exists(queue.path):
+            return queue
+        try:
+            with open(queue.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return queue
+        for entry in data.get("jobs", []) if isinstance(data, dict) else []:
+            try:
+                job = Job.from_dict(entry)
+            except TypeError:
+                continue
+            if job.status == RUNNING:
+                job.status = INTERRUPTED
+            queue.jobs.append(job)
+        return queue
+
+    def save(self):
+        with self._lock:
+            data = {"jobs": [job.to_dict() for job in self.jobs]}
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, indent=2)
+            os.replace(temp_path, self.path)
+
+    def add(self, path, preamble=None, postamble=None, name=""):
+        job = Job(
+            path=os.path.abspath(path),
+            name=name,
+            preamble=list(preamble or []),
+            postamble=list(postamble or []),
+        )
+        with self._lock:
+            self.jobs.append(job)
+            self.save()
+        return job
+
+    def get(self, job_id):
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def remove(self, job_id):
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job.status == RUNNING:
+                return False
+            self.jobs.remove(job)
+            self.save()
+        return True
+
+    def move(self, job_id, offset):
+        """Move a job ``offset`` places up (negative) or down the queue."""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return False
+            index = self.jobs.index(job)
+            target = min(max(index + offset, 0), len(self.jobs) - 1)
+            if target == index:
+                return False
+            self.jobs.insert(target, self.jobs.pop(index))
+            self.save()
+        return True
+
+    def reset(self, job_id):
+        """Queue a finished, failed or interrupted job to run again."""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job.status == RUNNING:
+                return False
+            job.status = PENDING
+            job.error = ""
+            self.save()
+        return True
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.status != DONE]
+            self.save()
+
+    def next_pending(self):
+        with self._lock:
+            for job in self.jobs:
+                if job.status == PENDING:
+                    return job
+        return None
+
+    def estimate(self, job, limits=None):
+        """Store the planner-estimated run time of ``job`` and return it.
+
+        Bundles already carry their estimate; plain files are read once.
+        """
+        if is_bundle(job.path):
+            with JobBundle(job.path) as bundle:
+                seconds = bundle.estimated_time
+        else:
+            estimator = PlannerEstimator(limits)
+            for line in job.iter_lines():
+                estimator.update(line)
+            seconds = round(estimator.finish().total, 3)
+        self.update(job, estimated_time=seconds)
+        return seconds
+
+    def pending_time(self):
+        """Estimated seconds for all pending jobs (0 for unestimated ones)."""
+        with self._lock:
+            return sum(job.estimated_time for job in self.jobs if job.status == PENDING)
+
+    def update(self, job, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            self.save()
+
+
+class JobQueueRunner(SenderProcedure):
+    """Stream pending jobs back-to-back until the queue is empty.
+
+    A job is done once its last line is acknowledged and the machine is
+    Idle again, so ``M0`` stock changes in a pre- or postamble count towards
+    its time. Errors, alarms and a manual stop end the job; with
+    ``stop_on_error`` (the default) they also end the run so an unattended
+    machine never starts the next sheet on a bad state. Each finished job
+    is appended to the CSV timing log.
+    """
+
+    name = "Job queue"
+
+    def __init__(
+        self,
+        sender,
+        queue,
+        line_filter=None,
+        stop_on_error=True,
+        log_path=None,
+        on_job=None,
+        on_line=None,
+    ):
+        super().__init__(sender, on_line=on_line)
+        self.queue = queue
+        self.line_filter = line_filter
+        self.stop_on_error = stop_on_error
+        self.log_path = log_path or get_job_log_path()
+        self.on_job = on_job
+        self.current = None
+        self.completed = []
+
+    def execute(self):
+        if self.sender.is_streaming():
+            raise ProcedureError(f"{self.name}: sender busy.")
+        while True:
+            job = self.queue.next_pending()
+            if job is None:
+                break
+            self._run_job(job)
+            if job.status != DONE and self.stop_on_error:
+                raise ProcedureError(f"{self.name}: {job.name} {job.status}: {job.error}")
+        return list(self.completed)
+
+    def _run_job(self, job):
+        self.current = job
+        self.queue.update(job, status=RUNNING, started_at=_timestamp(self.clock.time()), finished_at="", error="")
+        self._notify(job)
+        started = self.clock.monotonic()
+        status = DONE
+        error = ""
+        try:
+            self._start_stream(job)
+            self.wait_until(
+                lambda: not self.sender.is_streaming(),
+                float("inf"),
+                f"{self.name}: stream timed out.",
+            )
+            progress = self.sender.get_progress()
+            if progress.get("last_error"):
+                status, error = FAILED, progress["last_error"]
+            elif progress.get("acked", 0) < progress.get("total", 0):
+                status, error = STOPPED, "stream stopped"
+            else:
+                self.wait_idle(timeout=float("inf"), interval=0.2)
+        except ProcedureError as exc:
+            if self.is_cancelled():
+                self.sender.stop_stream()
+                status = STOPPED
+            else:
+                status = FAILED
+            error = str(exc)
+        except (OSError, RuntimeError) as exc:
+            status, error = FAILED, str(exc)
+        finally:
+            self.queue.update(
+                job,
+                status=status,
+                error=error,
+                finished_at=_timestamp(self.clock.time()),
+                duration=round(self.clock.monotonic() - started, 2),
+            )
+            self.current = None
+            self._log(job)
+            self._notify(job)
+        if status == DONE:
+            self.completed.append(job)
+        elif self.is_cancelled():
+            raise ProcedureError(f"{self.name} cancelled.")
+
+    def _start_stream(self, job):
+        if is_bundle(job.path) and self.line_filter is None:
+            # Lines come from the memory map as the window drains; the count
+            # is in the bundle header.
+            preamble = [line.strip() for line in job.preamble if line.strip()]
+            postamble = [line.strip() for line in job.postamble if line.strip()]
+            with JobBundle(job.path) as bundle:
+                job.lines = len(preamble) + len(bundle) + len(postamble)
+            self.sender.start_bundle(job.path, preamble=preamble, postamble=postamble)
+            return
+        # The sender pulls the generator into its own queue; no copy here.
+        self.sender.start_stream(job.iter_lines(self.line_filter))
+        job.lines = self.sender.get_progress().get("total", 0)
+
+    def _notify(self, job):
+        if self.on_job is not None:
+            self.on_job(job)
+
+    def _log(self, job):
+        try:
+            append_job_log(job, self.log_path)
+        except OSError:
+            pass
+
+
+def append_job_log(job, path=None):
+    """Append one finished job as a CSV row to the timing log."""
+    path = path or get_job_log_path()
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    new_file = not os.path.exists(path)
+    with open(path, "a", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=_LOG_FIELDS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerow(job.to_dict())
+
+
+def _data_dir():
+    if App is not None and hasattr(App, "getUserAppDataDir"):
+        return App.getUserAppDataDir()
+    return os.path.join(os.path.expanduser("~"), ".routerking")
+
+
+def get_queue_path():
+    return os.path.join(_data_dir(), "grbl_queue.json")
+
+
+def get_job_log_path():
+    return os.path.join(_data_dir(), "grbl_job_log.csv")
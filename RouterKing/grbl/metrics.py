@@ -0,0 +1,268 @@
+"""Prometheus-style metrics endpoint for a running GRBL sender.
+
+``MetricsServer`` serves ``/metrics`` from a daemon thread. Each scrape
+renders the sender's cached counters, progress and last status report
+(``get_metrics()``, ``get_progress()``, ``get_status()``), so scraping
+never writes to the controller or waits on the link. Position and state
+are as fresh as the status polling done by the UI or CLI.
+"""
+
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import re
+import threading
+
+try:
+    from .clock import SYSTEM_CLOCK
+except ImportError:
+    from grbl.clock import SYSTEM_CLOCK
+
+
+DEFAULT_PORT = 9465
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# lines/sec is averaged over scrapes from roughly this many seconds.
+RATE_WINDOW = 10.0
+
+_ALARM_CODE_RE = re.compile(r"alarm:(\d+)", re.IGNORECASE)
+_STATES = ("Idle", "Run", "Hold", "Jog", "Alarm", "Door", "Check", "Home", "Sleep")
+
+
+class MetricsServer:
+    """Serve ``render()`` on ``http://host:port/metrics``.
+
+    ``sender`` may be replaced at runtime (e.g. when the UI switches to the
+    child-process sender). ``labels`` are added to every sample, e.g.
+    ``{"machine": "router-1"}``. Binding to port 0 picks a free port.
+    Uptimes and rates use ``clock`` (default: the sender's clock).
+    """
+
+    def __init__(self, sender, host="127.0.0.1", port=DEFAULT_PORT, labels=None, clock=None):
+        self.sender = sender
+        self.host = host
+        self.port = port
+        self.labels = dict(labels or {})
+        self.clock = clock or getattr(sender, "clock", None) or SYSTEM_CLOCK
+        self.started_at = self.clock.time()
+        self._server = None
+        self._thread = None
+        self._rate_lock = threading.Lock()
+        self._rate_samples = collections.deque()
+
+    def start(self):
+        if self._server is not None:
+            return
+        handler = _make_handler(self)
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="RouterKingMetrics",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def render(self):
+        """Return the metrics page as Prometheus text exposition format."""
+        sender = self.sender
+        now = self.clock.time()
+        metrics = _safe(sender, "get_metrics") or {}
+        progress = _safe(sender, "get_progress") or {}
+        status = _safe(sender, "get_status") or {}
+        connected = bool(_safe(sender, "is_connected"))
+        page = _Page(self.labels)
+
+        page.gauge("routerking_up", "1 when the sender is connected.", int(connected))
+        page.gauge(
+            "routerking_uptime_seconds",
+            "Seconds since the metrics endpoint started.",
+            now - self.started_at,
+        )
+        since = metrics.get("connected_since")
+        page.gauge(
+            "routerking_connection_uptime_seconds",
+            "Seconds since the controller link was opened.",
+            now - since if connected and since else 0.0,
+        )
+
+        state = str(status.get("state", "")) if status else ""
+        base_state = state.split(":", 1)[0]
+        page.header("routerking_machine_state", "gauge", "Current machine state (1 = active).")
+        for name in _STATES:
+            page.sample("routerking_machine_state", int(base_state == name), state=name)
+        page.gauge(
+            "routerking_alarm_active",
+            "1 while the controller is in alarm.",
+            int(base_state == "Alarm"),
+        )
+        last_alarm = metrics.get("last_alarm") or ""
+        match = _ALARM_CODE_RE.search(last_alarm)
+        page.gauge(
+            "routerking_last_alarm_code",
+            "Code of the most recent ALARM:n (0 = none).",
+            int(match.group(1)) if match else 0,
+        )
+
+        for frame, key in (("machine", "MPos"), ("work", "WPos")):
+            position = _floats(status.get(key)) if status else None
+            if not position:
+                continue
+            page.header(f"routerking_{frame}_position_mm", "gauge", f"{key} from the last status report.")
+            for axis, value in zip("xyz", position):
+                page.sample(f"routerking_{frame}_position_mm", value, axis=axis)
+        feed = _floats(status.get("FS") or status.get("F")) if status else None
+        if feed:
+            page.gauge("routerking_feed_rate_mm_per_min", "Realtime feed rate.", feed[0])
+            if len(feed) > 1:
+                page.gauge("routerking_spindle_speed_rpm", "Realtime spindle speed.", feed[1])
+
+        buffers = _floats(status.get("Bf")) if status else None
+        if buffers:
+            blocks = metrics.get("planner_blocks") or 15
+            rx_size = metrics.get("rx_buffer_size") or 128
+            page.gauge("routerking_planner_blocks_free", "Free planner blocks (Bf).", buffers[0])
+            page.gauge(
+                "routerking_planner_fill_ratio",
+                "Used share of the planner buffer.",
+                max(0.0, 1.0 - buffers[0] / blocks),
+            )
+            if len(buffers) > 1:
+                page.gauge("routerking_rx_bytes_free", "Free serial RX buffer bytes (Bf).", buffers[1])
+                page.gauge(
+                    "routerking_rx_fill_ratio",
+                    "Used share of the serial RX buffer.",
+                    max(0.0, 1.0 - buffers[1] / rx_size),
+                )
+
+        total = progress.get("total", 0) or 0
+        acked = progress.get("acked", 0) or 0
+        page.gauge("routerking_job_streaming", "1 while a job is streaming.", int(bool(progress.get("streaming"))))
+        page.gauge("routerking_job_paused", "1 while the job is paused.", int(bool(progress.get("paused"))))
+        page.gauge("routerking_job_lines", "Lines in the current job.", total)
+        page.gauge("routerking_job_lines_acked", "Acknowledged lines of the current job.", acked)
+        page.gauge("routerking_job_progress_ratio", "Share of the job acknowledged.", acked / total if total else 0.0)
+        page.gauge(
+            "routerking_lines_per_second",
+            f"Acknowledged lines per second over the last {RATE_WINDOW:.0f} s.",
+            self._rate(metrics.get("lines_acked", 0)),
+        )
+
+        for key, name, help_text in (
+            ("lines_sent", "routerking_lines_sent_total", "Lines written to the controller."),
+            ("lines_acked", "routerking_lines_acked_total", "ok responses received."),
+            ("bytes_sent", "routerking_bytes_sent_total", "Bytes written to the controller."),
+            ("errors", "routerking_errors_total", "error:n responses received."),
+            ("alarms", "routerking_alarms_total", "ALARM:n messages received."),
+            ("status_reports", "routerking_status_reports_total", "Status reports received."),
+        ):
+            page.counter(name, help_text, metrics.get(key, 0))
+        return page.text()
+
+    def _rate(self, acked):
+        now = self.clock.monotonic()
+        with self._rate_lock:
+            samples = self._rate_samples
+            samples.append((now, acked))
+            while len(samples) > 2 and now - samples[1][0] >= RATE_WINDOW:
+                samples.popleft()
+            start_time, start_acked = samples[0]
+            if now - start_time <= 0.0 or acked < start_acked:
+                return 0.0
+            return (acked - start_acked) / (now - start_time)
+
+
+class _Page:
+    def __init__(self, labels):
+        self._labels = labels
+        self._lines = []
+
+    def header(self, name, kind, help_text):
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name, value, **labels):
+        merged = dict(self._labels)
+        merged.update(labels)
+        if merged:
+            body = ",".join(f'{key}="{_escape(val)}"' for key, val in merged.items())
+            name = f"{name}{{{body}}}"
+        self._lines.append(f"{name} {_number(value)}")
+
+    def gauge(self, name, help_text, value):
+        self.header(name, "gauge", help_text)
+        self.sample(name, value)
+
+    def counter(self, name, help_text, value):
+        self.header(name, "counter", help_text)
+        self.sample(name, value)
+
+    def text(self):
+        return "\n".join(self._lines) + "\n"
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+            elif path == "/":
+                body = b"RouterKing GRBL metrics: /metrics\n"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+            else:
+                body = b"not found\n"
+                self.send_response(404)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _safe(sender, name):
+    try:
+        return getattr(sender, name)()
+    except Exception:
+        return None
+
+
+def _floats(value):
+    if not value:
+        return None
+    try:
+        return [float(part) for part in str(value).split(",")]
+    except ValueError:
+        return None
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,262 @@
+"""Sender-level machine procedures for RouterKing.
+
+A procedure runs in its own thread and owns ``sender.poll()`` while it is
+active, so acks and status reports are handled on the procedure's timing
+rather than the UI timer. Every received line is forwarded to ``on_line``
+so the UI can still show it in the console. Waits and timeouts use the
+sender's ``clock``, so a procedure on a virtual-clock sender can be run
+synchronously with ``run()`` in fast-forward.
+"""
+
+from contextlib import contextmanager
+import threading
+
+try:
+    from .clock import SYSTEM_CLOCK
+except ImportError:
+    from grbl.clock import SYSTEM_CLOCK
+
+
+_JOG_CANCEL = b"\x85"
+
+
+class ProcedureError(RuntimeError):
+    """Raised when a procedure cannot continue."""
+
+
+class SenderProcedure:
+    poll_interval = 0.005
+    name = "Procedure"
+
+    def __init__(self, sender, on_line=None):
+        self.sender = sender
+        self.on_line = on_line
+        self.clock = getattr(sender, "clock", None) or SYSTEM_CLOCK
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self._shielded = 0
+        self._status_count = 0
+        self._ok_count = 0
+        self._error_count = 0
+        self._alarm_count = 0
+        self._banner_count = 0
+        self.last_error = None
+        self.last_alarm = None
+
+    def start(self):
+        """Run the procedure in a background thread."""
+        self._thread = threading.Thread(target=self.run, name=f"RouterKing{self.name}", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Run the procedure in the calling thread and return its result."""
+        self._done.clear()
+        try:
+            self.result = self.execute()
+        except ProcedureError as exc:
+            self.error = str(exc)
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self._done.set()
+        return self.result
+
+    def execute(self):
+        raise NotImplementedError
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._done.is_set()
+
+    def pump(self):
+        """Poll the sender once and dispatch received lines."""
+        lines = self.sender.poll()
+        for line in lines:
+            lower = line.lower()
+            if line.startswith("<") and line.endswith(">"):
+                self._status_count += 1
+            elif lower == "ok":
+                self._ok_count += 1
+            elif lower.startswith("error"):
+                self._error_count += 1
+                self.last_error = line
+            elif lower.startswith("alarm"):
+                self._alarm_count += 1
+                self.last_alarm = line
+            elif lower.startswith("grbl"):
+                self._banner_count += 1
+            self.handle_line(line)
+            if self.on_line is not None:
+                self.on_line(line)
+        return lines
+
+    def handle_line(self, line):
+        """Hook for subclasses that parse received lines."""
+
+    def sleep(self, seconds):
+        if self._shielded:
+            self.clock.sleep(seconds)
+            return
+        if self.clock.wait(self._cancel, seconds):
+            raise ProcedureError(f"{self.name} cancelled.")
+
+    @contextmanager
+    def shielded(self):
+        """Run cleanup steps that must finish even after ``cancel()``."""
+        self._shielded += 1
+        try:
+            yield
+        finally:
+            self._shielded -= 1
+
+    def wait_until(self, predicate, timeout, message):
+        deadline = self.clock.monotonic() + timeout
+        while True:
+            self.pump()
+            if predicate():
+                return
+            if self.clock.monotonic() >= deadline:
+                raise ProcedureError(message)
+            self.sleep(self.poll_interval)
+
+    def command(self, line, timeout=5.0):
+        """Send one line and wait for its ``ok``; raise on ``error``/alarm."""
+        oks = self._ok_count
+        errors = self._error_count
+        alarms = self._alarm_count
+        self.sender.send_line(line)
+        self.wait_until(
+            lambda: self._ok_count > oks or self._error_count > errors or self._alarm_count > alarms,
+            timeout,
+            f"{self.name}: no response to {line}.",
+        )
+        if self._error_count > errors:
+            raise ProcedureError(f"{self.name}: {line} rejected ({self.last_error}).")
+        if self._alarm_count > alarms:
+            raise ProcedureError(f"{self.name}: {line} raised {self.last_alarm}.")
+
+    def reset_and_unlock(self, timeout=5.0):
+        """Soft-reset the controller, wait for the banner and unlock."""
+        banners = self._banner_count
+        self.sender.send_soft_reset()
+        self.wait_until(
+            lambda: self._banner_count > banners,
+            timeout,
+            f"{self.name}: controller did not restart after reset.",
+        )
+        self.command("$X", timeout=timeout)
+
+    def wait_stream(self, timeout=600.0):
+        """Wait until the active stream finishes; raise on error/alarm."""
+        self.wait_until(
+            lambda: not self.sender.is_streaming(),
+            timeout,
+            f"{self.name}: stream timed out.",
+        )
+        error = self.sender.get_progress().get("last_error")
+        if error:
+            raise ProcedureError(f"{self.name}: controller reported {error}.")
+
+    def query_status(self, timeout=1.0):
+        """Request a status report and return the parsed data."""
+        seen = self._status_count
+        self.sender.request_status()
+        self.wait_until(
+            lambda: self._status_count > seen,
+            timeout,
+            f"{self.name}: no status report.",
+        )
+        return self.sender.get_status() or {}
+
+    def wait_idle(self, timeout=60.0, interval=0.05):
+        """Poll status until the controller reports Idle."""
+        deadline = self.clock.monotonic() + timeout
+        while True:
+            status = self.query_status()
+            state = str(status.get("state", "")).lower()
+            if state == "idle":
+                return status
+            if state == "alarm":
+                raise ProcedureError(f"{self.name}: controller in alarm.")
+            if self.clock.monotonic() >= deadline:
+                raise ProcedureError(f"{self.name}: timed out waiting for Idle.")
+            self.sleep(interval)
+
+    def jog(self, axis, distance, feed):
+        """Jog ``axis`` by ``distance`` mm and wait for the controller's ``ok``."""
+        self.command(_jog_line(axis, distance, feed))
+
+    def jog_to_limit(self, axis, direction, distance, feed, interval=0.02):
+        """Jog ``axis`` until its limit switch trips the controller into alarm.
+
+        Returns once the alarm is seen; the caller resets and unlocks.
+        """
+        alarms = self._alarm_count
+        errors = self._error_count
+        oks = self._ok_count
+        self.sender.send_line(_jog_line(axis, direction * distance, feed))
+        started = self.clock.monotonic()
+        timeout = distance / max(feed, 1.0) * 60.0 * 1.5 + 5.0
+        moving = False
+        while True:
+            self.pump()
+            if self._alarm_count > alarms:
+                return
+            if self._error_count > errors:
+                raise ProcedureError(
+                    f"{self.name}: jog rejected ({self.last_error}); disable soft limits ($20=0)."
+                )
+            state = str(self.query_status().get("state", "")).lower()
+            if self._alarm_count > alarms or state == "alarm":
+                return
+            if state in ("jog", "run"):
+                moving = True
+            elapsed = self.clock.monotonic() - started
+            if state == "idle" and self._ok_count > oks and (moving or elapsed > 0.5):
+                raise ProcedureError(
+                    f"{self.name}: no limit switch on {axis} within {distance:.0f} mm."
+                )
+            if elapsed > timeout:
+                raise ProcedureError(f"{self.name}: {axis} jog timed out.")
+            self.sleep(interval)
+
+    def cancel_jog(self):
+        """Send the realtime jog-cancel byte, ignoring link errors."""
+        try:
+            self.sender.send_realtime_command(_JOG_CANCEL)
+        except Exception:
+            pass
+
+
+def _jog_line(axis, distance, feed):
+    return f"$J=G91 G21 {axis}{format_number(distance)} F{format_number(feed)}"
+
+
+def format_number(value):
+    """Format a coordinate with up to three decimals and no trailing zeros."""
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def parse_position(status, key="MPos"):
+    """Return an ``[x, y, z]`` list from a parsed status report field."""
+    value = (status or {}).get(key)
+    if not value:
+        return None
+    try:
+        return [float(part) for part in value.split(",")[:3]]
+    except ValueError:
+        return None
@@ -0,0 +1,415 @@
+"""Run the GRBL sender in a child process for RouterKing.
+
+The FreeCAD process shares one GIL between the UI, document recomputes and
+the serial reader thread, so a long recompute can delay acks and starve the
+controller's planner. ``ProcessSender`` keeps the same API as ``GrblSender``
+but hosts the real sender in a separate interpreter. Received lines travel
+back through a shared-memory ring buffer, the latest status/progress snapshot
+through a shared-memory slot, and commands through a small pipe.
+"""
+
+import collections
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+from multiprocessing import shared_memory
+
+try:
+    from .sender import GrblSender
+except ImportError:
+    from grbl.sender import GrblSender
+
+
+_RING_HEADER = struct.Struct("<QQQ")
+_RECORD_HEADER = struct.Struct("<I")
+_SLOT_HEADER = struct.Struct("<QQI")
+_CHILD_POLL_INTERVAL = 0.001
+_REPLY_TIMEOUT = 5.0
+
+
+def python_interpreter():
+    """Return a Python interpreter for child processes, or None.
+
+    ``multiprocessing`` starts children with ``sys.executable``, which inside
+    FreeCAD is the FreeCAD binary: a spawned child would start FreeCAD
+    instead of running the worker. This returns ``sys.executable`` when it is
+    a Python interpreter, otherwise the ``python`` bundled next to it or in
+    the install prefix, and None when no interpreter can be found.
+    """
+    executable = sys.executable or ""
+    if os.path.basename(executable).lower().startswith("python"):
+        return executable
+    names = ("python.exe", "pythonw.exe") if os.name == "nt" else ("python3", "python")
+    folders = [os.path.dirname(executable)]
+    for prefix in (sys.exec_prefix, sys.prefix):
+        folders.extend((os.path.join(prefix, "bin"), prefix))
+    for folder in folders:
+        for name in names:
+            candidate = os.path.join(folder, name)
+            if folder and os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+                return candidate
+    return None
+
+
+class SharedRing:
+    """Single-producer/single-consumer record ring in shared memory.
+
+    The header holds the capacity and two monotonically increasing byte
+    counters (write and read). Each record is a 4-byte length prefix followed
+    by the payload; records may wrap around the end of the data area.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+        self._capacity = _RING_HEADER.unpack_from(self._buf, 0)[0]
+
+    @classmethod
+    def create(cls, capacity=1 << 18):
+        shm = shared_memory.SharedMemory(create=True, size=_RING_HEADER.size + capacity)
+        _RING_HEADER.pack_into(shm.buf, 0, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def put(self, payload):
+        """Append one record. Returns False when the ring is full."""
+        _, write_pos, read_pos = _RING_HEADER.unpack_from(self._buf, 0)
+        needed = _RECORD_HEADER.size + len(payload)
+        if needed > self._capacity - (write_pos - read_pos):
+            return False
+        self._copy_in(write_pos, _RECORD_HEADER.pack(len(payload)))
+        self._copy_in(write_pos + _RECORD_HEADER.size, payload)
+        struct.pack_into("<Q", self._buf, 8, write_pos + needed)
+        return True
+
+    def get(self):
+        """Pop one record, or return None when the ring is empty."""
+        _, write_pos, read_pos = _RING_HEADER.unpack_from(self._buf, 0)
+        if read_pos >= write_pos:
+            return None
+        (length,) = _RECORD_HEADER.unpack(self._copy_out(read_pos, _RECORD_HEADER.size))
+        payload = self._copy_out(read_pos + _RECORD_HEADER.size, length)
+        struct.pack_into("<Q", self._buf, 16, read_pos + _RECORD_HEADER.size + length)
+        return payload
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _copy_in(self, position, data):
+        offset = position % self._capacity
+        first = min(len(data), self._capacity - offset)
+        start = _RING_HEADER.size + offset
+        self._buf[start : start + first] = data[:first]
+        if first < len(data):
+            rest = len(data) - first
+            self._buf[_RING_HEADER.size : _RING_HEADER.size + rest] = data[first:]
+
+    def _copy_out(self, position, length):
+        offset = position % self._capacity
+        first = min(length, self._capacity - offset)
+        start = _RING_HEADER.size + offset
+        data = bytes(self._buf[start : start + first])
+        if first < length:
+            data += bytes(self._buf[_RING_HEADER.size : _RING_HEADER.size + length - first])
+        return data
+
+
+class SharedSlot:
+    """Latest-value slot in shared memory guarded by a sequence counter.
+
+    The writer bumps the counter to an odd value, writes, then bumps it to an
+    even value; readers retry until they see the same even counter on both
+    sides of the copy.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+        self._capacity = _SLOT_HEADER.unpack_from(self._buf, 0)[0]
+
+    @classmethod
+    def create(cls, capacity=1 << 14):
+        shm = shared_memory.SharedMemory(create=True, size=_SLOT_HEADER.size + capacity)
+        _SLOT_HEADER.pack_into(shm.buf, 0, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def write(self, payload):
+        if len(payload) > self._capacity:
+            raise ValueError("Payload exceeds slot capacity")
+        _, sequence, _ = _SLOT_HEADER.unpack_from(self._buf, 0)
+        struct.pack_into("<Q", self._buf, 8, sequence + 1)
+        start = _SLOT_HEADER.size
+        self._buf[start : start + len(payload)] = payload
+        struct.pack_into("<I", self._buf, 16, len(payload))
+        struct.pack_into("<Q", self._buf, 8, sequence + 2)
+
+    def read(self, attempts=100):
+        """Return the latest payload, or None if nothing was written yet."""
+        for _ in range(attempts):
+            _, before, length = _SLOT_HEADER.unpack_from(self._buf, 0)
+            if before == 0:
+                return None
+            if before % 2:
+                continue
+            start = _SLOT_HEADER.size
+            data = bytes(self._buf[start : start + length])
+            after = struct.unpack_from("<Q", self._buf, 8)[0]
+            if after == before:
+                return data
+        return None
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _snapshot(sender):
+    return {
+        "connected": sender.is_connected(),
+        "progress": sender.get_progress(),
+        "status": sender.get_status(),
+        "metrics": sender.get_metrics(),
+    }
+
+
+def _sender_process_main(conn, ring_name, slot_name):
+    """Child process loop: serve commands, pump acks, publish state."""
+    rx_ring = SharedRing.attach(ring_name)
+    slot = SharedSlot.attach(slot_name)
+    sender = GrblSender()
+    backlog = collections.deque()
+    published = None
+    running = True
+    try:
+        while running:
+            if conn.poll(_CHILD_POLL_INTERVAL):
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    break
+                op, args = message
+                if op == "close":
+                    running = False
+                    reply = ("ok", None)
+                else:
+                    try:
+                        reply = ("ok", getattr(sender, op)(*args))
+                    except Exception as exc:
+                        reply = ("error", type(exc).__name__, str(exc))
+                conn.send(reply + (_snapshot(sender),))
+            # Acks are handled here, so the next line goes out even while
+            # the parent process is busy.
+            backlog.extend(sender.poll())
+            # Publish the snapshot before the lines behind it: the parent
+            # drains the ring and then reads the slot, so every line it sees
+            # comes with a snapshot at least as new.
+            payload = json.dumps(_snapshot(sender)).encode("utf-8")
+            if payload != published:
+                slot.write(payload)
+                published = payload
+            while backlog and rx_ring.put(backlog[0].encode("utf-8", errors="replace")):
+                backlog.popleft()
+    finally:
+        try:
+            sender.disconnect()
+        except Exception:
+            pass
+        rx_ring.close()
+        slot.close()
+        conn.close()
+
+
+class ProcessSender:
+    """``GrblSender`` proxy hosting the real sender in a child process.
+
+    The child is started on ``connect()`` and stopped on ``disconnect()``.
+    ``poll()`` must still be called from the UI to collect received lines,
+    but streaming keeps running even when the UI does not poll.
+    """
+
+    def __init__(self, ring_size=1 << 18, start_method="spawn", python_executable=None):
+        self._ring_size = ring_size
+        self._context = multiprocessing.get_context(start_method)
+        if python_executable:
+            self._context.set_executable(python_executable)
+        self._process = None
+        self._conn = None
+        self._rx_ring = None
+        self._slot = None
+        self._call_lock = threading.Lock()
+        self._snapshot = {"connected": False, "progress": {}, "status": None}
+
+    def connect(self, port, baudrate=115200, timeout=0.1, window=None):
+        """Start the sender process and connect it to the controller."""
+        if not port:
+            raise ValueError("Port is required")
+        if self._process is None:
+            self._start_process()
+        try:
+            self._call("connect", port, baudrate, timeout, window)
+        except Exception:
+            self._stop_process()
+            raise
+
+    def disconnect(self):
+        """Disconnect from the controller and stop the sender process."""
+        if self._process is None:
+            return
+        try:
+            self._call("disconnect")
+        finally:
+            self._stop_process()
+
+    def send_line(self, line):
+        self._call("send_line", line)
+
+    def send_realtime_command(self, command):
+        self._call("send_realtime_command", command)
+
+    def send_soft_reset(self):
+        self._call("send_soft_reset")
+
+    def request_status(self):
+        self._call("request_status")
+
+    def drain_lines(self, limit=None):
+        """Return any received lines without blocking."""
+        lines = []
+        if self._rx_ring is None:
+            return lines
+        while limit is None or len(lines) < limit:
+            payload = self._rx_ring.get()
+            if payload is None:
+                break
+            lines.append(payload.decode("utf-8", errors="replace"))
+        return lines
+
+    def poll(self):
+        """Drain received lines and refresh the cached sender state."""
+        lines = self.drain_lines()
+        if self._slot is not None:
+            payload = self._slot.read()
+            if payload:
+                self._snapshot = json.loads(payload.decode("utf-8"))
+        if self._process is not None and not self._process.is_alive():
+            lines.append("[sender error] sender process exited")
+            self._stop_process()
+        return lines
+
+    def is_connected(self):
+        return bool(self._snapshot.get("connected"))
+
+    def is_streaming(self):
+        return bool(self._snapshot.get("progress", {}).get("streaming"))
+
+    def is_paused(self):
+        return bool(self._snapshot.get("progress", {}).get("paused"))
+
+    def get_progress(self):
+        return dict(self._snapshot.get("progress") or {})
+
+    def get_status(self):
+        return self._snapshot.get("status")
+
+    def get_metrics(self):
+        return dict(self._snapshot.get("metrics") or {})
+
+    def start_stream(self, lines):
+        self._call("start_stream", list(lines))
+
+    def start_bundle(self, bundle, start=0, preamble=None, postamble=None):
+        """Stream a job bundle; the child process maps the file itself."""
+        path = getattr(bundle, "path", bundle)
+        self._call("start_bundle", path, start, list(preamble or []), list(postamble or []))
+
+    def pause_stream(self):
+        self._call("pause_stream")
+
+    def resume_stream(self):
+        self._call("resume_stream")
+
+    def stop_stream(self):
+        self._call("stop_stream")
+
+    def _call(self, op, *args):
+        with self._call_lock:
+            if self._process is None or not self._process.is_alive():
+                raise RuntimeError("Not connected")
+            self._conn.send((op, args))
+            if not self._conn.poll(_REPLY_TIMEOUT):
+                raise RuntimeError("Sender process did not respond")
+            reply = self._conn.recv()
+        self._snapshot = reply[-1]
+        if reply[0] == "error":
+            _, kind, message = reply[:3]
+            raise (ValueError if kind == "ValueError" else RuntimeError)(message)
+        return reply[1]
+
+    def _start_process(self):
+        self._rx_ring = SharedRing.create(self._ring_size)
+        self._slot = SharedSlot.create()
+        self._conn, child_conn = self._context.Pipe(duplex=True)
+        self._process = self._context.Process(
+            target=_sender_process_main,
+            args=(child_conn, self._rx_ring.name, self._slot.name),
+            name="RouterKingSender",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+    def _stop_process(self):
+        process = self._process
+        if process is None:
+            return
+        if process.is_alive():
+            try:
+                with self._call_lock:
+                    self._conn.send(("close", ()))
+                    if self._conn.poll(1.0):
+                        self._conn.recv()
+            except (OSError, EOFError):
+                pass
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1.0)
+        self._conn.close()
+        self._rx_ring.close()
+        self._slot.close()
+        self._process = None
+        self._conn = None
+        self._rx_ring = None
+        self._slot = None
+        self._snapshot = {"connected": False, "progress": {}, "status": None}
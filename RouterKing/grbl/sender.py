@@ -1,18 +1,36 @@
 """GRBL sender for RouterKing."""
 
 import collections
+import itertools
 import queue
+import re
 import threading
-import time
 
 try:
     from ..vendor import import_serial
+    from .clock import SYSTEM_CLOCK
+    from .transport import open_transport
 except ImportError:
     from vendor import import_serial
+    from grbl.clock import SYSTEM_CLOCK
+    from grbl.transport import open_transport
+
+# Bundle lines are pulled into the send queue in chunks of this size.
+_BUNDLE_CHUNK = 256
+
+_OPT_RE = re.compile(r"^\[OPT:[^,\]]*,(\d+),(\d+)")
 
 
 class GrblSender:
-    def __init__(self):
+    """Line sender for one GRBL controller.
+
+    ``clock`` (default ``SYSTEM_CLOCK``) is used for every wait and
+    timestamp. With a virtual clock no reader thread is started; ``poll()``
+    reads the transport inline so runs are deterministic.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
         self._connected = False
         self._serial_module = import_serial()
         self._serial = None
@@ -21,43 +39,85 @@ class GrblSender:
         self._reader_thread = None
         self._lock = threading.Lock()
         self._stream_queue = collections.deque()
+        self._stream_source = None
+        self._stream_bundle = None
+        self._stream_offset = 0
         self._streaming = False
         self._paused = False
         self._awaiting_ok = False
+        self._inflight = collections.deque()
+        self._inflight_bytes = 0
+        self._stream_window = 0
         self._total_lines = 0
         self._sent_lines = 0
         self._acked_lines = 0
         self._last_error = None
         self._status_line = None
         self._status_data = None
+        # Cumulative counters for monitoring; plain attribute increments so
+        # the reader path stays cheap and readers never take a lock.
+        self._lines_sent_total = 0
+        self._lines_acked_total = 0
+        self._bytes_sent_total = 0
+        self._errors_total = 0
+        self._alarms_total = 0
+        self._status_reports_total = 0
+        self._last_alarm = None
+        self._connected_since = None
+        self._planner_blocks = 15
+        self._rx_buffer_size = 128
+
+    def connect(self, port, baudrate=115200, timeout=0.1, window=None):
+        """Connect to the GRBL controller over serial or the network.
 
-    def connect(self, port, baudrate=115200, timeout=0.1):
-        """Connect to the GRBL controller over serial."""
+        ``port`` may be a serial device, a pyserial URL such as ``loop://``,
+        ``tcp://host:port`` for network controllers or ``sim://``.
+        ``window`` is the number of unacknowledged bytes allowed while
+        streaming; by default serial links send one line per ``ok`` and
+        network links fill the controller's RX buffer.
+        """
         if not port:
             raise ValueError("Port is required")
         with self._lock:
             if self._connected:
                 return
-            self._serial = self._serial_module.Serial(
-                port=port,
+            transport = open_transport(
+                self._serial_module,
+                port,
                 baudrate=baudrate,
-                timeout=timeout,
-                write_timeout=timeout,
+                timeout=0.0 if self.clock.virtual else timeout,
+                clock=self.clock,
             )
-            try:
-                self._serial.write(b"\r\n\r\n")
-                self._serial.flush()
-                time.sleep(0.1)
-            except Exception:
-                pass
-            self._stop_event.clear()
+            self._attach(transport, window)
+
+    def connect_transport(self, transport, window=None):
+        """Connect over an already opened serial-like ``transport``."""
+        with self._lock:
+            if self._connected:
+                return
+            self._attach(transport, window)
+
+    def _attach(self, transport, window):
+        self._serial = transport
+        if window is None:
+            window = getattr(self._serial, "stream_window", 0)
+        self._stream_window = window
+        try:
+            self._serial.write(b"\r\n\r\n")
+            self._serial.flush()
+            self.clock.sleep(0.1)
+        except Exception:
+            pass
+        self._stop_event.clear()
+        if not self.clock.virtual:
             self._reader_thread = threading.Thread(
                 target=self._reader_loop,
                 name="RouterKingGrblReader",
                 daemon=True,
             )
             self._reader_thread.start()
-            self._connected = True
+        self._connected = True
+        self._connected_since = self.clock.time()
 
     def disconnect(self):
         """Disconnect from the controller."""
@@ -75,6 +135,7 @@ class GrblSender:
                 finally:
                     self._serial = None
             self._connected = False
+            self._connected_since = None
 
     def send_line(self, line):
         """Send a single line of G-code or a GRBL command."""
@@ -82,6 +143,7 @@ class GrblSender:
             return
         payload = f"{line.rstrip()}\n".encode("ascii", errors="replace")
         self._write(payload)
+        self._lines_sent_total += 1
 
     def send_realtime_command(self, command):
         """Send a GRBL realtime command without newline."""
@@ -101,6 +163,8 @@ class GrblSender:
 
     def drain_lines(self, limit=None):
         """Return any received lines without blocking."""
+        if self._connected and self._reader_thread is None:
+            self._read_inline()
         lines = []
         while limit is None or len(lines) < limit:
             try:
@@ -133,25 +197,77 @@ class GrblSender:
             "sent": self._sent_lines,
             "acked": self._acked_lines,
             "total": self._total_lines,
+            "offset": self._stream_offset,
             "last_error": self._last_error,
         }
 
     def get_status(self):
         return self._status_data
 
+    def get_metrics(self):
+        """Return the cumulative counters without touching the link."""
+        return {
+            "lines_sent": self._lines_sent_total,
+            "lines_acked": self._lines_acked_total,
+            "bytes_sent": self._bytes_sent_total,
+            "errors": self._errors_total,
+            "alarms": self._alarms_total,
+            "status_reports": self._status_reports_total,
+            "last_alarm": self._last_alarm,
+            "connected_since": self._connected_since,
+            "planner_blocks": self._planner_blocks,
+            "rx_buffer_size": self._rx_buffer_size,
+        }
+
     def start_stream(self, lines):
         """Start streaming a list of G-code lines."""
         if not self._connected or self._serial is None:
             raise RuntimeError("Not connected")
+        self._release_source()
         self._stream_queue.clear()
         self._stream_queue.extend(line for line in lines if line)
         self._total_lines = len(self._stream_queue)
+        self._stream_offset = 0
+        self._begin_stream()
+
+    def start_bundle(self, bundle, start=0, preamble=None, postamble=None):
+        """Stream a compiled job bundle from line ``start``.
+
+        ``bundle`` is a ``JobBundle`` or the path of one; lines are read from
+        the memory map as the window drains, so even huge programs start
+        immediately. ``preamble`` lines (e.g. ``bundle.resume_lines(start)``)
+        go out first and ``postamble`` lines after the last bundle line.
+        Progress counts this run's lines; ``offset + acked`` is the bundle
+        index of the next line to run.
+        """
+        if not self._connected or self._serial is None:
+            raise RuntimeError("Not connected")
+        self._release_source()
+        if isinstance(bundle, str):
+            try:
+                from ..gcode.bundle import JobBundle
+            except ImportError:
+                from gcode.bundle import JobBundle
+            bundle = JobBundle(bundle)
+            self._stream_bundle = bundle
+        start = min(max(0, int(start)), len(bundle))
+        preamble = [line for line in (preamble or []) if line]
+        postamble = [line for line in (postamble or []) if line]
+        self._stream_queue.clear()
+        self._stream_queue.extend(preamble)
+        self._stream_source = itertools.chain(bundle.iter_lines(start), postamble)
+        self._total_lines = len(preamble) + len(bundle) - start + len(postamble)
+        self._stream_offset = start - len(preamble)
+        self._begin_stream()
+
+    def _begin_stream(self):
         self._sent_lines = 0
         self._acked_lines = 0
         self._last_error = None
         self._paused = False
         self._streaming = self._total_lines > 0
         self._awaiting_ok = False
+        self._clear_inflight()
         if self._streaming:
             self._send_next_line()
 
@@ -166,9 +282,11 @@ class GrblSender:
 
     def stop_stream(self):
         self._stream_queue.clear()
+        self._release_source()
         self._streaming = False
         self._paused = False
         self._awaiting_ok = False
+        self._clear_inflight()
 
     def _write(self, payload):
         with self._lock:
@@ -176,38 +294,80 @@ class GrblSender:
                 raise RuntimeError("Not connected")
             self._serial.write(payload)
             self._serial.flush()
+            self._bytes_sent_total += len(payload)
 
     def _handle_line(self, line):
         if line.startswith("<") and line.endswith(">"):
             self._status_line = line
             self._status_data = self._parse_status_line(line)
+            self._status_reports_total += 1
             return
         if line.lower().startswith("ok"):
+            self._lines_acked_total += 1
             if self._streaming:
                 self._acked_lines += 1
-                self._awaiting_ok = False
+                if self._inflight:
+                    self._inflight_bytes -= self._inflight.popleft()
+                self._awaiting_ok = bool(self._inflight)
                 self._send_next_line()
             return
+        if line.startswith("[OPT:"):
+            match = _OPT_RE.match(line)
+            if match:
+                self._planner_blocks = int(match.group(1))
+                self._rx_buffer_size = int(match.group(2))
+            return
         if line.lower().startswith("error") or line.lower().startswith("alarm"):
+            if line.lower().startswith("alarm"):
+                self._alarms_total += 1
+                self._last_alarm = line
+            else:
+                self._errors_total += 1
             self._last_error = line
             self._streaming = False
             self._paused = False
             self._awaiting_ok = False
+            self._clear_inflight()
             return
 
     def _send_next_line(self):
-        if not self._streaming or self._paused or self._awaiting_ok:
-            return
-        if not self._stream_queue:
-            self._streaming = False
-            return
-        line = self._stream_queue.popleft()
-        if not line:
-            self._send_next_line()
-            return
-        self.send_line(line)
-        self._sent_lines += 1
-        self._awaiting_ok = True
+        while self._streaming and not self._paused:
+            if not self._stream_queue and not self._refill_stream_queue():
+                if not self._inflight:
+                    self._streaming = False
+                return
+            size = len(self._stream_queue[0].rstrip()) + 1
+            if self._inflight and (
+                not self._stream_window or self._inflight_bytes + size > self._stream_window
+            ):
+                return
+            line = self._stream_queue.popleft()
+            if not line:
+                continue
+            self.send_line(line)
+            self._inflight.append(size)
+            self._inflight_bytes += size
+            self._sent_lines += 1
+            self._awaiting_ok = True
+
+    def _refill_stream_queue(self):
+        if self._stream_source is None:
+            return False
+        self._stream_queue.extend(itertools.islice(self._stream_source, _BUNDLE_CHUNK))
+        if self._stream_queue:
+            return True
+        self._release_source()
+        return False
+
+    def _release_source(self):
+        self._stream_source = None
+        if self._stream_bundle is not None:
+            self._stream_bundle.close()
+            self._stream_bundle = None
+
+    def _clear_inflight(self):
+        self._inflight.clear()
+        self._inflight_bytes = 0
 
     @staticmethod
     def _parse_status_line(line):
@@ -223,6 +383,19 @@ class GrblSender:
             data[key] = value
         return data
 
+    def _read_inline(self):
+        while self._serial is not None:
+            try:
+                raw = self._serial.readline()
+            except Exception as exc:
+                self._rx_queue.put(f"[serial error] {exc}")
+                return
+            if not raw:
+                return
+            line = raw.decode("utf-8", errors="replace").strip()
+            if line:
+                self._rx_queue.put(line)
+
     def _reader_loop(self):
         while not self._stop_event.is_set():
             try:
@@ -0,0 +1,446 @@
+"""Simulated GRBL controller for RouterKing tests and dry runs."""
+
+import math
+import re
+import threading
+
+try:
+    from .clock import SYSTEM_CLOCK
+except ImportError:
+    from grbl.clock import SYSTEM_CLOCK
+
+_WORD_RE = re.compile(r"([A-Za-z])([-+]?\d*\.?\d+)")
+
+BANNER = "Grbl 1.1h ['$' for help]"
+
+DEFAULT_SETTINGS = {
+    20: 0.0,
+    21: 0.0,
+    22: 1.0,
+    23: 0.0,
+    27: 3.0,
+    110: 3000.0,
+    111: 3000.0,
+    112: 1000.0,
+    120: 200.0,
+    121: 200.0,
+    122: 100.0,
+    130: 400.0,
+    131: 400.0,
+    132: 80.0,
+}
+
+
+class GrblSimulator:
+    """Minimal GRBL 1.1 protocol emulator.
+
+    Lines are answered with ``ok``/``error:N``, ``?`` returns a status
+    report and ``$$`` dumps the settings table. Motion is applied
+    immediately; the controller keeps machine position only. ``surface`` is
+    an optional ``f(x, y) -> z`` used to answer ``G38.2`` probes.
+
+    With hard limits enabled (``$21=1``) each axis travels between 0 and its
+    ``$130``-``$132`` value; moving past either end stops the axis at the
+    switch and raises ``ALARM:1``. Like GRBL, machine position survives a
+    soft reset and the controller stays locked until ``$X`` or ``$H``.
+
+    With ``timed=True`` moves take real time: each one runs a trapezoidal
+    profile limited by ``$110``-``$112`` and ``$120``-``$122``, status
+    reports interpolate the position and report the realtime rate in
+    ``FS``, and a limit trip fires when the move reaches the switch.
+    ``stall_feed``/``stall_accel`` (per-axis dicts) model the mechanics: a
+    move that exceeds them loses ``stall_loss`` of its travel on that axis,
+    which shows up as a shifted limit-switch trigger position.
+    """
+
+    def __init__(
+        self,
+        settings=None,
+        build_info="",
+        surface=None,
+        timed=False,
+        stall_feed=None,
+        stall_accel=None,
+        stall_loss=0.1,
+        clock=None,
+    ):
+        self.build_info = build_info
+        self.surface = surface
+        self.settings = dict(DEFAULT_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.timed = timed
+        self.stall_feed = dict(stall_feed or {})
+        self.stall_accel = dict(stall_accel or {})
+        self.stall_loss = stall_loss
+        self.clock = clock or SYSTEM_CLOCK.monotonic
+        self.received = []
+        self._lock = threading.Lock()
+        self._output = bytearray()
+        self._input = bytearray()
+        self._alarm_lock = False
+        self._moves = []
+        self._slip = [0.0, 0.0, 0.0]
+        self.position = [0.0, 0.0, 0.0]
+        self._reset_state()
+        self._emit("")
+        self._emit(BANNER)
+
+    def write(self, data):
+        """Feed raw bytes from the host."""
+        with self._lock:
+            self._advance()
+            for byte in bytes(data):
+                if byte == 0x18:
+                    self._input.clear()
+                    self._stop_motion()
+                    self._reset_state()
+                    self._emit("")
+                    self._emit(BANNER)
+                    if self._alarm_lock:
+                        self.state = "Alarm"
+                        self._emit("[MSG:'$H'|'$X' to unlock]")
+                elif byte == ord("?"):
+                    self._emit(self.status_report())
+                elif byte == ord("!"):
+                    if self.state in ("Run", "Jog"):
+                        self.state = "Hold:0"
+                elif byte == ord("~"):
+                    if self.state.startswith("Hold"):
+                        self.state = "Idle"
+                elif byte == 0x85:
+                    if self.state == "Jog":
+                        self._stop_motion()
+                        self.state = "Idle"
+                elif byte == ord("\n"):
+                    line = self._input.decode("ascii", errors="replace").strip()
+                    self._input.clear()
+                    self._handle_line(line)
+                elif byte != ord("\r") and byte < 0x80:
+                    self._input.append(byte)
+        return len(data)
+
+    def read(self, size=1):
+        """Return up to ``size`` pending output bytes."""
+        with self._lock:
+            self._advance()
+            chunk = bytes(self._output[:size])
+            del self._output[:size]
+        return chunk
+
+    def readline(self):
+        """Return one complete pending output line, or ``b""``."""
+        with self._lock:
+            self._advance()
+            index = self._output.find(b"\n")
+            if index < 0:
+                return b""
+            line = bytes(self._output[: index + 1])
+            del self._output[: index + 1]
+        return line
+
+    def pending_output(self):
+        with self._lock:
+            return len(self._output)
+
+    def status_report(self):
+        self._advance()
+        if self.timed:
+            position, rate = self._current_motion()
+        else:
+            position, rate = self.position, self.feed
+        pos = ",".join(f"{value:.3f}" for value in position)
+        return f"<{self.state}|MPos:{pos}|FS:{rate:.0f},0>"
+
+    def _reset_state(self):
+        self.state = "Idle"
+        self.absolute = True
+        self.units = 1.0
+        self.motion = 0
+        self.feed = 0.0
+
+    def _emit(self, line):
+        self._output.extend(f"{line}\r\n".encode("ascii", errors="replace"))
+
+    def _handle_line(self, line):
+        if not line:
+            return
+        self.received.append(line)
+        upper = line.upper()
+        if upper == "$$":
+            for code in sorted(self.settings):
+                self._emit(f"${code}={_format_setting(self.settings[code])}")
+            self._emit("ok")
+            return
+        if upper == "$I":
+            self._emit(f"[VER:1.1h.20190825:{self.build_info}]")
+            self._emit("[OPT:V,15,128]")
+            self._emit("ok")
+            return
+        if upper == "$X":
+            self.state = "Idle"
+            self._alarm_lock = False
+            self._emit("[MSG:Caution: Unlocked]")
+            self._emit("ok")
+            return
+        if upper == "$H":
+            self.position = [0.0, 0.0, 0.0]
+            self.state = "Idle"
+            self._alarm_lock = False
+            self._emit("ok")
+            return
+        if upper.startswith("$J="):
+            self._emit(self._execute(upper[3:], jog=True))
+            return
+        setting = re.match(r"^\$(\d+)=([-+]?\d*\.?\d+)$", upper)
+        if setting:
+            if self._moves:
+                self._emit("error:8")
+                return
+            self.settings[int(setting.group(1))] = float(setting.group(2))
+            self._emit("ok")
+            return
+        if upper.startswith("$"):
+            self._emit("ok")
+            return
+        response = self._execute(upper)
+        if response is not None:
+            self._emit(response)
+
+    def _execute(self, line, jog=False):
+        if self.state == "Alarm":
+            return "error:9"
+        words = [(letter, float(value)) for letter, value in _WORD_RE.findall(line)]
+        absolute = self.absolute
+        units = self.units
+        motion = self.motion
+        machine = False
+        probe = False
+        target = list(self.position)
+        axes = {}
+        for letter, value in words:
+            if letter == "G":
+                if abs(value - 38.2) < 1e-6:
+                    probe = True
+                    continue
+                code = int(round(value))
+                if code in (0, 1, 2, 3):
+                    motion = code
+                elif code == 90:
+                    absolute = True
+                elif code == 91:
+                    absolute = False
+                elif code == 20:
+                    units = 25.4
+                elif code == 21:
+                    units = 1.0
+                elif code == 53:
+                    machine = True
+            elif letter == "F":
+                self.feed = value
+            elif letter in "XYZ":
+                axes["XYZ".index(letter)] = value
+        for index, value in axes.items():
+            value *= units
+            target[index] = value if absolute or machine else target[index] + value
+        if not jog:
+            self.absolute = absolute
+            self.units = units
+            self.motion = motion
+        if probe:
+            return self._probe(target)
+        return self._move(target, jog=jog, rapid=motion == 0 and not jog)
+
+    def _move(self, target, jog=False, rapid=False):
+        start = list(self.position)
+        if self.timed:
+            self._apply_stall(start, target, rapid)
+        tripped = False
+        if self.settings.get(21):
+            for index, value in enumerate(target):
+                upper = self.settings.get(130 + index, 0.0)
+                physical = value + self._slip[index]
+                if physical < 0.0 or physical > upper:
+                    target[index] = min(max(physical, 0.0), upper) - self._slip[index]
+                    tripped = True
+        self.position = target
+        if self.timed and target != start:
+            self._queue_move(start, target, jog, rapid, tripped)
+            return "ok"
+        if not tripped:
+            return "ok"
+        self._emit("ok")
+        self._trip_limit()
+        return None
+
+    def _trip_limit(self):
+        self.state = "Alarm"
+        self._alarm_lock = True
+        self._emit("ALARM:1")
+        self._emit("[MSG:Reset to continue]")
+
+    def _profile(self, start, target, rapid):
+        delta = [b - a for a, b in zip(start, target)]
+        length = math.sqrt(sum(value * value for value in delta))
+        rate = float("inf") if rapid else self.feed
+        accel = float("inf")
+        for index, value in enumerate(delta):
+            share = abs(value) / length if length else 0.0
+            if share:
+                rate = min(rate, self.settings.get(110 + index, 1000.0) / share)
+                accel = min(accel, self.settings.get(120 + index, 100.0) / share)
+        if not rate or rate == float("inf"):
+            rate = min(self.settings.get(110 + index, 1000.0) for index in range(3))
+        speed = rate / 60.0
+        if speed * speed / accel > length:
+            speed = math.sqrt(length * accel)
+            ramp = speed / accel
+            duration = 2.0 * ramp
+        else:
+            ramp = speed / accel
+            duration = 2.0 * ramp + (length - speed * ramp) / speed
+        return length, speed, accel, ramp, duration
+
+    def _apply_stall(self, start, target, rapid):
+        length, speed, accel, _, _ = self._profile(start, target, rapid)
+        if not length:
+            return
+        for index, axis in enumerate("XYZ"):
+            delta = target[index] - start[index]
+            share = abs(delta) / length
+            if not share:
+                continue
+            limit_feed = self.stall_feed.get(axis)
+            limit_accel = self.stall_accel.get(axis)
+            if (limit_feed is not None and speed * 60.0 * share > limit_feed) or (
+                limit_accel is not None and accel * share > limit_accel
+            ):
+                self._slip[index] -= delta * self.stall_loss
+
+    def _queue_move(self, start, target, jog, rapid, tripped):
+        length, speed, accel, ramp, duration = self._profile(start, target, rapid)
+        begin = self._moves[-1]["end"] if self._moves else self.clock()
+        self._moves.append(
+            {
+                "start": start,
+                "target": list(target),
+                "begin": begin,
+                "end": begin + duration,
+                "length": length,
+                "speed": speed,
+                "accel": accel,
+                "ramp": ramp,
+                "tripped": tripped,
+            }
+        )
+        self.state = "Jog" if jog else "Run"
+
+    def _advance(self):
+        if not self._moves:
+            return
+        now = self.clock()
+        while self._moves and self._moves[0]["end"] <= now:
+            move = self._moves.pop(0)
+            if move["tripped"]:
+                self._moves.clear()
+                self.position = list(move["target"])
+                self._trip_limit()
+                return
+        if not self._moves and self.state in ("Run", "Jog"):
+            self.state = "Idle"
+
+    def _current_motion(self):
+        if not self._moves:
+            return self.position, 0.0
+        move = self._moves[0]
+        elapsed = self.clock() - move["begin"]
+        if elapsed <= 0.0:
+            return move["start"], 0.0
+        speed, accel, ramp = move["speed"], move["accel"], move["ramp"]
+        duration = move["end"] - move["begin"]
+        if elapsed < ramp:
+            velocity = accel * elapsed
+            travelled = 0.5 * accel * elapsed * elapsed
+        elif elapsed < duration - ramp:
+            velocity = speed
+            travelled = 0.5 * speed * ramp + speed * (elapsed - ramp)
+        else:
+            remaining = max(duration - elapsed, 0.0)
+            velocity = accel * remaining
+            travelled = move["length"] - 0.5 * accel * remaining * remaining
+        fraction = travelled / move["length"] if move["length"] else 1.0
+        position = [a + (b - a) * fraction for a, b in zip(move["start"], move["target"])]
+        return position, velocity * 60.0
+
+    def _stop_motion(self):
+        if self._moves:
+            self.position = list(self._current_motion()[0])
+            self._moves.clear()
+
+    def _probe(self, target):
+        x, y, z = self.position
+        contact = self.surface(x, y) if self.surface is not None else None
+        if contact is None or not (target[2] <= contact <= z):
+            self.position = [x, y, target[2]]
+            self.state = "Alarm"
+            self._alarm_lock = True
+            self._emit("ALARM:5")
+            return None
+        self.position = [x, y, contact]
+        self._emit(f"[PRB:{x:.3f},{y:.3f},{contact:.3f}:1]")
+        return "ok"
+
+
+def _format_setting(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.3f}"
+
+
+class SimulatorTransport:
+    """Serial-like wrapper around ``GrblSimulator`` for ``sim://`` ports.
+
+    Read timeouts run on ``clock``, so with a ``VirtualClock`` an empty read
+    advances virtual time instead of blocking.
+    """
+
+    stream_window = 0
+
+    def __init__(self, simulator=None, timeout=0.1, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.simulator = simulator or GrblSimulator(clock=self.clock.monotonic)
+        self.timeout = timeout
+        self._closed = False
+
+    def write(self, data):
+        if self._closed:
+            raise OSError("Simulator transport closed")
+        return self.simulator.write(data)
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        deadline = self.clock.monotonic() + (self.timeout or 0.0)
+        while not self._closed:
+            line = self.simulator.readline()
+            if line or self.clock.monotonic() >= deadline:
+                return line
+            self.clock.sleep(0.001)
+        return b""
+
+    def read(self, size=1):
+        deadline = self.clock.monotonic() + (self.timeout or 0.0)
+        while not self._closed:
+            chunk = self.simulator.read(size)
+            if chunk or self.clock.monotonic() >= deadline:
+                return chunk
+            self.clock.sleep(0.001)
+        return b""
+
+    def reset_input_buffer(self):
+        while self.simulator.read(4096):
+            pass
+
+    def close(self):
+        self._closed = True
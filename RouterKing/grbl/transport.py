@@ -0,0 +1,157 @@
+"""Transport selection for the RouterKing GRBL sender.
+
+Serial ports (and pyserial URLs such as ``loop://``) go through pyserial.
+``tcp://host:port``, ``telnet://host:port`` and ``socket://host:port`` open a
+``SocketTransport`` for GRBL-ESP32/FluidNC controllers on the network, and
+``sim://`` opens an in-process ``GrblSimulator``.
+"""
+
+import select
+import socket
+import time
+from urllib.parse import urlsplit
+
+try:
+    from .simulator import SimulatorTransport
+except ImportError:
+    from grbl.simulator import SimulatorTransport
+
+
+NETWORK_SCHEMES = {"tcp": 23, "telnet": 23, "socket": 23}
+
+# GRBL's serial RX buffer is 128 bytes; keeping one byte spare is the
+# classic character-counting limit. Over a network link the round trip is
+# much longer than a line's transmit time, so filling the buffer is what
+# keeps the planner fed.
+NETWORK_STREAM_WINDOW = 127
+
+
+def is_network_port(port):
+    return urlsplit(str(port)).scheme.lower() in NETWORK_SCHEMES
+
+
+def open_transport(serial_module, port, baudrate=115200, timeout=0.1, clock=None):
+    """Open a serial-like transport for ``port``.
+
+    The returned object provides ``write``, ``flush``, ``readline``,
+    ``read``, ``reset_input_buffer`` and ``close``. ``stream_window`` is the
+    number of bytes the sender may keep unacknowledged (0 = one line).
+    ``clock`` drives the simulator's motion and read timeouts.
+    """
+    parts = urlsplit(str(port))
+    scheme = parts.scheme.lower()
+    if scheme in NETWORK_SCHEMES:
+        if not parts.hostname:
+            raise ValueError(f"Host missing in {port}")
+        return SocketTransport(
+            parts.hostname,
+            parts.port or NETWORK_SCHEMES[scheme],
+            timeout=timeout,
+        )
+    if scheme == "sim":
+        return SimulatorTransport(timeout=timeout, clock=clock)
+    return serial_module.serial_for_url(
+        port,
+        baudrate=baudrate,
+        timeout=timeout,
+        write_timeout=timeout,
+    )
+
+
+class SocketTransport:
+    """Serial-like TCP transport with ``TCP_NODELAY`` and nonblocking reads."""
+
+    stream_window = NETWORK_STREAM_WINDOW
+
+    def __init__(self, host, port, timeout=0.1, connect_timeout=3.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._buffer = bytearray()
+        self._sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.setblocking(False)
+
+    def write(self, data):
+        view = memoryview(bytes(data))
+        deadline = time.monotonic() + max(self.timeout or 0.0, 1.0)
+        while view:
+            try:
+                sent = self._sock.send(view)
+            except BlockingIOError:
+                sent = 0
+            view = view[sent:]
+            if view:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Write timeout")
+                select.select([], [self._sock], [], remaining)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        index = self._buffer.find(b"\n")
+        if index < 0:
+            self._fill(self.timeout)
+            index = self._buffer.find(b"\n")
+            if index < 0:
+                return b""
+        line = bytes(self._buffer[: index + 1])
+        del self._buffer[: index + 1]
+        return line
+
+    def read(self, size=1):
+        if not self._buffer:
+            self._fill(self.timeout)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+    def reset_input_buffer(self):
+        self._buffer.clear()
+        while self._fill(0.0):
+            self._buffer.clear()
+
+    def close(self):
+        try:
+            self._sock.close()
+        finally:
+            self._buffer.clear()
+
+    def _fill(self, timeout):
+        readable, _, _ = select.select([self._sock], [], [], timeout or 0.0)
+        if not readable:
+            return 0
+        try:
+            data = self._sock.recv(4096)
+        except BlockingIOError:
+            return 0
+        if not data:
+            raise ConnectionError("Connection closed by controller")
+        self._buffer.extend(_strip_telnet(data))
+        return len(data)
+
+
+def _strip_telnet(data):
+    """Drop telnet IAC negotiation sequences some firmwares send on connect."""
+    if b"\xff" not in data:
+        return data
+    out = bytearray()
+    index = 0
+    while index < len(data):
+        byte = data[index]
+        if byte == 0xFF and index + 1 < len(data):
+            command = data[index + 1]
+            if command == 0xFF:
+                out.append(0xFF)
+                index += 2
+            elif command in (0xFB, 0xFC, 0xFD, 0xFE):
+                index += 3
+            else:
+                index += 2
+            continue
+        out.append(byte)
+        index += 1
+    return bytes(out)
@@ -8,8 +8,8 @@ except ImportError:  # pragma: no cover - fallback for older FreeCAD builds
 import json
 import math
 import os
+import queue
 import re
-import time
 
 import FreeCAD as App
 import FreeCADGui as Gui
@@ -26,10 +26,44 @@ except Exception:
     from serial.tools import list_ports as _list_ports
 
 try:
-    from ..gcode.parser import iter_gcode_lines, parse_gcode
+    from ..gcode.parallel import parse_program_parallel
+    from ..gcode.cache import ParseCache, parse_cached
+    from ..gcode.lod import LodPyramid, pixel_tolerance
+    from ..gcode.parser import IncrementalParser, iter_gcode_lines
+    from ..grbl.autolevel import GridProber, autolevel_lines
+    from ..grbl.dynamics import CharacterizeDynamics
+    from ..grbl.explore import ExploreLimits
+    from ..grbl.jobqueue import JobQueue, JobQueueRunner
+    from ..grbl.metrics import MetricsServer
+    from ..grbl.baudrate import (
+        CANDIDATE_BAUDRATES,
+        DEFAULT_BAUDRATE,
+        forget_port,
+        negotiate_baudrate,
+        probe_port,
+        remembered_baudrate,
+    )
+    from ..grbl.process import ProcessSender, python_interpreter
     from ..grbl.sender import GrblSender
 except ImportError:
-    from gcode.parser import iter_gcode_lines, parse_gcode
+    from gcode.parallel import parse_program_parallel
+    from gcode.cache import ParseCache, parse_cached
+    from gcode.lod import LodPyramid, pixel_tolerance
+    from gcode.parser import IncrementalParser, iter_gcode_lines
+    from grbl.autolevel import GridProber, autolevel_lines
+    from grbl.dynamics import CharacterizeDynamics
+    from grbl.explore import ExploreLimits
+    from grbl.jobqueue import JobQueue, JobQueueRunner
+    from grbl.metrics import MetricsServer
+    from grbl.baudrate import (
+        CANDIDATE_BAUDRATES,
+        DEFAULT_BAUDRATE,
+        forget_port,
+        negotiate_baudrate,
+        probe_port,
+        remembered_baudrate,
+    )
+    from grbl.process import ProcessSender, python_interpreter
     from grbl.sender import GrblSender
 
 _dock = None
@@ -60,6 +94,11 @@ _ALARM_CODES = {
     8: "Homing fail. Pull-off failed.",
     9: "Homing fail. Could not find switch.",
 }
+# Larger previews only draw what the view shows, at the level of detail
+# matching the zoom (via the LOD pyramid and its segment indices).
+_PREVIEW_CULL_SEGMENTS = 20000
+# Click tolerance for picking a preview segment, in screen pixels.
+_PREVIEW_PICK_PIXELS = 5.0
 _DEFAULT_AI_MODELS = ["gpt-5.2", "gpt-5-mini", "gpt-4o", "gpt-4o-mini"]
 _AI_MODEL_SHORTLIST = [
     "gpt-5.2",
@@ -302,8 +341,11 @@ class RouterKingDockWidget(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        self._sender = GrblSender()
+        self._sender = self._create_sender()
         self._last_gcode_path = None
+        self._preview_parser = IncrementalParser()
+        self._preview_path = None
+        self._preview_lod = None
         self._last_dxf_path = None
         self._status_tick = 0
         self._fixed_font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
@@ -314,40 +356,15 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._limits_announced = False
         self._homing_dir_mask = 0
         self._axis_max_feed = {"X": None, "Y": None, "Z": None}
-        self._explore_active = False
-        self._explore_phase = None
-        self._explore_axis_queue = []
-        self._explore_axis = None
-        self._explore_step = 5.0
-        self._explore_feed = 800.0
-        self._explore_margin = 2.0
-        self._explore_distance = 0.0
-        self._explore_pending = False
-        self._explore_next_action = 0.0
         self._explore_results = {}
-        self._explore_dir = 1.0
-        self._explore_backoff = 5.0
-        self._explore_unlock_sent_at = None
         self._homing_pull_off = 3.0
-        self._explore_unlocked = False
-        self._explore_last_command_at = None
-        self._explore_recover_attempts = 0
-        self._explore_dir_override = {"X": None, "Y": None, "Z": None}
-        self._explore_safe_moves_done = False
-        self._explore_retry_axes = set()
-        self._explore_retry_axis = None
-        self._explore_known_limits = {}
-        self._explore_retry_measurements = {}
-        self._explore_ramp_remaining = 0.0
-        self._explore_ramp_feed = 0.0
-        self._explore_ramp_increment_current = 0.0
-        self._explore_ramp_max_feed_axis = 0.0
-        self._explore_ramp_target_feed = 0.0
-        self._explore_ramp_accel_remaining = 0.0
-        self._explore_ramp_last_step = 0.0
-        self._explore_prehome_pull_off = 0.0
-        self._explore_preflight_sent = False
-        self._explore_preflight_started_at = 0.0
+        self._procedure = None
+        self._procedure_lines = queue.Queue()
+        self._procedure_finished = None
+        self._height_map = None
+        self._job_queue = JobQueue.load()
+        self._queue_dirty = False
+        self._metrics_server = self._start_metrics_server()
         self._ai_messages = []
         self._ai_worker = None
         self._ai_worker_thread = None
@@ -384,13 +401,19 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._port.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToContentsOnFirstShow)
         port_editor = self._port.lineEdit()
         if port_editor is not None:
-            port_editor.setPlaceholderText("/dev/ttyUSB0 or /dev/cu.wchusbserial...")
+            port_editor.setPlaceholderText("/dev/ttyUSB0, /dev/cu.wchusbserial... or tcp://host:23")
         self._refresh_ports_btn = QtWidgets.QPushButton("Refresh")
         self._auto_btn = QtWidgets.QPushButton("Auto")
         self._connect_btn = QtWidgets.QPushButton("Connect")
+        self._sender_process = QtWidgets.QCheckBox("Isolated")
+        self._sender_process.setChecked(isinstance(self._sender, ProcessSender))
+        self._sender_process.setToolTip(
+            "Run the sender in a separate process so FreeCAD stalls cannot starve the machine."
+        )
         connect_row.addWidget(self._port)
         connect_row.addWidget(self._refresh_ports_btn)
         connect_row.addWidget(self._auto_btn)
+        connect_row.addWidget(self._sender_process)
         connect_row.addWidget(self._connect_btn)
         layout.addLayout(connect_row)
 
@@ -427,6 +450,7 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._connect_btn.clicked.connect(self._on_connect)
         self._refresh_ports_btn.clicked.connect(self._refresh_ports)
         self._auto_btn.clicked.connect(self._auto_connect)
+        self._sender_process.toggled.connect(self._on_sender_process_toggled)
 
         self._refresh_ports()
 
@@ -501,12 +525,14 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._explore_limits_btn = QtWidgets.QPushButton("Explore Limits")
         self._explore_z_btn = QtWidgets.QPushButton("Explore Z axis")
         self._z_speed_test_btn = QtWidgets.QPushButton("Test Z speed")
+        self._dynamics_btn = QtWidgets.QPushButton("Characterize Dynamics")
         machine_layout.addWidget(self._read_limits_btn, 1, 0, 1, 2)
         machine_layout.addWidget(self._travel_test_btn, 1, 2, 1, 2)
         machine_layout.addWidget(self._explore_limits_btn, 1, 4, 1, 2)
         action_layout = QtWidgets.QHBoxLayout()
         action_layout.addWidget(self._explore_z_btn)
         action_layout.addWidget(self._z_speed_test_btn)
+        action_layout.addWidget(self._dynamics_btn)
         action_layout.addStretch(1)
         machine_layout.addLayout(action_layout, 4, 0, 1, 6)
 
@@ -522,7 +548,7 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._travel_feed.setRange(1, 20000)
         self._travel_feed.setValue(1200)
         machine_layout.addWidget(self._travel_feed, 2, 3)
-        machine_layout.addWidget(QtWidgets.QLabel("Explore step (mm)"), 2, 4)
+        machine_layout.addWidget(QtWidgets.QLabel("Re-approach (mm)"), 2, 4)
         self._explore_step_spin = QtWidgets.QDoubleSpinBox()
         self._explore_step_spin.setDecimals(2)
         self._explore_step_spin.setRange(0.1, 50.0)
@@ -542,6 +568,68 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         )
         layout.addWidget(machine_group)
 
+        probe_group = QtWidgets.QGroupBox("Surface Probe / Autolevel")
+        probe_layout = QtWidgets.QGridLayout(probe_group)
+        probe_layout.addWidget(QtWidgets.QLabel("Width (mm)"), 0, 0)
+        self._probe_width = QtWidgets.QDoubleSpinBox()
+        self._probe_width.setDecimals(1)
+        self._probe_width.setRange(1.0, 2000.0)
+        self._probe_width.setValue(100.0)
+        probe_layout.addWidget(self._probe_width, 0, 1)
+        probe_layout.addWidget(QtWidgets.QLabel("Height (mm)"), 0, 2)
+        self._probe_height = QtWidgets.QDoubleSpinBox()
+        self._probe_height.setDecimals(1)
+        self._probe_height.setRange(1.0, 2000.0)
+        self._probe_height.setValue(100.0)
+        probe_layout.addWidget(self._probe_height, 0, 3)
+        probe_layout.addWidget(QtWidgets.QLabel("Points X/Y"), 0, 4)
+        points_row = QtWidgets.QHBoxLayout()
+        self._probe_cols = QtWidgets.QSpinBox()
+        self._probe_cols.setRange(2, 50)
+        self._probe_cols.setValue(5)
+        self._probe_rows = QtWidgets.QSpinBox()
+        self._probe_rows.setRange(2, 50)
+        self._probe_rows.setValue(5)
+        points_row.addWidget(self._probe_cols)
+        points_row.addWidget(self._probe_rows)
+        probe_layout.addLayout(points_row, 0, 5)
+
+        probe_layout.addWidget(QtWidgets.QLabel("Probe depth"), 1, 0)
+        self._probe_depth = QtWidgets.QDoubleSpinBox()
+        self._probe_depth.setDecimals(2)
+        self._probe_depth.setRange(-50.0, 0.0)
+        self._probe_depth.setValue(-5.0)
+        probe_layout.addWidget(self._probe_depth, 1, 1)
+        probe_layout.addWidget(QtWidgets.QLabel("Probe feed"), 1, 2)
+        self._probe_feed = QtWidgets.QDoubleSpinBox()
+        self._probe_feed.setDecimals(0)
+        self._probe_feed.setRange(1, 2000)
+        self._probe_feed.setValue(100)
+        probe_layout.addWidget(self._probe_feed, 1, 3)
+        probe_layout.addWidget(QtWidgets.QLabel("Refine (mm)"), 1, 4)
+        self._probe_refine = QtWidgets.QDoubleSpinBox()
+        self._probe_refine.setDecimals(3)
+        self._probe_refine.setRange(0.0, 5.0)
+        self._probe_refine.setValue(0.0)
+        self._probe_refine.setToolTip("Add probe points where the surface bends more than this (0 = off).")
+        probe_layout.addWidget(self._probe_refine, 1, 5)
+
+        self._probe_grid_btn = QtWidgets.QPushButton("Probe Grid")
+        self._autolevel_enabled = QtWidgets.QCheckBox("Autolevel job")
+        self._autolevel_enabled.setEnabled(False)
+        self._height_map_label = QtWidgets.QLabel("Map: none")
+        probe_layout.addWidget(self._probe_grid_btn, 2, 0, 1, 2)
+        probe_layout.addWidget(self._autolevel_enabled, 2, 2, 1, 2)
+        probe_layout.addWidget(self._height_map_label, 2, 4, 1, 2)
+        probe_layout.addWidget(
+            QtWidgets.QLabel("Grid starts at work X0 Y0. Attach the probe clip and zero Z first."),
+            3,
+            0,
+            1,
+            6,
+        )
+        layout.addWidget(probe_group)
+
         console_group = QtWidgets.QGroupBox("Console")
         console_layout = QtWidgets.QVBoxLayout(console_group)
         self._console = QtWidgets.QPlainTextEdit()
@@ -589,6 +677,8 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._explore_limits_btn.clicked.connect(self._on_explore_limits)
         self._explore_z_btn.clicked.connect(self._on_explore_z_axis)
         self._z_speed_test_btn.clicked.connect(self._on_z_speed_test)
+        self._dynamics_btn.clicked.connect(self._on_characterize_dynamics)
+        self._probe_grid_btn.clicked.connect(self._on_probe_grid)
 
     def _build_gcode_tab(self, parent):
         layout = QtWidgets.QVBoxLayout(parent)
@@ -619,6 +709,51 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         job_row.addStretch(1)
         layout.addLayout(job_row)
 
+        queue_group = QtWidgets.QGroupBox("Job Queue")
+        queue_layout = QtWidgets.QGridLayout(queue_group)
+        self._queue_list = QtWidgets.QListWidget()
+        self._queue_list.setMaximumHeight(110)
+        queue_layout.addWidget(self._queue_list, 0, 0, 1, 4)
+        queue_buttons = QtWidgets.QVBoxLayout()
+        self._queue_add_btn = QtWidgets.QPushButton("Add Files")
+        self._queue_remove_btn = QtWidgets.QPushButton("Remove")
+        self._queue_up_btn = QtWidgets.QPushButton("Up")
+        self._queue_down_btn = QtWidgets.QPushButton("Down")
+        self._queue_requeue_btn = QtWidgets.QPushButton("Requeue")
+        self._queue_clear_btn = QtWidgets.QPushButton("Clear Done")
+        for btn in [
+            self._queue_add_btn,
+            self._queue_remove_btn,
+            self._queue_up_btn,
+            self._queue_down_btn,
+            self._queue_requeue_btn,
+            self._queue_clear_btn,
+        ]:
+            queue_buttons.addWidget(btn)
+        queue_layout.addLayout(queue_buttons, 0, 4, 2, 1)
+        queue_layout.addWidget(QtWidgets.QLabel("Preamble"), 1, 0)
+        self._queue_preamble = QtWidgets.QPlainTextEdit()
+        self._queue_preamble.setMaximumHeight(48)
+        self._queue_preamble.setPlaceholderText("e.g. $H / G10 L20 P1 X0 Y0 Z0")
+        self._queue_preamble.setFont(self._fixed_font)
+        queue_layout.addWidget(self._queue_preamble, 1, 1)
+        queue_layout.addWidget(QtWidgets.QLabel("Postamble"), 1, 2)
+        self._queue_postamble = QtWidgets.QPlainTextEdit()
+        self._queue_postamble.setMaximumHeight(48)
+        self._queue_postamble.setPlaceholderText("e.g. G53 G0 Z-5 / M0 (stock change)")
+        self._queue_postamble.setFont(self._fixed_font)
+        queue_layout.addWidget(self._queue_postamble, 1, 3)
+        self._queue_run_btn = QtWidgets.QPushButton("Run Queue")
+        self._queue_status = QtWidgets.QLabel("Queue: idle")
+        queue_layout.addWidget(self._queue_run_btn, 2, 0)
+        queue_layout.addWidget(self._queue_status, 2, 1, 1, 4)
+        try:
+            self._queue_preamble.setPlainText(_PREFS.GetString("QueuePreamble", ""))
+            self._queue_postamble.setPlainText(_PREFS.GetString("QueuePostamble", ""))
+        except Exception:
+            pass
+        layout.addWidget(queue_group)
+
         cam_row = QtWidgets.QHBoxLayout()
         self._cam_status = QtWidgets.QLabel("CAM Workbench: unknown")
         self._cam_check_btn = QtWidgets.QPushButton("Check CAM")
@@ -638,6 +773,13 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._preview_scene = QtWidgets.QGraphicsScene(self)
         self._preview_view = QtWidgets.QGraphicsView(self._preview_scene)
         self._preview_view.setRenderHint(QtGui.QPainter.Antialiasing)
+        self._preview_view.viewport().installEventFilter(self)
+        self._preview_render_timer = QtCore.QTimer(self)
+        self._preview_render_timer.setSingleShot(True)
+        self._preview_render_timer.setInterval(30)
+        self._preview_render_timer.timeout.connect(self._render_preview)
+        self._preview_view.horizontalScrollBar().valueChanged.connect(self._schedule_preview_render)
+        self._preview_view.verticalScrollBar().valueChanged.connect(self._schedule_preview_render)
         splitter.addWidget(self._gcode_edit)
         splitter.addWidget(self._preview_view)
         splitter.setStretchFactor(0, 2)
@@ -652,11 +794,19 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._start_btn.clicked.connect(self._on_start_job)
         self._pause_btn.clicked.connect(self._on_pause_resume_job)
         self._stop_btn.clicked.connect(self._on_stop_job)
+        self._queue_add_btn.clicked.connect(self._on_queue_add)
+        self._queue_remove_btn.clicked.connect(self._on_queue_remove)
+        self._queue_up_btn.clicked.connect(lambda: self._on_queue_move(-1))
+        self._queue_down_btn.clicked.connect(lambda: self._on_queue_move(1))
+        self._queue_requeue_btn.clicked.connect(self._on_queue_requeue)
+        self._queue_clear_btn.clicked.connect(self._on_queue_clear_done)
+        self._queue_run_btn.clicked.connect(self._on_queue_run)
         self._cam_check_btn.clicked.connect(self._on_cam_check)
         self._cam_activate_btn.clicked.connect(self._on_cam_activate)
 
         self._update_job_controls()
         self._update_machine_controls()
+        self._refresh_queue_list()
         self._refresh_cam_status()
 
     def _refresh_cam_status(self):
@@ -1310,6 +1460,8 @@ class RouterKingDockWidget(QtWidgets.QWidget):
             spindle_speed=spindle_speed.value(),
             laser_power=laser_power.value(),
             start_spindle=start_spindle.isChecked(),
+            # ArcFitTolerance: mm for G2/G3 fitting of chord runs, 0 = off.
+            arc_tolerance=_PREFS.GetFloat("ArcFitTolerance", 0.01),
         )
 
         self._cam_generate_defaults = {
@@ -1704,6 +1856,8 @@ class RouterKingDockWidget(QtWidgets.QWidget):
             spindle_speed=spindle_speed.value(),
             laser_power=laser_power.value(),
             start_spindle=start_spindle.isChecked(),
+            # ArcFitTolerance: mm for G2/G3 fitting of chord runs, 0 = off.
+            arc_tolerance=_PREFS.GetFloat("ArcFitTolerance", 0.01),
         )
         import_settings = DxfImportSettings(
             deflection=deflection.value(),
@@ -1923,14 +2077,20 @@ class RouterKingDockWidget(QtWidgets.QWidget):
 
     def _on_ai_cam_analysis(self):
         try:
-            from ..ai.cam_analysis import analyze_gcode
+            from ..ai.cam_analysis import analyze_gcode, analyze_toolpath
         except ImportError:
-            from ai.cam_analysis import analyze_gcode
+            from ai.cam_analysis import analyze_gcode, analyze_toolpath
 
         gcode_text = self._gcode_edit.toPlainText() if self._gcode_edit is not None else ""
         self._set_ai_busy(True, "Analyzing G-code...")
         try:
-            result = analyze_gcode(gcode_text)
+            if gcode_text.strip():
+                # Reuse the preview parser's toolpath; after a load or a
+                # preview this re-interprets nothing.
+                self._preview_parser.update(gcode_text)
+                result = analyze_toolpath(self._preview_parser.toolpath)
+            else:
+                result = analyze_gcode(gcode_text)
         except Exception as exc:
             self._ai_status.setText("CAM analysis failed.")
             _status_message(f"RouterKing CAM analysis failed: {exc}\n", error=True)
@@ -2422,6 +2582,7 @@ class RouterKingDockWidget(QtWidgets.QWidget):
             self._update_limit_labels()
             self._connect_btn.setText("Connect")
             self._port.setEnabled(True)
+            self._sender_process.setEnabled(True)
             self._refresh_ports()
             self._append_console("Disconnected.")
             self._update_job_controls()
@@ -2438,10 +2599,66 @@ class RouterKingDockWidget(QtWidgets.QWidget):
 
         self._connect_to_port(port)
 
+    @staticmethod
+    def _create_sender():
+        try:
+            use_process = _PREFS.GetBool("SenderProcess", False)
+        except Exception:
+            use_process = False
+        if not use_process:
+            return GrblSender()
+        # Inside FreeCAD sys.executable is FreeCAD itself, not Python.
+        python = python_interpreter()
+        if python is None:
+            _status_message("RouterKing: no Python interpreter found; sender runs in-process\n", error=True)
+            return GrblSender()
+        return ProcessSender(python_executable=python)
+
+    def _start_metrics_server(self):
+        """Serve /metrics on localhost when the MetricsPort pref is set (0 = off)."""
+        try:
+            port = _PREFS.GetInt("MetricsPort", 0)
+            machine = _PREFS.GetString("MetricsMachine", "")
+        except Exception:
+            return None
+        if not port:
+            return None
+        server = MetricsServer(
+            self._sender,
+            port=port,
+            labels={"machine": machine} if machine else None,
+        )
+        try:
+            server.start()
+        except OSError as exc:
+            _status_message(f"RouterKing: metrics endpoint unavailable: {exc}\n", error=True)
+            return None
+        return server
+
+    def _on_sender_process_toggled(self, checked):
+        try:
+            _PREFS.SetBool("SenderProcess", bool(checked))
+        except Exception:
+            pass
+        if self._sender.is_connected():
+            return
+        self._sender = self._create_sender()
+        if self._metrics_server is not None:
+            self._metrics_server.sender = self._sender
+        mode = "separate process" if checked else "FreeCAD process"
+        self._append_console(f"Sender runs in the {mode}.")
+
     def _drain_sender(self):
-        lines = self._sender.poll()
+        if self._procedure is not None:
+            finished = self._procedure.is_done()
+            lines = self._drain_procedure_lines()
+        else:
+            finished = False
+            lines = self._sender.poll()
         for line in lines:
             self._handle_console_line(line)
+        if finished:
+            self._finish_procedure()
 
         if self._sender.is_connected():
             self._status_tick += 1
@@ -2459,9 +2676,76 @@ class RouterKingDockWidget(QtWidgets.QWidget):
                 self._machine_status.setText(f"Machine: {state}")
             self._update_alarm_status(state)
 
+        if self._queue_dirty:
+            self._refresh_queue_list()
         self._update_job_controls()
         self._update_machine_controls()
-        self._explore_tick()
+
+    def _start_procedure(self, procedure, finished):
+        procedure.on_line = self._procedure_lines.put
+        self._procedure = procedure
+        self._procedure_finished = finished
+        self._append_console(f"{procedure.name} started.", force=True)
+        procedure.start()
+        self._update_machine_controls()
+
+    def _drain_procedure_lines(self):
+        lines = []
+        while True:
+            try:
+                lines.append(self._procedure_lines.get_nowait())
+            except queue.Empty:
+                return lines
+
+    def _finish_procedure(self):
+        procedure = self._procedure
+        finished = self._procedure_finished
+        self._procedure = None
+        self._procedure_finished = None
+        if procedure.error:
+            self._append_console(procedure.error, force=True)
+        if finished is not None:
+            finished(procedure)
+        self._update_machine_controls()
+
+    def _on_probe_grid(self):
+        if not self._sender.is_connected():
+            self._append_console("Probe grid failed: not connected.")
+            return
+        if self._sender.is_streaming() or self._procedure is not None:
+            self._append_console("Probe grid failed: sender busy.")
+            return
+        refine = self._probe_refine.value()
+        prober = GridProber(
+            self._sender,
+            0.0,
+            0.0,
+            self._probe_width.value(),
+            self._probe_height.value(),
+            cols=self._probe_cols.value(),
+            rows=self._probe_rows.value(),
+            depth=self._probe_depth.value(),
+            feed=self._probe_feed.value(),
+            refine_threshold=refine if refine > 0 else None,
+        )
+        self._start_procedure(prober, self._on_probe_grid_finished)
+
+    def _on_probe_grid_finished(self, prober):
+        height_map = prober.result
+        if height_map is None:
+            return
+        self._height_map = height_map
+        values = [value for row in height_map.heights for value in row]
+        self._height_map_label.setText(
+            f"Map: {len(height_map.xs)}x{len(height_map.ys)}, "
+            f"{min(values):+.3f}..{max(values):+.3f} mm"
+        )
+        self._autolevel_enabled.setEnabled(True)
+        self._autolevel_enabled.setChecked(True)
+        self._append_console(
+            f"Probe grid complete: {len(prober.probed)} points in {prober.passes} pass(es).",
+            force=True,
+        )
 
     def _append_console(self, text, force=False):
         if not force and self._console_verbose is not None and not self._console_verbose.isChecked():
@@ -2476,38 +2760,16 @@ class RouterKingDockWidget(QtWidgets.QWidget):
                 self._append_console(line)
             return
         lower = line.strip().lower()
-        if self._explore_active:
-            if lower.startswith("grbl"):
-                self._append_console("Controller reset detected.", force=True)
-                self._explore_unlocked = False
-                self._explore_pending = False
-                self._explore_phase = "unlock"
-                self._explore_next_action = time.time() + 0.5
-                return
-            if "to unlock" in lower or "check limits" in lower:
-                self._explore_unlocked = False
-                self._explore_pending = False
-                self._explore_phase = "unlock"
-                self._explore_next_action = time.time() + 0.2
         if self._is_status_line(line):
             if self._console_verbose.isChecked():
                 self._append_console(line)
             return
-        if lower == "ok" and self._explore_active and self._explore_pending:
-            self._handle_explore_ok()
-            if not self._console_verbose.isChecked():
-                return
         if lower.startswith("alarm:"):
             message, label = self._format_alarm(line)
             self._last_alarm_info = label
             self._alarm_status.setText(f"Alarm: {label}")
             self._append_console(message, force=True)
-            if self._explore_active:
-                self._handle_explore_alarm(label)
             return
-        if self._explore_active and "unlocked" in lower:
-            self._explore_unlocked = True
-            self._explore_pending = False
         if lower.startswith("error:"):
             self._append_console(line, force=True)
             return
@@ -2605,7 +2867,8 @@ class RouterKingDockWidget(QtWidgets.QWidget):
 
     def _connect_to_port(self, port):
         try:
-            self._sender.connect(port)
+            baudrate = self._select_baudrate(port)
+            self._sender.connect(port, baudrate=baudrate)
         except Exception as exc:
             self._append_console(f"Connect failed: {exc}")
             _status_message(f"RouterKing: connect failed ({exc})\n", error=True)
@@ -2617,6 +2880,7 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._limits_announced = False
         self._connect_btn.setText("Disconnect")
         self._port.setEnabled(False)
+        self._sender_process.setEnabled(False)
         self._append_console("Connected.")
         self._poll_timer.start()
         self._update_job_controls()
@@ -2722,57 +2986,56 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         return sorted(ports, key=score, reverse=True)
 
     def _probe_port(self, device):
+        detail = ""
+        for baudrate in self._baudrate_candidates(device):
+            ok, detail = probe_port(device, baudrate)
+            if ok:
+                return True, f"GRBL response detected at {baudrate} baud."
+        return False, detail
+
+    def _baudrate_candidates(self, port):
+        candidates = []
         try:
-            serial = _serial.Serial(
-                port=device,
-                baudrate=115200,
-                timeout=0.2,
-                write_timeout=0.2,
-            )
-        except Exception as exc:
-            return False, f"Probe failed: {exc}"
-        try:
-            try:
-                serial.reset_input_buffer()
-            except Exception:
-                pass
-            serial.write(b"\r\n\r\n")
-            serial.flush()
-            time.sleep(0.1)
-            serial.write(b"?")
-            serial.flush()
-            deadline = time.time() + 0.8
-            data = b""
-            while time.time() < deadline:
-                chunk = serial.read(128)
-                if chunk:
-                    data += chunk
-                    decoded = data.decode("utf-8", errors="replace")
-                    if self._is_grbl_response(decoded):
-                        return True, "GRBL response detected."
-            if data:
-                preview = data.decode("utf-8", errors="replace").strip()
-                if len(preview) > 200:
-                    preview = f"{preview[:200]}..."
-                return False, f"No GRBL signature (got: {preview})"
-            return False, ""
-        finally:
+            text = _PREFS.GetString("BaudRates", "")
+        except Exception:
+            text = ""
+        for item in text.replace(";", ",").split(","):
             try:
-                serial.close()
-            except Exception:
-                pass
-
-    @staticmethod
-    def _is_grbl_response(text):
-        if "Grbl" in text:
-            return True
-        for line in text.splitlines():
-            line = line.strip()
-            if line.startswith("<") and line.endswith(">"):
-                return True
-        if "<" in text and ">" in text and ("MPos" in text or "WPos" in text):
-            return True
-        return False
+                value = int(item.strip())
+            except ValueError:
+                continue
+            if value > 0 and value not in candidates:
+                candidates.append(value)
+        if not candidates:
+            candidates = list(CANDIDATE_BAUDRATES)
+        remembered = remembered_baudrate(port)
+        if remembered:
+            candidates = [remembered] + [value for value in candidates if value != remembered]
+        return candidates
+
+    def _select_baudrate(self, port):
+        if "://" in str(port):
+            return DEFAULT_BAUDRATE
+        remembered = remembered_baudrate(port)
+        if remembered:
+            ok, _ = probe_port(port, remembered)
+            if ok:
+                self._append_console(f"Link: using remembered {remembered} baud.")
+                return remembered
+            self._append_console(f"Link: no response at remembered {remembered} baud.")
+            forget_port(port)
+        self._append_console("Link: negotiating baud rate...")
+        result = negotiate_baudrate(port, self._baudrate_candidates(port))
+        for line in result.log:
+            self._append_console(f"Link: {line}")
+        if not result.baudrate:
+            self._append_console(f"Link: no stable rate found, using {DEFAULT_BAUDRATE} baud.")
+            return DEFAULT_BAUDRATE
+        self._append_console(
+            f"Link: {result.baudrate} baud ({result.lines_per_sec:.0f} lines/s, "
+            f"controller {result.controller_id})."
+        )
+        return result.baudrate
 
     def _send_command(self, command, log=True):
         try:
@@ -2848,75 +3111,51 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._append_console("Travel test started.")
 
     def _on_explore_limits(self):
-        if self._explore_active:
-            self._explore_active = False
-            self._explore_phase = None
-            self._explore_axis_queue = []
-            self._explore_pending = False
-            self._append_console("Explore limits stopped.")
-            self._update_machine_controls()
+        if self._explore_running():
+            self._procedure.cancel()
+            self._append_console("Explore limits stopping...", force=True)
             return
+        if not self._can_start_explore():
+            return
+        self._start_explore(["X", "Y", "Z"])
+
+    def _can_start_explore(self):
         if not self._sender.is_connected():
             self._append_console("Explore limits failed: not connected.")
-            return
-        if self._sender.is_streaming():
+            return False
+        if self._sender.is_streaming() or self._procedure is not None:
             self._append_console("Explore limits failed: sender busy.")
-            return
+            return False
         status = self._sender.get_status()
         if status and str(status.get("state", "")).lower() == "alarm":
             self._append_console("Explore limits blocked: alarm active. Unlock and home first.")
-            return
-        if not self._prepare_explore_parameters():
-            return
-        if not self._confirm_explore_limits(self._explore_step, self._explore_feed, self._explore_margin):
-            return
-        self._start_explore(["X", "Y", "Z"])
-
-    def _prepare_explore_parameters(self):
-        self._explore_step = self._explore_step_spin.value()
-        self._explore_feed = self._travel_feed.value()
-        self._explore_margin = self._travel_margin.value()
-        self._explore_backoff = max(
-            self._homing_pull_off + 5.0,
-            self._explore_margin + 5.0,
-            self._explore_step * 2.0,
-        )
-        self._explore_prehome_pull_off = max(
-            self._homing_pull_off + 2.0,
-            self._explore_margin + 2.0,
-        )
-        self._explore_recover_attempts = 0
-        if self._explore_step <= 0:
-            self._append_console("Explore limits failed: step must be > 0.")
             return False
-        return True
+        if self._explore_step_spin.value() <= 0:
+            self._append_console("Explore limits failed: re-approach must be > 0.")
+            return False
+        return self._confirm_explore_limits(
+            self._explore_step_spin.value(),
+            self._travel_feed.value(),
+            self._travel_margin.value(),
+        )
 
     def _on_explore_z_axis(self):
-        if self._explore_active:
+        if self._explore_running():
             self._append_console("Explore limits already running.")
             self._update_machine_controls()
             return
-        if not self._sender.is_connected():
-            self._append_console("Explore limits failed: not connected.")
-            return
-        if self._sender.is_streaming():
-            self._append_console("Explore limits failed: sender busy.")
-            return
-        status = self._sender.get_status()
-        if status and str(status.get("state", "")).lower() == "alarm":
-            self._append_console("Explore limits blocked: alarm active. Unlock and home first.")
-            return
-        if not self._prepare_explore_parameters():
-            return
-        if not self._confirm_explore_limits(self._explore_step, self._explore_feed, self._explore_margin):
+        if not self._can_start_explore():
             return
         self._start_explore(["Z"])
 
+    def _explore_running(self):
+        return isinstance(self._procedure, ExploreLimits)
+
     def _on_z_speed_test(self):
         if not self._sender.is_connected():
             self._append_console("Z speed test failed: not connected.")
             return
-        if self._sender.is_streaming() or self._explore_active:
+        if self._sender.is_streaming() or self._procedure is not None:
             self._append_console("Z speed test failed: sender busy.")
             return
         step = self._explore_step_spin.value()
@@ -2935,12 +3174,86 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._send_command(f"G0 Z{-distance:.3f}")
         self._send_command("G90")
 
+    def _on_characterize_dynamics(self):
+        if isinstance(self._procedure, CharacterizeDynamics):
+            self._procedure.cancel()
+            self._append_console("Dynamics characterization stopping...", force=True)
+            return
+        if not self._sender.is_connected():
+            self._append_console("Characterize dynamics failed: not connected.")
+            return
+        if self._sender.is_streaming() or self._procedure is not None:
+            self._append_console("Characterize dynamics failed: sender busy.")
+            return
+        status = self._sender.get_status()
+        if status and str(status.get("state", "")).lower() == "alarm":
+            self._append_console("Characterize dynamics blocked: alarm active. Unlock and home first.")
+            return
+        axes = ["X", "Y", "Z"]
+        distance = {}
+        for axis in axes:
+            limit = self._limits.get(axis)
+            distance[axis] = min(50.0, limit * 0.5) if limit else 20.0
+        message = (
+            "This steps max feed ($110-$112) and acceleration ($120-$122) per\n"
+            "axis with test jogs away from the homing-side switch. With hard\n"
+            "limits enabled each level re-touches the switch to detect lost\n"
+            "steps, which triggers limit alarms and resets.\n\n"
+            + "\n".join(f"{axis} test move: {distance[axis]:.1f} mm" for axis in axes)
+            + "\n\nSettings are restored afterwards. Make sure the machine is homed,\n"
+            "spindle/laser is off, and the workspace is clear. Continue?"
+        )
+        result = QtWidgets.QMessageBox.warning(
+            self,
+            "Characterize Dynamics?",
+            message,
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+        )
+        if result != QtWidgets.QMessageBox.Yes:
+            return
+        dynamics = CharacterizeDynamics(
+            self._sender,
+            axes=axes,
+            directions={axis: -self._axis_explore_dir(axis) for axis in axes},
+            distance=distance,
+            backoff=max(self._homing_pull_off, 1.0),
+        )
+        self._start_procedure(dynamics, self._on_dynamics_finished)
+
+    def _on_dynamics_finished(self, dynamics):
+        for level in dynamics.levels:
+            verdict = level.fault or "ok"
+            self._append_console(
+                f"Dynamics {level.axis} {level.kind}: F{level.feed:.0f} A{level.accel:.0f} "
+                f"{level.measured_time:.2f}/{level.expected_time:.2f} s, "
+                f"peak {level.peak_feed:.0f} mm/min - {verdict}",
+                force=True,
+            )
+        for note in dynamics.notes:
+            self._append_console(f"Dynamics: {note}", force=True)
+        if not dynamics.proposals:
+            return
+        lines = [f"${code}={value}" for code, value in sorted(dynamics.proposals.items())]
+        result = QtWidgets.QMessageBox.question(
+            self,
+            "Write Dynamics Settings?",
+            "Apply the proposed settings to the controller?\n\n" + "\n".join(lines),
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+        )
+        if result == QtWidgets.QMessageBox.Yes:
+            for line in lines:
+                self._send_command(line)
+            for code, value in dynamics.proposals.items():
+                if 110 <= code <= 112:
+                    self._axis_max_feed["XYZ"[code - 110]] = float(value)
+            self._append_console("Dynamics settings written to controller.", force=True)
+
     def _confirm_explore_limits(self, step, feed, margin):
         message = (
             "This mode intentionally runs each axis into its limit switch to\n"
             "discover maximum travel. This can trigger hard limit alarms and\n"
             "controller resets.\n\n"
-            f"Step: {step:.2f} mm\n"
+            f"Re-approach: {step:.2f} mm\n"
             f"Feed: {feed:.0f} mm/min\n"
             f"Margin: {margin:.2f} mm\n\n"
             "Make sure the machine is homed, spindle/laser is off, and the\n"
@@ -2954,294 +3267,41 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         )
         return result == QtWidgets.QMessageBox.Yes
 
-    def _start_explore(self, axes=None):
-        self._explore_active = True
-        self._explore_phase = "preflight"
-        axes_to_run = list(axes) if axes else ["X", "Y", "Z"]
-        if not axes_to_run:
-            self._append_console("Explore limits failed: no axes selected.")
-            self._explore_active = False
-            return
-        self._explore_axis_queue = axes_to_run
-        self._explore_axis = None
-        self._explore_distance = 0.0
-        self._explore_pending = False
-        self._explore_next_action = time.time()
+    def _start_explore(self, axes):
+        feed = self._travel_feed.value()
+        max_travel = {}
+        for axis in axes:
+            known = self._limits.get(axis)
+            max_travel[axis] = known * 1.5 + 50.0 if known else 2000.0
+        explore = ExploreLimits(
+            self._sender,
+            axes=axes,
+            directions={axis: self._axis_explore_dir(axis) for axis in axes},
+            feed=feed,
+            slow_feed=max(10.0, feed / 10.0),
+            margin=self._travel_margin.value(),
+            reapproach=max(self._explore_step_spin.value(), self._homing_pull_off + 2.0),
+            max_travel=max_travel,
+            expected=dict(self._limits),
+        )
         self._explore_results = {}
-        self._explore_unlock_sent_at = None
-        self._explore_unlocked = False
-        self._explore_last_command_at = None
-        self._explore_recover_attempts = 0
-        self._explore_known_limits = dict(self._limits)
-        self._explore_retry_axes.clear()
-        self._explore_retry_axis = None
-        self._explore_retry_measurements = {}
-        self._explore_dir_override = {"X": None, "Y": None, "Z": None}
-        self._explore_preflight_sent = False
-        self._explore_preflight_started_at = 0.0
-        self._append_console("Explore limits started.", force=True)
-        self._update_machine_controls()
-
-    def _start_next_explore_axis(self):
-        if self._explore_retry_axis is not None:
-            self._explore_axis = self._explore_retry_axis
-            self._explore_retry_axis = None
-        else:
-            if not self._explore_axis_queue:
-                self._finish_explore()
-                return
-            self._explore_axis = self._explore_axis_queue.pop(0)
-        self._explore_distance = 0.0
-        self._explore_phase = "move"
-        self._explore_pending = False
-        self._explore_unlocked = False
-        self._explore_last_command_at = None
-        self._explore_recover_attempts = 0
-        self._explore_dir = self._axis_explore_dir(self._explore_axis)
-        self._explore_dir_override[self._explore_axis] = None
-        self._explore_ramp_remaining = 0.0
-        self._explore_ramp_feed = 0.0
-        self._explore_ramp_increment_current = 0.0
-        self._explore_ramp_max_feed_axis = 0.0
-        self._explore_ramp_last_step = 0.0
-        self._append_console(f"Exploring {self._explore_axis} axis...", force=True)
-
-    def _explore_tick(self):
-        if not self._explore_active:
-            return
-        if time.time() < self._explore_next_action:
-            return
-        status = self._sender.get_status() or {}
-        state = str(status.get("state", "")).lower()
-        if self._explore_phase == "preflight":
-            if not self._explore_preflight_sent:
-                self._explore_preflight_sent = True
-                self._explore_preflight_started_at = time.time()
-                self._limits_announced = False
-                self._append_console("Explore preflight: reading limits...", force=True)
-                self._send_command("$$", log=False)
-                self._explore_next_action = time.time() + 0.2
-                return
-            if self._limits_announced:
-                self._explore_phase = "move"
-                self._explore_next_action = time.time() + 0.2
-                self._start_next_explore_axis()
-                return
-            if time.time() - self._explore_preflight_started_at > 2.0:
-                self._append_console(
-                    "Explore preflight: limits not confirmed, continuing.",
-                    force=True,
-                )
-                self._explore_phase = "move"
-                self._explore_next_action = time.time() + 0.2
-                self._start_next_explore_axis()
-                return
-            return
-        if self._explore_phase == "wait_idle":
-            if state == "idle":
-                self._explore_next_action = time.time() + 0.2
-                self._start_next_explore_axis()
-            return
-        if self._explore_phase == "unlock":
-            if self._explore_unlocked:
-                self._explore_phase = "backoff"
-                self._explore_pending = False
-                return
-            if (
-                not self._explore_pending
-                or not self._explore_last_command_at
-                or time.time() - self._explore_last_command_at > 1.0
-            ):
-                self._explore_pending = True
-                self._explore_unlock_sent_at = time.time()
-                self._explore_last_command_at = time.time()
-                self._send_command("$X", log=False)
-            return
-        if self._explore_phase == "backoff":
-            axis = self._explore_axis
-            if not self._explore_pending:
-                direction = -self._explore_dir
-                distance = self._explore_backoff
-                self._explore_pending = True
-                self._explore_last_command_at = time.time()
-                self._send_command(f"G91 G21 G0 {axis}{direction * distance:.3f}", log=False)
-                return
-            if state == "idle":
-                self._explore_pending = False
-                self._explore_phase = "ramp"
-            return
-        if self._explore_phase == "ramp":
-            if self._explore_pending:
-                return
-            if self._explore_ramp_remaining <= 0.0:
-                self._explore_phase = "prehome_pull_off"
-                return
-            if state == "alarm":
-                return
-            axis = self._explore_axis
-            step = min(self._explore_step, self._explore_ramp_remaining)
-            direction = -self._explore_dir
-            feed = min(self._explore_ramp_feed, self._explore_ramp_max_feed_axis)
-            self._explore_ramp_feed = feed
-            self._explore_ramp_last_step = step
-            self._explore_pending = True
-            self._explore_last_command_at = time.time()
-            self._send_command(
-                f"G91 G21 G1 {axis}{direction * step:.3f} F{feed:.0f}",
-                log=False,
-            )
-            return
-        if self._explore_phase == "prehome_pull_off":
-            if self._explore_pending:
-                return
-            if state == "alarm":
-                return
-            axis = self._explore_axis
-            direction = self._explore_dir
-            distance = self._explore_prehome_pull_off
-            if distance <= 0:
-                self._explore_phase = "home"
-                return
-            self._explore_pending = True
-            self._explore_last_command_at = time.time()
-            self._send_command(
-                f"G91 G21 G0 {axis}{direction * distance:.3f}",
-                log=False,
-            )
-            return
-        if self._explore_phase == "home":
-            if self._explore_pending:
-                return
-            if state != "idle":
-                return
-            self._explore_pending = True
-            self._explore_last_command_at = time.time()
-            self._send_command("$H", log=False)
-            self._explore_phase = "wait_idle"
-            return
-        if self._explore_phase == "move":
-            if self._explore_pending:
-                return
-            if state == "alarm":
-                return
-            self._send_explore_step()
-
-    def _send_explore_step(self):
-        axis = self._explore_axis
-        step = self._explore_step
-        feed = self._explore_feed
-        self._explore_pending = True
-        self._explore_last_command_at = time.time()
-        self._send_command(f"G91 G21 G1 {axis}{self._explore_dir * step:.3f} F{feed:.0f}", log=False)
-
-    def _handle_explore_ok(self):
-        if self._explore_phase == "move":
-            self._explore_distance += self._explore_step
-            self._explore_pending = False
-            return
-        if self._explore_phase == "ramp":
-            self._explore_pending = False
-            self._explore_ramp_remaining = max(
-                0.0,
-                self._explore_ramp_remaining - self._explore_ramp_last_step,
-            )
-            if self._explore_ramp_feed < self._explore_ramp_max_feed_axis:
-                self._explore_ramp_feed = min(
-                    self._explore_ramp_max_feed_axis,
-                    self._explore_ramp_feed + self._explore_ramp_increment_current,
-                )
-            return
-        if self._explore_phase == "prehome_pull_off":
-            self._explore_pending = False
-            self._explore_phase = "home"
-            return
-
-    def _handle_explore_alarm(self, label):
-        if self._explore_phase not in ("move", "backoff", "ramp", "prehome_pull_off", "home", "unlock"):
-            return
-        if self._explore_phase != "move":
-            if "homing fail" in label.lower():
-                self._explore_recover_attempts += 1
-                if self._explore_recover_attempts <= 3:
-                    self._explore_backoff *= 1.5
-                    self._explore_unlocked = False
-                    self._explore_pending = False
-                    self._explore_phase = "unlock"
-                    self._explore_next_action = time.time() + 0.5
-                    self._append_console(
-                        "Homing failed. Increasing backoff and retrying unlock/home.",
-                        force=True,
-                    )
-                    return
-            self._append_console("Explore halted due to alarm during recovery.", force=True)
-            self._explore_active = False
-            self._explore_phase = None
-            self._update_machine_controls()
-            return
-        axis = self._explore_axis
-        measured = max(0.0, self._explore_distance - self._explore_margin)
-        if axis in self._explore_retry_measurements:
-            previous = self._explore_retry_measurements.pop(axis)
-            measured = max(previous, measured)
-        elif self._should_retry_explore_axis(axis, measured):
-            self._explore_retry_axes.add(axis)
-            self._explore_retry_measurements[axis] = measured
-            self._explore_retry_axis = axis
-            self._explore_dir_override[axis] = -self._explore_dir
+        self._start_procedure(explore, self._finish_explore)
+
+    def _finish_explore(self, explore):
+        for axis, measured in explore.results.items():
+            self._explore_results[axis] = measured
+            self._limits[axis] = measured
+            trigger = explore.triggers.get(axis)
+            detail = f" (switch at {trigger:.3f})" if trigger is not None else ""
             self._append_console(
-                f"Explore: {axis} alarm too early; retrying opposite direction.",
+                f"Explore: {axis} travel {measured:.3f} mm{detail}.",
                 force=True,
             )
-            self._explore_phase = "unlock"
-            self._explore_unlocked = False
-            self._explore_pending = False
-            self._explore_next_action = time.time() + 0.5
-            return
-        self._explore_results[axis] = measured
-        self._limits[axis] = measured
         self._update_limit_labels()
-        axis_max_feed = self._axis_max_feed.get(axis)
-        if axis_max_feed is None or axis_max_feed <= 0:
-            axis_max_feed = self._explore_feed
-            self._append_console(
-                "Explore ramp: max feed unknown; using test feed.",
-                force=True,
-            )
-        if self._explore_feed > axis_max_feed:
-            self._append_console(
-                f"Explore ramp: test feed capped to {axis_max_feed:.0f} mm/min.",
-                force=True,
-            )
-        self._explore_ramp_max_feed_axis = axis_max_feed
-        self._explore_ramp_feed = min(self._explore_feed, axis_max_feed)
-        self._explore_ramp_last_step = 0.0
-        self._explore_ramp_remaining = max(
-            0.0,
-            measured - self._explore_backoff - self._explore_prehome_pull_off,
-        )
-        if self._explore_ramp_remaining > 0.0 and self._explore_step > 0:
-            steps_available = max(1, int(self._explore_ramp_remaining / self._explore_step))
-            ramp_delta = self._explore_ramp_max_feed_axis - self._explore_ramp_feed
-            self._explore_ramp_increment_current = max(0.0, ramp_delta / steps_available)
+        if explore.error:
+            self._append_console("Explore limits halted.", force=True)
         else:
-            self._explore_ramp_increment_current = 0.0
-        self._append_console(
-            f"Explore: {axis} limit hit. Stored {measured:.3f} mm "
-            f"(margin {self._explore_margin:.2f}).",
-            force=True,
-        )
-        self._explore_phase = "unlock"
-        self._explore_unlocked = False
-        self._explore_pending = False
-        self._explore_next_action = time.time() + 0.5
-
-    def _finish_explore(self):
-        self._explore_active = False
-        self._explore_phase = None
-        self._explore_axis = None
-        self._explore_pending = False
-        self._append_console("Explore limits complete.", force=True)
-        self._update_machine_controls()
+            self._append_console("Explore limits complete.", force=True)
         self._prompt_apply_limits()
         self._send_unlock_home_after_explore()
 
@@ -3318,10 +3378,33 @@ class RouterKingDockWidget(QtWidgets.QWidget):
             return
         try:
             with open(path, "r", encoding="utf-8", errors="replace") as handle:
-                self._gcode_edit.setPlainText(handle.read())
+                text = handle.read()
+            self._gcode_edit.setPlainText(text)
             self._last_gcode_path = path
             self._append_console(f"Loaded G-code: {path}")
-            self._update_preview()
+            # ParseWorkers: 1 (default) = parse in this process, 0 = one
+            # worker per core. Workers need a real Python: inside FreeCAD
+            # sys.executable would start FreeCAD instead.
+            workers = _PREFS.GetInt("ParseWorkers", 1)
+            python = python_interpreter() if workers != 1 else None
+            if python is None:
+                workers = 1
+
+            def parse(source, arc_tolerance):
+                return parse_program_parallel(
+                    source,
+                    workers=workers or None,
+                    arc_tolerance=arc_tolerance,
+                    python_executable=python,
+                )
+
+            # ParseCacheMB: size of the parsed-toolpath cache, 0 = off.
+            cache = ParseCache(max_bytes=_PREFS.GetInt("ParseCacheMB", 512) * 1024 * 1024)
+            # The load parse (or cache hit) carries the toolpath and
+            # checkpoints, so the preview parser takes it over and neither
+            # Preview nor the CAM check parses the file again.
+            program = parse_cached(path, parse, cache)
+            self._show_preview(self._preview_parser.seed(text, program))
         except Exception as exc:
             self._append_console(f"Load failed: {exc}")
 
@@ -3343,13 +3426,21 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         if not self._sender.is_connected():
             self._append_console("Start failed: not connected.")
             return
+        if self._procedure is not None:
+            self._append_console(f"Start failed: {self._procedure.name} running.")
+            return
         lines = list(iter_gcode_lines(self._gcode_edit.toPlainText()))
         if not lines:
             self._append_console("Start failed: G-code is empty.")
             return
+        if self._height_map is not None and self._autolevel_enabled.isChecked():
+            # Streamed straight into the sender's queue, not copied first.
+            lines = autolevel_lines(lines, self._height_map)
+            self._append_console("Autolevel applied to job.")
         try:
             self._sender.start_stream(lines)
-            self._append_console(f"Streaming {len(lines)} lines.")
+            total = self._sender.get_progress().get("total", 0)
+            self._append_console(f"Streaming {total} lines.")
         except Exception as exc:
             self._append_console(f"Start failed: {exc}")
         self._update_job_controls()
@@ -3372,6 +3463,120 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         self._append_console("Job stopped.")
         self._update_job_controls()
 
+    def _queue_lines(self, editor):
+        return [line.strip() for line in editor.toPlainText().splitlines() if line.strip()]
+
+    def _selected_queue_job(self):
+        item = self._queue_list.currentItem()
+        if item is None:
+            return None
+        return item.data(QtCore.Qt.UserRole)
+
+    def _refresh_queue_list(self):
+        self._queue_dirty = False
+        selected = self._selected_queue_job()
+        self._queue_list.clear()
+        for job in self._job_queue.jobs:
+            text = f"{job.name} - {job.status}"
+            if job.duration:
+                text += f" ({job.duration:.0f} s)"
+            if job.error:
+                text += f": {job.error}"
+            item = QtWidgets.QListWidgetItem(text)
+            item.setData(QtCore.Qt.UserRole, job.id)
+            item.setToolTip(job.path)
+            self._queue_list.addItem(item)
+            if job.id == selected:
+                self._queue_list.setCurrentItem(item)
+        pending = sum(1 for job in self._job_queue.jobs if job.status == "pending")
+        if isinstance(self._procedure, JobQueueRunner):
+            current = self._procedure.current
+            name = current.name if current is not None else "-"
+            self._queue_status.setText(f"Queue: running {name}, {pending} pending")
+        else:
+            self._queue_status.setText(f"Queue: {pending} pending")
+
+    def _on_queue_add(self):
+        filters = "G-code (*.nc *.gcode *.tap *.txt *.rkjob);;All Files (*)"
+        start_dir = self._last_gcode_path or ""
+        paths, _ = QtWidgets.QFileDialog.getOpenFileNames(self, "Queue G-code", start_dir, filters)
+        if not paths:
+            return
+        preamble = self._queue_lines(self._queue_preamble)
+        postamble = self._queue_lines(self._queue_postamble)
+        try:
+            _PREFS.SetString("QueuePreamble", "\n".join(preamble))
+            _PREFS.SetString("QueuePostamble", "\n".join(postamble))
+        except Exception:
+            pass
+        for path in paths:
+            self._job_queue.add(path, preamble=preamble, postamble=postamble)
+        self._append_console(f"Queued {len(paths)} job(s).")
+        self._refresh_queue_list()
+
+    def _on_queue_remove(self):
+        job_id = self._selected_queue_job()
+        if job_id and not self._job_queue.remove(job_id):
+            self._append_console("Queue: cannot remove a running job.")
+        self._refresh_queue_list()
+
+    def _on_queue_move(self, offset):
+        job_id = self._selected_queue_job()
+        if job_id:
+            self._job_queue.move(job_id, offset)
+        self._refresh_queue_list()
+
+    def _on_queue_requeue(self):
+        job_id = self._selected_queue_job()
+        if job_id:
+            self._job_queue.reset(job_id)
+        self._refresh_queue_list()
+
+    def _on_queue_clear_done(self):
+        self._job_queue.clear_finished()
+        self._refresh_queue_list()
+
+    def _on_queue_run(self):
+        if isinstance(self._procedure, JobQueueRunner):
+            self._procedure.cancel()
+            self._append_console("Queue stopping...", force=True)
+            return
+        if not self._sender.is_connected():
+            self._append_console("Queue failed: not connected.")
+            return
+        if self._sender.is_streaming() or self._procedure is not None:
+            self._append_console("Queue failed: sender busy.")
+            return
+        if self._job_queue.next_pending() is None:
+            self._append_console("Queue: no pending jobs.")
+            return
+        line_filter = None
+        if self._height_map is not None and self._autolevel_enabled.isChecked():
+            height_map = self._height_map
+
+            def line_filter(lines):
+                return autolevel_lines(lines, height_map)
+
+            self._append_console("Autolevel applied to queued jobs.")
+        runner = JobQueueRunner(
+            self._sender,
+            self._job_queue,
+            line_filter=line_filter,
+            on_job=self._on_queue_job_changed,
+        )
+        self._start_procedure(runner, self._on_queue_finished)
+        self._queue_run_btn.setText("Stop Queue")
+
+    def _on_queue_job_changed(self, job):
+        # Called from the runner thread; the list refreshes on the next drain.
+        self._procedure_lines.put(f"[queue] {job.name}: {job.status}")
+        self._queue_dirty = True
+
+    def _on_queue_finished(self, runner):
+        self._queue_run_btn.setText("Run Queue")
+        self._append_console(f"Queue: {len(runner.completed)} job(s) completed.", force=True)
+        self._refresh_queue_list()
+
     def _update_job_controls(self):
         progress = self._sender.get_progress()
         total = progress.get("total", 0)
@@ -3384,7 +3589,9 @@ class RouterKingDockWidget(QtWidgets.QWidget):
 
         streaming = progress.get("streaming")
         paused = progress.get("paused")
-        self._start_btn.setEnabled(self._sender.is_connected() and not streaming)
+        self._start_btn.setEnabled(
+            self._sender.is_connected() and not streaming and self._procedure is None
+        )
         self._pause_btn.setEnabled(streaming)
         self._stop_btn.setEnabled(streaming)
         self._pause_btn.setText("Resume" if paused else "Pause")
@@ -3397,11 +3604,15 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         has_limits = self._limits.get("X") is not None and self._limits.get("Y") is not None
         self._read_limits_btn.setEnabled(connected and not streaming)
         self._travel_test_btn.setEnabled(connected and not streaming and has_limits and not alarm_active)
-        self._explore_limits_btn.setEnabled(connected and not streaming)
-        explore_action_enabled = connected and not streaming and not self._explore_active
+        self._explore_limits_btn.setEnabled(connected and (self._explore_running() or not streaming))
+        explore_action_enabled = connected and not streaming and self._procedure is None
         self._explore_z_btn.setEnabled(explore_action_enabled)
         self._z_speed_test_btn.setEnabled(explore_action_enabled)
-        if self._explore_active:
+        self._probe_grid_btn.setEnabled(explore_action_enabled)
+        dynamics_running = isinstance(self._procedure, CharacterizeDynamics)
+        self._dynamics_btn.setEnabled(explore_action_enabled or dynamics_running)
+        self._dynamics_btn.setText("Stop Characterize" if dynamics_running else "Characterize Dynamics")
+        if self._explore_running():
             self._explore_limits_btn.setText("Stop Explore")
             self._read_limits_btn.setEnabled(False)
             self._travel_test_btn.setEnabled(False)
@@ -3409,9 +3620,6 @@ class RouterKingDockWidget(QtWidgets.QWidget):
             self._explore_limits_btn.setText("Explore Limits")
 
     def _axis_explore_dir(self, axis):
-        override = self._explore_dir_override.get(axis)
-        if override is not None:
-            return override
         if axis == "Z":
             choice = self._explore_z_dir.currentText()
             if choice == "+":
@@ -3422,36 +3630,80 @@ class RouterKingDockWidget(QtWidgets.QWidget):
         homing_positive = bool(self._homing_dir_mask & (1 << bit))
         return -1.0 if homing_positive else 1.0
 
-    def _expected_explore_limit(self, axis):
-        if not self._explore_known_limits:
-            return None
-        value = self._explore_known_limits.get(axis)
-        if value is None:
-            return None
-        try:
-            value = float(value)
-        except (TypeError, ValueError):
-            return None
-        return value if value > 0 else None
-
-    def _should_retry_explore_axis(self, axis, measured):
-        if axis in self._explore_retry_axes:
-            return False
-        expected = self._expected_explore_limit(axis)
-        if expected is not None:
-            return measured < expected * 0.8
-        return measured < self._explore_step * 2.0
-
     def _update_preview(self):
-        text = self._gcode_edit.toPlainText()
-        path = parse_gcode(text)
+        # Only the edited range (from the nearest checkpoint) is re-parsed.
+        self._show_preview(self._preview_parser.update(self._gcode_edit.toPlainText()))
+
+    def _show_preview(self, path):
+        self._preview_scene.clear()
+        self._preview_path = path
+        self._preview_lod = None
+        if not len(path):
+            return
+        min_x, min_y, max_x, max_y = path.bounds()
+        bounds = QtCore.QRectF(min_x, -max_y, max_x - min_x, max_y - min_y)
+        self._preview_scene.setSceneRect(bounds)
+        self._preview_view.fitInView(bounds, QtCore.Qt.KeepAspectRatio)
+        self._render_preview()
+
+    def _render_preview(self):
+        path = self._preview_path
+        if path is None or not len(path):
+            return
+        if len(path) <= _PREVIEW_CULL_SEGMENTS:
+            if not self._preview_scene.items():
+                self._draw_segments(path, range(len(path)))
+            return
+        if self._preview_lod is None:
+            self._preview_lod = LodPyramid(path)
+        # One screen pixel of error is invisible; draw the coarsest level
+        # within it, so the work follows the pixels on screen.
+        level = self._preview_lod.level_for(pixel_tolerance(self._preview_view.transform().m11()))
+        view = self._preview_view.mapToScene(self._preview_view.viewport().rect()).boundingRect()
         self._preview_scene.clear()
-        if not path.segments:
-            return
-        for x0, y0, x1, y1, rapid in path.segments:
-            color = QtGui.QColor(150, 150, 150) if rapid else QtGui.QColor(0, 120, 255)
-            pen = QtGui.QPen(color, 0)
-            self._preview_scene.addLine(x0, -y0, x1, -y1, pen)
-        bounds = self._preview_scene.itemsBoundingRect()
-        if not bounds.isNull():
-            self._preview_view.fitInView(bounds, QtCore.Qt.KeepAspectRatio)
+        # Scene Y is flipped against machine Y.
+        visible = level.visible(view.left(), -view.bottom(), view.right(), -view.top())
+        self._draw_segments(level.path, visible)
+
+    def _draw_segments(self, path, indices):
+        rapid_pen = QtGui.QPen(QtGui.QColor(150, 150, 150), 0)
+        cut_pen = QtGui.QPen(QtGui.QColor(0, 120, 255), 0)
+        for index in indices:
+            x0, y0, x1, y1, rapid = path.segment(index)
+            self._preview_scene.addLine(x0, -y0, x1, -y1, rapid_pen if rapid else cut_pen)
+
+    def _schedule_preview_render(self, *_args):
+        if self._preview_path is not None and len(self._preview_path) > _PREVIEW_CULL_SEGMENTS:
+            self._preview_render_timer.start()
+
+    def eventFilter(self, watched, event):
+        if watched is self._preview_view.viewport():
+            if event.type() == QtCore.QEvent.Wheel:
+                factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+                self._preview_view.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+                self._preview_view.scale(factor, factor)
+                self._schedule_preview_render()
+                return True
+            if event.type() == QtCore.QEvent.MouseButtonPress and event.button() == QtCore.Qt.LeftButton:
+                self._on_preview_clicked(event.pos())
+        return super().eventFilter(watched, event)
+
+    def _on_preview_clicked(self, pos):
+        """Jump the editor to the G-code line drawn under the cursor."""
+        path = self._preview_path
+        if path is None or not len(path):
+            return
+        if self._preview_lod is None:
+            self._preview_lod = LodPyramid(path)
+        point = self._preview_view.mapToScene(pos)
+        scale = self._preview_view.transform().m11() or 1.0
+        # Pick against the full-detail path.
+        line = self._preview_lod.levels[0].index.line_at(point.x(), -point.y(), _PREVIEW_PICK_PIXELS / abs(scale))
+        if line is None:
+            return
+        block = self._gcode_edit.document().findBlockByNumber(line - 1)
+        if not block.isValid():
+            return
+        self._gcode_edit.setTextCursor(QtGui.QTextCursor(block))
+        self._gcode_edit.centerCursor()
+        self._gcode_edit.setFocus()
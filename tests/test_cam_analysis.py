@@ -1,6 +1,7 @@
 import unittest
 
-from RouterKing.ai.cam_analysis import analyze_gcode
+from RouterKing.ai.cam_analysis import analyze_gcode, analyze_toolpath
+from RouterKing.gcode.parser import IncrementalParser
 
 
 class TestCamAnalysis(unittest.TestCase):
@@ -19,6 +20,34 @@ class TestCamAnalysis(unittest.TestCase):
         self.assertTrue(any("radius" in message for message in messages))
         self.assertTrue(any("rapid move" in message for message in messages))
 
+    def test_analysis_reuses_the_preview_toolpath(self):
+        text = "G21\nG0 Z5\nG0 X5 Y5\nG1 Z-4 F100\nG3 X6 Y6 R0.3\nG0 X0 Y0"
+        incremental = IncrementalParser()
+        incremental.update(text)
+        config = {"cam": {"tool_radius": 1.0}}
+        shared = analyze_toolpath(incremental.toolpath, config)
+        direct = analyze_gcode(text, config)
+        self.assertEqual(shared.stats, direct.stats)
+        self.assertEqual(shared.stats["lines"], 6)
+        self.assertEqual(shared.stats["min_z"], -4.0)
+        self.assertEqual(
+            sorted(issue.feedback_key for issue in shared.issues),
+            ["cam.arc_radius", "cam.overcut", "cam.plunge_depth", "cam.rapid_low_z"],
+        )
+        # Z never sits at the origin unless a block leaves it there.
+        for text, min_z in (
+            ("G0 Z5\nG0 X5 Y5\nG1 Z1 F100\nG1 X10", 1.0),
+            ("G0 Z5\nG0 X10 Y10 Z5", 5.0),
+            ("(setup)\nG0 Z5\nG0 X10", 5.0),
+            ("G21\nG0 Z5\nG0 X10", 0.0),
+            ("G21 G90", 0.0),
+        ):
+            incremental = IncrementalParser()
+            incremental.update(text)
+            shared = analyze_toolpath(incremental.toolpath, config)
+            self.assertEqual(shared.stats["min_z"], min_z, text)
+            self.assertEqual(shared.stats, analyze_gcode(text, config).stats)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,104 @@
+import math
+import unittest
+
+from RouterKing.cam.simple_engine import SimpleJobSettings, generate_gcode_from_paths
+from RouterKing.gcode.arcfit import fit_arcs, fit_arcs_gcode
+from RouterKing.gcode.modal import ModalState
+
+
+def _chords(first, second, radius=10.0, sweep=math.pi, count=90, start=0.0, clockwise=False):
+    lines = []
+    sign = -1.0 if clockwise else 1.0
+    for step in range(1, count + 1):
+        angle = start + sign * sweep * step / count
+        lines.append(f"G1 {first}{radius * math.cos(angle):.4f} {second}{radius * math.sin(angle):.4f}")
+    return lines
+
+
+def _replay(lines):
+    state = ModalState()
+    moves = [state.update(line) for line in lines]
+    return state, [move for move in moves if move is not None]
+
+
+class TestArcFit(unittest.TestCase):
+    def test_chords_of_a_semicircle_become_one_arc(self):
+        lines = ["G21 G90 G17", "G0 X10 Y0", "G1 Z-1 F300", "G1 F800"] + _chords("X", "Y") + ["X-20", "G0 Z5"]
+        result = fit_arcs(lines)
+        self.assertEqual(result.arcs, 1)
+        self.assertEqual(result.replaced, 90)
+        self.assertEqual(result.lines[4], "G3 X-10 Y0 I-10 J0")
+        # The line after the arc restates the original motion.
+        self.assertEqual(result.lines[5:], ["G1 X-20", "G0 Z5"])
+        self.assertEqual(list(result.source_lines), [1, 2, 3, 4, 5, 95, 96])
+        original, _ = _replay(lines)
+        fitted, _ = _replay(result.lines)
+        self.assertEqual(fitted.position(), original.position())
+
+    def test_vertices_stay_within_tolerance(self):
+        # A slightly elliptical curve: several arcs, none off by more than 0.01.
+        lines = ["G21 G90", "G0 X10 Y0", "G1 F500"]
+        for step in range(1, 181):
+            angle = math.pi * step / 180
+            lines.append(f"G1 X{10 * math.cos(angle):.4f} Y{10.3 * math.sin(angle):.4f}")
+        result = fit_arcs(lines, tolerance=0.01)
+        self.assertGreater(result.arcs, 1)
+        self.assertLess(len(result), len(lines) / 5)
+        state = ModalState()
+        ends = {}
+        for number, line in enumerate(lines, 1):
+            state.update(line)
+            ends[number] = state.position()
+        state = ModalState()
+        # Each arc replaces the source lines up to the next output line.
+        for index, line in enumerate(result.lines):
+            move = state.update(line)
+            if move is None or move.arc is None:
+                continue
+            first = result.source_line(index)
+            last = result.source_line(index + 1) if index + 1 < len(result) else len(lines) + 1
+            for number in range(first, last):
+                x, y, _ = ends[number]
+                self.assertLessEqual(abs(math.hypot(x - move.arc[3], y - move.arc[4]) - move.arc[5]), 0.01)
+
+    def test_clockwise_arcs_in_the_xz_plane(self):
+        lines = ["G21 G90 G18", "G0 Y5", "G0 X10 Z0", "G1 F300"] + _chords("X", "Z", clockwise=True, count=40)
+        result = fit_arcs(lines)
+        self.assertEqual(result.arcs, 1)
+        # G18 arcs are Z-first: clockwise seen from +Y is counter-clockwise in (Z, X).
+        arc = result.lines[-1]
+        self.assertIn(" I-10", arc)
+        self.assertIn(" K0", arc)
+        _, moves = _replay(result.lines)
+        self.assertAlmostEqual(moves[-1].length, 10 * math.pi, places=3)
+        self.assertEqual(moves[-1].end[1], 5.0)
+
+    def test_relative_mode_and_lines_that_do_not_fit(self):
+        absolute = ["G0 X10 Y0", "G1 F600"] + _chords("X", "Y", sweep=math.pi / 2, count=30)
+        _, moves = _replay(absolute)
+        steps = [(move.end[0] - move.start[0], move.end[1] - move.start[1]) for move in moves[1:]]
+        relative = ["G21 G91", "G0 X10"] + [f"G1 X{dx:.6f} Y{dy:.6f}" for dx, dy in steps]
+        relative += ["G1 X1 Y1", "X1 Y-1", "X1 Y1"]
+        result = fit_arcs(relative)
+        self.assertEqual(result.arcs, 1)
+        self.assertTrue(result.lines[2].startswith("G3 X-10 Y10 I"), result.lines[2])
+        arc = _replay(result.lines)[1][1].arc
+        self.assertAlmostEqual(math.hypot(arc[3], arc[4]), 0.0, delta=0.001)
+        self.assertEqual(result.lines[3:], ["G1 X1 Y1", "X1 Y-1", "X1 Y1"])
+        self.assertEqual(_replay(result.lines)[0].position(), _replay(relative)[0].position())
+
+    def test_straight_runs_and_plunges_are_left_alone(self):
+        text = "G21 G90\nG1 X1 F100\nG1 X2\nG1 X3\nG1 X4\nG1 X5\nG1 X6 Z-1\nG1 X7 Z-2\n"
+        self.assertEqual(fit_arcs_gcode(text).lines, text.splitlines())
+
+    def test_simple_engine_fits_arcs_when_asked(self):
+        circle = [(10 * math.cos(math.tau * step / 200), 10 * math.sin(math.tau * step / 200)) for step in range(201)]
+        plain = generate_gcode_from_paths([circle], SimpleJobSettings(pass_depth=0.0))
+        fitted = generate_gcode_from_paths([circle], SimpleJobSettings(pass_depth=0.0, arc_tolerance=0.01))
+        self.assertGreater(len(plain.splitlines()), 200)
+        self.assertLess(len(fitted.splitlines()), 20)
+        self.assertIn("G3 ", fitted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import time
+import unittest
+
+from RouterKing.gcode.bundle import BundleError, JobBundle, compile_bundle, is_bundle
+from RouterKing.gcode.modal import ModalState
+from RouterKing.gcode.parser import iter_gcode_lines
+from RouterKing.grbl.sender import GrblSender
+
+PROGRAM = """(header comment)
+G21 G90 G17
+G0 Z5
+M3 S12000
+G0 X0 Y0
+G1 Z-1 F300 ; plunge
+G1 X10 F600
+G2 X20 Y0 I5 J0
+
+G1 Y10
+G0 Z5
+M5
+"""
+
+
+class BundleTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = self._tmp.name
+        self.source = os.path.join(self.tmpdir, "job.nc")
+        with open(self.source, "w", encoding="utf-8") as handle:
+            handle.write(PROGRAM)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+
+class TestJobBundle(BundleTestCase):
+    def test_bundle_matches_sanitized_lines(self):
+        path = compile_bundle(self.source, checkpoint_interval=3)
+        self.assertEqual(path, os.path.join(self.tmpdir, "job.rkjob"))
+        self.assertTrue(is_bundle(path))
+        self.assertFalse(is_bundle(self.source))
+        with JobBundle(path) as bundle:
+            expected = list(iter_gcode_lines(PROGRAM))
+            self.assertEqual(len(bundle), len(expected))
+            self.assertEqual(list(bundle.iter_lines()), expected)
+            self.assertEqual(bundle.line(4), "G1 Z-1 F300")
+            self.assertEqual(bundle.source_line(4), 6)
+            self.assertEqual(bundle.find_line(9), 7)
+            self.assertEqual(list(bundle.iter_lines(8)), ["G0 Z5", "M5"])
+            self.assertEqual(bundle.bounds, (0.0, 0.0, -1.0, 20.0, 10.0, 5.0))
+            self.assertGreater(bundle.estimated_time, 60.0 * (10 + 5 * 3.14159 + 10) / 600)
+
+    def test_modal_checkpoints_match_a_full_replay(self):
+        path = compile_bundle(self.source, checkpoint_interval=2)
+        with JobBundle(path) as bundle:
+            lines = list(bundle.iter_lines())
+            for index in range(len(bundle) + 1):
+                state = ModalState()
+                for line in lines[:index]:
+                    state.update(line)
+                self.assertEqual(bundle.modal_at(index), state, index)
+
+    def test_time_marks_give_elapsed_and_remaining_time(self):
+        path = compile_bundle(self.source, checkpoint_interval=4, limits={110: 6000.0, 111: 6000.0})
+        with JobBundle(path) as bundle:
+            self.assertEqual(bundle.metadata["limits"]["max_rate"][:2], [6000.0, 6000.0])
+            self.assertEqual(len(bundle.metadata["time_marks"]), len(bundle.metadata["checkpoints"]))
+            times = [bundle.elapsed_time(index) for index in range(len(bundle) + 1)]
+            self.assertEqual(times[0], 0.0)
+            self.assertEqual(times, sorted(times))
+            self.assertAlmostEqual(times[-1], bundle.estimated_time)
+            self.assertAlmostEqual(bundle.remaining_time(4), bundle.estimated_time - times[4])
+
+    def test_resume_lines_restore_state_and_position(self):
+        path = compile_bundle(self.source)
+        with JobBundle(path) as bundle:
+            lines = bundle.resume_lines(bundle.find_line(10))
+        self.assertEqual(
+            lines,
+            [
+                "G21 G90 G17 G94 G54",
+                "M3 S12000",
+                "G0 Z5",
+                "G0 X20 Y0",
+                "G1 Z-1 F600",
+                "G21 G90 G94",
+                "F600",
+            ],
+        )
+
+    def test_inch_program_converts_resume_moves(self):
+        with open(self.source, "w", encoding="utf-8") as handle:
+            handle.write("G20 G91\nG0 Z1\nG1 X1 F10\nG1 X1\n")
+        path = compile_bundle(self.source)
+        with JobBundle(path) as bundle:
+            state = bundle.modal_at(3)
+            lines = bundle.resume_lines(3)
+        self.assertAlmostEqual(state.x, 25.4)
+        self.assertAlmostEqual(state.feed, 254.0)
+        self.assertIn("G0 X25.4 Y0", lines)
+        self.assertEqual(lines[-3:], ["G20 G91 G94", "F10", "G1"])
+
+    def test_resume_inside_modal_arc_run_is_rejected(self):
+        with open(self.source, "w", encoding="utf-8") as handle:
+            handle.write("G21 G90\nG0 X10 Y0\nG1 Z-1 F300\nG2 X0 Y10 I-10 J0\nX-10 Y0 I0 J-10\nG3 X0 Y-10 I10 J0\n")
+        path = compile_bundle(self.source)
+        with JobBundle(path) as bundle:
+            with self.assertRaises(ValueError):
+                bundle.resume_lines(4)
+            # Lines that state their own arc word resume fine.
+            self.assertEqual(bundle.resume_lines(3)[-1], "G1")
+            self.assertEqual(bundle.resume_lines(5)[-1], "F300")
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(BundleError):
+            JobBundle(self.source)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "job.rkjob.tmp")))
+
+
+class TestSenderBundle(BundleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sender = GrblSender()
+        self.sender.connect("sim://")
+        self.simulator = self.sender._serial.simulator
+
+    def tearDown(self):
+        self.sender.disconnect()
+        super().tearDown()
+
+    def _wait(self):
+        deadline = time.monotonic() + 5.0
+        while self.sender.is_streaming() and time.monotonic() < deadline:
+            self.sender.poll()
+            time.sleep(0.002)
+        self.assertFalse(self.sender.is_streaming())
+
+    def test_streams_bundle_from_path(self):
+        path = compile_bundle(self.source)
+        self.sender.start_bundle(path)
+        self._wait()
+        expected = list(iter_gcode_lines(PROGRAM))
+        self.assertEqual(self.simulator.received[-len(expected):], expected)
+        progress = self.sender.get_progress()
+        self.assertEqual((progress["acked"], progress["total"], progress["offset"]), (10, 10, 0))
+
+    def test_resume_sends_preamble_then_remaining_lines(self):
+        path = compile_bundle(self.source)
+        with JobBundle(path) as bundle:
+            start = bundle.find_line(10)
+            preamble = bundle.resume_lines(start)
+            self.sender.start_bundle(bundle, start, preamble)
+            self._wait()
+        self.assertEqual(
+            self.simulator.received[-len(preamble) - 3 :],
+            preamble + ["G1 Y10", "G0 Z5", "M5"],
+        )
+        progress = self.sender.get_progress()
+        self.assertEqual(progress["offset"] + progress["acked"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
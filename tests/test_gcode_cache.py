@@ -0,0 +1,115 @@
+import os
+import tempfile
+import time
+import unittest
+
+from RouterKing.gcode.cache import ParseCache, parse_cached
+from RouterKing.gcode.parser import IncrementalParser, parse_gcode_file, parse_program_file
+
+PROGRAM = "G21 G90\nG0 X0 Y0\nG1 X10 F300\nG2 X20 Y0 I5 J0\nG0 X0 Y5\n"
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = self._tmp.name
+        self.cache = ParseCache(os.path.join(self.tmpdir, "cache"))
+        self.source = self._write("job.nc", PROGRAM)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        return path
+
+    def test_round_trip_keeps_segments_lines_and_bounds(self):
+        parsed = parse_gcode_file(self.source)
+        self.assertIsNone(self.cache.load(self.source))
+        self.cache.store(self.source, parsed)
+        entry = self.cache.load(self.source)
+        self.assertEqual(entry.path.segments, parsed.segments)
+        self.assertEqual(
+            [entry.path.source_line(index) for index in range(len(parsed))],
+            [parsed.source_line(index) for index in range(len(parsed))],
+        )
+        self.assertEqual(entry.bounds, parsed.bounds())
+        self.assertEqual(entry.stats["segments"], len(parsed))
+        self.assertEqual(entry.stats["rapids"], 1)
+        self.assertEqual(entry.stats["lines"], 5)
+        # Other tolerances are separate entries.
+        self.assertIsNone(self.cache.load(self.source, arc_tolerance=0.1))
+
+    def test_program_round_trip_keeps_toolpath_and_checkpoints(self):
+        self._write("job.nc", PROGRAM * 40)
+        parsed = parse_program_file(self.source, checkpoint_interval=30)
+        self.cache.store(self.source, parsed)
+        program = parse_cached(self.source, lambda *args, **kwargs: self.fail("parsed again"), self.cache)
+        self.assertEqual(program.path.segments, parsed.path.segments)
+        self.assertEqual(list(program.toolpath), list(parsed.toolpath))
+        self.assertEqual(program.toolpath.blocks, parsed.toolpath.blocks)
+        self.assertEqual(program.toolpath.first_block, 1)
+        self.assertEqual(program.checkpoints, parsed.checkpoints)
+        self.assertEqual(program.lines, 200)
+        # A hit seeds the preview parser without parsing anything.
+        incremental = IncrementalParser()
+        incremental.seed(PROGRAM * 40, program)
+        self.assertEqual(incremental.reparsed, 0)
+        self.assertIs(incremental.toolpath, program.toolpath)
+
+    def test_parse_cached_parses_once_until_the_file_changes(self):
+        calls = []
+
+        def parse(source, arc_tolerance):
+            calls.append(source)
+            return parse_gcode_file(source, arc_tolerance)
+
+        first = parse_cached(self.source, parse, self.cache)
+        second = parse_cached(self.source, parse, self.cache)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first.segments, second.segments)
+        self._write("job.nc", PROGRAM + "G1 Y20\n")
+        self.assertEqual(len(parse_cached(self.source, parse, self.cache)), len(first) + 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_corrupt_entries_are_misses(self):
+        self.cache.store(self.source, parse_gcode_file(self.source))
+        with open(self.cache.entry_path(self.cache.key(self.source)), "r+b") as handle:
+            handle.truncate(40)
+        self.assertIsNone(self.cache.load(self.source))
+
+    def test_disabled_cache_neither_loads_nor_stores(self):
+        calls = []
+
+        def parse(source, arc_tolerance):
+            calls.append(source)
+            return parse_gcode_file(source, arc_tolerance)
+
+        parse_cached(self.source, parse, self.cache)
+        self.cache.max_bytes = 0
+        self.assertIsNone(self.cache.load(self.source))
+        parse_cached(self.source, parse, self.cache)
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(self.cache.store(self._write("other.nc", PROGRAM), parse_gcode_file(self.source)))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        sources = [self._write(f"job{index}.nc", PROGRAM * (index + 1)) for index in range(3)]
+        for source in sources:
+            self.cache.store(source, parse_gcode_file(source))
+        sizes = [os.path.getsize(self.cache.entry_path(self.cache.key(source))) for source in sources]
+        past = time.time() - 100
+        for age, source in enumerate(sources):
+            os.utime(self.cache.entry_path(self.cache.key(source)), (past + age, past + age))
+        # Using the oldest entry makes the second one the least recently used.
+        self.assertIsNotNone(self.cache.load(sources[0]))
+        self.cache.max_bytes = sizes[0] + sizes[2]
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.load(sources[0]))
+        self.assertIsNone(self.cache.load(sources[1]))
+        self.assertIsNotNone(self.cache.load(sources[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import math
+import unittest
+
+from RouterKing.gcode.compact import Compactor, compact_gcode, compact_lines
+from RouterKing.gcode.modal import ModalState
+
+PROGRAM = """%
+(Job: pocket)
+N10 G21 G90 G17
+N20 G0 Z5.000000
+N30 G0 X10.123456 Y20.000000
+G1 Z-1.0000 F300.0
+G1 X20.0000 Y20.0000 F300.0
+G1 X20.0000 Y30.0004 F300.0
+
+G2 X30.0000 Y30.0000 I5.0000 J0.0000
+G2 X20.0000 Y30.0000 I-5.0000 J0.0000
+G0 Z5.000000
+M30
+"""
+
+
+def _moves(lines):
+    state = ModalState()
+    moves = []
+    for line in lines:
+        move = state.update(line)
+        if move is not None and move.length:
+            moves.append(move)
+    return moves
+
+
+class TestCompactor(unittest.TestCase):
+    def test_drops_repeats_comments_and_digits(self):
+        program = compact_gcode(PROGRAM)
+        self.assertEqual(
+            program.lines,
+            [
+                "G21G90G17",
+                "G0Z5",
+                "X10.123Y20",
+                "G1Z-1F300",
+                "X20",
+                "Y30",
+                "G2X30Y30I5",
+                "G2X20Y30I-5",
+                "G0Z5",
+                "M30",
+            ],
+        )
+        self.assertEqual(list(program.source_lines), [3, 4, 5, 6, 7, 8, 10, 11, 12, 13])
+        self.assertLess(program.bytes, program.source_bytes / 2)
+
+    def test_moves_stay_within_the_resolution(self):
+        original = _moves(PROGRAM.splitlines())
+        compacted = _moves(compact_gcode(PROGRAM).lines)
+        self.assertEqual(len(compacted), len(original))
+        for before, after in zip(original, compacted):
+            self.assertEqual(before.motion, after.motion)
+            self.assertLessEqual(math.dist(before.end, after.end), 0.001)
+            self.assertAlmostEqual(before.length, after.length, delta=0.002)
+            self.assertEqual(before.feed, after.feed)
+
+    def test_relative_rounding_does_not_accumulate(self):
+        lines = ["G21 G91 G1 F100"] + ["X0.0004 Y-0.0004"] * 1000
+        program = compact_lines(lines)
+        state = ModalState()
+        for line in program.lines:
+            state.update(line)
+        self.assertAlmostEqual(state.x, 0.4, places=3)
+        self.assertAlmostEqual(state.y, -0.4, places=3)
+        self.assertLess(len(program), 500)
+
+    def test_unknown_modes_are_not_assumed(self):
+        # No G90/G91 seen yet: values are kept and repeats are sent.
+        self.assertEqual(compact_gcode("G1 X1.23456789\nX1.23456789").lines, ["G1X1.234568", "X1.234568"])
+        # Inch precision until units are known.
+        self.assertEqual(compact_gcode("G90 G0 X1.23456789").lines, ["G90G0X1.23457"])
+
+    def test_non_modal_and_system_lines_pass_through(self):
+        compactor = Compactor()
+        lines = ["G21 G90 G0 X1 Y1", "G53 G0 Z-2", "G0 X1 Y1", "G38.2 Z-10 F50", "G38.2 Z-10", "$H"]
+        self.assertEqual(
+            [compactor.compact_line(line) for line in lines],
+            ["G21G90G0X1Y1", "G53G0Z-2", "X1Y1", "G38.2Z-10F50", "G38.2Z-10", "$H"],
+        )
+
+    def test_units_switch_resends_feed_and_positions(self):
+        program = compact_gcode("G21 G90 G1 X25.4 F100\nG20\nX1 F100")
+        self.assertEqual(program.lines, ["G21G90G1X25.4F100", "G20", "X1F100"])
+
+
+if __name__ == "__main__":
+    unittest.main()
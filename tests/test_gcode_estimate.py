@@ -0,0 +1,87 @@
+import math
+import unittest
+
+from RouterKing.gcode.estimate import MachineLimits, PlannerEstimator, estimate_program
+
+# 3000 mm/min at 200 mm/s^2: 0.25 s (6.25 mm) to accelerate and to stop.
+SINGLE_MOVE = 2.25
+
+
+def _chords(radius, tolerance, start_angle=0.0, sweep=math.pi):
+    """The chords GRBL cuts a counter-clockwise arc into, as G1 lines."""
+    segments = int(abs(0.5 * sweep * radius) / math.sqrt(tolerance * (2.0 * radius - tolerance)))
+    lines = []
+    for step in range(1, segments + 1):
+        angle = start_angle + sweep * step / segments
+        lines.append(f"G1 X{radius * math.cos(angle):.6f} Y{radius * math.sin(angle):.6f}")
+    return lines
+
+
+class TestMachineLimits(unittest.TestCase):
+    def test_from_text_reads_a_settings_dump(self):
+        limits = MachineLimits.from_text("$11=0.020\n$12=0.005\n$110=5000.000\n$111=4000\n$122=50.0\nok\n")
+        self.assertEqual(limits.junction_deviation, 0.02)
+        self.assertEqual(limits.arc_tolerance, 0.005)
+        self.assertEqual(limits.max_rate, (5000.0, 4000.0, 1000.0))
+        self.assertEqual(limits.acceleration, (200.0, 200.0, 50.0))
+
+
+class TestPlannerEstimate(unittest.TestCase):
+    def test_single_move_is_a_trapezoid(self):
+        self.assertAlmostEqual(estimate_program("G1 X100 F3000").total, SINGLE_MOVE)
+
+    def test_collinear_blocks_do_not_slow_down(self):
+        self.assertAlmostEqual(estimate_program("G1 X50 F3000\nG1 X100").total, SINGLE_MOVE)
+
+    def test_reversal_stops_at_the_junction(self):
+        there = estimate_program("G1 X50 F3000").total
+        self.assertAlmostEqual(estimate_program("G1 X50 F3000\nG1 X0").total, 2.0 * there)
+
+    def test_axis_limits_follow_the_move_direction(self):
+        # Z alone: 1000 mm/min and 100 mm/s^2.
+        estimate = estimate_program("G1 Z-10 F3000")
+        self.assertAlmostEqual(estimate.total, 10.0 / (1000.0 / 60.0) + (1000.0 / 60.0) / 100.0)
+
+    def test_short_lookahead_limits_speed_on_dense_segments(self):
+        program = "G1 F3000\n" + "\n".join(f"G1 X{index * 0.1:.1f}" for index in range(1, 1001))
+        buffered = estimate_program(program).total
+        unbounded = estimate_program(program, lookahead=2000).total
+        self.assertAlmostEqual(unbounded, SINGLE_MOVE)
+        self.assertGreater(buffered, 1.8 * unbounded)
+
+    def test_arcs_match_their_grbl_chords(self):
+        for radius, tolerance in ((10.0, 0.002), (80.0, 0.002), (10.0, 0.01)):
+            arc = f"G0 X{radius} Y0\nG3 X-{radius} Y0 I-{radius} J0 F2000\nG1 X-{2 * radius}"
+            chords = [f"G0 X{radius} Y0", "F2000"] + _chords(radius, tolerance) + [f"G1 X-{2 * radius}"]
+            limits = {12: tolerance}
+            expected = estimate_program("\n".join(chords), limits).total
+            self.assertAlmostEqual(estimate_program(arc, limits).total, expected, delta=0.002 * expected)
+
+    def test_dwell_rapid_and_tool_sections(self):
+        estimate = estimate_program("T1 M6\nG1 X10 F600\nG4 P2\nT2 M6\nG0 X0\nM30")
+        self.assertAlmostEqual(estimate.dwell, 2.0)
+        self.assertAlmostEqual(estimate.total, estimate.rapid + estimate.feed + estimate.dwell)
+        self.assertEqual([(section.name, section.start, section.end) for section in estimate.sections], [
+            ("T1", 0, 3),
+            ("T2", 3, 6),
+        ])
+        self.assertAlmostEqual(sum(section.time for section in estimate.sections), estimate.total)
+
+    def test_elapsed_and_remaining_by_line(self):
+        estimate = estimate_program("G1 X50 F3000\nG1 X0\nG1 X50")
+        leg = estimate.total / 3.0
+        self.assertEqual(estimate.elapsed_at(0), 0.0)
+        self.assertAlmostEqual(estimate.elapsed_at(1), leg)
+        self.assertAlmostEqual(estimate.remaining(2), leg)
+        self.assertEqual(estimate.marks(2), [[0, 0.0], [2, round(2.0 * leg, 3)]])
+
+    def test_estimator_shares_its_modal_state(self):
+        estimator = PlannerEstimator()
+        for line in ("G20 G91", "G1 X1 F100"):
+            estimator.update(line)
+        self.assertAlmostEqual(estimator.state.x, 25.4)
+        self.assertGreater(estimator.finish().total, 60.0 * 25.4 / 2540.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
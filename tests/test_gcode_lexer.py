@@ -0,0 +1,38 @@
+import unittest
+
+from RouterKing.gcode.lexer import lex_line
+
+
+class TestLexLine(unittest.TestCase):
+    def test_words_and_comments(self):
+        self.assertEqual(lex_line("G1 X10.5 Y-2 F800 (cut X99) ; Z5"), (("G", 1.0), ("X", 10.5), ("Y", -2.0), ("F", 800.0)))
+        self.assertEqual(lex_line("(only a comment)"), ())
+        self.assertEqual(lex_line(""), ())
+
+    def test_full_word_set(self):
+        self.assertEqual(
+            lex_line("N120 g2 x1 y0 i.5 j0 m3 s12000 t2*71"),
+            (
+                ("N", 120.0),
+                ("G", 2.0),
+                ("X", 1.0),
+                ("Y", 0.0),
+                ("I", 0.5),
+                ("J", 0.0),
+                ("M", 3.0),
+                ("S", 12000.0),
+                ("T", 2.0),
+            ),
+        )
+
+    def test_spaces_inside_words_and_markers(self):
+        self.assertEqual(lex_line("/G0 X 5 Z +1.5"), (("G", 0.0), ("X", 5.0), ("Z", 1.5)))
+        self.assertEqual(lex_line("%"), ())
+
+    def test_comment_and_checksum_words_are_skipped(self):
+        self.assertEqual(lex_line("g1x1(msg x2);y3"), (("G", 1.0), ("X", 1.0)))
+        self.assertEqual(lex_line("N5 G0 X1*12 Y2"), (("N", 5.0), ("G", 0.0), ("X", 1.0), ("Y", 2.0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import math
+import unittest
+
+from RouterKing.gcode.lod import LodPyramid, pixel_tolerance, simplify_path
+from RouterKing.gcode.parser import GcodePath
+
+
+def _surfacing(rows=200, columns=400, step=0.25, stepover=0.5):
+    """A raster of tiny zig-zag cuts joined by rapids, like a surfacing pass."""
+    path = GcodePath()
+    line = 1
+    for row in range(rows):
+        y = row * stepover
+        x0, y0 = 0.0, y
+        for column in range(1, columns + 1):
+            x1, y1 = column * step, y + (0.05 if column % 2 else 0.0)
+            path.add_segment(x0, y0, x1, y1, line=line)
+            x0, y0 = x1, y1
+            line += 1
+        path.add_segment(x0, y0, 0.0, y + stepover, rapid=True, line=line)
+        line += 1
+    return path
+
+
+class TestSimplifyPath(unittest.TestCase):
+    def test_end_points_stay_within_the_grid_tolerance(self):
+        path = _surfacing(rows=20)
+        grid = 1.0
+        simple = simplify_path(path, grid)
+        self.assertLess(len(simple), len(path) / 2)
+        snapped = {
+            (round(x / grid), round(y / grid)) for x0, y0, x1, y1, _ in path.segments for x, y in ((x0, y0), (x1, y1))
+        }
+        for x0, y0, x1, y1, _ in simple.segments:
+            for x, y in ((x0, y0), (x1, y1)):
+                self.assertIn((round(x / grid), round(y / grid)), snapped)
+        self.assertTrue(all(math.hypot(x1 - x0, y1 - y0) > 0 for x0, y0, x1, y1, _ in simple.segments))
+
+    def test_rapids_and_cuts_stay_apart(self):
+        path = GcodePath()
+        path.add_segment(0.0, 0.0, 10.0, 0.0, line=1)
+        path.add_segment(10.0, 0.0, 0.0, 0.0, rapid=True, line=2)
+        path.add_segment(0.0, 0.0, 10.0, 0.01, line=3)
+        simple = simplify_path(path, 1.0)
+        self.assertEqual(
+            simple.segments,
+            [(0.0, 0.0, 10.0, 0.0, False), (0.0, 0.0, 10.0, 0.0, True)],
+        )
+        self.assertEqual([simple.source_line(index) for index in range(len(simple))], [1, 2])
+
+
+class TestLodPyramid(unittest.TestCase):
+    def test_levels_shrink_with_the_view_scale(self):
+        path = _surfacing()
+        lod = LodPyramid(path)
+        self.assertIs(lod.level_for(lod.finest / 2.0).path, path)
+        sizes = []
+        for pixels_per_mm in (16.0, 4.0, 1.0, 0.25):
+            level = lod.level_for(pixel_tolerance(pixels_per_mm))
+            self.assertLessEqual(level.tolerance, 1.0 / pixels_per_mm)
+            sizes.append(len(level))
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        # Zoomed out, the level is bounded by the grid cells it covers, not
+        # by the 80k segments of the program.
+        coarse = lod.level_for(pixel_tolerance(0.25))
+        cells = (100.0 / coarse.tolerance + 1) * (100.0 / coarse.tolerance + 1)
+        self.assertLess(len(coarse), 4 * cells)
+
+    def test_levels_are_cached_and_culled(self):
+        lod = LodPyramid(_surfacing(rows=40))
+        level = lod.level_for(0.5)
+        self.assertIs(lod.level_for(0.5), level)
+        visible = level.visible(0.0, 0.0, 10.0, 5.0)
+        self.assertTrue(0 < len(visible) < len(level))
+        self.assertEqual(len(level.visible(-1e9, -1e9, 1e9, 1e9)), len(level))
+
+    def test_empty_path(self):
+        lod = LodPyramid(GcodePath())
+        self.assertEqual(len(lod.level_for(10.0)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
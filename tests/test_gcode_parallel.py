@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import RouterKing.gcode.parallel as parallel
+from RouterKing.gcode.parallel import (
+    _scan_states,
+    _StateScanner,
+    chunk_offsets,
+    parse_gcode_parallel,
+    parse_program_parallel,
+)
+from RouterKing.gcode.parser import IncrementalParser, _iter_raw_file, parse_gcode_file, parse_program_file
+
+
+def _program():
+    lines = ["(G91 in a comment must not count)", "G21 G90"]
+    for row in range(60):
+        lines += ["G0 Z5", f"G0 X0 Y{row}", "G1 Z-1 F300"]
+        lines += [f"G1 X{col * 2} Y{row + 0.5}" for col in range(1, 20)]
+        lines.append(f"G2 X40 Y{row + 1} R0.5")
+        if row % 7 == 3:
+            # A relative pocket: positions depend on everything before.
+            lines += ["G91", "G1 X1", "Y1", "X-1", "G90"]
+        if row == 30:
+            lines += ["G20", "G0 Z0.2", "G21"]
+        if row == 45:
+            lines += ["G91 G0 Z2", "X3", "X3", "X3"]
+    return "\n".join(lines) + "\n"
+
+
+class TestParallelParse(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "job.nc")
+        with open(self.path, "w") as handle:
+            handle.write(_program())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_chunks_start_at_lines(self):
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        cuts = chunk_offsets(self.path, 9)
+        self.assertEqual(cuts[0], 0)
+        self.assertEqual(cuts[-1], len(data))
+        self.assertEqual(cuts, sorted(set(cuts)))
+        for cut in cuts[1:-1]:
+            self.assertEqual(data[cut - 1 : cut], b"\n")
+
+    def test_boundary_states_match_sequential_scan(self):
+        for count in (2, 7, 31, 200):
+            cuts = chunk_offsets(self.path, count)
+            scanner = _StateScanner()
+            expected = []
+            for start, stop in zip(cuts, cuts[1:]):
+                expected.append(scanner.state())
+                for raw in _iter_raw_file(self.path, start, stop):
+                    scanner.handle_line(raw)
+            self.assertEqual(_scan_states(self.path, cuts, 0.01), expected)
+
+    def test_parallel_result_matches_serial(self):
+        serial = parse_gcode_file(self.path)
+        # The in-process fallback must not be taken.
+        with patch.object(parallel, "parse_gcode_file", side_effect=AssertionError("fell back")):
+            result = parse_gcode_parallel(self.path, workers=2, min_bytes=0)
+        self.assertEqual(result.segments, serial.segments)
+        self.assertEqual(result.bounds(), serial.bounds())
+        self.assertEqual(
+            [result.source_line(index) for index in range(len(result))],
+            [serial.source_line(index) for index in range(len(serial))],
+        )
+
+    def test_parallel_program_matches_serial(self):
+        serial = parse_program_file(self.path)
+        with patch.object(parallel, "parse_program_file", side_effect=AssertionError("fell back")):
+            program = parse_program_parallel(self.path, workers=2, min_bytes=0, checkpoint_interval=100)
+        self.assertEqual(program.path.segments, serial.path.segments)
+        self.assertEqual(program.lines, serial.lines)
+        # Feeds at chunk starts come from the F words before the cut.
+        self.assertEqual(list(program.toolpath), list(serial.toolpath))
+        self.assertEqual(program.toolpath.blocks, serial.toolpath.blocks)
+        self.assertEqual(program.toolpath.first_block, serial.toolpath.first_block)
+        lines = [line for line in _iter_raw_file(self.path)]
+        incremental = IncrementalParser()
+        incremental.seed("\n".join(lines), program)
+        lines[900] = "G91 G1 X5 F123"
+        incremental.update("\n".join(lines))
+        expected = IncrementalParser()
+        expected.update("\n".join(lines))
+        self.assertEqual(incremental.path.segments, expected.path.segments)
+        self.assertEqual(list(incremental.toolpath), list(expected.toolpath))
+
+    def test_small_files_parse_in_process(self):
+        self.assertEqual(parse_gcode_parallel(self.path, workers=4).segments, parse_gcode_file(self.path).segments)
+
+
+if __name__ == "__main__":
+    unittest.main()
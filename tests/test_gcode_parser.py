@@ -1,6 +1,20 @@
+import math
+import os
+import random
+import tempfile
 import unittest
 
-from RouterKing.gcode.parser import iter_gcode_lines, parse_gcode
+from RouterKing.gcode.parser import (
+    GcodePath,
+    IncrementalParser,
+    arc_steps,
+    iter_gcode_file,
+    iter_gcode_lines,
+    parse_gcode,
+    parse_gcode_file,
+    parse_program_file,
+)
+from RouterKing.gcode.toolpath import interpret_lines
 
 
 class TestGcodeParser(unittest.TestCase):
@@ -19,5 +33,225 @@ class TestGcodeParser(unittest.TestCase):
         self.assertTrue(len(path.segments) >= 8)
 
 
+def _feeds(path):
+    return [segment for segment in path.segments if not segment[4]]
+
+
+class TestArcTessellation(unittest.TestCase):
+    def _chord_error(self, path, cx, cy, radius):
+        worst = 0.0
+        for x0, y0, x1, y1, _ in _feeds(path):
+            mid = math.hypot((x0 + x1) / 2.0 - cx, (y0 + y1) / 2.0 - cy)
+            worst = max(worst, radius - mid)
+        return worst
+
+    def test_large_arc_stays_within_tolerance(self):
+        path = parse_gcode("G0 X100 Y0\nG3 X-100 Y0 I-100 J0", arc_tolerance=0.01)
+        self.assertLessEqual(self._chord_error(path, 0.0, 0.0, 100.0), 0.01 + 1e-9)
+        self.assertEqual(len(_feeds(path)), arc_steps(100.0, math.pi, 0.01))
+        self.assertEqual(path.segments[-1][2:4], (-100.0, 0.0))
+
+    def test_small_arc_uses_few_segments(self):
+        path = parse_gcode("G0 X0.1 Y0\nG2 X-0.1 Y0 R0.1")
+        self.assertLessEqual(len(_feeds(path)), 4)
+        self.assertLessEqual(self._chord_error(path, 0.0, 0.0, 0.1), 0.01 + 1e-9)
+
+    def test_radius_below_tolerance_keeps_quarter_steps(self):
+        self.assertEqual(arc_steps(0.005, 2 * math.pi, 0.01), 4)
+
+    def test_coarser_tolerance_gives_fewer_segments(self):
+        text = "G0 X10 Y0\nG3 X-10 Y0 I-10 J0"
+        self.assertLess(len(parse_gcode(text, arc_tolerance=0.1)), len(parse_gcode(text, arc_tolerance=0.001)))
+
+
+class TestGcodePath(unittest.TestCase):
+    def test_segments_view_and_bounds(self):
+        path = GcodePath()
+        path.add_segment(0.0, 0.0, 10.0, 0.0, rapid=True)
+        path.add_segment(10.0, 0.0, 10.0, 0.0)
+        path.add_segment(10.0, 0.0, 10.0, 5.0)
+        self.assertEqual(len(path), 2)
+        self.assertEqual(path.segments, [(0.0, 0.0, 10.0, 0.0, True), (10.0, 0.0, 10.0, 5.0, False)])
+        self.assertEqual(path.segments[-1], (10.0, 0.0, 10.0, 5.0, False))
+        self.assertEqual(path.segments[1:], [(10.0, 0.0, 10.0, 5.0, False)])
+        self.assertEqual(path.bounds(), (0.0, 0.0, 10.0, 5.0))
+        path.add_segment(10.0, 5.0, -3.0, 7.0)
+        self.assertEqual(path.bounds(), (-3.0, 0.0, 10.0, 7.0))
+        coords, flags = path.as_arrays()
+        flat = [float(value) for value in (coords.ravel() if hasattr(coords, "ravel") else coords)]
+        self.assertEqual(flat[8:], [10.0, 5.0, -3.0, 7.0])
+        self.assertEqual(list(flags), [1, 0, 0])
+        path.add_segment(-3.0, 7.0, 0.0, 0.0)
+        self.assertEqual(len(path.segments), 4)
+
+    def test_segments_keep_their_source_line(self):
+        path = parse_gcode("G21\n(start)\nG0 X1\n\nG1 Y1 F100\nG2 X2 Y0 I0.5 J-0.5\n")
+        lines = _source_lines(path)
+        self.assertEqual(lines[:2], [3, 5])
+        self.assertEqual(set(lines[2:]), {6})
+        other = GcodePath()
+        other.add_segment(0.0, 0.0, 1.0, 1.0, line=2)
+        path.extend(other, line_offset=10)
+        self.assertEqual(path.source_line(len(path) - 1), 12)
+        path.splice(0, 1, other, line_shift=-1)
+        self.assertEqual(_source_lines(path)[:2], [2, 4])
+
+    def test_empty_path(self):
+        path = GcodePath()
+        self.assertFalse(path.segments)
+        self.assertIsNone(path.bounds())
+
+
+def _source_lines(path):
+    return [path.source_line(index) for index in range(len(path))]
+
+
+def _program(count):
+    lines = ["G21 G90"]
+    for index in range(count):
+        x = index % 50
+        lines.append(f"G0 Z5\nG0 X{x} Y{index // 50}\nG1 Z-1 F300\nG1 X{x + 0.5} F800\nG2 X{x + 1} Y{index // 50} R0.25")
+    return "\n".join(lines).splitlines()
+
+
+class TestIncrementalParser(unittest.TestCase):
+    def assertMatchesFullParse(self, incremental, lines):
+        expected = parse_gcode("\n".join(lines))
+        self.assertEqual(incremental.path.segments, expected.segments)
+        self.assertEqual(incremental.path.bounds(), expected.bounds())
+        self.assertEqual(_source_lines(incremental.path), _source_lines(expected))
+        moves = interpret_lines(lines)
+        self.assertEqual(list(incremental.toolpath), list(moves))
+        self.assertEqual(incremental.toolpath.blocks, moves.blocks)
+        self.assertEqual(incremental.toolpath.first_block, moves.first_block)
+
+    def test_feed_edit_reparses_one_checkpoint_interval(self):
+        lines = _program(2000)
+        incremental = IncrementalParser(checkpoint_interval=100)
+        incremental.update("\n".join(lines))
+        self.assertEqual(incremental.reparsed, len(lines))
+        lines[7003] = "G1 X3.5 F1200"
+        incremental.update("\n".join(lines))
+        self.assertLessEqual(incremental.reparsed, 100)
+        self.assertMatchesFullParse(incremental, lines)
+        incremental.update("\n".join(lines))
+        self.assertEqual(incremental.reparsed, 0)
+
+    def test_modal_change_reparses_until_state_converges(self):
+        lines = _program(400)
+        incremental = IncrementalParser(checkpoint_interval=50)
+        incremental.update("\n".join(lines))
+        # Switching to relative mode changes every position after the edit.
+        lines.insert(10, "G91")
+        incremental.update("\n".join(lines))
+        self.assertEqual(incremental.reparsed, len(lines))
+        self.assertMatchesFullParse(incremental, lines)
+
+    def test_seeded_parser_edits_like_a_parsed_one(self):
+        lines = _program(500)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "job.nc")
+            with open(source, "w") as handle:
+                handle.write("\n".join(lines) + "\n")
+            program = parse_program_file(source, checkpoint_interval=100)
+        incremental = IncrementalParser(checkpoint_interval=100)
+        self.assertIs(incremental.seed("\n".join(lines), program), program.path)
+        self.assertEqual(incremental.reparsed, 0)
+        self.assertMatchesFullParse(incremental, lines)
+        incremental.update("\n".join(lines))
+        self.assertEqual(incremental.reparsed, 0)
+        lines[1203] = "G1 X3.5 F1200"
+        incremental.update("\n".join(lines))
+        self.assertLessEqual(incremental.reparsed, 100)
+        self.assertMatchesFullParse(incremental, lines)
+
+    def test_seed_with_other_text_parses_it(self):
+        lines = _program(20)
+        incremental = IncrementalParser()
+        incremental.update("G0 X5")
+        stale = incremental.toolpath
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "job.nc")
+            with open(source, "w") as handle:
+                handle.write("G0 X1\n")
+            program = parse_program_file(source)
+        incremental.seed("\n".join(lines), program)
+        self.assertIsNot(incremental.toolpath, stale)
+        self.assertEqual(incremental.reparsed, len(lines))
+        self.assertMatchesFullParse(incremental, lines)
+
+    def test_removing_the_first_block_finds_the_next_one(self):
+        lines = ["G21"] + [""] * 10 + _program(50)
+        incremental = IncrementalParser(checkpoint_interval=5)
+        incremental.update("\n".join(lines))
+        lines[0] = ""
+        incremental.update("\n".join(lines))
+        self.assertLess(incremental.reparsed, len(lines))
+        self.assertEqual(incremental.toolpath.first_block, 12)
+        self.assertMatchesFullParse(incremental, lines)
+
+    def test_random_edits_match_full_parse(self):
+        rng = random.Random(7)
+        lines = _program(300)
+        incremental = IncrementalParser(checkpoint_interval=37)
+        incremental.update("\n".join(lines))
+        choices = ["G0 X3 Y4", "G1 Y-2 F500", "G91", "G90", "G20", "G21", "G3 X1 Y1 I0.5 J0.5", "", "(note)"]
+        for _ in range(40):
+            start = rng.randrange(len(lines) + 1)
+            stop = min(len(lines), start + rng.randrange(0, 20))
+            lines[start:stop] = [rng.choice(choices) for _ in range(rng.randrange(0, 20))]
+            incremental.update("\n".join(lines))
+            self.assertMatchesFullParse(incremental, lines)
+
+
+class TestParseGcodeFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, data):
+        path = os.path.join(self.tmpdir.name, "job.nc")
+        with open(path, "wb") as handle:
+            handle.write(data)
+        return path
+
+    def test_matches_parse_gcode(self):
+        text = (
+            "(header)\r\nG21 G90\r\nG0 X0 Y0 ; rapid\r\n\r\nG1 X10 Y0 F500\r\n"
+            "G2 X20 Y0 R5\r\nG3 X10 Y0 I-5 J0\rG91 G1 Y5\nG20 X1"
+        )
+        path = self._write(text.encode("utf-8"))
+        self.assertEqual(list(iter_gcode_file(path)), list(iter_gcode_lines(text)))
+        expected = parse_gcode(text)
+        parsed = parse_gcode_file(path)
+        self.assertEqual(parsed.segments, expected.segments)
+        self.assertEqual(parsed.bounds(), expected.bounds())
+
+    def test_crlf_lines_are_numbered_like_splitlines(self):
+        text = "G21\r\nG0 X1\r\n\r\nG1 X2 F300\r\rG1 X3\r\n"
+        path = self._write(text.encode("utf-8"))
+        expected = parse_gcode(text)
+        parsed = parse_gcode_file(path)
+        self.assertEqual(_source_lines(parsed), _source_lines(expected))
+        self.assertEqual(parse_program_file(path).lines, len(text.splitlines()))
+
+    def test_program_matches_path_and_toolpath(self):
+        text = "\n".join(_program(300))
+        path = self._write(text.encode("utf-8"))
+        program = parse_program_file(path, checkpoint_interval=250)
+        self.assertEqual(program.path.segments, parse_gcode(text).segments)
+        moves = interpret_lines(text.splitlines())
+        self.assertEqual(list(program.toolpath), list(moves))
+        self.assertEqual(program.toolpath.blocks, moves.blocks)
+        self.assertEqual([item.line for item in program.checkpoints], list(range(0, program.lines, 250)))
+
+    def test_empty_file(self):
+        path = self._write(b"")
+        self.assertEqual(parse_gcode_file(path).segments, [])
+        self.assertIsNone(parse_gcode_file(path).bounds())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,66 @@
+import math
+import random
+import unittest
+
+from RouterKing.gcode.parser import GcodePath, parse_gcode
+from RouterKing.gcode.spatial import SegmentIndex
+
+
+def _distance(x, y, segment):
+    x0, y0, x1, y1 = segment[:4]
+    dx = x1 - x0
+    dy = y1 - y0
+    t = min(1.0, max(0.0, ((x - x0) * dx + (y - y0) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(x0 + t * dx - x, y0 + t * dy - y)
+
+
+class TestSegmentIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.path = GcodePath()
+        for line in range(1, 3001):
+            x = rng.uniform(0.0, 200.0)
+            y = rng.uniform(0.0, 100.0)
+            self.path.add_segment(x, y, x + rng.uniform(-4.0, 4.0), y + rng.uniform(-4.0, 4.0), line=line)
+        self.index = SegmentIndex(self.path, node_size=8)
+
+    def test_window_matches_brute_force(self):
+        for box in ((10.0, 10.0, 40.0, 30.0), (150.0, 90.0, 120.0, 60.0), (-50.0, -50.0, -10.0, -10.0)):
+            x0, y0, x1, y1 = min(box[0], box[2]), min(box[1], box[3]), max(box[0], box[2]), max(box[1], box[3])
+            expected = [
+                index
+                for index, (a, b, c, d, _) in enumerate(self.path.segments)
+                if min(a, c) <= x1 and max(a, c) >= x0 and min(b, d) <= y1 and max(b, d) >= y0
+            ]
+            self.assertEqual(list(self.index.window(*box)), expected)
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(5)
+        segments = list(self.path.segments)
+        for _ in range(50):
+            x, y = rng.uniform(-20.0, 220.0), rng.uniform(-20.0, 120.0)
+            index, distance = self.index.nearest(x, y)
+            self.assertAlmostEqual(distance, min(_distance(x, y, segment) for segment in segments))
+            self.assertAlmostEqual(distance, _distance(x, y, segments[index]))
+
+    def test_line_at_respects_max_distance(self):
+        x0, y0, x1, y1, _ = self.path.segment(42)
+        self.assertEqual(self.index.line_at((x0 + x1) / 2.0, (y0 + y1) / 2.0, 1e-6), 43)
+        self.assertIsNone(self.index.line_at(-100.0, -100.0, 1.0))
+
+    def test_parsed_program_maps_to_source_lines(self):
+        path = parse_gcode("G21 G90\nG0 X0 Y0\nG1 X10 F300\n(cut)\nG1 Y10\nG2 X0 Y10 I-5 J0\n")
+        index = SegmentIndex(path)
+        self.assertEqual(index.line_at(5.0, 0.1, 0.5), 3)
+        self.assertEqual(index.line_at(10.1, 5.0, 0.5), 5)
+        # Clockwise from (10, 10) to (0, 10) dips through (5, 5).
+        self.assertEqual(index.line_at(5.0, 5.0, 0.1), 6)
+
+    def test_empty_path(self):
+        index = SegmentIndex(GcodePath())
+        self.assertEqual(list(index.window(0.0, 0.0, 1.0, 1.0)), [])
+        self.assertIsNone(index.nearest(0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
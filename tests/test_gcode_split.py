@@ -0,0 +1,75 @@
+import unittest
+
+from RouterKing.cam.simple_engine import SimpleJobSettings, generate_gcode_from_paths
+from RouterKing.gcode.modal import ModalState
+from RouterKing.gcode.parser import iter_gcode_lines
+from RouterKing.gcode.split import split_program
+
+
+def _squares(count, size=10.0):
+    return [
+        [(x * 20.0, 0.0), (x * 20.0 + size, 0.0), (x * 20.0 + size, size), (x * 20.0, size), (x * 20.0, 0.0)]
+        for x in range(count)
+    ]
+
+
+def _replay(lines, state=None):
+    state = state or ModalState()
+    cuts = []
+    for line in lines:
+        move = state.update(line)
+        if move is not None and move.motion == "G1":
+            cuts.append((move.start, move.end))
+    return state, cuts
+
+
+class TestSplitProgram(unittest.TestCase):
+    def setUp(self):
+        settings = SimpleJobSettings(spindle_speed=12000, pass_depth=0.5, cut_z=-1.0)
+        self.program = generate_gcode_from_paths(_squares(6), settings)
+
+    def test_parts_cover_the_program_and_are_balanced(self):
+        jobs = split_program(self.program, 3)
+        self.assertEqual(len(jobs), 3)
+        lines = list(iter_gcode_lines(self.program))
+        self.assertEqual([job.start for job in jobs], [0, jobs[0].end, jobs[1].end])
+        self.assertEqual(jobs[-1].end, len(lines))
+        times = [job.estimated_time for job in jobs]
+        self.assertLess(max(times) - min(times), 0.25 * max(times))
+
+    def test_each_part_cuts_the_same_moves_as_the_original(self):
+        jobs = split_program(self.program, 3)
+        _, expected = _replay(iter_gcode_lines(self.program))
+        cuts = []
+        for job in jobs:
+            # Every part runs on a freshly reset machine.
+            _, part_cuts = _replay(job.lines)
+            cuts.extend(part_cuts)
+        self.assertEqual([cut for cut in cuts if cut[0] != cut[1]], [cut for cut in expected if cut[0] != cut[1]])
+
+    def test_preamble_restores_modal_state_and_postamble_stops_spindle(self):
+        jobs = split_program(self.program, 2)
+        second = jobs[1].lines
+        self.assertEqual(second[:2], ["G21 G90 G17 G94 G54", "G0 Z5"])
+        self.assertIn("M3 S12000", second[: second.index("F800")])
+        self.assertEqual(jobs[0].lines[-2:], ["M5", "M2"])
+        self.assertEqual(jobs[1].lines[-2:], ["M5", "M2"])
+
+    def test_relative_inch_program_travels_to_the_boundary(self):
+        program = "G20 G91\nG0 Z0.2\n" + "G0 X1\nG1 Z-0.3 F20\nG1 Y1\nG0 Z0.3\n" * 4
+        jobs = split_program(program, 2)
+        self.assertEqual(len(jobs), 2)
+        state, _ = _replay(jobs[0].lines[:-2])
+        preamble = jobs[1].lines[:3]
+        self.assertEqual(preamble[1], "G0 Z5.08")
+        self.assertEqual(preamble[2], f"G0 X{state.x:g} Y{state.y:g}")
+        self.assertIn("G20 G91 G17 G94 G54", jobs[1].lines)
+
+    def test_program_without_safe_retracts_stays_whole(self):
+        jobs = split_program("G1 Z-1 F100\nG1 X10\nG0 X20\nG1 Y10\n", 3)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].lines, ["G1 Z-1 F100", "G1 X10", "G0 X20", "G1 Y10"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import math
+import unittest
+
+from RouterKing.gcode.modal import ModalState
+from RouterKing.gcode.parser import parse_gcode
+from RouterKing.gcode.toolpath import (
+    ARC_CW,
+    LINEAR,
+    RAPID,
+    Interpreter,
+    ToolMove,
+    Toolpath,
+    interpret_gcode,
+)
+
+
+class TestInterpreter(unittest.TestCase):
+    def test_moves_carry_kind_line_feed_and_z(self):
+        toolpath = interpret_gcode("G21\n(setup)\nG0 X10 Y5 Z3\nG1 Z-1 F300\nG1 X20\nF800\nG1 X0")
+        self.assertEqual(toolpath.blocks, 6)
+        self.assertEqual(
+            list(toolpath),
+            [
+                ToolMove(RAPID, 3, (0.0, 0.0, 0.0), (10.0, 5.0, 3.0), 0.0),
+                ToolMove(LINEAR, 4, (10.0, 5.0, 3.0), (10.0, 5.0, -1.0), 300.0),
+                ToolMove(LINEAR, 5, (10.0, 5.0, -1.0), (20.0, 5.0, -1.0), 300.0),
+                ToolMove(LINEAR, 7, (20.0, 5.0, -1.0), (0.0, 5.0, -1.0), 800.0),
+            ],
+        )
+
+    def test_units_and_relative_mode(self):
+        toolpath = interpret_gcode("G20 G91\nG1 X1 Y-1\nG1 X1")
+        self.assertEqual([move.end for move in toolpath], [(25.4, -25.4, 0.0), (50.8, -25.4, 0.0)])
+
+    def test_arcs_resolve_their_center(self):
+        toolpath = interpret_gcode("G0 X10\nG2 X-10 I-10 J0\nG3 X10 R-10")
+        cw, ccw = toolpath.move(1), toolpath.move(2)
+        self.assertEqual(cw.kind, ARC_CW)
+        self.assertEqual(cw.center, (0.0, 0.0))
+        self.assertEqual(cw.radius, 10.0)
+        self.assertAlmostEqual(cw.delta, -math.pi)
+        self.assertAlmostEqual(ccw.center[0], 0.0)
+        self.assertAlmostEqual(ccw.delta, math.pi)
+
+    def test_non_modal_offset_and_plane_codes_match_modal_state(self):
+        lines = [
+            "G21 G90 G17",
+            "G0 X10 Y10 Z5",
+            "G53 G0 Z-5",
+            "G28 X0 Y0",
+            "G10 L20 P1 X0",
+            "G92 X0 Y0",
+            "G1 X5 F300",
+            "G4 P1",
+            "G18 G2 X15 Z5 I5 K0",
+            "G19 G3 Y10 Z0 J5 K0",
+            "G17 G91 G1 X1",
+            "G80 X50",
+            "G38.2 Z-10 F50",
+            "M30",
+            "X2",
+        ]
+        state = ModalState()
+        expected = []
+        for number, line in enumerate(lines, 1):
+            move = state.update(line)
+            if move is not None and move.motion != "G4" and move.start != move.end:
+                expected.append((number, move.start, move.end))
+        toolpath = interpret_gcode("\n".join(lines))
+        self.assertEqual([(move.line, move.start, move.end) for move in toolpath], expected)
+        xz, yz = toolpath.move(2), toolpath.move(3)
+        self.assertEqual((xz.plane, xz.center, xz.radius), (18, (5.0, 10.0), 5.0))
+        self.assertEqual((yz.plane, yz.center), (19, (5.0, 5.0)))
+        self.assertEqual(toolpath.move(5).kind, LINEAR)
+
+    def test_full_circles_move(self):
+        toolpath = interpret_gcode("G0 X10\nG2 X10 I-10\nG2 I-10")
+        self.assertEqual(len(toolpath), 2)
+        self.assertAlmostEqual(toolpath.move(1).delta, -2 * math.pi)
+
+    def test_state_only_interpreter_skips_arc_centers(self):
+        interpreter = Interpreter()
+        interpreter.resolve_arcs = False
+        interpreter.step("G0 X10")
+        move = interpreter.step("G2 X-10 I-10 J0")
+        self.assertIsNone(move.center)
+        self.assertEqual(move.radius, 10.0)
+
+
+class TestToolpath(unittest.TestCase):
+    def test_splice_and_extend_shift_source_lines(self):
+        base = interpret_gcode("G1 X1 F100\nG1 X2\nG1 X3")
+        insert = interpret_gcode("G1 Y1\nG1 Y2")
+        base.splice(1, 2, insert, line_shift=1)
+        self.assertEqual([move.line for move in base], [1, 1, 2, 4])
+        combined = Toolpath()
+        combined.extend(insert)
+        combined.extend(insert, line_offset=2)
+        self.assertEqual([move.line for move in combined], [1, 2, 3, 4])
+        self.assertEqual(combined.blocks, 4)
+
+    def test_preview_parse_records_the_same_moves(self):
+        text = "G21 G90\nG0 Z5\nG0 X5 Y5\nG1 Z-1 F200\nG3 X10 Y10 R5\nG1 X0 Y0"
+        toolpath = Toolpath()
+        path = parse_gcode(text, toolpath=toolpath)
+        self.assertEqual(list(toolpath), list(interpret_gcode(text)))
+        self.assertEqual(toolpath.blocks, 6)
+        self.assertEqual({path.source_line(index) for index in range(len(path))}, {3, 5, 6})
+
+    def test_side_plane_arcs_are_drawn_as_their_xy_projection(self):
+        # A half circle in XZ from X0 to X10: X runs one way, Y stays put.
+        path = parse_gcode("G18 G2 X10 Z0 I5 K0")
+        xs = [segment[2] for segment in path.segments]
+        self.assertGreater(len(xs), 2)
+        self.assertEqual(xs, sorted(xs))
+        self.assertEqual(path.bounds(), (0.0, 0.0, 10.0, 0.0))
+        # In YZ with a rising X the projection is a line from X0 to X4.
+        path = parse_gcode("G19 G3 Y10 Z0 X4 J5 K0")
+        self.assertAlmostEqual(path.bounds()[2], 4.0)
+        self.assertAlmostEqual(path.bounds()[3], 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import math
+import unittest
+
+from RouterKing.grbl.autolevel import GridProber, HeightMap, autolevel_lines
+from RouterKing.grbl.sender import GrblSender
+
+
+def tilted(x, y):
+    return 0.01 * x + 0.02 * y + 0.001 * x * y
+
+
+class TestHeightMap(unittest.TestCase):
+    def test_bilinear_surface_is_exact(self):
+        xs = [0.0, 10.0, 25.0]
+        ys = [0.0, 20.0]
+        heights = [[tilted(x, y) for x in xs] for y in ys]
+        height_map = HeightMap(xs, ys, heights)
+        for x, y in [(0, 0), (5, 5), (17.5, 12.0), (25, 20)]:
+            self.assertAlmostEqual(height_map.z_at(x, y), tilted(x, y))
+        points = [(3.0, 4.0), (12.0, 19.0), (30.0, -5.0)]
+        batch = height_map.offsets([p[0] for p in points], [p[1] for p in points])
+        for (x, y), value in zip(points, batch):
+            self.assertAlmostEqual(value, height_map.z_at(x, y))
+        # Outside points clamp to the nearest edge.
+        self.assertAlmostEqual(height_map.z_at(30.0, -5.0), tilted(25.0, 0.0))
+
+    def test_round_trip_dict(self):
+        height_map = HeightMap([0, 1], [0, 1], [[0, 0.1], [0.2, 0.3]])
+        copy = HeightMap.from_dict(height_map.to_dict())
+        self.assertAlmostEqual(copy.z_at(0.5, 0.5), height_map.z_at(0.5, 0.5))
+
+
+class TestGridProber(unittest.TestCase):
+    def _connect(self, surface):
+        sender = GrblSender()
+        sender.connect("sim://")
+        sender._serial.simulator.surface = surface
+        return sender
+
+    def test_probe_grid_builds_relative_map(self):
+        sender = self._connect(lambda x, y: -1.0 + tilted(x, y))
+        try:
+            prober = GridProber(sender, 0.0, 0.0, 20.0, 10.0, cols=3, rows=2, depth=-5.0)
+            height_map = prober.run()
+            self.assertIsNone(prober.error)
+            self.assertEqual(len(prober.probed), 6)
+            self.assertAlmostEqual(height_map.z_at(20.0, 10.0), tilted(20.0, 10.0), places=3)
+            self.assertAlmostEqual(height_map.z_at(0.0, 0.0), 0.0)
+        finally:
+            sender.disconnect()
+
+    def test_refines_where_surface_bends(self):
+        def bump(x, y):
+            return -1.0 + 0.5 * math.exp(-((x - 10.0) ** 2) / 4.0)
+
+        sender = self._connect(bump)
+        try:
+            prober = GridProber(
+                sender, 0.0, 0.0, 20.0, 10.0, cols=3, rows=2, refine_threshold=0.05
+            )
+            height_map = prober.run()
+            self.assertIsNone(prober.error)
+            self.assertGreater(len(height_map.xs), 3)
+            self.assertEqual(len(height_map.ys), 2)
+        finally:
+            sender.disconnect()
+
+    def test_missing_contact_reports_error(self):
+        sender = self._connect(lambda x, y: -20.0)
+        try:
+            prober = GridProber(sender, 0.0, 0.0, 10.0, 10.0, cols=2, rows=2, depth=-5.0)
+            self.assertIsNone(prober.run())
+            self.assertIn("ALARM:5", prober.error)
+        finally:
+            sender.disconnect()
+
+
+class TestAutolevelLines(unittest.TestCase):
+    def setUp(self):
+        self.height_map = HeightMap([0, 100], [0, 100], [[0.5, 0.5], [0.5, 0.5]])
+
+    def test_splits_long_feed_moves(self):
+        lines = list(
+            autolevel_lines(["G90", "G1 X10 Y0 Z-1 F500"], self.height_map, segment_length=5.0)
+        )
+        self.assertEqual(lines, ["G90", "G1 F500 X5 Y0 Z0", "X10 Y0 Z-0.5"])
+
+    def test_rapids_and_passthrough(self):
+        lines = list(
+            autolevel_lines(
+                ["G0 X50 Y50", "G38.2 Z-5 F100", "G53 G0 Z0"],
+                self.height_map,
+                segment_length=5.0,
+            )
+        )
+        self.assertEqual(lines, ["G0 X50 Y50 Z0.5", "G38.2 Z-5 F100", "G53 G0 Z0"])
+
+    def test_relative_moves_emit_deltas(self):
+        lines = list(
+            autolevel_lines(["G91", "G1 X10 F500", "G1 X10"], self.height_map, segment_length=0)
+        )
+        self.assertEqual(lines, ["G91", "G1 F500 X10 Y0 Z0.5", "G1 X10 Y0 Z0"])
+
+    def test_batches_do_not_change_output(self):
+        height_map = HeightMap([0, 10, 20], [0, 10], [[0.0, 0.4, 0.1], [0.2, 0.3, 0.6]])
+        program = ["G90", "G1 X3 Y4 Z-1 F500", "G53 G0 Z0", "G91", "G1 X7 Y2", "G0 Z1", "G1 X-4 Y3 Z-2"] * 5
+        expected = list(autolevel_lines(program, height_map, segment_length=2.0, batch_lines=len(program)))
+        for batch_lines in (1, 3, 7):
+            lines = list(autolevel_lines(program, height_map, segment_length=2.0, batch_lines=batch_lines))
+            self.assertEqual(lines, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import RouterKing.grbl.baudrate as baudrate
+from RouterKing.grbl.clock import VirtualClock
+from RouterKing.grbl.simulator import GrblSimulator, SimulatorTransport
+
+
+class FakeApp:
+    def __init__(self, base_dir):
+        self._base_dir = base_dir
+
+    def getUserAppDataDir(self):
+        return self._base_dir
+
+
+class BaudLimitedLink(SimulatorTransport):
+    """Simulator link that delays writes like a UART at ``baudrate``."""
+
+    def __init__(self, simulator, baudrate, clock=None):
+        super().__init__(simulator, timeout=0.05, clock=clock)
+        self._byte_time = 10.0 / baudrate
+
+    def write(self, data):
+        self.clock.sleep(len(data) * self._byte_time)
+        return super().write(data)
+
+
+class GarbledLink(SimulatorTransport):
+    def read(self, size=1):
+        self.clock.sleep(0.001)
+        return b"\xfe\xfd\xfc"
+
+    def readline(self):
+        self.clock.sleep(0.001)
+        return b"\xfe\xfd\xfc\n"
+
+
+def make_opener(working_rates, clock=None):
+    def opener(port, rate):
+        if rate in working_rates:
+            return BaudLimitedLink(GrblSimulator(build_info="router-a"), rate, clock=clock)
+        return GarbledLink(GrblSimulator(), clock=clock)
+
+    return opener
+
+
+class TestBaudNegotiation(unittest.TestCase):
+    def test_negotiate_picks_fastest_stable_rate(self):
+        clock = VirtualClock()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch.object(baudrate, "App", FakeApp(tmpdir)):
+                result = baudrate.negotiate_baudrate(
+                    "/dev/ttyFAKE",
+                    candidates=(250000, 230400, 115200),
+                    opener=make_opener({230400, 115200}, clock),
+                    test_lines=20,
+                    clock=clock,
+                )
+                self.assertEqual(result.baudrate, 230400)
+                self.assertEqual(result.controller_id, "router-a")
+                self.assertNotIn(250000, result.results)
+                self.assertGreater(result.results[230400], result.results[115200])
+                # Virtual time: the UART model alone sets the rate, so it is exact.
+                self.assertAlmostEqual(result.results[115200], 115200 / 10.0 / len(baudrate._TEST_LINE))
+                self.assertEqual(baudrate.remembered_baudrate("/dev/ttyFAKE"), 230400)
+                baudrate.forget_port("/dev/ttyFAKE")
+                self.assertIsNone(baudrate.remembered_baudrate("/dev/ttyFAKE"))
+
+    def test_probe_port_reports_missing_grbl(self):
+        ok, detail = baudrate.probe_port("/dev/ttyFAKE", 250000, opener=make_opener(set()), wait=0.1)
+        self.assertFalse(ok)
+        self.assertIn("No GRBL signature", detail)
+        ok, _ = baudrate.probe_port("/dev/ttyFAKE", 115200, opener=make_opener({115200}), wait=0.1)
+        self.assertTrue(ok)
+
+    def test_controller_id_falls_back_to_port(self):
+        link = SimulatorTransport(GrblSimulator(), timeout=0.05)
+        self.assertEqual(baudrate.read_controller_id(link, "COM3"), "1.1h.20190825@COM3")
+
+
+if __name__ == "__main__":
+    unittest.main()
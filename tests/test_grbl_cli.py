@@ -0,0 +1,143 @@
+import contextlib
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from RouterKing.grbl import cli
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, text):
+        path = os.path.join(self.tmpdir, "job.nc")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        return path
+
+    def _run(self, *argv):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = cli.main(list(argv))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_stream_prints_json_summary(self):
+        path = self._write("G21 G90\nG1 X10 F600 (cut)\n\nG0 X0\n")
+        code, stdout, stderr = self._run("stream", path, "--port", "sim://", "--json")
+        self.assertEqual(code, cli.EXIT_OK)
+        summary = json.loads(stdout)
+        self.assertEqual(summary["lines"], 3)
+        self.assertEqual(summary["acked"], 3)
+        self.assertEqual(summary["state"], "Idle")
+        self.assertIn("Sent 3/3 lines", stderr)
+
+    def test_alarm_sets_exit_code(self):
+        path = self._write("$21=1\nG0 X-5\nG0 X1\n")
+        code, _, stderr = self._run("stream", path, "--port", "sim://", "--quiet")
+        self.assertEqual(code, cli.EXIT_ALARM)
+        self.assertIn("ALARM:1", stderr)
+
+    def test_missing_file_and_connect_failure(self):
+        code, _, _ = self._run("stream", os.path.join(self.tmpdir, "none.nc"), "--port", "sim://")
+        self.assertEqual(code, cli.EXIT_FAILURE)
+        code, _, stderr = self._run("stream", self._write("G0 X0\n"), "--port", "tcp://")
+        self.assertEqual(code, cli.EXIT_CONNECT)
+        self.assertIn("Connect failed", stderr)
+
+    def test_bundle_and_resume_from_source_line(self):
+        path = self._write("G21 G90\nG1 X10 F600\n(cut)\nG1 Y10\nG0 X0\n")
+        code, _, stderr = self._run("bundle", path)
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertIn("4 lines", stderr)
+        bundle = os.path.join(self.tmpdir, "job.rkjob")
+        code, stdout, _ = self._run("stream", bundle, "--port", "sim://", "--json", "--quiet")
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertEqual(json.loads(stdout)["acked"], 4)
+        code, stdout, stderr = self._run("stream", path, "--port", "sim://", "--json", "--start-line", "4")
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertIn("Resuming at source line 4", stderr)
+        summary = json.loads(stdout)
+        self.assertEqual(summary["acked"], summary["lines"])
+        self.assertGreater(summary["lines"], 2)
+
+    def test_compact_and_compacted_bundle(self):
+        path = self._write("G21 G90\nG1 X10.00000 F600\n(cut)\nG1 Y10.00000 F600\nG1 X10 Y10\nG0 X0\n")
+        output = os.path.join(self.tmpdir, "job.min.nc")
+        code, _, stderr = self._run("compact", path, "-o", output)
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertIn("4 lines", stderr)
+        with open(output, encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), "G21G90\nG1X10F600\nY10\nG0X0\n")
+        code, _, stderr = self._run("bundle", path, "--compact")
+        self.assertEqual(code, cli.EXIT_OK)
+        bundle = os.path.join(self.tmpdir, "job.rkjob")
+        with cli.JobBundle(bundle) as job:
+            self.assertEqual([job.source_line(index) for index in range(len(job))], [1, 2, 4, 6])
+        code, stdout, _ = self._run("stream", bundle, "--port", "sim://", "--json", "--quiet")
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertEqual(json.loads(stdout)["acked"], 4)
+
+    def test_compact_fits_arcs(self):
+        angles = [step * math.pi / 60 for step in range(1, 61)]
+        chords = "".join(f"G1 X{10 * math.cos(angle):.4f} Y{10 * math.sin(angle):.4f}\n" for angle in angles)
+        path = self._write("G21 G90\nG0 X10 Y0\nG1 Z-1 F300\n" + chords)
+        code, stdout, stderr = self._run("compact", path, "--arcs", "0.01")
+        self.assertEqual(code, cli.EXIT_OK, stderr)
+        self.assertEqual(stdout.splitlines()[-1], "G3X-10Y0I-10")
+
+    def test_split_streams_one_part_per_port(self):
+        body = "".join(f"G0 X{x * 20} Y0\nG1 Z-1 F300\nG1 X{x * 20 + 10} F600\nG0 Z5\n" for x in range(4))
+        path = self._write("G21 G90\nG0 Z5\nM3 S1000\n" + body + "M5\n")
+        code, _, stderr = self._run("split", path, "--port", "sim://", "--port", "sim://")
+        self.assertEqual(code, cli.EXIT_OK, stderr)
+        self.assertIn("part 2", stderr)
+        code, _, stderr = self._run("split", path, "--parts", "2", "--output-dir", self.tmpdir)
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, "job.part2.nc")))
+
+    def test_send_prints_responses(self):
+        code, stdout, _ = self._run("send", "--port", "sim://", "$I", "G0 X1")
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertIn("[VER:1.1h", stdout)
+        self.assertEqual(stdout.count("ok"), 2)
+
+    def test_module_entry_point_imports_only_sender_stack(self):
+        path = self._write("G0 X1\n")
+        result = subprocess.run(
+            [sys.executable, "-m", "RouterKing.grbl", "stream", path, "--port", "sim://", "--quiet"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        probe = (
+            "import sys, RouterKing.grbl.cli; "
+            "print(sorted(m for m in ('FreeCAD', 'PySide2', 'numpy', 'multiprocessing') "
+            "if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
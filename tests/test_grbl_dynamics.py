@@ -0,0 +1,70 @@
+import unittest
+
+from RouterKing.grbl.dynamics import CharacterizeDynamics, move_time, peak_feed
+from RouterKing.grbl.harness import VirtualHarness
+
+
+class TestMoveProfile(unittest.TestCase):
+    def test_trapezoid_and_triangle(self):
+        # 3000 mm/min = 50 mm/s, ramps of 0.25 s covering 6.25 mm each.
+        self.assertAlmostEqual(move_time(100.0, 3000.0, 200.0), 0.25 + 2.0)
+        # Too short to cruise: triangular profile.
+        self.assertAlmostEqual(move_time(5.0, 3000.0, 200.0), 2.0 * (5.0 / 200.0) ** 0.5)
+        self.assertAlmostEqual(peak_feed(5.0, 3000.0, 200.0), (5.0 * 200.0) ** 0.5 * 60.0)
+        self.assertEqual(move_time(0.0, 3000.0, 200.0), 0.0)
+
+
+class TestCharacterizeDynamics(unittest.TestCase):
+    def setUp(self):
+        self.bench = VirtualHarness(
+            settings={21: 1.0, 110: 2000.0, 120: 400.0},
+            stall_feed={"X": 4000.0},
+            stall_accel={"X": 600.0},
+        )
+        self.sender = self.bench.sender
+        self.simulator = self.bench.simulator
+
+    def tearDown(self):
+        self.bench.close()
+
+    def test_finds_stall_and_restores_settings(self):
+        dynamics = CharacterizeDynamics(
+            self.sender,
+            axes=("X",),
+            distance=20.0,
+            feeds={"X": [3000.0, 4500.0]},
+            accels={"X": [400.0, 800.0]},
+            search_feed=1200.0,
+            touch_feed=600.0,
+            backoff=1.0,
+        )
+        proposals = dynamics.run()
+        self.assertIsNone(dynamics.error)
+        self.assertEqual(proposals, {110: 2400, 120: 320})
+        faults = [(level.kind, level.feed, level.accel) for level in dynamics.levels if level.fault]
+        self.assertEqual(faults, [("feed", 4500.0, 400.0), ("accel", 3000.0, 800.0)])
+        passing = [level for level in dynamics.levels if not level.fault]
+        for level in passing:
+            self.assertAlmostEqual(level.drift, 0.0, places=3)
+            self.assertGreater(len(level.samples), 5)
+            self.assertGreater(level.peak_feed, level.feed * 0.75)
+        self.assertEqual(self.simulator.settings[110], 2000.0)
+        self.assertEqual(self.simulator.settings[120], 400.0)
+
+    def test_stops_feed_sweep_when_distance_too_short(self):
+        dynamics = CharacterizeDynamics(
+            self.sender,
+            axes=("X",),
+            distance=2.0,
+            feeds={"X": [6000.0]},
+            search_feed=1200.0,
+            touch_feed=600.0,
+            backoff=1.0,
+        )
+        self.assertEqual(dynamics.run(), {})
+        self.assertEqual(dynamics.levels, [])
+        self.assertTrue(any("too short" in note for note in dynamics.notes))
+
+
+if __name__ == "__main__":
+    unittest.main()
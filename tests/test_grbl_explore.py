@@ -0,0 +1,66 @@
+import unittest
+
+from RouterKing.grbl.explore import ExploreLimits
+from RouterKing.grbl.sender import GrblSender
+
+
+class TestExploreLimits(unittest.TestCase):
+    def setUp(self):
+        self.sender = GrblSender()
+        self.sender.connect("sim://")
+        self.simulator = self.sender._serial.simulator
+        self.simulator.settings.update({21: 1.0, 130: 400.0, 131: 300.0, 132: 80.0})
+
+    def tearDown(self):
+        self.sender.disconnect()
+
+    def test_measures_each_axis(self):
+        explore = ExploreLimits(
+            self.sender,
+            axes=("X", "Y"),
+            directions={"X": 1.0, "Y": 1.0},
+            margin=2.0,
+        )
+        results = explore.run()
+        self.assertIsNone(explore.error)
+        self.assertAlmostEqual(results["X"], 398.0)
+        self.assertAlmostEqual(results["Y"], 298.0)
+        self.assertEqual(self.simulator.position[:2], [0.0, 0.0])
+        jogs = [line for line in self.simulator.received if line.startswith("$J=")]
+        slow = [line for line in jogs if line.endswith("F100")]
+        self.assertEqual(len(slow), 2)
+
+    def test_rehomes_before_each_return_jog(self):
+        explore = ExploreLimits(self.sender, axes=("X", "Y"), directions={"X": 1.0, "Y": 1.0})
+        explore.run()
+        self.assertIsNone(explore.error)
+        self.assertTrue(explore.homing)
+        received = self.simulator.received
+        homes = [index for index, line in enumerate(received) if line == "$H"]
+        self.assertEqual(len(homes), 2)
+        for index in homes:
+            self.assertTrue(received[index + 1].startswith("$J=G53"))
+
+    def test_skips_homing_when_disabled(self):
+        self.simulator.settings[22] = 0.0
+        explore = ExploreLimits(self.sender, axes=("X",), directions={"X": 1.0})
+        explore.run()
+        self.assertIsNone(explore.error)
+        self.assertFalse(explore.homing)
+        self.assertNotIn("$H", self.simulator.received)
+
+    def test_retries_opposite_direction_when_short(self):
+        explore = ExploreLimits(self.sender, axes=("Z",), directions={"Z": -1.0}, margin=1.0)
+        results = explore.run()
+        self.assertIsNone(explore.error)
+        self.assertAlmostEqual(results["Z"], 79.0)
+
+    def test_reports_missing_limit_switch(self):
+        self.simulator.settings[21] = 0.0
+        explore = ExploreLimits(self.sender, axes=("X",), max_travel={"X": 50.0})
+        self.assertIsNone(explore.run())
+        self.assertIn("no limit switch", explore.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
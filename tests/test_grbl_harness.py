@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+
+from RouterKing.grbl.clock import VirtualClock
+from RouterKing.grbl.explore import ExploreLimits
+from RouterKing.grbl.harness import HarnessTimeout, VirtualHarness
+from RouterKing.grbl.procedures import ProcedureError, SenderProcedure
+
+
+class _WaitForever(SenderProcedure):
+    name = "Wait"
+
+    def execute(self):
+        self.wait_until(lambda: False, 60.0, "gave up")
+
+
+class _Nap(SenderProcedure):
+    name = "Nap"
+
+    def execute(self):
+        self.sleep(3600.0)
+
+
+class TestVirtualClock(unittest.TestCase):
+    def test_callbacks_fire_in_order_at_their_due_time(self):
+        clock = VirtualClock()
+        fired = []
+        clock.call_later(2.0, lambda: fired.append(("b", clock.monotonic())))
+        clock.call_later(1.0, lambda: fired.append(("a", clock.monotonic())))
+        cancelled = clock.call_later(1.5, fired.append, "never")
+        cancelled.cancel()
+        clock.advance(1.0)
+        self.assertEqual(fired, [("a", 1.0)])
+        clock.sleep(5.0)
+        self.assertEqual(fired, [("a", 1.0), ("b", 2.0)])
+        self.assertEqual(clock.monotonic(), 6.0)
+
+    def test_wait_returns_early_once_event_is_set(self):
+        clock = VirtualClock()
+        event = threading.Event()
+        clock.call_later(0.5, event.set)
+        self.assertTrue(clock.wait(event, 10.0))
+        self.assertTrue(clock.wait(event, 10.0))
+        self.assertEqual(clock.monotonic(), 10.0)
+
+
+class TestVirtualHarness(unittest.TestCase):
+    def test_hour_long_job_runs_in_virtual_time(self):
+        # Twelve 500 mm moves at 100 mm/min: five minutes each.
+        lines = ["G21 G90", "F100"] + [f"G1 X{500 if index % 2 == 0 else 0}" for index in range(12)]
+        with VirtualHarness() as bench:
+            started = time.perf_counter()
+            elapsed = bench.stream(lines, step=1.0)
+            wall = time.perf_counter() - started
+            self.assertGreater(elapsed, 3600.0)
+            self.assertLess(elapsed, 3600.0 + 60.0)
+            self.assertLess(wall, 10.0)
+            self.assertEqual(bench.simulator.position[0], 0.0)
+            self.assertTrue(bench.is_idle())
+
+    def test_procedure_timeout_elapses_in_virtual_time(self):
+        with VirtualHarness() as bench:
+            procedure = _WaitForever(bench.sender)
+            started = time.perf_counter()
+            bench.run(procedure)
+            self.assertLess(time.perf_counter() - started, 5.0)
+            self.assertIn("gave up", procedure.error)
+            self.assertGreaterEqual(bench.now, 60.0)
+            self.assertLess(bench.now, 62.0)
+
+    def test_call_later_cancels_a_sleeping_procedure(self):
+        with VirtualHarness() as bench:
+            procedure = _Nap(bench.sender)
+            bench.clock.call_later(2.0, procedure.cancel)
+            bench.run(procedure)
+            self.assertIn("cancelled", procedure.error)
+
+    def test_run_until_raises_after_timeout(self):
+        with VirtualHarness() as bench:
+            started = bench.now
+            with self.assertRaises(HarnessTimeout):
+                bench.run_until(lambda: False, 5.0, step=0.5)
+            self.assertAlmostEqual(bench.now - started, 5.0)
+
+    def test_explore_limits_with_timed_motion(self):
+        with VirtualHarness(settings={21: 1.0, 130: 400.0, 131: 300.0, 132: 80.0}) as bench:
+            explore = ExploreLimits(bench.sender, axes=("X",), directions={"X": 1.0}, margin=2.0)
+            results = bench.run(explore)
+            self.assertIsNone(explore.error)
+            self.assertAlmostEqual(results["X"], 398.0, places=1)
+            self.assertAlmostEqual(bench.simulator.position[0], 0.0)
+            # 400 mm at 1200 mm/min alone takes 20 s of machine time.
+            self.assertGreater(bench.now, 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from RouterKing.gcode.bundle import compile_bundle
+import RouterKing.grbl.jobqueue as jobqueue
+from RouterKing.grbl.jobqueue import DONE, FAILED, INTERRUPTED, PENDING, JobQueue, JobQueueRunner
+from RouterKing.grbl.sender import GrblSender
+
+
+class FakeApp:
+    def __init__(self, base_dir):
+        self._base_dir = base_dir
+
+    def getUserAppDataDir(self):
+        return self._base_dir
+
+
+class QueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = self._tmp.name
+        self._patch = patch.object(jobqueue, "App", FakeApp(self.tmpdir))
+        self._patch.start()
+
+    def tearDown(self):
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    def _write_job(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        return path
+
+
+class TestJobQueue(QueueTestCase):
+    def test_queue_persists_and_marks_running_jobs_interrupted(self):
+        queue = JobQueue()
+        first = queue.add(self._write_job("a.nc", "G1 X1\n"), preamble=["$H"])
+        second = queue.add(self._write_job("b.nc", "G1 X2\n"))
+        queue.move(second.id, -1)
+        queue.update(first, status="running")
+
+        loaded = JobQueue.load()
+        self.assertEqual([job.name for job in loaded.jobs], ["b.nc", "a.nc"])
+        self.assertEqual(loaded.jobs[1].status, INTERRUPTED)
+        self.assertEqual(loaded.jobs[1].preamble, ["$H"])
+        self.assertEqual(loaded.next_pending().name, "b.nc")
+        self.assertTrue(loaded.reset(first.id))
+        self.assertEqual(loaded.get(first.id).status, PENDING)
+        self.assertTrue(loaded.remove(second.id))
+        with open(loaded.path, "r", encoding="utf-8") as handle:
+            self.assertEqual(len(json.load(handle)["jobs"]), 1)
+
+    def test_estimates_add_up_for_pending_jobs(self):
+        queue = JobQueue()
+        first = queue.add(self._write_job("a.nc", "G1 X100 F3000\n"))
+        second = queue.add(self._write_job("b.nc", "G1 X100 F3000\n"), preamble=["G0 X-10"])
+        self.assertAlmostEqual(queue.estimate(first), 2.25)
+        self.assertGreater(queue.estimate(second), 2.25)
+        queue.update(second, status=DONE)
+        self.assertAlmostEqual(JobQueue.load().pending_time(), 2.25)
+
+
+class TestJobQueueRunner(QueueTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sender = GrblSender()
+        self.sender.connect("sim://")
+        self.simulator = self.sender._serial.simulator
+
+    def tearDown(self):
+        self.sender.disconnect()
+        super().tearDown()
+
+    def test_runs_jobs_back_to_back_with_pre_and_postamble(self):
+        queue = JobQueue()
+        queue.add(
+            self._write_job("a.nc", "G90\nG1 X10 F600 ; cut\n"),
+            preamble=["$H", "G10 L20 P1 X0 Y0 Z0"],
+            postamble=["M0"],
+        )
+        queue.add(self._write_job("b.nc", "G1 Y5 F600\n"))
+        runner = JobQueueRunner(self.sender, queue)
+        completed = runner.run()
+
+        self.assertIsNone(runner.error)
+        self.assertEqual([job.name for job in completed], ["a.nc", "b.nc"])
+        self.assertEqual(
+            self.simulator.received[-6:],
+            ["$H", "G10 L20 P1 X0 Y0 Z0", "G90", "G1 X10 F600", "M0", "G1 Y5 F600"],
+        )
+        self.assertEqual([job.status for job in JobQueue.load().jobs], [DONE, DONE])
+        with open(jobqueue.get_job_log_path(), "r", encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual([row["name"] for row in rows], ["a.nc", "b.nc"])
+        self.assertEqual(rows[0]["lines"], "5")
+        self.assertTrue(rows[0]["started_at"] and rows[0]["finished_at"])
+
+    def test_failed_job_stops_the_run(self):
+        queue = JobQueue()
+        missing = queue.add(os.path.join(self.tmpdir, "missing.nc"))
+        waiting = queue.add(self._write_job("b.nc", "G1 Y5 F600\n"))
+        runner = JobQueueRunner(self.sender, queue)
+        self.assertIsNone(runner.run())
+        self.assertIn("missing.nc", runner.error)
+        self.assertEqual(queue.get(missing.id).status, FAILED)
+        self.assertEqual(queue.get(waiting.id).status, PENDING)
+
+    def test_bundle_jobs_stream_from_the_map(self):
+        bundle = compile_bundle(self._write_job("a.nc", "G90\nG1 X10 F600\nG1 Y5\n"))
+        queue = JobQueue()
+        queue.add(bundle, preamble=["G21"], postamble=["M5"])
+        runner = JobQueueRunner(self.sender, queue)
+        with patch.object(self.sender, "start_stream", side_effect=AssertionError("bundle was listed")):
+            completed = runner.run()
+        self.assertIsNone(runner.error)
+        self.assertEqual(completed[0].lines, 5)
+        self.assertEqual(self.simulator.received[-5:], ["G21", "G90", "G1 X10 F600", "G1 Y5", "M5"])
+
+    def test_line_filter_only_touches_the_body(self):
+        queue = JobQueue()
+        queue.add(self._write_job("a.nc", "G1 X1 F600\n"), preamble=["G21"])
+        runner = JobQueueRunner(
+            self.sender,
+            queue,
+            line_filter=lambda lines: (f"{line} Z-1" for line in lines),
+        )
+        runner.run()
+        self.assertEqual(self.simulator.received[-2:], ["G21", "G1 X1 F600 Z-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
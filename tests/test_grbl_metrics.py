@@ -0,0 +1,107 @@
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from RouterKing.grbl.clock import VirtualClock
+from RouterKing.grbl.metrics import MetricsServer
+from RouterKing.grbl.sender import GrblSender
+
+
+def _wait_for(predicate, sender, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        sender.poll()
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def _samples(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+class TestMetricsServer(unittest.TestCase):
+    def setUp(self):
+        self.sender = GrblSender()
+        self.sender.connect("sim://")
+        self.server = MetricsServer(self.sender, port=0, labels={"machine": "bench"})
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.sender.disconnect()
+
+    def _scrape(self, path="/metrics"):
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.server.port}{path}", timeout=5) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+            return response.read().decode("utf-8")
+
+    def test_scrape_reports_counters_state_and_progress(self):
+        self.sender.start_stream(["G21", "G1 X5 F600", "G0 X0"])
+        self.assertTrue(_wait_for(lambda: not self.sender.is_streaming(), self.sender))
+        self.sender.request_status()
+        self.assertTrue(_wait_for(lambda: self.sender.get_status() is not None, self.sender))
+
+        values = _samples(self._scrape())
+        self.assertEqual(values['routerking_up{machine="bench"}'], 1)
+        self.assertEqual(values['routerking_machine_state{machine="bench",state="Idle"}'], 1)
+        self.assertEqual(values['routerking_machine_state{machine="bench",state="Alarm"}'], 0)
+        self.assertEqual(values['routerking_lines_sent_total{machine="bench"}'], 3)
+        self.assertEqual(values['routerking_lines_acked_total{machine="bench"}'], 3)
+        self.assertEqual(values['routerking_job_progress_ratio{machine="bench"}'], 1.0)
+        self.assertEqual(values['routerking_machine_position_mm{machine="bench",axis="x"}'], 0.0)
+        self.assertGreater(values['routerking_bytes_sent_total{machine="bench"}'], 20)
+        self.assertIn('routerking_lines_per_second{machine="bench"}', values)
+
+    def test_alarm_is_counted(self):
+        self.sender.send_line("$21=1")
+        self.sender.send_line("G0 X-5")
+        self.assertTrue(_wait_for(lambda: self.sender.get_metrics()["alarms"], self.sender))
+        values = _samples(self.server.render())
+        self.assertEqual(values['routerking_alarms_total{machine="bench"}'], 1)
+        self.assertEqual(values['routerking_last_alarm_code{machine="bench"}'], 1)
+
+    def test_unknown_path_is_404(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(f"http://127.0.0.1:{self.server.port}/nope", timeout=5)
+        self.assertEqual(ctx.exception.code, 404)
+        ctx.exception.close()
+
+    def test_render_never_writes_to_the_link(self):
+        sent = self.sender.get_metrics()["bytes_sent"]
+        for _ in range(3):
+            self._scrape()
+        self.assertEqual(self.sender.get_metrics()["bytes_sent"], sent)
+
+
+class _CountingSender:
+    def __init__(self, clock):
+        self.clock = clock
+        self.acked = 0
+
+    def get_metrics(self):
+        return {"lines_acked": self.acked}
+
+
+class TestMetricsClock(unittest.TestCase):
+    def test_uptime_and_rate_follow_the_sender_clock(self):
+        clock = VirtualClock()
+        sender = _CountingSender(clock)
+        server = MetricsServer(sender)
+        server.render()
+        clock.advance(4.0)
+        sender.acked = 200
+        values = _samples(server.render())
+        self.assertEqual(values["routerking_uptime_seconds"], 4.0)
+        self.assertEqual(values["routerking_lines_per_second"], 50.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
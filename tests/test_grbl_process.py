@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from RouterKing.grbl.process import ProcessSender, SharedRing, SharedSlot, python_interpreter
+
+
+class TestSharedMemory(unittest.TestCase):
+    def test_ring_round_trip_with_wrap(self):
+        ring = SharedRing.create(64)
+        try:
+            for index in range(50):
+                payload = f"line {index}".encode("ascii")
+                self.assertTrue(ring.put(payload))
+                self.assertEqual(ring.get(), payload)
+            self.assertIsNone(ring.get())
+        finally:
+            ring.close()
+
+    def test_ring_reports_full(self):
+        ring = SharedRing.create(16)
+        try:
+            self.assertTrue(ring.put(b"12345678"))
+            self.assertFalse(ring.put(b"12345678"))
+            self.assertEqual(ring.get(), b"12345678")
+            self.assertTrue(ring.put(b"12345678"))
+        finally:
+            ring.close()
+
+    def test_slot_keeps_latest_value(self):
+        slot = SharedSlot.create(128)
+        try:
+            self.assertIsNone(slot.read())
+            slot.write(b"first")
+            slot.write(b"second")
+            self.assertEqual(slot.read(), b"second")
+        finally:
+            slot.close()
+
+
+class TestPythonInterpreter(unittest.TestCase):
+    def test_python_executable_is_used_as_is(self):
+        with patch.object(sys, "executable", "/usr/bin/python3.11"):
+            self.assertEqual(python_interpreter(), "/usr/bin/python3.11")
+
+    def test_host_binary_resolves_bundled_python(self):
+        with tempfile.TemporaryDirectory() as folder:
+            host = os.path.join(folder, "FreeCAD")
+            name = "python.exe" if os.name == "nt" else "python3"
+            bundled = os.path.join(folder, name)
+            for path in (host, bundled):
+                with open(path, "w") as handle:
+                    handle.write("")
+                os.chmod(path, 0o755)
+            with patch.object(sys, "executable", host):
+                self.assertEqual(python_interpreter(), bundled)
+
+    def test_no_interpreter_found(self):
+        with tempfile.TemporaryDirectory() as folder:
+            host = os.path.join(folder, "FreeCAD")
+            with patch.object(sys, "executable", host), patch.object(
+                sys, "exec_prefix", folder
+            ), patch.object(sys, "prefix", folder):
+                self.assertIsNone(python_interpreter())
+
+
+class TestProcessSender(unittest.TestCase):
+    def test_loopback_round_trip(self):
+        sender = ProcessSender()
+        try:
+            sender.connect("loop://")
+            self.assertTrue(sender.is_connected())
+            sender.send_line("G0 X1")
+            received = []
+            deadline = time.time() + 5.0
+            while time.time() < deadline and "G0 X1" not in received:
+                received.extend(sender.poll())
+                time.sleep(0.01)
+            self.assertIn("G0 X1", received)
+        finally:
+            sender.disconnect()
+        self.assertFalse(sender.is_connected())
+        with self.assertRaises(RuntimeError):
+            sender.send_line("G0 X0")
+
+
+if __name__ == "__main__":
+    unittest.main()
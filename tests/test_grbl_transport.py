@@ -0,0 +1,120 @@
+import socket
+import threading
+import time
+import unittest
+
+from RouterKing.grbl.sender import GrblSender
+from RouterKing.grbl.simulator import GrblSimulator
+
+
+class LoopbackGrblServer:
+    """Serve one GrblSimulator over TCP on localhost."""
+
+    def __init__(self):
+        self.simulator = GrblSimulator()
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen(1)
+        self.port = self._listener.getsockname()[1]
+        self._client = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        self._client, _ = self._listener.accept()
+        self._client.settimeout(0.01)
+        while not self._stop.is_set():
+            try:
+                data = self._client.recv(4096)
+                if not data:
+                    break
+                self.simulator.write(data)
+            except socket.timeout:
+                pass
+            except OSError:
+                break
+            pending = self.simulator.read(4096)
+            if pending:
+                self._client.sendall(pending)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        if self._client is not None:
+            self._client.close()
+        self._listener.close()
+
+
+def _wait_for(predicate, sender, timeout=5.0):
+    lines = []
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        lines.extend(sender.poll())
+        if predicate(lines):
+            return lines
+        time.sleep(0.005)
+    return lines
+
+
+class TestSocketTransport(unittest.TestCase):
+    def test_streams_over_tcp_with_window(self):
+        server = LoopbackGrblServer()
+        sender = GrblSender()
+        try:
+            sender.connect(f"tcp://127.0.0.1:{server.port}")
+            self.assertEqual(
+                sender._serial._sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY),
+                1,
+            )
+            lines = [f"G1 X{index} F1000" for index in range(40)]
+            sender.start_stream(lines)
+            self.assertGreater(sender.get_progress()["sent"], 1)
+            _wait_for(lambda _: not sender.is_streaming(), sender)
+            progress = sender.get_progress()
+            self.assertEqual(progress["acked"], 40)
+            self.assertIsNone(progress["last_error"])
+            self.assertEqual(server.simulator.received[-40:], lines)
+        finally:
+            sender.disconnect()
+            server.close()
+
+    def test_reconnect_after_peer_closes(self):
+        server = LoopbackGrblServer()
+        sender = GrblSender()
+        try:
+            sender.connect(f"tcp://127.0.0.1:{server.port}")
+            _wait_for(lambda lines: any("Grbl" in line for line in lines), sender)
+            server.close()
+            lines = _wait_for(
+                lambda lines: any(line.startswith("[serial error]") for line in lines),
+                sender,
+            )
+            self.assertTrue(any(line.startswith("[serial error]") for line in lines))
+            sender.disconnect()
+            server = LoopbackGrblServer()
+            sender.connect(f"tcp://127.0.0.1:{server.port}")
+            sender.send_line("G0 X5")
+            _wait_for(lambda lines: "ok" in lines, sender)
+            self.assertIn("G0 X5", server.simulator.received)
+        finally:
+            sender.disconnect()
+            server.close()
+
+
+class TestSimulatorTransport(unittest.TestCase):
+    def test_sim_port_streams(self):
+        sender = GrblSender()
+        try:
+            sender.connect("sim://")
+            sender.start_stream(["G21", "G90", "G0 X10 Y5"])
+            _wait_for(lambda _: not sender.is_streaming(), sender)
+            sender.request_status()
+            _wait_for(lambda _: sender.get_status() is not None, sender)
+            self.assertEqual(sender.get_status()["MPos"], "10.000,5.000,0.000")
+        finally:
+            sender.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()